@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_aprobacionexcepcional'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(fields=['updated_at', 'id'], name='accounts_em_updated_148201_idx'),
+        ),
+    ]
@@ -196,6 +196,10 @@ class Empresa(models.Model):
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
         ordering = ['-created_at']
+        indexes = [
+            # Cursor del feed de cambios (reportes/cambios.py)
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.rnc})"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Autorizacion, RegistroAcceso, Discrepancia, SolicitudExtension
+from .models import Autorizacion, AutorizacionVehiculo, RegistroAcceso, OcupacionVehiculo, Discrepancia, SolicitudExtension
 
 @admin.register(Autorizacion)
 class AutorizacionAdmin(admin.ModelAdmin):
@@ -30,6 +30,13 @@ class AutorizacionAdmin(admin.ModelAdmin):
     
     readonly_fields = ['codigo', 'qr_code', 'creada_el', 'actualizada_el']
 
+@admin.register(AutorizacionVehiculo)
+class AutorizacionVehiculoAdmin(admin.ModelAdmin):
+    list_display = ['placa', 'autorizacion', 'conductor_nombre', 'valida_desde', 'valida_hasta']
+    search_fields = ['placa_normalizada', 'autorizacion__codigo', 'conductor_nombre']
+    ordering = ['-valida_hasta']
+    readonly_fields = ['placa_normalizada', 'valida_desde', 'valida_hasta']
+
 @admin.register(RegistroAcceso)
 class RegistroAccesoAdmin(admin.ModelAdmin):
     list_display = ['autorizacion', 'tipo_acceso']
@@ -37,6 +44,14 @@ class RegistroAccesoAdmin(admin.ModelAdmin):
     search_fields = ['autorizacion__codigo']
     ordering = ['-id']
 
+@admin.register(OcupacionVehiculo)
+class OcupacionVehiculoAdmin(admin.ModelAdmin):
+    list_display = ['vehiculo_placa', 'puerto', 'lugar', 'autorizacion', 'ingreso_el']
+    list_filter = ['puerto']
+    search_fields = ['vehiculo_placa', 'autorizacion__codigo', 'conductor_nombre']
+    ordering = ['ingreso_el']
+    readonly_fields = ['registro_ingreso', 'ingreso_el']
+
 @admin.register(Discrepancia)
 class DiscrepanciaAdmin(admin.ModelAdmin):
     list_display = ['codigo', 'tipo_discrepancia', 'estado']
@@ -0,0 +1,6 @@
+"""
+API REST de control de acceso (v1).
+
+Pensada para escáneres de garita y clientes móviles: respuestas JSON
+compactas, autenticación por token y soporte de GET condicional (ETag).
+"""
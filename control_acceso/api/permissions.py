@@ -0,0 +1,16 @@
+from rest_framework.permissions import BasePermission
+
+
+class EsOficialAcceso(BasePermission):
+    """Permite el acceso solo a usuarios activos con rol de oficial de acceso"""
+
+    message = 'Solo los oficiales de acceso pueden usar esta API.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and
+            user.is_authenticated and
+            getattr(user, 'role', None) == 'oficial_acceso' and
+            getattr(user, 'activo', True)
+        )
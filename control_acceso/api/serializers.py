@@ -0,0 +1,67 @@
+from rest_framework import serializers
+
+from ..models import Autorizacion, RegistroAcceso, Discrepancia
+
+
+class AutorizacionCompactaSerializer(serializers.ModelSerializer):
+    """
+    Representación mínima de una autorización para los escáneres de garita.
+    Solo incluye lo necesario para decidir en la puerta.
+    """
+    vigente = serializers.SerializerMethodField()
+    empresa = serializers.CharField(source='empresa_nombre')
+    puerto = serializers.CharField(source='puerto_nombre')
+    placas = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Autorizacion
+        fields = [
+            'codigo', 'uuid', 'estado', 'vigente',
+            'valida_desde', 'valida_hasta',
+            'empresa', 'puerto', 'placas',
+        ]
+
+    def get_vigente(self, obj):
+        return obj.esta_vigente()
+
+    def get_placas(self, obj):
+        return [
+            v.get('placa') for v in (obj.vehiculos_autorizados or [])
+            if isinstance(v, dict) and v.get('placa')
+        ]
+
+
+class RegistroAccesoEntradaSerializer(serializers.Serializer):
+    """Datos enviados por la garita al registrar un acceso"""
+    tipo_acceso = serializers.ChoiceField(
+        choices=RegistroAcceso.TIPO_ACCESO_CHOICES, default='ingreso'
+    )
+    estado = serializers.ChoiceField(
+        choices=[('autorizado', 'Autorizado'), ('denegado', 'Denegado')],
+        default='autorizado'
+    )
+    vehiculo_placa = serializers.CharField(max_length=15, allow_blank=True, default='')
+    conductor_nombre = serializers.CharField(max_length=200, allow_blank=True, default='')
+    observaciones = serializers.CharField(allow_blank=True, default='')
+    motivo_denegacion = serializers.CharField(allow_blank=True, default='')
+
+    def validate(self, data):
+        if data['estado'] == 'denegado' and not data['motivo_denegacion']:
+            raise serializers.ValidationError({
+                'motivo_denegacion': 'Debe indicar el motivo de la denegación.'
+            })
+        return data
+
+
+class DiscrepanciaEntradaSerializer(serializers.Serializer):
+    """Datos enviados por la garita al reportar una discrepancia"""
+    tipo_discrepancia = serializers.ChoiceField(
+        choices=[
+            (valor, nombre) for valor, nombre in Discrepancia.TIPO_DISCREPANCIA_CHOICES
+            if valor not in Discrepancia.TIPOS_AUTOMATICOS
+        ],
+        default='otros'
+    )
+    descripcion = serializers.CharField()
+    vehiculo_placa = serializers.CharField(max_length=15, allow_blank=True, default='')
+    conductor_nombre = serializers.CharField(max_length=200, allow_blank=True, default='')
@@ -0,0 +1,27 @@
+from django.urls import path
+from rest_framework.authtoken.views import obtain_auth_token
+
+from .views import (
+    autorizacion_por_uuid,
+    autorizacion_por_codigo,
+    autorizaciones_por_placa,
+    registrar_acceso,
+    reportar_discrepancia,
+    claves_verificacion,
+    revocaciones,
+    ocupacion,
+)
+
+app_name = 'control_acceso_api'
+
+urlpatterns = [
+    path('auth/token/', obtain_auth_token, name='obtener_token'),
+    path('qr/claves/', claves_verificacion, name='claves_verificacion'),
+    path('qr/revocaciones/', revocaciones, name='revocaciones'),
+    path('autorizaciones/', autorizaciones_por_placa, name='autorizaciones_por_placa'),
+    path('ocupacion/', ocupacion, name='ocupacion'),
+    path('autorizaciones/uuid/<uuid:uuid>/', autorizacion_por_uuid, name='autorizacion_por_uuid'),
+    path('autorizaciones/<str:codigo>/', autorizacion_por_codigo, name='autorizacion_por_codigo'),
+    path('autorizaciones/<str:codigo>/accesos/', registrar_acceso, name='registrar_acceso'),
+    path('autorizaciones/<str:codigo>/discrepancias/', reportar_discrepancia, name='reportar_discrepancia'),
+]
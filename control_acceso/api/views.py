@@ -0,0 +1,214 @@
+import hashlib
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from ..models import Autorizacion, RegistroAcceso, Discrepancia
+from ..qr_firmado import claves_publicas, lista_revocacion
+from .permissions import EsOficialAcceso
+from .serializers import (
+    AutorizacionCompactaSerializer,
+    RegistroAccesoEntradaSerializer,
+    DiscrepanciaEntradaSerializer,
+)
+
+
+def _etag_autorizacion(autorizacion):
+    """
+    ETag de una autorización. Incluye la vigencia calculada porque puede
+    cambiar con el paso del tiempo sin que se modifique el registro.
+    """
+    return quote_etag('{}-{}-{}-{}'.format(
+        autorizacion.pk,
+        autorizacion.estado,
+        int(autorizacion.actualizada_el.timestamp()),
+        int(autorizacion.esta_vigente()),
+    ))
+
+
+def _respuesta_autorizacion(request, autorizacion):
+    """Responde con la autorización compacta o 304 si el cliente ya la tiene"""
+    etag = _etag_autorizacion(autorizacion)
+    no_modificada = get_conditional_response(request, etag=etag)
+    if no_modificada is not None:
+        return no_modificada
+    response = Response(AutorizacionCompactaSerializer(autorizacion).data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def autorizacion_por_uuid(request, uuid):
+    """Consulta de autorización por el UUID contenido en el QR"""
+    autorizacion = get_object_or_404(Autorizacion, uuid=uuid)
+    return _respuesta_autorizacion(request, autorizacion)
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def autorizacion_por_codigo(request, codigo):
+    """Consulta de autorización por su código (AUT-...)"""
+    autorizacion = get_object_or_404(Autorizacion, codigo=codigo)
+    return _respuesta_autorizacion(request, autorizacion)
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def autorizaciones_por_placa(request):
+    """Lista las autorizaciones activas que incluyen la placa indicada"""
+    placa = request.query_params.get('placa', '').strip().upper()
+    if not placa:
+        return Response(
+            {'detail': 'Debe indicar el parámetro placa.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    candidatas = Autorizacion.buscar_por_placa(placa)
+
+    return Response(AutorizacionCompactaSerializer(candidatas, many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([EsOficialAcceso])
+def registrar_acceso(request, codigo):
+    """Registra un ingreso/salida autorizado o denegado desde la garita"""
+    autorizacion = get_object_or_404(Autorizacion, codigo=codigo)
+    entrada = RegistroAccesoEntradaSerializer(data=request.data)
+    entrada.is_valid(raise_exception=True)
+    datos = entrada.validated_data
+
+    # La vigencia solo se exige para entrar: un vehículo que sigue dentro
+    # cuando vence (o se revoca) la autorización debe poder registrar su salida
+    if datos['estado'] == 'autorizado' and datos['tipo_acceso'] == 'ingreso':
+        autorizacion.actualizar_estado()
+        if not autorizacion.esta_vigente():
+            return Response(
+                {'detail': 'Autorización no vigente.', 'estado': autorizacion.estado},
+                status=status.HTTP_409_CONFLICT
+            )
+
+    registro = RegistroAcceso.objects.create(
+        autorizacion=autorizacion,
+        oficial_acceso=request.user,
+        tipo_acceso=datos['tipo_acceso'],
+        vehiculo_placa=datos['vehiculo_placa'],
+        conductor_nombre=datos['conductor_nombre'],
+        estado=datos['estado'],
+        documento_verificado=datos['estado'] == 'autorizado',
+        vehiculo_verificado=datos['estado'] == 'autorizado',
+        conductor_verificado=datos['estado'] == 'autorizado',
+        observaciones=datos['observaciones'],
+        motivo_denegacion=datos['motivo_denegacion'],
+        ip_address=request.META.get('REMOTE_ADDR')
+    )
+
+    return Response(
+        {'id': registro.id, 'estado': registro.estado, 'ts': registro.timestamp},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([EsOficialAcceso])
+def reportar_discrepancia(request, codigo):
+    """Reporta una discrepancia detectada en la garita"""
+    autorizacion = get_object_or_404(Autorizacion, codigo=codigo)
+    entrada = DiscrepanciaEntradaSerializer(data=request.data)
+    entrada.is_valid(raise_exception=True)
+    datos = entrada.validated_data
+
+    with transaction.atomic():
+        registro = RegistroAcceso.objects.create(
+            autorizacion=autorizacion,
+            oficial_acceso=request.user,
+            tipo_acceso='ingreso',
+            vehiculo_placa=datos['vehiculo_placa'],
+            conductor_nombre=datos['conductor_nombre'],
+            estado='pendiente',
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+        discrepancia = Discrepancia.objects.create(
+            registro_acceso=registro,
+            reportada_por=request.user,
+            tipo_discrepancia=datos['tipo_discrepancia'],
+            descripcion=datos['descripcion']
+        )
+
+    return Response(
+        {'codigo': discrepancia.codigo, 'registro': registro.id},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def claves_verificacion(request):
+    """
+    Claves públicas vigentes para verificar tokens QR sin conexión. Las
+    claves privadas con las que se firma nunca salen del servidor.
+    """
+    activa, claves = claves_publicas()
+    return Response({'algoritmo': 'Ed25519', 'activa': activa, 'claves': claves})
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def revocaciones(request):
+    """Lista de revocación que los dispositivos sincronizan periódicamente"""
+    uuids = sorted(lista_revocacion())
+    etag = quote_etag(hashlib.sha256(','.join(uuids).encode('ascii')).hexdigest()[:16])
+    no_modificada = get_conditional_response(request, etag=etag)
+    if no_modificada is not None:
+        return no_modificada
+    response = Response({'ts': int(timezone.now().timestamp()), 'uuids': uuids})
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([EsOficialAcceso])
+def ocupacion(request):
+    """
+    Ocupación actual. Con ``placa`` indica si el vehículo está dentro y
+    desde cuándo; con ``puerto`` o ``lugar`` devuelve el total de esa zona;
+    sin parámetros, el total por puerto.
+    """
+    from ..ocupacion import esta_dentro, ocupacion_lugar, ocupacion_puerto, resumen_ocupacion
+
+    placa = request.query_params.get('placa', '').strip()
+    if placa:
+        dentro = esta_dentro(placa)
+        if dentro is None:
+            return Response({'placa': placa.upper(), 'dentro': False})
+        return Response({
+            'placa': dentro.vehiculo_placa,
+            'dentro': True,
+            'puerto': dentro.puerto.nombre if dentro.puerto else None,
+            'lugar': dentro.lugar.nombre if dentro.lugar else None,
+            'ingreso_el': dentro.ingreso_el,
+            'permanencia_minutos': int(dentro.permanencia().total_seconds() // 60),
+        })
+
+    try:
+        puerto_id = int(request.query_params.get('puerto') or 0)
+        lugar_id = int(request.query_params.get('lugar') or 0)
+    except ValueError:
+        return Response({'detail': 'puerto y lugar deben ser numéricos.'}, status=status.HTTP_400_BAD_REQUEST)
+    if lugar_id:
+        return Response({'lugar': lugar_id, 'total': ocupacion_lugar(lugar_id)})
+    if puerto_id:
+        return Response({'puerto': puerto_id, 'total': ocupacion_puerto(puerto_id)})
+
+    return Response([
+        {'puerto': fila['puerto_id'], 'nombre': fila['puerto__nombre'], 'total': fila['total']}
+        for fila in resumen_ocupacion()
+    ])
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ControlAccesoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'control_acceso'
+
+    def ready(self):
+        """Mantener la ocupación de los puertos con cada registro de acceso"""
+        from django.db.models.signals import post_save
+        from .models import RegistroAcceso
+        from .ocupacion import actualizar_ocupacion_al_guardar
+
+        post_save.connect(
+            actualizar_ocupacion_al_guardar,
+            sender=RegistroAcceso,
+            dispatch_uid='ocupacion_registro_acceso'
+        )
@@ -0,0 +1,96 @@
+"""
+Limitador de peticiones por cliente sobre el cache de Django.
+
+Cada cliente dispone de ``capacidad`` peticiones por ventana de
+``capacidad / recarga`` segundos (en promedio ``recarga`` por segundo); al
+superarlas se responde 429 con Retry-After hasta el fin de la ventana.
+
+El cliente es el usuario autenticado (los dispositivos de garita entran con
+su usuario) o, si es anónimo, su IP real. Detrás de un proxy inverso (Azure
+App Service, Front Door, nginx) REMOTE_ADDR es la del proxy y todos los
+clientes compartirían el límite: con LIMITADOR_PROXIES_CONFIABLES = N la IP
+se toma de X-Forwarded-For, N posiciones desde el final (lo que agregaron
+los proxies propios; lo anterior lo escribe el cliente y no es confiable).
+
+El contador se crea con ``cache.add`` y se incrementa con ``cache.incr``,
+ambos atómicos en Redis/Memcached (y en LocMemCache dentro del proceso), así
+que peticiones simultáneas no se pisan. Con un backend compartido el límite
+aplica a todos los procesos.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+def consumir_ficha(clave, capacidad, recarga):
+    """
+    Cuenta una petición en la ventana actual de ``clave``.
+
+    Returns:
+        tuple: (permitido, segundos_para_reintentar)
+    """
+    ventana = max(int(capacidad / recarga), 1)
+    ahora = time.time()
+    inicio = int(ahora // ventana)
+    clave_ventana = f'{clave}:{inicio}'
+
+    cache.add(clave_ventana, 0, timeout=ventana + 1)
+    try:
+        usadas = cache.incr(clave_ventana)
+    except ValueError:
+        # Venció entre add e incr
+        cache.add(clave_ventana, 1, timeout=ventana + 1)
+        usadas = 1
+
+    if usadas > capacidad:
+        return False, int((inicio + 1) * ventana - ahora) + 1
+    return True, 0
+
+
+def obtener_ip(request):
+    """IP del cliente: REMOTE_ADDR o, tras proxies confiables, X-Forwarded-For"""
+    proxies = getattr(settings, 'LIMITADOR_PROXIES_CONFIABLES', 0)
+    if proxies:
+        reenviadas = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if reenviadas:
+            return reenviadas[-min(proxies, len(reenviadas))]
+    return request.META.get('REMOTE_ADDR', 'desconocida')
+
+
+def identificar_cliente(request):
+    """Usuario autenticado o, si es anónimo, su IP"""
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return f'usuario:{usuario.pk}'
+    return f'ip:{obtener_ip(request)}'
+
+
+def limitar_peticiones(prefijo, capacidad=30, recarga=0.5):
+    """
+    Decorador que limita las peticiones de cada cliente.
+
+    Args:
+        prefijo: Prefijo de la clave de cache (uno por vista)
+        capacidad: Peticiones permitidas por ventana
+        recarga: Peticiones por segundo en promedio (la ventana dura capacidad / recarga)
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            permitido, reintentar = consumir_ficha(
+                f'limitador:{prefijo}:{identificar_cliente(request)}', capacidad, recarga
+            )
+            if not permitido:
+                response = HttpResponse(
+                    'Demasiadas solicitudes. Intente nuevamente en unos segundos.',
+                    status=429,
+                    content_type='text/plain; charset=utf-8'
+                )
+                response['Retry-After'] = str(reintentar)
+                return response
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,53 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from control_acceso.permanencias import detectar, registrar
+
+
+class Command(BaseCommand):
+    help = (
+        'Empareja ingresos y salidas de cada autorización y registra como '
+        'discrepancias las permanencias que exceden valida_hasta y las salidas '
+        'sin ingreso, avisando a los supervisores'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tolerancia',
+            type=int,
+            help='Minutos de gracia después del vencimiento (por defecto PERMANENCIA_TOLERANCIA_MINUTOS)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar los hallazgos sin crear discrepancias ni alertas'
+        )
+
+    def handle(self, *args, **options):
+        ahora = timezone.now()
+        tolerancia = timedelta(minutes=options['tolerancia']) if options['tolerancia'] is not None else None
+        hallazgos, recorridos = detectar(ahora, tolerancia)
+
+        por_tipo = Counter(
+            'dentro' if h.salida is None and h.tipo == 'permanencia_excedida' else h.tipo
+            for h in hallazgos
+        )
+        self.stdout.write(
+            f"[INFO] {recorridos} registros recorridos: {por_tipo['dentro']} vehículos dentro con "
+            f"autorización vencida, {por_tipo['permanencia_excedida']} salidas tardías, "
+            f"{por_tipo['salida_sin_ingreso']} salidas sin ingreso"
+        )
+
+        if options['dry_run']:
+            for h in hallazgos:
+                self.stdout.write(f'  {h.tipo}: autorización #{h.autorizacion_id} placa {h.placa} (registro #{h.registro_id})')
+            self.stdout.write(self.style.WARNING(f'[INFO] (dry-run) {len(hallazgos)} hallazgos, no se guardó nada'))
+            return
+
+        creadas, alertas = registrar(hallazgos, ahora)
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {creadas} discrepancias nuevas, {alertas} alertas enviadas'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from control_acceso.ocupacion import reconstruir, resumen_ocupacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye la ocupación actual de los puertos (vehículos dentro) a partir '
+        'del historial de registros de acceso y reinicia los contadores en caché'
+    )
+
+    def handle(self, *args, **options):
+        total = reconstruir()
+        for fila in resumen_ocupacion():
+            self.stdout.write(f"  {fila['puerto__nombre'] or 'Sin puerto'}: {fila['total']}")
+        self.stdout.write(self.style.SUCCESS(f'[OK] {total} vehículos dentro de los puertos'))
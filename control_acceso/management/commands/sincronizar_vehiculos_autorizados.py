@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from control_acceso.models import Autorizacion, AutorizacionVehiculo
+
+
+class Command(BaseCommand):
+    help = 'Rellena la tabla de vehículos autorizados (búsqueda por placa) desde las autorizaciones existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-activas',
+            action='store_true',
+            help='Procesar solo autorizaciones en estado activa'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Cantidad de autorizaciones por transacción (por defecto 500)'
+        )
+
+    def handle(self, *args, **options):
+        autorizaciones = Autorizacion.objects.order_by('pk')
+        if options['solo_activas']:
+            autorizaciones = autorizaciones.filter(estado='activa')
+
+        lote = options['lote']
+        ids = list(autorizaciones.values_list('pk', flat=True))
+        procesadas = 0
+        filas = 0
+        completadas = 0
+
+        for inicio in range(0, len(ids), lote):
+            bloque = list(
+                Autorizacion.objects.filter(pk__in=ids[inicio:inicio + lote])
+                .prefetch_related('solicitud__vehiculos')
+            )
+            nuevas = []
+            with transaction.atomic():
+                for autorizacion in bloque:
+                    # Autorizaciones antiguas se crearon sin vehiculos_autorizados
+                    if not autorizacion.vehiculos_autorizados and autorizacion.solicitud_id:
+                        autorizacion.vehiculos_autorizados = [
+                            {
+                                'placa': v.placa,
+                                'tipo': v.tipo_vehiculo,
+                                'conductor': v.conductor_nombre,
+                                'licencia': v.conductor_licencia,
+                            }
+                            for v in autorizacion.solicitud.vehiculos.all()
+                        ]
+                        if autorizacion.vehiculos_autorizados:
+                            Autorizacion.objects.filter(pk=autorizacion.pk).update(
+                                vehiculos_autorizados=autorizacion.vehiculos_autorizados,
+                                actualizada_el=timezone.now(),
+                            )
+                            completadas += 1
+
+                    nuevas.extend(
+                        AutorizacionVehiculo.desde_dict(autorizacion, vehiculo)
+                        for vehiculo in autorizacion.vehiculos_autorizados or []
+                        if isinstance(vehiculo, dict) and vehiculo.get('placa')
+                    )
+
+                AutorizacionVehiculo.objects.filter(autorizacion__in=bloque).delete()
+                AutorizacionVehiculo.objects.bulk_create(nuevas, ignore_conflicts=True)
+
+            procesadas += len(bloque)
+            filas += len(nuevas)
+
+        if completadas:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'[INFO] {completadas} autorizaciones sin vehículos se completaron desde su solicitud'
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'[OK] {procesadas} autorizaciones procesadas, {filas} placas indexadas'
+            )
+        )
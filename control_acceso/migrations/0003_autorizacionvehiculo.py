@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('control_acceso', '0002_solicitudextension'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutorizacionVehiculo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('placa', models.CharField(max_length=15, verbose_name='Placa')),
+                ('placa_normalizada', models.CharField(max_length=15, verbose_name='Placa normalizada')),
+                ('tipo_vehiculo', models.CharField(blank=True, max_length=50, verbose_name='Tipo de Vehículo')),
+                ('conductor_nombre', models.CharField(blank=True, max_length=200, verbose_name='Conductor')),
+                ('conductor_licencia', models.CharField(blank=True, max_length=50, verbose_name='Licencia')),
+                ('valida_desde', models.DateTimeField(verbose_name='Válida desde')),
+                ('valida_hasta', models.DateTimeField(verbose_name='Válida hasta')),
+                ('autorizacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehiculos', to='control_acceso.autorizacion', verbose_name='Autorización')),
+            ],
+            options={
+                'verbose_name': 'Vehículo Autorizado',
+                'verbose_name_plural': 'Vehículos Autorizados',
+                'indexes': [models.Index(fields=['placa_normalizada', 'valida_hasta', 'valida_desde'], name='control_acc_placa_n_a32ca2_idx'), models.Index(fields=['valida_desde', 'valida_hasta'], name='control_acc_valida__3c6ec8_idx')],
+                'unique_together': {('autorizacion', 'placa_normalizada')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0016_alter_documentopersonal_fecha_vencimiento_and_more'),
+        ('control_acceso', '0003_autorizacionvehiculo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionVehiculo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vehiculo_placa', models.CharField(max_length=15, unique=True, verbose_name='Placa del Vehículo')),
+                ('conductor_nombre', models.CharField(blank=True, max_length=200, verbose_name='Conductor')),
+                ('ingreso_el', models.DateTimeField(verbose_name='Ingresó el')),
+                ('autorizacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehiculos_dentro', to='control_acceso.autorizacion', verbose_name='Autorización')),
+                ('lugar', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vehiculos_dentro', to='solicitudes.lugarpuerto', verbose_name='Lugar')),
+                ('puerto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vehiculos_dentro', to='solicitudes.puerto', verbose_name='Puerto')),
+                ('registro_ingreso', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacion', to='control_acceso.registroacceso', verbose_name='Registro de Ingreso')),
+            ],
+            options={
+                'verbose_name': 'Vehículo en Puerto',
+                'verbose_name_plural': 'Vehículos en Puerto',
+                'ordering': ['ingreso_el'],
+                'indexes': [models.Index(fields=['puerto', 'lugar'], name='control_acc_puerto__09c606_idx'), models.Index(fields=['ingreso_el'], name='control_acc_ingreso_8b209c_idx')],
+            },
+        ),
+    ]
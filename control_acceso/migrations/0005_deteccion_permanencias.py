@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('control_acceso', '0004_ocupacionvehiculo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='discrepancia',
+            name='reportada_por',
+            field=models.ForeignKey(blank=True, help_text='Vacío si la detectó el sistema', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='discrepancias_reportadas', to=settings.AUTH_USER_MODEL, verbose_name='Reportada por'),
+        ),
+        migrations.AlterField(
+            model_name='discrepancia',
+            name='tipo_discrepancia',
+            field=models.CharField(choices=[('vehiculo_diferente', 'Vehículo Diferente'), ('conductor_diferente', 'Conductor Diferente'), ('documento_vencido', 'Documento Vencido'), ('documento_ilegible', 'Documento Ilegible'), ('autorizacion_vencida', 'Autorización Vencida'), ('datos_incorrectos', 'Datos Incorrectos'), ('permanencia_excedida', 'Permanencia Excedida'), ('salida_sin_ingreso', 'Salida sin Ingreso'), ('otros', 'Otros')], max_length=25, verbose_name='Tipo de Discrepancia'),
+        ),
+        migrations.AddIndex(
+            model_name='discrepancia',
+            index=models.Index(fields=['tipo_discrepancia', 'registro_acceso'], name='control_acc_tipo_di_4c8150_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroacceso',
+            index=models.Index(fields=['autorizacion', 'timestamp'], name='control_acc_autoriz_2d0b57_idx'),
+        ),
+    ]
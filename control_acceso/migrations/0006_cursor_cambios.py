@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:06
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copiar_timestamp(apps, schema_editor):
+    """Los registros existentes cambiaron por última vez cuando se crearon"""
+    RegistroAcceso = apps.get_model('control_acceso', 'RegistroAcceso')
+    RegistroAcceso.objects.update(actualizado_el=F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('control_acceso', '0005_deteccion_permanencias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroacceso',
+            name='actualizado_el',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizado el'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copiar_timestamp, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='autorizacion',
+            index=models.Index(fields=['actualizada_el', 'id'], name='control_acc_actuali_7bda71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroacceso',
+            index=models.Index(fields=['actualizado_el', 'id'], name='control_acc_actuali_17600b_idx'),
+        ),
+    ]
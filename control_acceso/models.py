@@ -99,6 +99,8 @@ class Autorizacion(models.Model):
             models.Index(fields=['codigo']),
             models.Index(fields=['uuid']),
             models.Index(fields=['estado', '-creada_el']),
+            # Cursor del feed de cambios (reportes/cambios.py)
+            models.Index(fields=['actualizada_el', 'id']),
         ]
 
     def save(self, *args, **kwargs):
@@ -125,8 +127,9 @@ class Autorizacion(models.Model):
             )
             self.valida_desde = timezone.make_aware(fecha_inicio)
             self.valida_hasta = timezone.make_aware(fecha_fin)
-            
-            # Obtener vehículos
+        
+        # Obtener vehículos (también cuando los datos de empresa vienen dados)
+        if self.solicitud and not self.vehiculos_autorizados:
             vehiculos = []
             for vehiculo in self.solicitud.vehiculos.all():
                 vehiculos.append({
@@ -139,9 +142,15 @@ class Autorizacion(models.Model):
         
         super().save(*args, **kwargs)
         
-        # Generar QR si no existe
+        # Mantener sincronizada la tabla de placas autorizadas
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'vehiculos_autorizados', 'valida_desde', 'valida_hasta'} & set(update_fields):
+            self.sincronizar_vehiculos()
+        
+        # Generar QR si no existe (tras el commit, en segundo plano)
         if not self.qr_code:
-            self.generar_qr()
+            from notificaciones.services import despachar
+            despachar(self.generar_qr)
 
     def generar_codigo(self):
         """Genera un código único para la autorización"""
@@ -161,9 +170,13 @@ class Autorizacion(models.Model):
             base_url = settings.BASE_URL if hasattr(settings, 'BASE_URL') else 'http://127.0.0.1:8002'
             verificacion_url = f"{base_url}/verificar/{self.uuid}/"
 
-            # El QR solo contiene la URL de verificación
-            # Esto es más seguro y hace el QR más pequeño
+            # Por defecto el QR solo contiene la URL de verificación.
+            # Opcionalmente se agrega un token firmado para que los
+            # dispositivos de garita puedan verificar sin conexión.
             qr_data = verificacion_url
+            if getattr(settings, 'QR_INCLUIR_TOKEN_FIRMADO', False):
+                from .qr_firmado import generar_token
+                qr_data = f"{verificacion_url}?t={generar_token(self)}"
 
             # Crear QR con configuración optimizada para lectura móvil
             qr = qrcode.QRCode(
@@ -191,6 +204,28 @@ class Autorizacion(models.Model):
             # Si no están las dependencias, simplemente no generar QR
             pass
     
+    def sincronizar_vehiculos(self):
+        """Reconstruye las filas de AutorizacionVehiculo a partir de vehiculos_autorizados"""
+        AutorizacionVehiculo.objects.filter(autorizacion=self).delete()
+        AutorizacionVehiculo.objects.bulk_create([
+            AutorizacionVehiculo.desde_dict(self, vehiculo)
+            for vehiculo in (self.vehiculos_autorizados or [])
+            if isinstance(vehiculo, dict) and vehiculo.get('placa')
+        ], ignore_conflicts=True)
+    
+    @classmethod
+    def buscar_por_placa(cls, placa, momento=None):
+        """
+        Autorizaciones activas que cubren la placa y no han expirado en el
+        momento indicado. Una sola consulta sobre el índice de placas.
+        """
+        momento = momento or timezone.now()
+        return cls.objects.filter(
+            vehiculos__placa_normalizada=AutorizacionVehiculo.normalizar(placa),
+            vehiculos__valida_hasta__gte=momento,
+            estado='activa',
+        ).distinct().order_by('valida_desde')
+    
     def esta_vigente(self):
         """Verifica si la autorización está vigente"""
         ahora = timezone.now()
@@ -222,6 +257,59 @@ class Autorizacion(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.empresa_nombre} - {self.get_estado_display()}"
 
+class AutorizacionVehiculo(models.Model):
+    """
+    Vehículo cubierto por una autorización, normalizado para búsqueda por placa.
+    Se reconstruye desde Autorizacion.vehiculos_autorizados al guardar.
+    """
+    autorizacion = models.ForeignKey(
+        Autorizacion,
+        on_delete=models.CASCADE,
+        related_name='vehiculos',
+        verbose_name='Autorización'
+    )
+    placa = models.CharField(max_length=15, verbose_name='Placa')
+    placa_normalizada = models.CharField(max_length=15, verbose_name='Placa normalizada')
+    tipo_vehiculo = models.CharField(max_length=50, blank=True, verbose_name='Tipo de Vehículo')
+    conductor_nombre = models.CharField(max_length=200, blank=True, verbose_name='Conductor')
+    conductor_licencia = models.CharField(max_length=50, blank=True, verbose_name='Licencia')
+    
+    # Copia de la vigencia para filtrar sin unir con la autorización
+    valida_desde = models.DateTimeField(verbose_name='Válida desde')
+    valida_hasta = models.DateTimeField(verbose_name='Válida hasta')
+    
+    class Meta:
+        verbose_name = 'Vehículo Autorizado'
+        verbose_name_plural = 'Vehículos Autorizados'
+        unique_together = ['autorizacion', 'placa_normalizada']
+        indexes = [
+            models.Index(fields=['placa_normalizada', 'valida_hasta', 'valida_desde']),
+            models.Index(fields=['valida_desde', 'valida_hasta']),
+        ]
+    
+    def __str__(self):
+        return f"{self.placa} - {self.autorizacion.codigo}"
+    
+    @staticmethod
+    def normalizar(placa):
+        """Normaliza la placa para búsqueda (mayúsculas, sin espacios ni guiones)"""
+        from .qr_firmado import normalizar_placa
+        return normalizar_placa(placa)
+    
+    @classmethod
+    def desde_dict(cls, autorizacion, vehiculo):
+        """Construye la fila (sin guardar) a partir de una entrada de vehiculos_autorizados"""
+        return cls(
+            autorizacion=autorizacion,
+            placa=vehiculo.get('placa', '')[:15],
+            placa_normalizada=cls.normalizar(vehiculo.get('placa'))[:15],
+            tipo_vehiculo=(vehiculo.get('tipo') or '')[:50],
+            conductor_nombre=(vehiculo.get('conductor') or '')[:200],
+            conductor_licencia=(vehiculo.get('licencia') or '')[:50],
+            valida_desde=autorizacion.valida_desde,
+            valida_hasta=autorizacion.valida_hasta,
+        )
+
 class RegistroAcceso(models.Model):
     """Modelo para registrar los accesos físicos al puerto"""
     TIPO_ACCESO_CHOICES = [
@@ -277,6 +365,7 @@ class RegistroAcceso(models.Model):
     
     # Metadatos
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name='Fecha y Hora')
+    actualizado_el = models.DateTimeField(auto_now=True, verbose_name='Actualizado el')
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name='Dirección IP')
     
     class Meta:
@@ -285,8 +374,11 @@ class RegistroAcceso(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['autorizacion', 'tipo_acceso']),
+            models.Index(fields=['autorizacion', 'timestamp']),
             models.Index(fields=['-timestamp']),
             models.Index(fields=['oficial_acceso', '-timestamp']),
+            # Cursor del feed de cambios (reportes/cambios.py)
+            models.Index(fields=['actualizado_el', 'id']),
         ]
     
     def autorizar(self, observaciones=""):
@@ -304,6 +396,60 @@ class RegistroAcceso(models.Model):
     def __str__(self):
         return f"{self.get_tipo_acceso_display()} - {self.vehiculo_placa} - {self.timestamp.strftime('%d/%m/%Y %H:%M')}"
 
+class OcupacionVehiculo(models.Model):
+    """
+    Vehículos que están dentro de un puerto en este momento. Se mantiene al
+    registrar cada acceso autorizado (ver control_acceso/ocupacion.py) y
+    puede reconstruirse desde RegistroAcceso.
+    """
+    vehiculo_placa = models.CharField(max_length=15, unique=True, verbose_name='Placa del Vehículo')
+    puerto = models.ForeignKey(
+        'solicitudes.Puerto',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='vehiculos_dentro',
+        verbose_name='Puerto'
+    )
+    lugar = models.ForeignKey(
+        'solicitudes.LugarPuerto',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='vehiculos_dentro',
+        verbose_name='Lugar'
+    )
+    autorizacion = models.ForeignKey(
+        Autorizacion,
+        on_delete=models.CASCADE,
+        related_name='vehiculos_dentro',
+        verbose_name='Autorización'
+    )
+    registro_ingreso = models.OneToOneField(
+        RegistroAcceso,
+        on_delete=models.CASCADE,
+        related_name='ocupacion',
+        verbose_name='Registro de Ingreso'
+    )
+    conductor_nombre = models.CharField(max_length=200, blank=True, verbose_name='Conductor')
+    ingreso_el = models.DateTimeField(verbose_name='Ingresó el')
+
+    class Meta:
+        verbose_name = 'Vehículo en Puerto'
+        verbose_name_plural = 'Vehículos en Puerto'
+        ordering = ['ingreso_el']
+        indexes = [
+            models.Index(fields=['puerto', 'lugar']),
+            models.Index(fields=['ingreso_el']),
+        ]
+
+    def permanencia(self):
+        """Tiempo que lleva el vehículo dentro del puerto"""
+        return timezone.now() - self.ingreso_el
+
+    def __str__(self):
+        return f"{self.vehiculo_placa} - {self.puerto or 'Sin puerto'}"
+
 class Discrepancia(models.Model):
     """Modelo para registrar discrepancias en el control de acceso"""
     TIPO_DISCREPANCIA_CHOICES = [
@@ -313,9 +459,14 @@ class Discrepancia(models.Model):
         ('documento_ilegible', 'Documento Ilegible'),
         ('autorizacion_vencida', 'Autorización Vencida'),
         ('datos_incorrectos', 'Datos Incorrectos'),
+        ('permanencia_excedida', 'Permanencia Excedida'),
+        ('salida_sin_ingreso', 'Salida sin Ingreso'),
         ('otros', 'Otros'),
     ]
     
+    # Tipos que solo genera el barrido de permanencias (no se reportan a mano)
+    TIPOS_AUTOMATICOS = ('permanencia_excedida', 'salida_sin_ingreso')
+    
     ESTADO_CHOICES = [
         ('reportada', 'Reportada'),
         ('en_revision', 'En Revisión'),
@@ -349,8 +500,11 @@ class Discrepancia(models.Model):
     reportada_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='discrepancias_reportadas',
-        verbose_name='Reportada por'
+        verbose_name='Reportada por',
+        help_text='Vacío si la detectó el sistema'
     )
     estado = models.CharField(
         max_length=15,
@@ -387,6 +541,9 @@ class Discrepancia(models.Model):
         verbose_name = 'Discrepancia'
         verbose_name_plural = 'Discrepancias'
         ordering = ['-creada_el']
+        indexes = [
+            models.Index(fields=['tipo_discrepancia', 'registro_acceso']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.codigo:
@@ -395,9 +552,14 @@ class Discrepancia(models.Model):
     
     def generar_codigo(self):
         """Genera un código único para la discrepancia"""
+        return self.generar_codigos(1)[0]
+    
+    @classmethod
+    def generar_codigos(cls, cantidad):
+        """Códigos consecutivos para crear ``cantidad`` discrepancias con bulk_create"""
         año = timezone.now().year
-        count = Discrepancia.objects.filter(creada_el__year=año).count() + 1
-        return f"DISC-{año}-{count:03d}"
+        count = cls.objects.filter(creada_el__year=año).count()
+        return [f"DISC-{año}-{count + i:03d}" for i in range(1, cantidad + 1)]
     
     def resolver(self, usuario, resolucion):
         """Resuelve la discrepancia"""
@@ -554,6 +716,11 @@ class SolicitudExtension(models.Model):
         self.autorizacion.valida_hasta = self.fecha_vencimiento_solicitada
         self.autorizacion.save(update_fields=['valida_hasta'])
 
+        # El token firmado del QR incluye la vigencia: regenerarlo
+        if getattr(settings, 'QR_INCLUIR_TOKEN_FIRMADO', False):
+            from notificaciones.services import despachar
+            despachar(self.autorizacion.generar_qr)
+
     def rechazar(self, usuario, motivo_rechazo):
         """Rechaza la solicitud de extensión"""
         from django.utils import timezone
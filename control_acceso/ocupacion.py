@@ -0,0 +1,223 @@
+"""
+Ocupación en tiempo real de los puertos.
+
+OcupacionVehiculo guarda una fila por vehículo que está dentro ahora. Se
+actualiza con cada RegistroAcceso autorizado (señal post_save): un ingreso
+inserta o reemplaza la fila de la placa y una salida la elimina. Así
+"¿está dentro esta placa?" es una búsqueda por índice único y no hace
+falta recorrer el historial de accesos.
+
+Los totales por puerto y por lugar se guardan además como contadores en
+la caché, que se ajustan tras el commit de cada movimiento. Si un contador
+no existe se calcula con un COUNT sobre OcupacionVehiculo y se guarda por
+OCUPACION_CONTADORES_SEGUNDOS. Con un backend compartido (Redis, base de
+datos) todos los workers ven el mismo contador; con LocMemCache cada
+proceso tiene el suyo y solo ve los movimientos que él atendió, así que
+el vencimiento acota cuánto puede desfasarse antes de volver al COUNT.
+``reconstruir()`` rehace la tabla desde RegistroAcceso y descarta los
+contadores.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Trim, Upper
+from django.utils import timezone
+
+from .models import Autorizacion, OcupacionVehiculo, RegistroAcceso
+
+CLAVE_PUERTO = 'ocupacion:puerto:{}'
+CLAVE_LUGAR = 'ocupacion:lugar:{}'
+
+
+def normalizar_placa(placa):
+    return (placa or '').strip().upper()
+
+
+def _claves(puerto_id, lugar_id):
+    claves = []
+    if puerto_id:
+        claves.append(CLAVE_PUERTO.format(puerto_id))
+    if lugar_id:
+        claves.append(CLAVE_LUGAR.format(lugar_id))
+    return claves
+
+
+def _ajustar_contadores(puerto_id, lugar_id, delta):
+    """Suma ``delta`` a los contadores existentes tras el commit"""
+    def ajustar():
+        for clave in _claves(puerto_id, lugar_id):
+            try:
+                cache.incr(clave, delta)
+            except ValueError:
+                pass  # Sin contador: se calculará al consultarlo
+    transaction.on_commit(ajustar)
+
+
+def _hay_posterior(registro, placa):
+    """Si la placa tiene un acceso autorizado posterior al registro"""
+    return RegistroAcceso.objects.filter(estado='autorizado').annotate(
+        placa_normalizada=Upper(Trim('vehiculo_placa'))
+    ).filter(
+        Q(timestamp__gt=registro.timestamp) | Q(timestamp=registro.timestamp, id__gt=registro.id),
+        placa_normalizada=placa,
+    ).exists()
+
+
+def registrar_movimiento(registro, nuevo=True):
+    """
+    Aplica un registro de acceso a la ocupación. Es idempotente: volver a
+    aplicar el mismo registro o uno más antiguo que el último movimiento de
+    la placa no cambia nada.
+
+    Args:
+        nuevo: False si el registro ya existía (se volvió a guardar); entonces
+            se comprueba además que no haya un acceso posterior de la placa,
+            que ya lo habría reemplazado aunque el vehículo no esté dentro
+    """
+    if registro.estado != 'autorizado':
+        return
+    placa = normalizar_placa(registro.vehiculo_placa)
+    if not placa:
+        return
+
+    with transaction.atomic():
+        actual = OcupacionVehiculo.objects.select_for_update().filter(vehiculo_placa=placa).first()
+        if actual is not None and (
+            actual.registro_ingreso_id == registro.id or actual.ingreso_el > registro.timestamp
+        ):
+            return
+        if not nuevo and _hay_posterior(registro, placa):
+            return
+        if actual is not None:
+            actual.delete()
+            _ajustar_contadores(actual.puerto_id, actual.lugar_id, -1)
+
+        if registro.tipo_acceso != 'ingreso':
+            return
+
+        puerto_id, lugar_id = Autorizacion.objects.filter(pk=registro.autorizacion_id).values_list(
+            'solicitud__puerto_destino_id', 'solicitud__lugar_destino_id'
+        ).first() or (None, None)
+        OcupacionVehiculo.objects.create(
+            vehiculo_placa=placa,
+            puerto_id=puerto_id,
+            lugar_id=lugar_id,
+            autorizacion_id=registro.autorizacion_id,
+            registro_ingreso=registro,
+            conductor_nombre=registro.conductor_nombre,
+            ingreso_el=registro.timestamp,
+        )
+        _ajustar_contadores(puerto_id, lugar_id, 1)
+
+
+def actualizar_ocupacion_al_guardar(sender, instance, created, **kwargs):
+    """post_save de RegistroAcceso"""
+    if kwargs.get('raw'):
+        return
+    registrar_movimiento(instance, nuevo=created)
+
+
+# ----------------------------------------------------------------------
+# Consultas
+# ----------------------------------------------------------------------
+
+def esta_dentro(placa):
+    """OcupacionVehiculo de la placa si está dentro de algún puerto, o None"""
+    return OcupacionVehiculo.objects.select_related('puerto', 'lugar').filter(
+        vehiculo_placa=normalizar_placa(placa)
+    ).first()
+
+
+def _contador(clave, **filtro):
+    total = cache.get(clave)
+    if total is None:
+        total = OcupacionVehiculo.objects.filter(**filtro).count()
+        # add: no pisar un contador que otro proceso acaba de crear. Vence
+        # para volver al COUNT si la caché no se comparte entre procesos.
+        cache.add(clave, total, timeout=settings.OCUPACION_CONTADORES_SEGUNDOS)
+    return total
+
+
+def ocupacion_puerto(puerto_id):
+    """Vehículos dentro del puerto ahora"""
+    return _contador(CLAVE_PUERTO.format(puerto_id), puerto_id=puerto_id)
+
+
+def ocupacion_lugar(lugar_id):
+    """Vehículos dentro del lugar (zona) ahora"""
+    return _contador(CLAVE_LUGAR.format(lugar_id), lugar_id=lugar_id)
+
+
+def vehiculos_dentro(puerto_id=None, lugar_id=None):
+    """Vehículos dentro, con su permanencia anotada, del más antiguo al más reciente"""
+    queryset = OcupacionVehiculo.objects.select_related('puerto', 'lugar', 'autorizacion')
+    if puerto_id:
+        queryset = queryset.filter(puerto_id=puerto_id)
+    if lugar_id:
+        queryset = queryset.filter(lugar_id=lugar_id)
+    return queryset.annotate(
+        tiempo_dentro=ExpressionWrapper(Value(timezone.now()) - F('ingreso_el'), output_field=DurationField())
+    ).order_by('ingreso_el')
+
+
+def resumen_ocupacion():
+    """Vehículos dentro por puerto en una consulta: [{puerto_id, puerto__nombre, total}]"""
+    return list(
+        OcupacionVehiculo.objects.values('puerto_id', 'puerto__nombre')
+        .annotate(total=Count('id')).order_by('puerto__nombre')
+    )
+
+
+# ----------------------------------------------------------------------
+# Reconstrucción
+# ----------------------------------------------------------------------
+
+def reconstruir():
+    """
+    Rehace la ocupación desde el historial: un vehículo está dentro si su
+    último acceso autorizado es un ingreso.
+
+    Returns:
+        int: Vehículos dentro
+    """
+    autorizados = RegistroAcceso.objects.filter(estado='autorizado').annotate(
+        placa_normalizada=Upper(Trim('vehiculo_placa'))
+    )
+    ultimo = autorizados.filter(
+        placa_normalizada=OuterRef('placa_normalizada')
+    ).order_by('-timestamp', '-id').values('id')[:1]
+
+    ingresos = autorizados.filter(tipo_acceso='ingreso').annotate(
+        ultimo_id=Subquery(ultimo)
+    ).filter(id=F('ultimo_id')).values_list(
+        'id', 'vehiculo_placa', 'conductor_nombre', 'timestamp', 'autorizacion_id',
+        'autorizacion__solicitud__puerto_destino_id', 'autorizacion__solicitud__lugar_destino_id',
+    )
+
+    dentro = {}
+    for registro_id, placa, conductor, timestamp, autorizacion_id, puerto_id, lugar_id in ingresos:
+        placa = normalizar_placa(placa)
+        if not placa or (placa in dentro and dentro[placa].ingreso_el >= timestamp):
+            continue
+        dentro[placa] = OcupacionVehiculo(
+            vehiculo_placa=placa,
+            puerto_id=puerto_id,
+            lugar_id=lugar_id,
+            autorizacion_id=autorizacion_id,
+            registro_ingreso_id=registro_id,
+            conductor_nombre=conductor,
+            ingreso_el=timestamp,
+        )
+
+    with transaction.atomic():
+        anteriores = set(OcupacionVehiculo.objects.values_list('puerto_id', 'lugar_id').distinct())
+        OcupacionVehiculo.objects.all().delete()
+        OcupacionVehiculo.objects.bulk_create(dentro.values(), batch_size=500)
+
+        claves = set()
+        for puerto_id, lugar_id in anteriores | {(o.puerto_id, o.lugar_id) for o in dentro.values()}:
+            claves.update(_claves(puerto_id, lugar_id))
+        transaction.on_commit(lambda: cache.delete_many(list(claves)))
+
+    return len(dentro)
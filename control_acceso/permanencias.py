@@ -0,0 +1,174 @@
+"""
+Barrido de permanencias.
+
+Recorre los registros de acceso autorizados en una sola consulta ordenada
+por (autorización, fecha) y empareja ingresos y salidas por placa dentro
+de cada autorización, como una mezcla en streaming: en memoria solo se
+guardan los ingresos abiertos de la autorización en curso. Detecta:
+
+- permanencia_excedida: el vehículo salió (o sigue dentro) después de
+  ``valida_hasta`` más la tolerancia configurada.
+- salida_sin_ingreso: una salida sin ingreso previo de esa placa.
+
+Las discrepancias nuevas se crean con un bulk_create y las alertas a los
+supervisores con una sola inserción. Volver a barrer no duplica nada: cada
+hallazgo se identifica por su registro de acceso y tipo.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Discrepancia, RegistroAcceso
+from .qr_firmado import normalizar_placa
+
+Hallazgo = namedtuple(
+    'Hallazgo', 'tipo registro_id autorizacion_id placa momento valida_hasta salida'
+)
+
+
+def detectar(ahora=None, tolerancia=None):
+    """
+    Empareja ingresos y salidas de todo el historial.
+
+    Args:
+        ahora: Momento de referencia para los vehículos que siguen dentro
+        tolerancia: timedelta de gracia (por defecto PERMANENCIA_TOLERANCIA_MINUTOS)
+
+    Returns:
+        tuple: (lista de Hallazgo, registros recorridos)
+    """
+    ahora = ahora or timezone.now()
+    if tolerancia is None:
+        tolerancia = timedelta(minutes=settings.PERMANENCIA_TOLERANCIA_MINUTOS)
+
+    registros = RegistroAcceso.objects.filter(estado='autorizado').order_by(
+        'autorizacion_id', 'timestamp', 'id'
+    ).values_list(
+        'id', 'autorizacion_id', 'tipo_acceso', 'vehiculo_placa', 'timestamp', 'autorizacion__valida_hasta'
+    ).iterator(chunk_size=5000)
+
+    hallazgos = []
+    recorridos = 0
+    for autorizacion_id, grupo in groupby(registros, key=itemgetter(1)):
+        abiertos = {}  # placa -> (registro_id, timestamp)
+        limite = valida_hasta = None
+        for registro_id, _, tipo, placa, timestamp, valida_hasta in grupo:
+            recorridos += 1
+            limite = valida_hasta + tolerancia
+            placa = normalizar_placa(placa)
+            if tipo == 'ingreso':
+                # Un ingreso repetido sin salida reemplaza al anterior
+                abiertos[placa] = (registro_id, timestamp)
+                continue
+
+            ingreso = abiertos.pop(placa, None)
+            if ingreso is None:
+                hallazgos.append(Hallazgo(
+                    'salida_sin_ingreso', registro_id, autorizacion_id, placa, timestamp, valida_hasta, None
+                ))
+            elif timestamp > limite:
+                hallazgos.append(Hallazgo(
+                    'permanencia_excedida', ingreso[0], autorizacion_id, placa, ingreso[1], valida_hasta, timestamp
+                ))
+
+        if limite is not None and ahora > limite:
+            for placa, (registro_id, timestamp) in abiertos.items():
+                hallazgos.append(Hallazgo(
+                    'permanencia_excedida', registro_id, autorizacion_id, placa, timestamp, valida_hasta, None
+                ))
+
+    return hallazgos, recorridos
+
+
+def _fecha(momento):
+    return timezone.localtime(momento).strftime('%d/%m/%Y %H:%M')
+
+
+def _descripcion(hallazgo, ahora):
+    if hallazgo.tipo == 'salida_sin_ingreso':
+        return f"Salida del vehículo {hallazgo.placa} el {_fecha(hallazgo.momento)} sin ingreso registrado."
+    if hallazgo.salida is None:
+        horas = (ahora - hallazgo.valida_hasta).total_seconds() / 3600
+        return (
+            f"El vehículo {hallazgo.placa} ingresó el {_fecha(hallazgo.momento)} y sigue dentro; "
+            f"la autorización venció el {_fecha(hallazgo.valida_hasta)} (hace {horas:.1f} h)."
+        )
+    horas = (hallazgo.salida - hallazgo.valida_hasta).total_seconds() / 3600
+    return (
+        f"El vehículo {hallazgo.placa} ingresó el {_fecha(hallazgo.momento)} y salió el "
+        f"{_fecha(hallazgo.salida)}, {horas:.1f} h después del vencimiento de la autorización."
+    )
+
+
+def _alertas(nuevas):
+    """Alerta crítica por vehículo que sigue dentro y un resumen del resto"""
+    alertas = []
+    resto = 0
+    for hallazgo, discrepancia in nuevas:
+        if hallazgo.tipo == 'permanencia_excedida' and hallazgo.salida is None:
+            alertas.append({
+                'titulo': f"Vehículo {hallazgo.placa} dentro con autorización vencida",
+                'mensaje': discrepancia.descripcion,
+                'tipo_alerta': 'permanencia_excedida',
+                'nivel': 'critico',
+                'clave': f"permanencia:{hallazgo.registro_id}",
+                'datos_adicionales': {
+                    'discrepancia': discrepancia.codigo,
+                    'autorizacion_id': hallazgo.autorizacion_id,
+                    'placa': hallazgo.placa,
+                },
+            })
+        else:
+            resto += 1
+    if resto:
+        alertas.append({
+            'titulo': f"{resto} discrepancias de acceso detectadas",
+            'mensaje': (
+                f"El barrido de permanencias registró {resto} discrepancias nuevas "
+                "(salidas tardías o sin ingreso)."
+            ),
+            'tipo_alerta': 'discrepancias_acumuladas',
+            'nivel': 'advertencia',
+            'datos_adicionales': {'count': resto},
+        })
+    return alertas
+
+
+def registrar(hallazgos, ahora=None):
+    """
+    Crea las discrepancias de los hallazgos que aún no existen y avisa a
+    los supervisores.
+
+    Returns:
+        tuple: (discrepancias creadas, alertas creadas)
+    """
+    from supervisor.models import AlertaSistema
+
+    ahora = ahora or timezone.now()
+    existentes = set(Discrepancia.objects.filter(
+        tipo_discrepancia__in=Discrepancia.TIPOS_AUTOMATICOS
+    ).values_list('registro_acceso_id', 'tipo_discrepancia'))
+    pendientes = [h for h in hallazgos if (h.registro_id, h.tipo) not in existentes]
+    if not pendientes:
+        return 0, 0
+
+    with transaction.atomic():
+        codigos = Discrepancia.generar_codigos(len(pendientes))
+        nuevas = [
+            (hallazgo, Discrepancia(
+                codigo=codigo,
+                registro_acceso_id=hallazgo.registro_id,
+                tipo_discrepancia=hallazgo.tipo,
+                descripcion=_descripcion(hallazgo, ahora),
+            ))
+            for hallazgo, codigo in zip(pendientes, codigos)
+        ]
+        Discrepancia.objects.bulk_create([d for _, d in nuevas], batch_size=500)
+        alertas = AlertaSistema.crear_para_supervisores(_alertas(nuevas))
+
+    return len(nuevas), alertas
@@ -0,0 +1,211 @@
+"""
+Tokens firmados para verificación offline de autorizaciones.
+
+Formato del token (todo en base64url sin relleno):
+
+    NV2.<kid>.<payload>.<firma>
+
+El payload es un JSON compacto con:
+    u: UUID de la autorización (hex)
+    d: válida desde (epoch, segundos)
+    h: válida hasta (epoch, segundos)
+    p: nombre del puerto
+    v: hash corto de la lista de placas autorizadas
+
+La firma es Ed25519 sobre "NV2.<kid>.<payload>" con la clave privada
+identificada por ``kid``. Las claves privadas solo existen en el servidor;
+los dispositivos de garita reciben únicamente las claves públicas
+(``claves_publicas``), que sirven para verificar pero no para emitir
+tokens. El juego de claves rota: se firma siempre con la clave activa
+(``QR_FIRMA_CLAVE_ACTIVA``) y se siguen aceptando las demás claves del juego
+(``QR_FIRMA_CLAVES``) hasta que se retiren.
+
+La parte de verificación (``verificar_token`` y auxiliares) no depende de
+Django, solo de ``cryptography``, para poder copiarse tal cual a los
+dispositivos de garita.
+"""
+import base64
+import hashlib
+import json
+import re
+import time
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+PREFIJO = 'NV2'
+
+
+def normalizar_placa(placa):
+    """Normaliza una placa: mayúsculas, sin espacios ni guiones"""
+    return re.sub(r'[\s\-]', '', (placa or '').upper())
+
+
+def hash_placas(placas):
+    """Hash corto (8 bytes) de la lista de placas, independiente del orden"""
+    normalizadas = sorted({normalizar_placa(p) for p in placas if p})
+    digest = hashlib.sha256(','.join(normalizadas).encode('utf-8')).digest()
+    return _b64e(digest[:8])
+
+
+def _b64e(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b'=').decode('ascii')
+
+
+def _b64d(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+
+def _firmar(mensaje, clave_privada):
+    return _b64e(clave_privada.sign(mensaje.encode('ascii')))
+
+
+def _firma_valida(mensaje, firma, clave_publica):
+    try:
+        Ed25519PublicKey.from_public_bytes(_b64d(clave_publica)).verify(_b64d(firma), mensaje.encode('ascii'))
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Verificación (sin dependencias de Django)
+# ---------------------------------------------------------------------------
+
+def verificar_token(token, claves, revocados=(), placas=None, ahora=None, tolerancia=0):
+    """
+    Verifica un token localmente.
+
+    Args:
+        token: Cadena NV2.<kid>.<payload>.<firma>
+        claves: Dict {kid: clave pública (base64url)} del juego vigente
+        revocados: Colección de UUIDs (hex) revocados
+        placas: Lista de placas presentadas (opcional); si se indica debe
+            coincidir con la lista firmada
+        ahora: Epoch actual (por defecto time.time())
+        tolerancia: Segundos de holgura para desfase de reloj
+
+    Returns:
+        dict: {'valido': bool, 'motivo': str, 'datos': dict | None}
+    """
+    def resultado(valido, motivo, datos=None):
+        return {'valido': valido, 'motivo': motivo, 'datos': datos}
+
+    try:
+        prefijo, kid, payload_b64, firma = token.strip().split('.')
+    except (AttributeError, ValueError):
+        return resultado(False, 'formato_invalido')
+
+    if prefijo != PREFIJO:
+        return resultado(False, 'formato_invalido')
+
+    clave = claves.get(kid)
+    if not clave:
+        return resultado(False, 'clave_desconocida')
+
+    if not _firma_valida(f'{prefijo}.{kid}.{payload_b64}', firma, clave):
+        return resultado(False, 'firma_invalida')
+
+    try:
+        datos = json.loads(_b64d(payload_b64))
+    except ValueError:
+        return resultado(False, 'formato_invalido')
+
+    if datos.get('u') in set(revocados):
+        return resultado(False, 'revocada', datos)
+
+    ahora = time.time() if ahora is None else ahora
+    if ahora + tolerancia < datos.get('d', 0):
+        return resultado(False, 'aun_no_valida', datos)
+    if ahora - tolerancia > datos.get('h', 0):
+        return resultado(False, 'vencida', datos)
+
+    if placas is not None and hash_placas(placas) != datos.get('v'):
+        return resultado(False, 'placas_no_coinciden', datos)
+
+    return resultado(True, 'ok', datos)
+
+
+# ---------------------------------------------------------------------------
+# Generación (servidor)
+# ---------------------------------------------------------------------------
+
+def _clave_privada(valor):
+    """Clave privada Ed25519 desde PEM (PKCS8) o una semilla de 32 bytes en base64url"""
+    if valor.lstrip().startswith('-----BEGIN'):
+        clave = serialization.load_pem_private_key(valor.encode('ascii'), password=None)
+        if not isinstance(clave, Ed25519PrivateKey):
+            raise ValueError('Las claves de QR_FIRMA_CLAVES deben ser Ed25519')
+        return clave
+    return Ed25519PrivateKey.from_private_bytes(_b64d(valor))
+
+
+def obtener_claves():
+    """
+    Retorna (kid_activo, {kid: Ed25519PrivateKey}) desde la configuración.
+
+    Si no hay juego de claves configurado se deriva una clave de SECRET_KEY
+    para que el sistema funcione sin configuración adicional.
+    """
+    from django.conf import settings
+    from django.utils.crypto import salted_hmac
+
+    configuradas = dict(getattr(settings, 'QR_FIRMA_CLAVES', {}) or {})
+    if configuradas:
+        claves = {kid: _clave_privada(valor) for kid, valor in configuradas.items()}
+    else:
+        semilla = salted_hmac('control_acceso.qr_firmado', 'k0', algorithm='sha256').digest()
+        claves = {'k0': Ed25519PrivateKey.from_private_bytes(semilla)}
+    activa = getattr(settings, 'QR_FIRMA_CLAVE_ACTIVA', None) or sorted(claves)[-1]
+    return activa, claves
+
+
+def claves_publicas():
+    """Retorna (kid_activo, {kid: clave pública en base64url}) para los dispositivos"""
+    activa, claves = obtener_claves()
+    return activa, {
+        kid: _b64e(clave.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw,
+        ))
+        for kid, clave in claves.items()
+    }
+
+
+def placas_de_autorizacion(autorizacion):
+    """Placas cubiertas por la autorización"""
+    placas = [
+        v.get('placa') for v in (autorizacion.vehiculos_autorizados or [])
+        if isinstance(v, dict) and v.get('placa')
+    ]
+    if not placas and autorizacion.solicitud_id:
+        placas = list(autorizacion.solicitud.vehiculos.values_list('placa', flat=True))
+    return placas
+
+
+def generar_token(autorizacion):
+    """Genera el token firmado de una autorización con la clave activa"""
+    kid, claves = obtener_claves()
+    datos = {
+        'u': autorizacion.uuid.hex,
+        'd': int(autorizacion.valida_desde.timestamp()),
+        'h': int(autorizacion.valida_hasta.timestamp()),
+        'p': autorizacion.puerto_nombre,
+        'v': hash_placas(placas_de_autorizacion(autorizacion)),
+    }
+    payload_b64 = _b64e(json.dumps(datos, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    mensaje = f'{PREFIJO}.{kid}.{payload_b64}'
+    return f'{mensaje}.{_firmar(mensaje, claves[kid])}'
+
+
+def lista_revocacion():
+    """UUIDs (hex) de autorizaciones revocadas que aún no han expirado"""
+    from django.utils import timezone
+    from .models import Autorizacion
+
+    return [
+        u.hex for u in Autorizacion.objects.filter(
+            estado='revocada',
+            valida_hasta__gte=timezone.now(),
+        ).values_list('uuid', flat=True)
+    ]
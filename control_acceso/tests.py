@@ -1,3 +1,287 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from naviport.pruebas import PruebaConMedia, crear_autorizacion, crear_usuario
+
+from . import qr_firmado
+
+
+class TokenFirmadoTests(PruebaConMedia):
+    """Verificación offline de los tokens del QR con las claves públicas"""
+
+    def setUp(self):
+        self.autorizacion = crear_autorizacion()
+        self.token = qr_firmado.generar_token(self.autorizacion)
+        _, self.publicas = qr_firmado.claves_publicas()
+
+    def test_token_valido_con_claves_publicas(self):
+        resultado = qr_firmado.verificar_token(
+            self.token, self.publicas, placas=['A000001'], ahora=time.time(),
+        )
+        self.assertTrue(resultado['valido'], resultado['motivo'])
+        self.assertEqual(resultado['datos']['u'], self.autorizacion.uuid.hex)
+
+    def test_payload_alterado_invalida_la_firma(self):
+        prefijo, kid, payload, firma = self.token.split('.')
+        datos = json.loads(qr_firmado._b64d(payload))
+        datos['h'] += 365 * 86400
+        alterado = qr_firmado._b64e(json.dumps(datos, separators=(',', ':')).encode())
+        resultado = qr_firmado.verificar_token(f'{prefijo}.{kid}.{alterado}.{firma}', self.publicas)
+        self.assertEqual(resultado['motivo'], 'firma_invalida')
+
+    def test_token_firmado_con_otra_clave_no_es_valido(self):
+        prefijo, kid, payload, _ = self.token.split('.')
+        falsa = qr_firmado._firmar(f'{prefijo}.{kid}.{payload}', Ed25519PrivateKey.generate())
+        resultado = qr_firmado.verificar_token(f'{prefijo}.{kid}.{payload}.{falsa}', self.publicas)
+        self.assertEqual(resultado['motivo'], 'firma_invalida')
+
+    def test_revocada_y_placas(self):
+        revocada = qr_firmado.verificar_token(self.token, self.publicas, revocados=[self.autorizacion.uuid.hex])
+        self.assertEqual(revocada['motivo'], 'revocada')
+        otras = qr_firmado.verificar_token(self.token, self.publicas, placas=['Z999999'])
+        self.assertEqual(otras['motivo'], 'placas_no_coinciden')
+
+    def test_rotacion_acepta_la_clave_anterior(self):
+        anterior = Ed25519PrivateKey.generate().private_bytes_raw()
+        nueva = Ed25519PrivateKey.generate().private_bytes_raw()
+        claves = {'k1': qr_firmado._b64e(anterior)}
+        with override_settings(QR_FIRMA_CLAVES=claves, QR_FIRMA_CLAVE_ACTIVA='k1'):
+            token = qr_firmado.generar_token(self.autorizacion)
+        claves['k2'] = qr_firmado._b64e(nueva)
+        with override_settings(QR_FIRMA_CLAVES=claves, QR_FIRMA_CLAVE_ACTIVA='k2'):
+            activa, publicas = qr_firmado.claves_publicas()
+        self.assertEqual(activa, 'k2')
+        self.assertTrue(qr_firmado.verificar_token(token, publicas)['valido'])
+
+
+class ClavesVerificacionApiTests(TestCase):
+
+    def test_publica_solo_claves_publicas(self):
+        self.client.force_login(crear_usuario('oficial_acceso'))
+        respuesta = self.client.get(reverse('control_acceso_api:claves_verificacion'))
+
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['algoritmo'], 'Ed25519')
+        _, privadas = qr_firmado.obtener_claves()
+        for kid, publica in datos['claves'].items():
+            # 32 bytes de clave pública, distinta de la privada del servidor
+            self.assertEqual(len(base64.urlsafe_b64decode(publica + '=')), 32)
+            self.assertNotEqual(qr_firmado._b64d(publica), privadas[kid].private_bytes_raw())
+
+    def test_requiere_oficial_de_acceso(self):
+        self.client.force_login(crear_usuario('solicitante'))
+        respuesta = self.client.get(reverse('control_acceso_api:claves_verificacion'))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class OcupacionTests(PruebaConMedia):
+    """La ocupación sigue el último acceso autorizado de cada placa"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import RegistroAcceso
+
+        cache.clear()
+        self.autorizacion = crear_autorizacion()
+        self.puerto_id = self.autorizacion.solicitud.puerto_destino_id
+        self.oficial = crear_usuario('oficial_acceso')
+        self.registrar = lambda tipo: RegistroAcceso.objects.create(
+            autorizacion=self.autorizacion, tipo_acceso=tipo, vehiculo_placa='zz-999 ',
+            conductor_nombre='Conductor', oficial_acceso=self.oficial, estado='autorizado',
+        )
+
+    def test_volver_a_guardar_un_ingreso_antiguo_no_reingresa(self):
+        from .ocupacion import esta_dentro, ocupacion_puerto
+
+        ingreso = self.registrar('ingreso')
+        self.assertIsNotNone(esta_dentro('ZZ-999'))
+        self.registrar('salida')
+        self.assertIsNone(esta_dentro('ZZ-999'))
+
+        ingreso.observaciones = 'Corrección posterior'
+        ingreso.save()
+        self.assertIsNone(esta_dentro('ZZ-999'))
+        self.assertEqual(ocupacion_puerto(self.puerto_id), 0)
+
+    def test_volver_a_guardar_el_ingreso_vigente_no_cambia_nada(self):
+        from .ocupacion import esta_dentro
+
+        ingreso = self.registrar('ingreso')
+        ingreso.observaciones = 'Corrección'
+        ingreso.save()
+        self.assertEqual(esta_dentro('ZZ-999').registro_ingreso_id, ingreso.pk)
+
+    def test_contadores_se_ajustan_y_vencen(self):
+        from django.core.cache import cache
+        from .ocupacion import CLAVE_PUERTO, ocupacion_puerto
+
+        self.assertEqual(ocupacion_puerto(self.puerto_id), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.registrar('ingreso')
+        self.assertEqual(ocupacion_puerto(self.puerto_id), 1)
+
+        # Otro proceso con su propia caché: el contador desfasado vence y se recalcula
+        cache.set(CLAVE_PUERTO.format(self.puerto_id), 7, timeout=0)
+        self.assertEqual(ocupacion_puerto(self.puerto_id), 1)
+
+
+
+class PermanenciasTests(PruebaConMedia):
+    """El barrido empareja ingresos y salidas por placa dentro de cada autorización"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+        from .models import Autorizacion
+
+        cache.clear()
+        self.autorizacion = crear_autorizacion()
+        self.vence = timezone.now() - timedelta(hours=3)
+        Autorizacion.objects.filter(pk=self.autorizacion.pk).update(valida_hasta=self.vence)
+        self.oficial = crear_usuario('oficial_acceso')
+        self.tolerancia = timedelta(minutes=30)
+
+    def _registrar(self, tipo, placa, minutos):
+        """Registro de acceso ``minutos`` después del vencimiento de la autorización"""
+        from datetime import timedelta
+        from .models import RegistroAcceso
+
+        registro = RegistroAcceso.objects.create(
+            autorizacion=self.autorizacion, tipo_acceso=tipo, vehiculo_placa=placa,
+            conductor_nombre='Conductor', oficial_acceso=self.oficial, estado='autorizado',
+        )
+        RegistroAcceso.objects.filter(pk=registro.pk).update(timestamp=self.vence + timedelta(minutes=minutos))
+        return registro
+
+    def _detectar(self):
+        from .permanencias import detectar
+
+        hallazgos, _ = detectar(tolerancia=self.tolerancia)
+        return {(h.tipo, h.registro_id, h.salida is None) for h in hallazgos}
+
+    def test_sigue_dentro_despues_del_vencimiento(self):
+        ingreso = self._registrar('ingreso', 'A000001', -60)
+        self.assertEqual(self._detectar(), {('permanencia_excedida', ingreso.pk, True)})
+
+    def test_salida_tardia_y_salida_dentro_de_la_tolerancia(self):
+        tardio = self._registrar('ingreso', 'A000001', -60)
+        self._registrar('salida', ' a000001', 90)
+        self._registrar('ingreso', 'B000002', -60)
+        self._registrar('salida', 'B000002', 10)
+        self.assertEqual(self._detectar(), {('permanencia_excedida', tardio.pk, False)})
+
+    def test_salida_sin_ingreso(self):
+        salida = self._registrar('salida', 'A000001', -30)
+        self.assertEqual(self._detectar(), {('salida_sin_ingreso', salida.pk, True)})
+
+    def test_ingreso_repetido_reemplaza_al_abierto(self):
+        self._registrar('ingreso', 'A000001', -90)
+        segundo = self._registrar('ingreso', 'A000001', -60)
+        self.assertEqual(self._detectar(), {('permanencia_excedida', segundo.pk, True)})
+
+    def test_segundo_barrido_no_crea_nada(self):
+        from supervisor.models import AlertaSistema
+        from .models import Discrepancia
+        from .permanencias import detectar, registrar
+
+        crear_usuario('supervisor')
+        self._registrar('ingreso', 'A000001', -60)
+        self._registrar('salida', 'B000002', -30)
+
+        self.assertEqual(registrar(detectar(tolerancia=self.tolerancia)[0]), (2, 2))
+        self.assertEqual(registrar(detectar(tolerancia=self.tolerancia)[0]), (0, 0))
+        self.assertEqual(Discrepancia.objects.count(), 2)
+        self.assertEqual(AlertaSistema.objects.count(), 2)
+
+
+class RegistrarAccesoApiTests(PruebaConMedia):
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.client.force_login(crear_usuario('oficial_acceso'))
+        self.autorizacion = crear_autorizacion()
+        # Ventana ya vencida
+        self.autorizacion.valida_hasta = timezone.now() - timedelta(minutes=5)
+        self.autorizacion.save()
+
+    def _registrar(self, tipo):
+        return self.client.post(
+            reverse('control_acceso_api:registrar_acceso', args=[self.autorizacion.codigo]),
+            {'tipo_acceso': tipo, 'vehiculo_placa': 'A000001', 'conductor_nombre': 'Conductor', 'estado': 'autorizado'},
+            content_type='application/json',
+        )
+
+    def test_ingreso_con_autorizacion_vencida_es_409(self):
+        self.assertEqual(self._registrar('ingreso').status_code, 409)
+
+    def test_salida_con_autorizacion_vencida_se_registra(self):
+        from .ocupacion import esta_dentro
+        from .models import RegistroAcceso
+
+        RegistroAcceso.objects.create(
+            autorizacion=self.autorizacion, tipo_acceso='ingreso', vehiculo_placa='A000001',
+            conductor_nombre='Conductor', oficial_acceso=crear_usuario('oficial_acceso'), estado='autorizado',
+        )
+        self.assertIsNotNone(esta_dentro('A000001'))
+
+        self.assertEqual(self._registrar('salida').status_code, 201)
+        self.assertIsNone(esta_dentro('A000001'))
+
+
+class LimitadorTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .limitador import limitar_peticiones
+
+        cache.clear()
+        # Dentro de una misma ventana
+        reloj = mock.patch('control_acceso.limitador.time.time', return_value=1000.0)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+        self.fabrica = RequestFactory()
+        self.vista = limitar_peticiones('prueba', capacidad=2, recarga=0.1)(lambda request: HttpResponse('ok'))
+
+    def _peticion(self, usuario=None, reenviada=''):
+        from django.contrib.auth.models import AnonymousUser
+
+        request = self.fabrica.get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=reenviada)
+        request.user = usuario or AnonymousUser()
+        return self.vista(request)
+
+    @override_settings(LIMITADOR_PROXIES_CONFIABLES=1)
+    def test_clientes_tras_el_proxy_tienen_limites_separados(self):
+        for _ in range(2):
+            self.assertEqual(self._peticion(reenviada='1.1.1.1, 203.0.113.5').status_code, 200)
+        bloqueada = self._peticion(reenviada='203.0.113.5')
+        self.assertEqual(bloqueada.status_code, 429)
+        self.assertGreater(int(bloqueada['Retry-After']), 0)
+        # Otro cliente detrás del mismo proxy; la IP falsificada al inicio no cuenta
+        self.assertEqual(self._peticion(reenviada='203.0.113.5, 198.51.100.7').status_code, 200)
+
+    def test_usuarios_autenticados_por_usuario(self):
+        usuario, otro = crear_usuario('oficial_acceso'), crear_usuario('oficial_acceso')
+        for _ in range(2):
+            self.assertEqual(self._peticion(usuario).status_code, 200)
+        self.assertEqual(self._peticion(usuario).status_code, 429)
+        self.assertEqual(self._peticion(otro).status_code, 200)
+
+    def test_contador_vencido_entre_add_e_incr(self):
+        from django.core.cache import cache
+        from .limitador import consumir_ficha
+
+        self.assertEqual([consumir_ficha('limitador:x', 3, 1)[0] for _ in range(4)], [True, True, True, False])
+        with mock.patch.object(cache, 'incr', side_effect=ValueError):
+            self.assertEqual(consumir_ficha('limitador:y', 3, 1), (True, 0))
@@ -1,13 +1,22 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from .models import Autorizacion, RegistroAcceso, Discrepancia, SolicitudExtension
 from accounts.decorators import role_required
+from notificaciones.models import EventoEnVivo
+from .limitador import limitar_peticiones
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Count, Q
 from datetime import datetime, timedelta
 from django.utils import timezone
+import hashlib
+import time
 
 # Create your views here.
 
@@ -65,6 +74,11 @@ def dashboard(request):
     else:
         stats['porcentaje_autorizacion'] = 0
     
+    # Ocupación actual (vehículos dentro) por puerto
+    from .ocupacion import resumen_ocupacion
+    ocupacion_puertos = resumen_ocupacion()
+    stats['vehiculos_dentro'] = sum(fila['total'] for fila in ocupacion_puertos)
+    
     # Autorizaciones que vencen pronto (próximas 2 horas)
     vencen_pronto = autorizaciones_list.filter(
         valida_hasta__lte=datetime.now() + timedelta(hours=2)
@@ -84,7 +98,10 @@ def dashboard(request):
         'user': request.user,
         'autorizaciones': autorizaciones,
         'ultimos_registros': ultimos_registros,
-        'stats': stats
+        'ocupacion_puertos': ocupacion_puertos,
+        'stats': stats,
+        # Cursor del flujo de actualizaciones en vivo
+        'en_vivo_desde': EventoEnVivo.ultimo_id('control_acceso'),
     }
 
     return render(request, 'control_acceso/dashboard.html', context)
@@ -99,6 +116,17 @@ def verificar_qr(request):
     # Aceptar código por GET (desde escaneo) o POST (desde formulario)
     codigo_qr = request.GET.get('codigo', '') or request.POST.get('codigo_qr', '')
     codigo_qr = codigo_qr.strip()
+    placa = (request.GET.get('placa', '') or request.POST.get('placa', '')).strip()
+
+    if placa and not codigo_qr:
+        # Búsqueda por placa del vehículo (sin QR)
+        autorizacion = Autorizacion.buscar_por_placa(placa).first()
+        if not autorizacion:
+            error_message = f"No hay autorizaciones activas para la placa {placa.upper()}"
+        elif autorizacion.valida_desde > timezone.now():
+            error_message = "⏳ Autorización aún no válida (inicia el {})".format(
+                autorizacion.valida_desde.strftime('%d/%m/%Y %H:%M')
+            )
 
     if codigo_qr:
         try:
@@ -336,56 +364,94 @@ def listar_autorizaciones(request):
 
 
 # Vista pública para verificar QR (sin login requerido)
-def verificar_autorizacion_publica(request, uuid):
-    """Vista pública para verificar una autorización escaneando el QR"""
-    try:
-        autorizacion = Autorizacion.objects.select_related('solicitud', 'solicitud__empresa').get(uuid=uuid)
-
-        # Actualizar estado si está vencida
-        autorizacion.actualizar_estado()
-
-        # Verificar vigencia
-        ahora = timezone.now()
-        es_valida = autorizacion.esta_vigente()
-
-        # Calcular información adicional
-        if autorizacion.estado == 'activa':
-            if autorizacion.valida_desde > ahora:
-                mensaje_estado = "⏳ Autorización programada para el futuro"
-                color_estado = "#f39c12"
-            elif autorizacion.valida_hasta < ahora:
-                mensaje_estado = "⏰ Autorización vencida"
-                color_estado = "#e74c3c"
-            else:
-                mensaje_estado = "✅ Autorización válida y activa"
-                color_estado = "#27ae60"
-        elif autorizacion.estado == 'vencida':
-            mensaje_estado = "⏰ Autorización vencida"
-            color_estado = "#e74c3c"
-        elif autorizacion.estado == 'revocada':
-            mensaje_estado = "🚫 Autorización revocada"
-            color_estado = "#c0392b"
+# Segundos que se reutiliza la página pública de verificación
+VERIFICACION_PUBLICA_TTL = 60
+
+
+def _contexto_verificacion_publica(autorizacion, ahora):
+    """Contexto de la página pública, sin modificar la autorización"""
+    # Estado efectivo en memoria: la vista pública nunca guarda cambios
+    if autorizacion.estado == 'activa' and autorizacion.valida_hasta < ahora:
+        autorizacion.estado = 'vencida'
+
+    es_valida = autorizacion.esta_vigente()
+
+    # Calcular información adicional
+    if autorizacion.estado == 'activa':
+        if autorizacion.valida_desde > ahora:
+            mensaje_estado = "⏳ Autorización programada para el futuro"
+            color_estado = "#f39c12"
         else:
-            mensaje_estado = f"ℹ️ Estado: {autorizacion.get_estado_display()}"
-            color_estado = "#95a5a6"
+            mensaje_estado = "✅ Autorización válida y activa"
+            color_estado = "#27ae60"
+    elif autorizacion.estado == 'vencida':
+        mensaje_estado = "⏰ Autorización vencida"
+        color_estado = "#e74c3c"
+    elif autorizacion.estado == 'revocada':
+        mensaje_estado = "🚫 Autorización revocada"
+        color_estado = "#c0392b"
+    else:
+        mensaje_estado = f"ℹ️ Estado: {autorizacion.get_estado_display()}"
+        color_estado = "#95a5a6"
 
-        context = {
-            'autorizacion': autorizacion,
-            'es_valida': es_valida,
-            'mensaje_estado': mensaje_estado,
-            'color_estado': color_estado,
-            'dias_restantes': autorizacion.dias_restantes() if es_valida else 0,
-            'ahora': ahora,
-        }
+    return {
+        'autorizacion': autorizacion,
+        'es_valida': es_valida,
+        'mensaje_estado': mensaje_estado,
+        'color_estado': color_estado,
+        'dias_restantes': autorizacion.dias_restantes() if es_valida else 0,
+        'ahora': ahora,
+    }
 
-        return render(request, 'control_acceso/verificar_autorizacion_publica.html', context)
 
-    except Autorizacion.DoesNotExist:
-        context = {
-            'error': True,
-            'mensaje_error': 'Código de autorización no válido o no encontrado',
-        }
-        return render(request, 'control_acceso/verificar_autorizacion_publica.html', context)
+@require_safe
+@limitar_peticiones('verificar_publica', capacidad=20, recarga=0.5)
+def verificar_autorizacion_publica(request, uuid):
+    """
+    Vista pública para verificar una autorización escaneando el QR.
+
+    Es de solo lectura: la página renderizada se guarda en cache por UUID y
+    actualizada_el durante un TTL corto (acotado al próximo cambio de
+    vigencia) y se sirve con Cache-Control y ETag.
+    """
+    ahora = timezone.now()
+    version = Autorizacion.objects.filter(uuid=uuid).values_list(
+        'actualizada_el', 'valida_desde', 'valida_hasta'
+    ).first()
+
+    marca = int(version[0].timestamp() * 1000000) if version else 0
+    clave = f'verificar_publica:{uuid}:{marca}'
+    en_cache = cache.get(clave)
+
+    if en_cache is None:
+        ttl = VERIFICACION_PUBLICA_TTL
+        if version:
+            autorizacion = Autorizacion.objects.get(uuid=uuid)
+            context = _contexto_verificacion_publica(autorizacion, ahora)
+            # No reutilizar la página más allá del próximo cambio de vigencia
+            for limite in (version[1], version[2]):
+                if limite > ahora:
+                    ttl = min(ttl, int((limite - ahora).total_seconds()) + 1)
+        else:
+            context = {
+                'error': True,
+                'mensaje_error': 'Código de autorización no válido o no encontrado',
+            }
+
+        contenido = render_to_string('control_acceso/verificar_autorizacion_publica.html', context)
+        etag = quote_etag(hashlib.md5(contenido.encode('utf-8')).hexdigest())
+        expira = time.time() + ttl
+        cache.set(clave, (contenido, etag, expira), ttl)
+    else:
+        contenido, etag, expira = en_cache
+
+    max_age = max(0, int(expira - time.time()))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(contenido)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
 
 
 # ============================================================================
@@ -452,7 +518,7 @@ def solicitar_extension(request, autorizacion_id):
             )
 
             # Enviar notificación por email
-            from notificaciones.services.email_service import EmailService
+            from notificaciones.services import despachar_notificacion
             contexto = {
                 'codigo_extension': solicitud_ext.codigo,
                 'codigo_autorizacion': autorizacion.codigo,
@@ -464,7 +530,7 @@ def solicitar_extension(request, autorizacion_id):
                 'solicitada_por': request.user.get_full_name(),
             }
 
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='extension_solicitada',
                 contexto=contexto,
                 destinatarios_roles=['supervisor', 'direccion']
@@ -561,7 +627,7 @@ def aprobar_extension(request, extension_id):
         )
 
         # Enviar notificación por email
-        from notificaciones.services.email_service import EmailService
+        from notificaciones.services import despachar_notificacion
 
         # Obtener emails del solicitante y admins de la empresa
         destinatarios = [extension.solicitada_por.email] if extension.solicitada_por.email else []
@@ -582,7 +648,7 @@ def aprobar_extension(request, extension_id):
                 'observaciones': observaciones,
             }
 
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='extension_aprobada',
                 contexto=contexto,
                 destinatarios_adicionales=destinatarios,
@@ -623,7 +689,7 @@ def rechazar_extension(request, extension_id):
         messages.success(request, f'Extensión {extension.codigo} rechazada.')
 
         # Enviar notificación por email
-        from notificaciones.services.email_service import EmailService
+        from notificaciones.services import despachar_notificacion
 
         destinatarios = [extension.solicitada_por.email] if extension.solicitada_por.email else []
         empresa_emails = [
@@ -641,7 +707,7 @@ def rechazar_extension(request, extension_id):
                 'rechazada_por': request.user.get_full_name(),
             }
 
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='extension_rechazada',
                 contexto=contexto,
                 destinatarios_adicionales=destinatarios,
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import ConfiguracionEvaluacion, Servicio, TipoLicencia, DocumentoRequeridoServicio
+from .models import (
+    AprobacionSobreCapacidad, ConfiguracionEvaluacion, Servicio, TipoLicencia, DocumentoRequeridoServicio,
+    PerfilEvaluador,
+)
 
 
 class DocumentoRequeridoInline(admin.TabularInline):
@@ -81,3 +84,17 @@ class TipoLicenciaAdmin(admin.ModelAdmin):
         if obj:
             return obj.puede_eliminar()
         return True
+
+
+@admin.register(PerfilEvaluador)
+class PerfilEvaluadorAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'capacidad_maxima', 'recibe_asignaciones']
+    list_filter = ['recibe_asignaciones']
+    filter_horizontal = ['servicios']
+
+
+@admin.register(AprobacionSobreCapacidad)
+class AprobacionSobreCapacidadAdmin(admin.ModelAdmin):
+    list_display = ['solicitud', 'aprobada_por', 'fecha_aprobacion']
+    search_fields = ['solicitud__codigo', 'motivo']
+    readonly_fields = ['solicitud', 'aprobada_por', 'motivo', 'ambitos', 'fecha_aprobacion']
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class EvaluacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'evaluacion'
+
+    def ready(self):
+        """Ajustar las cargas de asignación con cada cambio de solicitud"""
+        from .asignacion import conectar
+        conectar()
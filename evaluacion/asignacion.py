@@ -0,0 +1,512 @@
+"""
+Motor de asignación automática de solicitudes a evaluadores.
+
+La carga de cada evaluador es la suma del peso de sus solicitudes abiertas.
+El peso depende de la prioridad y crece a medida que se acerca ``vence_el``
+(hasta el doble cuando faltan 0 horas o ya venció). Las cargas se mantienen
+en un heap de mínimos, de modo que elegir al evaluador menos cargado y
+actualizar su carga tras asignar cuesta O(log n).
+
+Las cargas se comparten entre los motores del proceso: se leen de la base de
+datos como mucho cada ASIGNACION_CARGAS_SEGUNDOS y entre tanto cada cambio de
+solicitud (post_save) las ajusta en O(log n), sin volver a recorrer las
+solicitudes abiertas. Los cambios hechos en otros procesos se ven al vencer.
+
+Políticas (``ASIGNACION_POLITICA``):
+    round_robin: turno rotativo entre los evaluadores con capacidad
+    menos_cargado: el evaluador con menor carga ponderada
+    habilidades: el menos cargado entre los que evalúan todos los servicios
+        de la solicitud (``PerfilEvaluador.servicios``); si ninguno los
+        cubre, el menos cargado en general
+
+La asignación se confirma con un UPDATE condicional sobre la fila de la
+solicitud (``WHERE evaluador_asignado IS NULL``), por lo que dos procesos
+o dos evaluadores nunca se quedan con la misma.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from solicitudes.models import Solicitud
+
+ESTADOS_SIN_ASIGNAR = ('recibido', 'sin_asignar')
+ESTADOS_ABIERTOS = ('pendiente', 'en_revision', 'documentos_faltantes')
+
+PESO_PRIORIDAD = {
+    'normal': 1.0,
+    'alta': 2.0,
+    'critica': 3.0,
+    'vip': 5.0,
+}
+
+POLITICAS = ('round_robin', 'menos_cargado', 'habilidades')
+
+CLAVE_TURNO = 'asignacion:ultimo_evaluador'
+
+
+def tiene_capacidad(abiertas, capacidad):
+    """Si un evaluador puede recibir otra solicitud (capacidad 0 = sin límite)"""
+    return not capacidad or abiertas < capacidad
+
+
+def excede_capacidad(abiertas, capacidad):
+    """Si un evaluador tiene más solicitudes abiertas que su capacidad (p. ej. por asignación manual)"""
+    return bool(capacidad) and abiertas > capacidad
+
+
+def peso_solicitud(prioridad, vence_el, ahora):
+    """Peso de una solicitud abierta en la carga de su evaluador"""
+    base = PESO_PRIORIDAD.get(prioridad, 1.0)
+    if vence_el is None:
+        return base
+    horas = (vence_el - ahora).total_seconds() / 3600
+    return base * (1 + min(1.0, max(0.0, (24 - horas) / 24)))
+
+
+def cola_sin_asignar():
+    """Solicitudes sin evaluador en el mismo orden de urgencia que las listas"""
+    return Solicitud.objects.filter(
+        estado__in=ESTADOS_SIN_ASIGNAR,
+        evaluador_asignado__isnull=True,
+    ).por_urgencia()
+
+
+def _bloquear_si(solicitud_id, **condiciones):
+    """
+    Bloquea la fila de la solicitud solo si cumple las condiciones, con un
+    UPDATE condicional que toca ``actualizada_el``. Debe llamarse dentro de
+    transaction.atomic(). A diferencia de select_for_update también
+    serializa en SQLite, donde el UPDATE toma el bloqueo de escritura.
+
+    Returns:
+        bool: True si la fila cumplía las condiciones y quedó bloqueada
+    """
+    return Solicitud.objects.filter(pk=solicitud_id, **condiciones).update(
+        actualizada_el=timezone.now()
+    ) == 1
+
+
+def reclamar_solicitud(solicitud_id, evaluador, estado='en_revision', estados=ESTADOS_SIN_ASIGNAR):
+    """
+    Asigna la solicitud al evaluador solo si sigue sin evaluador.
+
+    Returns:
+        Solicitud | None: La solicitud asignada, o None si otro la tomó antes
+    """
+    with transaction.atomic():
+        if not _bloquear_si(solicitud_id, evaluador_asignado__isnull=True, estado__in=estados):
+            return None
+        solicitud = Solicitud.objects.get(pk=solicitud_id)
+        solicitud.evaluador_asignado = evaluador
+        solicitud.estado = estado
+        # save() mantiene enviada_el/vence_el y los eventos del timeline
+        solicitud.save()
+    return solicitud
+
+
+def reclamar_siguiente(evaluador, intentos=5):
+    """
+    Toma la solicitud sin asignar más urgente para el evaluador.
+
+    Con bases de datos que soportan SKIP LOCKED la fila se bloquea en la
+    misma consulta que la elige; si no, se intenta el UPDATE condicional
+    sobre las primeras candidatas hasta ganar una.
+
+    Returns:
+        Solicitud | None: La solicitud tomada, o None si la cola está vacía
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            solicitud = cola_sin_asignar().select_for_update(skip_locked=True, of=('self',)).first()
+            if solicitud is None:
+                return None
+            solicitud.evaluador_asignado = evaluador
+            solicitud.estado = 'en_revision'
+            solicitud.save()
+        return solicitud
+
+    while True:
+        candidatas = list(cola_sin_asignar().values_list('pk', flat=True)[:intentos])
+        if not candidatas:
+            return None
+        for solicitud_id in candidatas:
+            solicitud = reclamar_solicitud(solicitud_id, evaluador)
+            if solicitud is not None:
+                return solicitud
+        # Todas las candidatas fueron tomadas por otros: volver a consultar
+
+
+class _Cargas:
+    """Evaluadores, solicitudes abiertas y heap de cargas de un momento dado"""
+
+    def __init__(self, ahora):
+        from accounts.models import User
+
+        self.ahora = ahora
+        self.vence = time.monotonic() + settings.ASIGNACION_CARGAS_SEGUNDOS
+        self.evaluadores = {}
+        usuarios = User.objects.filter(
+            role='evaluador', activo=True, is_active=True
+        ).select_related('perfil_evaluador').prefetch_related('perfil_evaluador__servicios')
+
+        for usuario in usuarios:
+            perfil = getattr(usuario, 'perfil_evaluador', None)
+            if perfil is not None and not perfil.recibe_asignaciones:
+                continue
+            servicios = {s.id for s in perfil.servicios.all()} if perfil else set()
+            self.evaluadores[usuario.id] = {
+                'usuario': usuario,
+                'servicios': servicios or None,   # None = evalúa cualquier servicio
+                'capacidad': perfil.capacidad_maxima if perfil else 0,
+                'carga': 0.0,
+                'abiertas': 0,
+            }
+
+        # {solicitud_id: (evaluador_id, peso, estado)}
+        self.abiertas = {}
+        # Solicitudes aún no iniciadas, candidatas a redistribuir: {evaluador_id: {solicitud_id: peso}}
+        self.pendientes = defaultdict(dict)
+
+        abiertas = Solicitud.objects.filter(
+            evaluador_asignado_id__in=list(self.evaluadores),
+            estado__in=ESTADOS_ABIERTOS,
+        ).values_list('pk', 'evaluador_asignado_id', 'prioridad', 'vence_el', 'estado')
+        for pk, evaluador_id, prioridad, vence_el, estado in abiertas:
+            self._agregar(pk, evaluador_id, peso_solicitud(prioridad, vence_el, ahora), estado)
+
+        self.heap = [(d['carga'], d['abiertas'], ev_id) for ev_id, d in self.evaluadores.items()]
+        heapq.heapify(self.heap)
+
+    def vigente(self):
+        return time.monotonic() < self.vence
+
+    def _agregar(self, pk, evaluador_id, peso, estado):
+        datos = self.evaluadores[evaluador_id]
+        datos['carga'] += peso
+        datos['abiertas'] += 1
+        self.abiertas[pk] = (evaluador_id, peso, estado)
+        if estado == 'pendiente':
+            self.pendientes[evaluador_id][pk] = peso
+
+    def _quitar(self, pk):
+        evaluador_id, peso, _ = self.abiertas.pop(pk)
+        datos = self.evaluadores[evaluador_id]
+        datos['carga'] -= peso
+        datos['abiertas'] -= 1
+        self.pendientes[evaluador_id].pop(pk, None)
+        return evaluador_id
+
+    def _reinsertar(self, ev_id):
+        """Entrada con la carga actual; las anteriores quedan obsoletas (ver MotorAsignacion._vigente)"""
+        datos = self.evaluadores[ev_id]
+        heapq.heappush(self.heap, (datos['carga'], datos['abiertas'], ev_id))
+
+    def ajustar(self, pk, evaluador_id, prioridad, vence_el, estado):
+        """Refleja el estado actual de una solicitud en las cargas"""
+        afectados = set()
+        if pk in self.abiertas:
+            afectados.add(self._quitar(pk))
+        if estado in ESTADOS_ABIERTOS and evaluador_id in self.evaluadores:
+            self._agregar(pk, evaluador_id, peso_solicitud(prioridad, vence_el, self.ahora), estado)
+            afectados.add(evaluador_id)
+        for ev_id in afectados:
+            self._reinsertar(ev_id)
+
+
+# Cargas compartidas por los motores del proceso (los despachos corren en hilos)
+_cargas = None
+_cargas_lock = threading.RLock()
+
+
+def _cargas_vigentes(ahora=None):
+    """Cargas del proceso; se reconstruyen al vencer o si se pide otro ``ahora``"""
+    global _cargas
+    with _cargas_lock:
+        if _cargas is None or not _cargas.vigente() or ahora is not None:
+            _cargas = _Cargas(ahora or timezone.now())
+        return _cargas
+
+
+def invalidar_cargas(*args, **kwargs):
+    """Descarta las cargas del proceso (cambios de evaluadores o perfiles)"""
+    global _cargas
+    with _cargas_lock:
+        _cargas = None
+
+
+def ajustar_carga(sender, instance, **kwargs):
+    """post_save de Solicitud: ajusta las cargas sin releerlas"""
+    if kwargs.get('raw'):
+        return
+    with _cargas_lock:
+        if _cargas is not None:
+            _cargas.ajustar(
+                instance.pk, instance.evaluador_asignado_id, instance.prioridad, instance.vence_el, instance.estado,
+            )
+
+
+def quitar_carga(sender, instance, **kwargs):
+    """post_delete de Solicitud (incluido el archivo)"""
+    with _cargas_lock:
+        if _cargas is not None:
+            _cargas.ajustar(instance.pk, None, None, None, None)
+
+
+def invalidar_si_evaluador(sender, instance, **kwargs):
+    if getattr(instance, 'role', 'evaluador') == 'evaluador':
+        invalidar_cargas()
+
+
+def conectar():
+    """Conecta los receptores (EvaluacionConfig.ready)"""
+    from django.db.models.signals import m2m_changed, post_delete, post_save
+    from accounts.models import User
+    from .models import PerfilEvaluador
+
+    post_save.connect(ajustar_carga, sender=Solicitud, dispatch_uid='asignacion_ajustar_carga')
+    post_delete.connect(quitar_carga, sender=Solicitud, dispatch_uid='asignacion_quitar_carga')
+    post_save.connect(invalidar_si_evaluador, sender=User, dispatch_uid='asignacion_evaluador')
+    post_save.connect(invalidar_cargas, sender=PerfilEvaluador, dispatch_uid='asignacion_perfil')
+    post_delete.connect(invalidar_cargas, sender=PerfilEvaluador, dispatch_uid='asignacion_perfil_eliminado')
+    m2m_changed.connect(
+        invalidar_cargas, sender=PerfilEvaluador.servicios.through, dispatch_uid='asignacion_perfil_servicios',
+    )
+
+
+class MotorAsignacion:
+    """Asigna solicitudes sobre las cargas de los evaluadores del proceso"""
+
+    def __init__(self, politica=None, ahora=None):
+        self.politica = politica or getattr(settings, 'ASIGNACION_POLITICA', 'menos_cargado')
+        if self.politica not in POLITICAS:
+            raise ValueError(f"Política de asignación desconocida: {self.politica}")
+        self._cargas = _cargas_vigentes(ahora)
+        self.ahora = self._cargas.ahora
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    @property
+    def evaluadores(self):
+        return self._cargas.evaluadores
+
+    def _vigente(self, entrada):
+        """Las entradas del heap se invalidan de forma perezosa al cambiar la carga"""
+        carga, abiertas, ev_id = entrada
+        datos = self.evaluadores.get(ev_id)
+        return datos is not None and datos['carga'] == carga and datos['abiertas'] == abiertas
+
+    def _tiene_capacidad(self, ev_id):
+        datos = self.evaluadores[ev_id]
+        return tiene_capacidad(datos['abiertas'], datos['capacidad'])
+
+    def _cubre(self, ev_id, servicio_ids):
+        servicios = self.evaluadores[ev_id]['servicios']
+        return servicios is None or set(servicio_ids) <= servicios
+
+    def cargas(self):
+        """Carga actual por evaluador: {id: (carga, abiertas)}"""
+        with _cargas_lock:
+            return {ev_id: (d['carga'], d['abiertas']) for ev_id, d in self.evaluadores.items()}
+
+    # ------------------------------------------------------------------
+    # Selección
+    # ------------------------------------------------------------------
+
+    def _menos_cargado(self, criterio=None):
+        """
+        Evaluador vigente de menor carga que cumpla el criterio. Las
+        entradas descartadas por criterio o capacidad se reinsertan.
+        """
+        heap = self._cargas.heap
+        apartadas = []
+        elegido = None
+        with _cargas_lock:
+            while heap:
+                entrada = heapq.heappop(heap)
+                if not self._vigente(entrada):
+                    continue
+                apartadas.append(entrada)
+                ev_id = entrada[2]
+                if self._tiene_capacidad(ev_id) and (criterio is None or criterio(ev_id)):
+                    elegido = ev_id
+                    break
+            for entrada in apartadas:
+                heapq.heappush(heap, entrada)
+        return elegido
+
+    def _turno(self):
+        """Siguiente evaluador con capacidad después del último asignado"""
+        ids = sorted(self.evaluadores)
+        if not ids:
+            return None
+        ultimo = cache.get(CLAVE_TURNO)
+        inicio = next((i for i, ev_id in enumerate(ids) if ultimo is not None and ev_id > ultimo), 0)
+        for ev_id in ids[inicio:] + ids[:inicio]:
+            if self._tiene_capacidad(ev_id):
+                return ev_id
+        return None
+
+    def _elegible(self, ev_id, servicio_ids):
+        """Con la política de habilidades, el evaluador debe cubrir los servicios"""
+        return self.politica != 'habilidades' or not servicio_ids or self._cubre(ev_id, servicio_ids)
+
+    def seleccionar(self, servicio_ids=()):
+        """Evaluador que recibiría una solicitud con los servicios indicados"""
+        if self.politica == 'round_robin':
+            return self._turno()
+        if self.politica == 'habilidades' and servicio_ids:
+            return (
+                self._menos_cargado(lambda ev_id: self._cubre(ev_id, servicio_ids))
+                or self._menos_cargado()
+            )
+        return self._menos_cargado()
+
+    # ------------------------------------------------------------------
+    # Operaciones
+    # ------------------------------------------------------------------
+
+    def _confirmar(self, solicitud_id, evaluador_id, **condiciones):
+        """
+        Asigna la solicitud si sigue cumpliendo las condiciones (ver
+        _bloquear_si); save() mantiene los eventos del timeline y ajusta
+        las cargas (ajustar_carga).
+        """
+        with transaction.atomic():
+            if not _bloquear_si(solicitud_id, **condiciones):
+                return None
+            solicitud = Solicitud.objects.get(pk=solicitud_id)
+            solicitud.evaluador_asignado_id = evaluador_id
+            if solicitud.estado in ESTADOS_SIN_ASIGNAR:
+                solicitud.estado = 'pendiente'
+            solicitud.save()
+        return solicitud
+
+    @staticmethod
+    def _servicios(solicitud_ids):
+        """Servicios de varias solicitudes en una consulta: {solicitud_id: [servicio_id]}"""
+        servicios = defaultdict(list)
+        relacion = Solicitud.servicios_solicitados.through
+        for solicitud_id, servicio_id in relacion.objects.filter(
+            solicitud_id__in=list(solicitud_ids)
+        ).values_list('solicitud_id', 'servicio_id'):
+            servicios[solicitud_id].append(servicio_id)
+        return servicios
+
+    def asignar(self, solicitud, servicio_ids=None):
+        """
+        Asigna una solicitud sin evaluador.
+
+        Returns:
+            User | None: El evaluador asignado, o None si no hay evaluador
+            disponible o la solicitud ya fue tomada por otro proceso
+        """
+        if servicio_ids is None:
+            servicio_ids = list(solicitud.servicios_solicitados.values_list('id', flat=True))
+
+        evaluador_id = self.seleccionar(servicio_ids)
+        if evaluador_id is None:
+            return None
+
+        asignada = self._confirmar(
+            solicitud.pk, evaluador_id,
+            evaluador_asignado__isnull=True, estado__in=ESTADOS_SIN_ASIGNAR
+        )
+        if asignada is None:
+            return None
+
+        if self.politica == 'round_robin':
+            cache.set(CLAVE_TURNO, evaluador_id, timeout=None)
+        return self.evaluadores[evaluador_id]['usuario']
+
+    def asignar_pendientes(self, limite=None):
+        """
+        Asigna las solicitudes sin evaluador de la más a la menos urgente
+        (prioridad y luego vence_el).
+
+        Returns:
+            list: [(solicitud, evaluador)] de las asignaciones realizadas
+        """
+        cola = cola_sin_asignar()
+        if limite:
+            cola = cola[:limite]
+        cola = list(cola)
+        servicios = self._servicios(s.pk for s in cola)
+
+        resultado = []
+        for solicitud in cola:
+            evaluador = self.asignar(solicitud, servicios[solicitud.pk])
+            if evaluador is not None:
+                resultado.append((solicitud, evaluador))
+        return resultado
+
+    def _movimiento(self, origen, servicios, omitidas):
+        """
+        La solicitud pendiente más liviana del origen que reduzca la
+        diferencia con el evaluador elegible menos cargado para ella.
+
+        Returns:
+            tuple | None: (solicitud_id, evaluador_destino_id)
+        """
+        with _cargas_lock:
+            candidatas = sorted(
+                (peso, pk) for pk, peso in self._cargas.pendientes[origen].items() if pk not in omitidas
+            )
+        for peso, solicitud_id in candidatas:
+            destino = self._menos_cargado(
+                lambda ev_id: ev_id != origen and self._elegible(ev_id, servicios[solicitud_id])
+            )
+            if destino is None:
+                continue
+            if peso < self.evaluadores[origen]['carga'] - self.evaluadores[destino]['carga']:
+                return solicitud_id, destino
+        return None
+
+    def rebalancear(self, max_movimientos=None):
+        """
+        Mueve solicitudes aún no iniciadas (estado 'pendiente') del
+        evaluador más cargado al menos cargado que pueda evaluarlas (ver
+        ``seleccionar``) mientras la diferencia de carga sea mayor que el
+        peso de la solicitud movida.
+
+        Returns:
+            list: [(solicitud_id, evaluador_origen_id, evaluador_destino_id)]
+        """
+        with _cargas_lock:
+            pendientes = [pk for por_evaluador in self._cargas.pendientes.values() for pk in por_evaluador]
+        servicios = self._servicios(pendientes) if self.politica == 'habilidades' else defaultdict(list)
+
+        movimientos = []
+        omitidas = set()
+        while max_movimientos is None or len(movimientos) < max_movimientos:
+            if len(self.evaluadores) < 2:
+                break
+            origen = max(self.evaluadores, key=lambda ev_id: self.evaluadores[ev_id]['carga'])
+            movimiento = self._movimiento(origen, servicios, omitidas)
+            if movimiento is None:
+                break
+            solicitud_id, destino = movimiento
+
+            movida = self._confirmar(
+                solicitud_id, destino, evaluador_asignado_id=origen, estado='pendiente'
+            )
+            if movida is None:
+                omitidas.add(solicitud_id)
+                continue
+            movimientos.append((solicitud_id, origen, destino))
+        return movimientos
+
+
+def asignar_solicitud(solicitud_id, politica=None):
+    """Asigna una solicitud recién recibida (para despachar tras el commit)"""
+    solicitud = Solicitud.objects.filter(pk=solicitud_id).first()
+    if solicitud is None or solicitud.evaluador_asignado_id:
+        return None
+    return MotorAsignacion(politica).asignar(solicitud)
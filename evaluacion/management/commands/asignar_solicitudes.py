@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from evaluacion.asignacion import POLITICAS, MotorAsignacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Asigna las solicitudes sin evaluador según la carga ponderada de cada '
+        'evaluador (prioridad y cercanía del vencimiento) y opcionalmente '
+        'redistribuye las que aún no se han comenzado a revisar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--politica',
+            choices=POLITICAS,
+            help='Política de asignación (por defecto ASIGNACION_POLITICA)'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            help='Máximo de solicitudes a asignar en esta ejecución'
+        )
+        parser.add_argument(
+            '--rebalancear',
+            action='store_true',
+            help='Mover solicitudes pendientes del evaluador más cargado al menos cargado'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar las asignaciones sin guardarlas'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        try:
+            motor = MotorAsignacion(options['politica'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not motor.evaluadores:
+            self.stdout.write(self.style.WARNING('[INFO] No hay evaluadores activos que reciban asignaciones'))
+            return
+
+        # En dry-run se ejecuta todo y se revierte la transacción
+        with transaction.atomic():
+            asignadas = motor.asignar_pendientes(options['limite'])
+            for solicitud, evaluador in asignadas:
+                self.stdout.write(f'  {solicitud.codigo} ({solicitud.prioridad}) -> {evaluador.get_display_name()}')
+
+            movimientos = []
+            if options['rebalancear']:
+                movimientos = motor.rebalancear()
+                for solicitud_id, origen, destino in movimientos:
+                    self.stdout.write(
+                        f"  Solicitud #{solicitud_id}: "
+                        f"{motor.evaluadores[origen]['usuario'].get_display_name()} -> "
+                        f"{motor.evaluadores[destino]['usuario'].get_display_name()}"
+                    )
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        for carga, abiertas, ev_id in sorted(
+            (d['carga'], d['abiertas'], ev_id) for ev_id, d in motor.evaluadores.items()
+        ):
+            self.stdout.write(
+                f"  {motor.evaluadores[ev_id]['usuario'].get_display_name()}: "
+                f"{abiertas} abiertas, carga {carga:.1f}"
+            )
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se asignarían {len(asignadas)} solicitudes '
+                f'y se moverían {len(movimientos)}'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {len(asignadas)} solicitudes asignadas, {len(movimientos)} redistribuidas '
+            f'(política {motor.politica})'
+        ))
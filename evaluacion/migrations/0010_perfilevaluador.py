@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('evaluacion', '0009_add_documento_requerido_servicio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilEvaluador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('capacidad_maxima', models.PositiveIntegerField(default=0, help_text='Solicitudes abiertas simultáneas (0 = sin límite)', verbose_name='Capacidad máxima')),
+                ('recibe_asignaciones', models.BooleanField(default=True, verbose_name='Recibe asignaciones automáticas')),
+                ('servicios', models.ManyToManyField(blank=True, help_text='Dejar vacío si puede evaluar cualquier servicio', related_name='evaluadores', to='evaluacion.servicio', verbose_name='Servicios que evalúa')),
+                ('usuario', models.OneToOneField(limit_choices_to={'role': 'evaluador'}, on_delete=django.db.models.deletion.CASCADE, related_name='perfil_evaluador', to=settings.AUTH_USER_MODEL, verbose_name='Evaluador')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Evaluador',
+                'verbose_name_plural': 'Perfiles de Evaluadores',
+            },
+        ),
+    ]
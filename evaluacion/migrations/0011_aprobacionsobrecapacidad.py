@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('solicitudes', '0021_tipo_contenido_archivo'),
+        ('evaluacion', '0010_perfilevaluador'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AprobacionSobreCapacidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('motivo', models.TextField(help_text='Por qué se aprueba aunque se exceda la capacidad', verbose_name='Justificación')),
+                ('ambitos', models.JSONField(default=list, help_text='Ámbito, capacidad y vehículos simultáneos al aprobar', verbose_name='Ámbitos excedidos')),
+                ('fecha_aprobacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Aprobación')),
+                ('aprobada_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='aprobaciones_sobre_capacidad', to=settings.AUTH_USER_MODEL, verbose_name='Aprobada por')),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aprobaciones_sobre_capacidad', to='solicitudes.solicitud', verbose_name='Solicitud')),
+            ],
+            options={
+                'verbose_name': 'Aprobación sobre Capacidad',
+                'verbose_name_plural': 'Aprobaciones sobre Capacidad',
+                'ordering': ['-fecha_aprobacion'],
+            },
+        ),
+    ]
@@ -557,3 +557,79 @@ Sistema NaviPort RD
                 error_msg = "Conexión agotó tiempo de espera. Verifica la conexión a internet y la configuración del servidor."
             
             return False, error_msg
+
+
+class PerfilEvaluador(models.Model):
+    """
+    Preferencias de asignación automática de un evaluador.
+    Un evaluador sin servicios configurados puede recibir cualquier solicitud.
+    """
+    usuario = models.OneToOneField(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='perfil_evaluador',
+        limit_choices_to={'role': 'evaluador'},
+        verbose_name='Evaluador'
+    )
+    servicios = models.ManyToManyField(
+        Servicio,
+        blank=True,
+        related_name='evaluadores',
+        verbose_name='Servicios que evalúa',
+        help_text='Dejar vacío si puede evaluar cualquier servicio'
+    )
+    capacidad_maxima = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Capacidad máxima',
+        help_text='Solicitudes abiertas simultáneas (0 = sin límite)'
+    )
+    recibe_asignaciones = models.BooleanField(
+        default=True,
+        verbose_name='Recibe asignaciones automáticas'
+    )
+
+    class Meta:
+        verbose_name = 'Perfil de Evaluador'
+        verbose_name_plural = 'Perfiles de Evaluadores'
+
+    def __str__(self):
+        return f"Perfil de {self.usuario.get_display_name()}"
+
+
+class AprobacionSobreCapacidad(models.Model):
+    """
+    Aprobación de una solicitud que deja su destino por encima de la
+    capacidad. Audita quién la autorizó, por qué y la ocupación de cada
+    ámbito excedido en ese momento.
+    """
+    solicitud = models.ForeignKey(
+        'solicitudes.Solicitud',
+        on_delete=models.CASCADE,
+        related_name='aprobaciones_sobre_capacidad',
+        verbose_name='Solicitud'
+    )
+    aprobada_por = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='aprobaciones_sobre_capacidad',
+        verbose_name='Aprobada por'
+    )
+    motivo = models.TextField(
+        verbose_name='Justificación',
+        help_text='Por qué se aprueba aunque se exceda la capacidad'
+    )
+    ambitos = models.JSONField(
+        default=list,
+        verbose_name='Ámbitos excedidos',
+        help_text='Ámbito, capacidad y vehículos simultáneos al aprobar'
+    )
+    fecha_aprobacion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Aprobación')
+
+    class Meta:
+        verbose_name = 'Aprobación sobre Capacidad'
+        verbose_name_plural = 'Aprobaciones sobre Capacidad'
+        ordering = ['-fecha_aprobacion']
+
+    def __str__(self):
+        return f"{self.solicitud.codigo} - {self.fecha_aprobacion:%d/%m/%Y %H:%M}"
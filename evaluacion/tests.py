@@ -1,3 +1,196 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from naviport.pruebas import PruebaConMedia, crear_puerto, crear_solicitud, crear_usuario
+from solicitudes.models import Solicitud
+
+
+class EvaluarSolicitudTests(TestCase):
+    """Solo el evaluador asignado puede decidir sobre una solicitud"""
+
+    def setUp(self):
+        self.asignado = crear_usuario('evaluador')
+        self.otro = crear_usuario('evaluador')
+        self.solicitud = crear_solicitud(estado='en_revision', evaluador_asignado=self.asignado)
+        self.url = reverse('evaluacion:evaluar_solicitud', args=[self.solicitud.pk])
+
+    def test_evaluador_no_asignado_no_puede_decidir(self):
+        self.client.force_login(self.otro)
+        respuesta = self.client.post(self.url, {'accion': 'rechazar', 'comentario': 'no'}, follow=True)
+
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'en_revision')
+        self.assertEqual(self.solicitud.evaluador_asignado, self.asignado)
+        self.assertIn(
+            'Esta solicitud ya está asignada a otro evaluador.',
+            [str(m) for m in respuesta.context['messages']],
+        )
+
+    def test_evaluador_asignado_decide(self):
+        self.client.force_login(self.asignado)
+        self.client.post(self.url, {'accion': 'rechazar', 'comentario': 'Falta documentación'})
+
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'rechazada')
+        self.assertEqual(self.solicitud.motivo_rechazo, 'Falta documentación')
+
+    def test_solicitud_sin_asignar_se_reclama_y_se_decide(self):
+        solicitud = crear_solicitud(estado='pendiente')
+        self.client.force_login(self.otro)
+        self.client.post(
+            reverse('evaluacion:evaluar_solicitud', args=[solicitud.pk]),
+            {'accion': 'solicitar_documentos', 'comentario': ''},
+        )
+
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.evaluador_asignado, self.otro)
+        self.assertEqual(solicitud.estado, 'documentos_faltantes')
+
+
+    def test_aprobar_genera_autorizacion_con_fechas_con_zona_horaria(self):
+        import warnings
+        from control_acceso.models import Autorizacion
+
+        self.client.force_login(self.asignado)
+        with warnings.catch_warnings():
+            # Una fecha sin zona horaria haría fallar la creación de la autorización
+            warnings.simplefilter('error', RuntimeWarning)
+            self.client.post(self.url, {'accion': 'aprobar', 'comentario': 'Conforme'})
+
+        self.solicitud.refresh_from_db()
+        autorizacion = Autorizacion.objects.get(solicitud=self.solicitud)
+        self.assertEqual((autorizacion.valida_desde, autorizacion.valida_hasta),
+                         (self.solicitud.inicio_acceso, self.solicitud.fin_acceso))
+        self.assertEqual(
+            set(autorizacion.vehiculos.values_list('valida_desde', 'valida_hasta')),
+            {(self.solicitud.inicio_acceso, self.solicitud.fin_acceso)},
+        )
+
+
+class MotorAsignacionTests(TestCase):
+
+    def setUp(self):
+        from .asignacion import invalidar_cargas
+
+        invalidar_cargas()
+        self.addCleanup(invalidar_cargas)
+        self.evaluadores = [crear_usuario('evaluador') for _ in range(3)]
+
+    def _pendientes(self, evaluador, cantidad, servicios=()):
+        solicitudes = [crear_solicitud(estado='pendiente', evaluador_asignado=evaluador) for _ in range(cantidad)]
+        for solicitud in solicitudes:
+            solicitud.servicios_solicitados.set(servicios)
+        return solicitudes
+
+    def test_cargas_se_ajustan_sin_releer_las_solicitudes(self):
+        from .asignacion import MotorAsignacion
+
+        primero = self.evaluadores[0]
+        solicitud, = self._pendientes(primero, 1)
+        self.assertEqual(MotorAsignacion().cargas()[primero.id][1], 1)
+
+        with self.assertNumQueries(0):
+            motor = MotorAsignacion()
+        nueva = crear_solicitud(estado='recibido')
+        with self.assertNumQueries(0):
+            self.assertNotEqual(motor.seleccionar(), primero.id)
+
+        solicitud.estado = 'rechazada'
+        solicitud.save()
+        self.assertEqual(MotorAsignacion().cargas()[primero.id], (0.0, 0))
+
+        evaluador = motor.asignar(nueva, [])
+        self.assertEqual(MotorAsignacion().cargas()[evaluador.id][1], 1)
+
+    def test_rebalancear_respeta_las_habilidades(self):
+        from .asignacion import MotorAsignacion
+        from .models import PerfilEvaluador, Servicio
+
+        grua = Servicio.objects.create(nombre='Grúa', codigo='GR-001')
+        otro = Servicio.objects.create(nombre='Combustible', codigo='CB-001')
+        cargado, sin_habilidad, con_habilidad = self.evaluadores
+        PerfilEvaluador.objects.create(usuario=sin_habilidad).servicios.set([otro])
+        PerfilEvaluador.objects.create(usuario=con_habilidad).servicios.set([grua])
+        self._pendientes(cargado, 4, [grua])
+        # El menos cargado es el que no evalúa grúas
+        self._pendientes(con_habilidad, 1, [grua])
+
+        movimientos = MotorAsignacion('habilidades').rebalancear()
+
+        self.assertTrue(movimientos)
+        self.assertEqual({destino for _, _, destino in movimientos}, {con_habilidad.id})
+        self.assertFalse(Solicitud.objects.filter(evaluador_asignado=sin_habilidad).exists())
+
+
+class CapacidadAprobacionTests(PruebaConMedia):
+    """Aprobar por encima de la capacidad del destino requiere una excepción registrada"""
+
+    def setUp(self):
+        puerto = crear_puerto(capacidad_maxima=1)
+        crear_solicitud(estado='aprobada', puerto_destino=puerto, placas=('B000001',))
+        self.evaluador = crear_usuario('evaluador')
+        self.solicitud = crear_solicitud(estado='en_revision', puerto_destino=puerto, evaluador_asignado=self.evaluador)
+        self.url = reverse('evaluacion:evaluar_solicitud', args=[self.solicitud.pk])
+        self.client.force_login(self.evaluador)
+
+    def _aprobar(self, **extra):
+        return self.client.post(self.url, {'accion': 'aprobar', 'comentario': '', **extra})
+
+    def test_aprobacion_sobre_capacidad_se_bloquea(self):
+        respuesta = self._aprobar()
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.context['form'].errors['justificacion_capacidad'])
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'en_revision')
+
+    def test_excepcion_requiere_justificacion(self):
+        self._aprobar(exceder_capacidad='on', justificacion_capacidad='corta')
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'en_revision')
+
+    def test_excepcion_justificada_se_registra(self):
+        from .models import AprobacionSobreCapacidad
+
+        respuesta = self._aprobar(exceder_capacidad='on', justificacion_capacidad='Operación de emergencia del puerto')
+
+        self.assertRedirects(respuesta, reverse('evaluacion:dashboard'), fetch_redirect_response=False)
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'aprobada')
+        excepcion = AprobacionSobreCapacidad.objects.get(solicitud=self.solicitud)
+        self.assertEqual(excepcion.aprobada_por, self.evaluador)
+        self.assertEqual(excepcion.ambitos[0]['total'], 2)
+
+
+class NuevasSolicitudesTests(TestCase):
+    """La bandeja de solicitudes sin asignar también se ordena por urgencia"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.client.force_login(crear_usuario('evaluador'))
+        ahora = timezone.now()
+        self.vencida = crear_solicitud(estado='sin_asignar')
+        self.vip = crear_solicitud(estado='sin_asignar', prioridad='vip')
+        self.normal = crear_solicitud(estado='sin_asignar')
+        for solicitud, vence_el in ((self.vencida, ahora - timedelta(hours=1)), (self.vip, ahora + timedelta(days=1)),
+                                    (self.normal, ahora + timedelta(hours=12))):
+            Solicitud.objects.filter(pk=solicitud.pk).update(vence_el=vence_el)
+
+    def _ids(self, **parametros):
+        respuesta = self.client.get(reverse('evaluacion:nuevas_solicitudes'), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return [s.pk for s in respuesta.context['solicitudes']]
+
+    def test_orden_por_urgencia(self):
+        self.assertEqual(self._ids(orden='urgencia'), [self.vencida.pk, self.vip.pk, self.normal.pk])
+        # Por omisión, las más recientes primero
+        self.assertEqual(self._ids(), [self.normal.pk, self.vip.pk, self.vencida.pk])
+
+    def test_tomar_siguiente_toma_la_primera_de_la_lista_por_urgencia(self):
+        # Una VIP no pasa por delante de una normal vencida
+        primera = self._ids(orden='urgencia')[0]
+        respuesta = self.client.post(reverse('evaluacion:tomar_siguiente'))
+        self.assertRedirects(respuesta, reverse('evaluacion:evaluar_solicitud', args=[primera]), fetch_redirect_response=False)
+        self.assertEqual(primera, self.vencida.pk)
@@ -5,7 +5,7 @@ from .views import (
     configuracion, configuracion_email, crear_configuracion_email, editar_configuracion_email,
     activar_configuracion_email, eliminar_configuracion_email, enviar_email_prueba,
     obtener_servicios_tipo_licencia, gestion_licencias_servicios,
-    asignar_evaluador, mis_solicitudes, nuevas_solicitudes,
+    asignar_evaluador, tomar_siguiente, mis_solicitudes, nuevas_solicitudes,
     # Servicios
     gestionar_servicios, crear_servicio, editar_servicio, eliminar_servicio,
     # Tipos de Licencia
@@ -17,7 +17,8 @@ from .views import (
 )
 from .views_puertos import (
     gestion_puertos, crear_puerto, editar_puerto, eliminar_puerto,
-    detalle_puerto, crear_lugar, editar_lugar, eliminar_lugar, get_lugares_puerto
+    detalle_puerto, crear_lugar, editar_lugar, eliminar_lugar, get_lugares_puerto,
+    mapa_capacidad
 )
 
 app_name = 'evaluacion'
@@ -28,6 +29,7 @@ urlpatterns = [
     path('nuevas-solicitudes/', nuevas_solicitudes, name='nuevas_solicitudes'),
     path('evaluar/<int:solicitud_id>/', evaluar_solicitud, name='evaluar_solicitud'),
     path('asignar/<int:solicitud_id>/', asignar_evaluador, name='asignar_evaluador'),
+    path('tomar-siguiente/', tomar_siguiente, name='tomar_siguiente'),
     
     # Gestión de empresas
     path('empresas/', gestionar_empresas, name='gestionar_empresas'),
@@ -83,4 +85,5 @@ urlpatterns = [
 
     # API endpoints para puertos
     path('api/puertos/<int:puerto_id>/lugares/', get_lugares_puerto, name='get_lugares_puerto'),
+    path('api/puertos/<int:puerto_id>/capacidad/', mapa_capacidad, name='mapa_capacidad'),
 ] 
\ No newline at end of file
@@ -4,11 +4,14 @@ from solicitudes.models import Solicitud
 from django import forms
 from accounts.decorators import role_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Count, Q
 from datetime import datetime, timedelta
 from django.utils import timezone
 from accounts.models import Empresa
 from .models import ConfiguracionEvaluacion, Servicio, TipoLicencia, ConfiguracionEmail, DocumentoRequeridoServicio
+from reportes.models import TiempoEnEstado
+from notificaciones.models import EventoEnVivo
 from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.db.models import Q
@@ -24,7 +27,7 @@ def dashboard(request):
     prioridad_filtro = request.GET.get('prioridad', '')
     
     # Obtener todas las solicitudes base
-    solicitudes_queryset = Solicitud.objects.all().select_related(
+    solicitudes_queryset = Solicitud.objects.con_urgencia().select_related(
         'empresa', 'puerto_destino', 'motivo_acceso', 'solicitante'
     ).order_by('-creada_el')
     
@@ -62,7 +65,7 @@ def dashboard(request):
     )
     
     # Solicitudes asignadas a este evaluador
-    mis_solicitudes = Solicitud.objects.filter(
+    mis_solicitudes = Solicitud.objects.con_urgencia().filter(
         evaluador_asignado=request.user
     ).select_related('empresa', 'puerto_destino', 'motivo_acceso', 'solicitante').order_by('-creada_el')
     
@@ -90,7 +93,10 @@ def dashboard(request):
             estado='aprobada'
         ).count(),
         
-        'tiempo_promedio': 2.5,  # Simulado por ahora
+        # Mediana en días desde el envío hasta la decisión (reportes.TiempoEnEstado)
+        'tiempo_promedio': (
+            TiempoEnEstado.dias_resolucion('evaluador', request.user.id) or TiempoEnEstado.dias_resolucion()
+        ),
     }
     
     # Calcular porcentaje de aprobación del mes
@@ -104,6 +110,11 @@ def dashboard(request):
         count=Count('id')
     ).order_by('-count')
     
+    # Ordenar por urgencia (vencidas, por vencer y luego por prioridad) en SQL
+    orden = request.GET.get('orden', '')
+    if orden == 'urgencia':
+        solicitudes_queryset = solicitudes_queryset.por_urgencia()
+    
     # Paginación para las solicitudes filtradas
     per_page = request.GET.get('per_page', '25')
     try:
@@ -128,8 +139,11 @@ def dashboard(request):
         'busqueda': busqueda,
         'estado_filtro': estado_filtro,
         'prioridad_filtro': prioridad_filtro,
+        'orden': orden,
         'is_paginated': page_obj.has_other_pages(),
-        'tiene_filtros': bool(busqueda or estado_filtro or prioridad_filtro)
+        'tiene_filtros': bool(busqueda or estado_filtro or prioridad_filtro),
+        # Cursor del flujo de actualizaciones en vivo
+        'en_vivo_desde': EventoEnVivo.ultimo_id('evaluacion'),
     }
     
     return render(request, 'evaluacion/dashboard.html', context)
@@ -156,6 +170,115 @@ class EvaluacionForm(forms.Form):
         widget=forms.RadioSelect(attrs={'class': 'form-check-input'}), 
         label='Decisión'
     )
+    exceder_capacidad = forms.BooleanField(
+        required=False,
+        label='Aprobar aunque exceda la capacidad'
+    )
+    justificacion_capacidad = forms.CharField(
+        widget=forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
+        required=False,
+        label='Justificación'
+    )
+
+
+def _validar_capacidad(request, solicitud, datos):
+    """
+    Comprueba la capacidad del destino antes de aprobar. Si algún ámbito se
+    excede, la aprobación requiere marcar ``exceder_capacidad`` con una
+    justificación, que queda registrada en AprobacionSobreCapacidad.
+
+    Returns:
+        str | None: El error que impide aprobar, o None
+    """
+    from django.db.models import F
+    from solicitudes.capacidad import evaluar_capacidad
+    from solicitudes.models import Puerto
+    from .models import AprobacionSobreCapacidad
+
+    # Bloquea el puerto: dos aprobaciones simultáneas al mismo destino no
+    # pueden contar cada una el pico sin la otra
+    Puerto.objects.filter(pk=solicitud.puerto_destino_id).update(capacidad_maxima=F('capacidad_maxima'))
+
+    excedidos = [ambito for ambito in evaluar_capacidad(solicitud) if ambito['excede']]
+    if not excedidos:
+        return None
+    detalle = ', '.join(f"{a['ambito']} ({a['total']} de {a['capacidad']})" for a in excedidos)
+    if not datos.get('exceder_capacidad'):
+        return f"La aprobación excede la capacidad: {detalle}. Marque la excepción y justifíquela para continuar."
+    motivo = (datos.get('justificacion_capacidad') or '').strip()
+    if len(motivo) < 10:
+        return 'La justificación debe tener al menos 10 caracteres.'
+
+    AprobacionSobreCapacidad.objects.create(
+        solicitud=solicitud,
+        aprobada_por=request.user,
+        motivo=motivo,
+        ambitos=[
+            {'ambito': a['ambito'], 'capacidad': a['capacidad'], 'total': a['total']} for a in excedidos
+        ],
+    )
+    messages.warning(request, f"Aprobada por encima de la capacidad: {detalle}. La excepción quedó registrada.")
+    return None
+
+
+def _registrar_decision(request, solicitud, accion, comentario):
+    """Aplica la decisión del evaluador; se llama con la fila de la solicitud bloqueada"""
+    # Actualizar la solicitud
+    solicitud.fecha_evaluacion = timezone.now()
+    solicitud.comentarios_evaluacion = comentario
+    
+    if accion == 'aprobar':
+        solicitud.estado = 'aprobada'
+        messages.success(request, "¡Solicitud aprobada exitosamente!")
+        
+        # Crear autorización automáticamente
+        try:
+            from control_acceso.models import Autorizacion
+            # Savepoint: un error aquí no debe invalidar la transacción de la decisión
+            with transaction.atomic():
+                autorizacion = Autorizacion.objects.create(
+                    solicitud=solicitud,
+                    empresa_nombre=solicitud.empresa.nombre,
+                    empresa_rnc=solicitud.empresa.rnc,
+                    representante_nombre=solicitud.solicitante.get_display_name(),
+                    representante_cedula=solicitud.solicitante.cedula_rnc,
+                    valida_desde=timezone.make_aware(datetime.combine(solicitud.fecha_ingreso, solicitud.hora_ingreso)),
+                    valida_hasta=timezone.make_aware(datetime.combine(solicitud.fecha_salida, solicitud.hora_salida)),
+                    puerto_nombre=solicitud.puerto_destino.nombre,
+                    motivo_acceso=solicitud.motivo_acceso.nombre,
+                    generada_por=request.user
+                )
+            messages.success(request, f"Autorización {autorizacion.codigo} generada automáticamente.")
+        except Exception as e:
+            messages.warning(request, f"Solicitud aprobada pero error al generar autorización: {str(e)}")
+            
+    elif accion == 'rechazar':
+        solicitud.estado = 'rechazada'
+        solicitud.motivo_rechazo = comentario
+        messages.success(request, "¡Solicitud rechazada exitosamente!")
+    elif accion == 'solicitar_documentos':
+        solicitud.estado = 'documentos_faltantes'
+        messages.success(request, "Se han solicitado documentos adicionales.")
+    elif accion == 'escalar':
+        solicitud.estado = 'escalada'
+        # Crear escalamiento
+        try:
+            from supervisor.models import Escalamiento
+            with transaction.atomic():
+                escalamiento = Escalamiento.objects.create(
+                    solicitud=solicitud,
+                    tipo_escalamiento='revision_manual',
+                    prioridad='media',
+                    motivo='Solicitud escalada por evaluador',
+                    descripcion_detallada=comentario or 'Requiere revisión manual del supervisor',
+                    escalado_por=request.user
+                )
+            messages.success(request, f"Solicitud escalada exitosamente. Código: {escalamiento.codigo}")
+        except Exception as e:
+            messages.error(request, f"Error al crear escalamiento: {str(e)}")
+    
+    solicitud.save()
+
 
 @login_required
 @role_required('evaluador')
@@ -168,71 +291,36 @@ def evaluar_solicitud(request, solicitud_id):
     # Verificar si la solicitud puede ser evaluada
     puede_evaluar = solicitud.estado in ESTADOS_EVALUABLES
 
-    # Asignar el evaluador si no está asignado y puede ser evaluada
-    if puede_evaluar and not solicitud.evaluador_asignado:
-        solicitud.evaluador_asignado = request.user
-        solicitud.estado = 'en_revision'
-        solicitud.save()
+    # Tomar la solicitud si no está asignada. El UPDATE condicional evita que
+    # dos evaluadores que la abren a la vez se la asignen ambos.
+    if puede_evaluar and not solicitud.evaluador_asignado_id:
+        from .asignacion import reclamar_solicitud
+        if reclamar_solicitud(solicitud.id, request.user, estados=ESTADOS_EVALUABLES) is None:
+            messages.info(request, "Otro evaluador tomó esta solicitud mientras la abría.")
+        solicitud.refresh_from_db()
 
     if request.method == 'POST' and puede_evaluar:
         form = EvaluacionForm(request.POST)
         if form.is_valid():
             accion = form.cleaned_data['accion']
             comentario = form.cleaned_data['comentario']
-            
-            # Actualizar la solicitud
-            solicitud.fecha_evaluacion = datetime.now()
-            solicitud.comentarios_evaluacion = comentario
-            
-            if accion == 'aprobar':
-                solicitud.estado = 'aprobada'
-                messages.success(request, "¡Solicitud aprobada exitosamente!")
-                
-                # Crear autorización automáticamente
-                try:
-                    from control_acceso.models import Autorizacion
-                    autorizacion = Autorizacion.objects.create(
-                        solicitud=solicitud,
-                        empresa_nombre=solicitud.empresa.nombre,
-                        empresa_rnc=solicitud.empresa.rnc,
-                        representante_nombre=solicitud.solicitante.get_display_name(),
-                        representante_cedula=solicitud.solicitante.cedula_rnc,
-                        valida_desde=datetime.combine(solicitud.fecha_ingreso, solicitud.hora_ingreso),
-                        valida_hasta=datetime.combine(solicitud.fecha_salida, solicitud.hora_salida),
-                        puerto_nombre=solicitud.puerto_destino.nombre,
-                        motivo_acceso=solicitud.motivo_acceso.nombre,
-                        generada_por=request.user
-                    )
-                    messages.success(request, f"Autorización {autorizacion.codigo} generada automáticamente.")
-                except Exception as e:
-                    messages.warning(request, f"Solicitud aprobada pero error al generar autorización: {str(e)}")
-                    
-            elif accion == 'rechazar':
-                solicitud.estado = 'rechazada'
-                solicitud.motivo_rechazo = comentario
-                messages.success(request, "¡Solicitud rechazada exitosamente!")
-            elif accion == 'solicitar_documentos':
-                solicitud.estado = 'documentos_faltantes'
-                messages.success(request, "Se han solicitado documentos adicionales.")
-            elif accion == 'escalar':
-                solicitud.estado = 'escalada'
-                # Crear escalamiento
-                try:
-                    from supervisor.models import Escalamiento
-                    escalamiento = Escalamiento.objects.create(
-                        solicitud=solicitud,
-                        tipo_escalamiento='revision_manual',
-                        prioridad='media',
-                        motivo='Solicitud escalada por evaluador',
-                        descripcion_detallada=comentario or 'Requiere revisión manual del supervisor',
-                        escalado_por=request.user
-                    )
-                    messages.success(request, f"Solicitud escalada exitosamente. Código: {escalamiento.codigo}")
-                except Exception as e:
-                    messages.error(request, f"Error al crear escalamiento: {str(e)}")
-            
-            solicitud.save()
-            return redirect('evaluacion:dashboard')
+
+            from .asignacion import _bloquear_si
+            with transaction.atomic():
+                # Solo decide el evaluador asignado. El mismo UPDATE condicional
+                # de la asignación bloquea la fila hasta guardar la decisión, así
+                # que quien perdió la solicitud no puede aprobarla ni rechazarla.
+                if not _bloquear_si(solicitud.id, evaluador_asignado_id=request.user.id,
+                                    estado__in=ESTADOS_EVALUABLES):
+                    messages.error(request, "Esta solicitud ya está asignada a otro evaluador.")
+                    return redirect('evaluacion:dashboard')
+                solicitud.refresh_from_db()
+                error = _validar_capacidad(request, solicitud, form.cleaned_data) if accion == 'aprobar' else None
+                if error is None:
+                    _registrar_decision(request, solicitud, accion, comentario)
+            if error is None:
+                return redirect('evaluacion:dashboard')
+            form.add_error('justificacion_capacidad', error)
         else:
             messages.error(request, "Por favor corrige los errores en el formulario.")
     elif request.method == 'POST' and not puede_evaluar:
@@ -242,6 +330,12 @@ def evaluar_solicitud(request, solicitud_id):
 
     # Obtener vehículos y documentos de la solicitud
     vehiculos = solicitud.vehiculos.all()
+
+    # Ocupación del destino durante la ventana de acceso
+    capacidad = []
+    if puede_evaluar:
+        from solicitudes.capacidad import evaluar_capacidad
+        capacidad = evaluar_capacidad(solicitud)
     documentos = solicitud.documentos.all()
 
     # Obtener personal asignado
@@ -292,6 +386,8 @@ def evaluar_solicitud(request, solicitud_id):
         'servicios': servicios,
         'documentos_servicios': documentos_servicios,
         'puede_evaluar': puede_evaluar,
+        'capacidad': capacidad,
+        'capacidad_excedida': any(ambito['excede'] for ambito in capacidad),
         'eventos': eventos,
         'eventos_json': eventos_json
     }
@@ -1082,7 +1178,7 @@ def mis_solicitudes(request):
     prioridad_filtro = request.GET.get('prioridad', '')
     
     # Obtener solicitudes asignadas al usuario actual
-    solicitudes_queryset = Solicitud.objects.filter(
+    solicitudes_queryset = Solicitud.objects.con_urgencia().filter(
         evaluador_asignado=request.user
     ).select_related(
         'empresa', 'puerto_destino', 'motivo_acceso', 'solicitante'
@@ -1115,6 +1211,11 @@ def mis_solicitudes(request):
         'documentos_pendientes': solicitudes_queryset.filter(estado='documentos_faltantes').count(),
     }
     
+    # Ordenar por urgencia en SQL
+    orden = request.GET.get('orden', '')
+    if orden == 'urgencia':
+        solicitudes_queryset = solicitudes_queryset.por_urgencia()
+    
     # Paginación
     per_page = request.GET.get('per_page', '25')
     try:
@@ -1138,6 +1239,7 @@ def mis_solicitudes(request):
         'busqueda': busqueda,
         'estado_filtro': estado_filtro,
         'prioridad_filtro': prioridad_filtro,
+        'orden': orden,
         'tiene_filtros': tiene_filtros,
         'is_paginated': page_obj.has_other_pages(),
     }
@@ -1155,7 +1257,7 @@ def nuevas_solicitudes(request):
     prioridad_filtro = request.GET.get('prioridad', '')
     
     # Obtener solicitudes sin asignar
-    solicitudes_queryset = Solicitud.objects.filter(
+    solicitudes_queryset = Solicitud.objects.con_urgencia().filter(
         estado='sin_asignar'
     ).select_related(
         'empresa', 'puerto_destino', 'motivo_acceso', 'solicitante'
@@ -1186,6 +1288,11 @@ def nuevas_solicitudes(request):
         'hoy': solicitudes_queryset.filter(creada_el__date=timezone.now().date()).count(),
     }
     
+    # Ordenar por urgencia en SQL
+    orden = request.GET.get('orden', '')
+    if orden == 'urgencia':
+        solicitudes_queryset = solicitudes_queryset.por_urgencia()
+    
     # Paginación
     per_page = request.GET.get('per_page', '25')
     try:
@@ -1207,12 +1314,31 @@ def nuevas_solicitudes(request):
         'stats': stats,
         'busqueda': busqueda,
         'prioridad_filtro': prioridad_filtro,
+        'orden': orden,
         'tiene_filtros': tiene_filtros,
         'is_paginated': paginator.num_pages > 1,
     }
     
     return render(request, 'evaluacion/nuevas_solicitudes.html', context)
 
+@login_required
+@role_required('evaluador')
+def tomar_siguiente(request):
+    """Toma la solicitud sin asignar más urgente y abre su evaluación"""
+    from .asignacion import reclamar_siguiente
+
+    if request.method != 'POST':
+        return redirect('evaluacion:nuevas_solicitudes')
+
+    solicitud = reclamar_siguiente(request.user)
+    if solicitud is None:
+        messages.info(request, "No hay solicitudes sin asignar en este momento.")
+        return redirect('evaluacion:nuevas_solicitudes')
+
+    messages.success(request, f"Solicitud {solicitud.codigo} asignada a usted.")
+    return redirect('evaluacion:evaluar_solicitud', solicitud_id=solicitud.id)
+
+
 @login_required
 @role_required('evaluador')
 def asignar_evaluador(request, solicitud_id):
@@ -1238,23 +1364,32 @@ def asignar_evaluador(request, solicitud_id):
         else:
             return JsonResponse({'success': False, 'error': 'Debe seleccionar un evaluador'})
 
-    # GET request - obtener evaluadores disponibles
-    evaluadores = User.objects.filter(role='evaluador', is_active=True).exclude(id=request.user.id)
+    # GET request - obtener evaluadores disponibles con su carga en una consulta
+    from .asignacion import MotorAsignacion
+
+    evaluadores = User.objects.filter(role='evaluador', is_active=True).annotate(
+        en_revision=Count('solicitudes_asignadas', filter=Q(solicitudes_asignadas__estado='en_revision'))
+    )
+    carga = {ev.id: ev.en_revision for ev in evaluadores}
+    sugerido = MotorAsignacion().seleccionar(
+        list(solicitud.servicios_solicitados.values_list('id', flat=True))
+    )
 
     return JsonResponse({
         'usuario_actual': {
             'id': request.user.id,
             'nombre': request.user.get_display_name(),
-            'solicitudes_asignadas': request.user.solicitudes_asignadas.filter(estado='en_revision').count()
+            'solicitudes_asignadas': carga.get(request.user.id, 0)
         },
         'evaluadores': [
             {
                 'id': eval.id,
                 'nombre': eval.get_display_name(),
-                'solicitudes_asignadas': eval.solicitudes_asignadas.filter(estado='en_revision').count()
+                'solicitudes_asignadas': eval.en_revision
             }
-            for eval in evaluadores
-        ]
+            for eval in evaluadores if eval.id != request.user.id
+        ],
+        'sugerido': sugerido
     })
 
 
@@ -1611,8 +1746,8 @@ def dashboard_rendimiento(request):
     tasa_aprobacion = round((aprobadas / total_solicitudes * 100), 1) if total_solicitudes > 0 else 0
     tasa_rechazo = round((rechazadas / total_solicitudes * 100), 1) if total_solicitudes > 0 else 0
 
-    # Tiempo promedio de evaluación (simulado - se puede calcular real)
-    tiempo_promedio_evaluacion = 2.3  # días
+    # Mediana de días desde el envío hasta la decisión (actualizar_tiempos_estado)
+    tiempo_promedio_evaluacion = TiempoEnEstado.dias_resolucion()
 
     context = {
         'stats': {
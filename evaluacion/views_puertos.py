@@ -9,6 +9,15 @@ from accounts.decorators import role_required
 from solicitudes.models import Puerto, LugarPuerto
 
 
+def _capacidad(valor):
+    """Capacidad máxima del formulario; vacía o no positiva = sin límite"""
+    try:
+        capacidad = int((valor or '').strip())
+    except ValueError:
+        return None
+    return capacidad if capacidad > 0 else None
+
+
 @role_required('evaluador', 'supervisor', 'admin_tic')
 def gestion_puertos(request):
     """Vista principal para gestión de puertos y lugares"""
@@ -72,6 +81,7 @@ def crear_puerto(request):
                 codigo=codigo,
                 ubicacion=ubicacion,
                 descripcion=descripcion,
+                capacidad_maxima=_capacidad(request.POST.get('capacidad_maxima')),
                 activo=True
             )
 
@@ -121,6 +131,7 @@ def editar_puerto(request, puerto_id):
             puerto.codigo = codigo
             puerto.ubicacion = ubicacion
             puerto.descripcion = descripcion
+            puerto.capacidad_maxima = _capacidad(request.POST.get('capacidad_maxima'))
             puerto.activo = activo
             puerto.save()
 
@@ -382,4 +393,51 @@ def get_lugares_puerto(request, puerto_id):
         return JsonResponse({
             'success': False,
             'error': str(e)
-        })
\ No newline at end of file
+        })
+
+
+@login_required
+@role_required('evaluador', 'supervisor', 'admin_tic')
+def mapa_capacidad(request, puerto_id):
+    """
+    Mapa de calor de ocupación aprobada de un puerto (o de uno de sus
+    lugares con ?lugar=). Parámetros: desde (AAAA-MM-DD, por defecto hoy),
+    dias (1-366, por defecto 7) y horas por tramo (por defecto 1).
+    """
+    from datetime import date, timedelta
+    from solicitudes.capacidad import mapa_calor, rango_dias
+
+    puerto = get_object_or_404(Puerto, pk=puerto_id)
+    lugar = None
+    if request.GET.get('lugar'):
+        lugar = get_object_or_404(LugarPuerto, pk=request.GET['lugar'], puerto=puerto)
+
+    try:
+        inicio = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else timezone.localdate()
+        dias = min(max(int(request.GET.get('dias', 7)), 1), 366)
+        horas = min(max(int(request.GET.get('horas', 1)), 1), 24 * 7)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parámetros inválidos'}, status=400)
+
+    desde, hasta = rango_dias(inicio, dias)
+    tramos = mapa_calor(
+        desde, hasta, timedelta(hours=horas),
+        puerto_id=puerto.pk, lugar_id=lugar.pk if lugar else None,
+    )
+    capacidad = lugar.capacidad_maxima if lugar else puerto.capacidad_maxima
+
+    return JsonResponse({
+        'success': True,
+        'puerto': puerto.nombre,
+        'lugar': lugar.nombre if lugar else None,
+        'capacidad': capacidad,
+        'horas_por_tramo': horas,
+        'tramos': [
+            {
+                'inicio': timezone.localtime(momento).isoformat(),
+                'pico': pico,
+                'porcentaje': round(pico * 100 / capacidad) if capacidad else None,
+            }
+            for momento, pico in tramos
+        ],
+    })
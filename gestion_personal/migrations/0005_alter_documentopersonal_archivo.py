@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:14
+
+from django.db import migrations, models
+import solicitudes.almacenamiento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_personal', '0004_persona_cargo_persona_licencia_conducir'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentopersonal',
+            name='archivo',
+            field=models.FileField(help_text='Archivo del documento (PDF, JPG, PNG máx. 5MB)', storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='documentos/personal/%Y/%m/'),
+        ),
+    ]
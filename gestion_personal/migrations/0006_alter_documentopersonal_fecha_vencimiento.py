@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_personal', '0005_alter_documentopersonal_archivo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentopersonal',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, db_index=True, help_text='Fecha de vencimiento del documento', null=True),
+        ),
+    ]
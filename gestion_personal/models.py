@@ -3,6 +3,8 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 import re
 
+from solicitudes.almacenamiento import almacenamiento_documentos
+
 
 def validate_cedula_dominicana(value):
     """Validar formato de cédula dominicana (XXX-XXXXXXX-X)"""
@@ -165,11 +167,13 @@ class DocumentoPersonal(models.Model):
     )
     archivo = models.FileField(
         upload_to='documentos/personal/%Y/%m/',
+        storage=almacenamiento_documentos,
         help_text="Archivo del documento (PDF, JPG, PNG máx. 5MB)"
     )
     fecha_vencimiento = models.DateField(
         blank=True,
         null=True,
+        db_index=True,
         help_text="Fecha de vencimiento del documento"
     )
     estado_validacion = models.CharField(
@@ -10,6 +10,9 @@ from accounts.decorators import role_required
 from .models import Persona, DocumentoPersonal
 from .forms import PersonaForm, DocumentoPersonalForm
 
+# Roles que pueden ver documentos de cualquier empresa (evaluación)
+ROLES_LECTURA_DOCUMENTOS = ('evaluador', 'supervisor', 'admin_tic', 'direccion')
+
 
 @login_required
 def dashboard(request):
@@ -306,10 +309,15 @@ def validar_documento_personal(request, documento_id):
 def descargar_documento_personal(request, documento_id):
     """Descargar archivo de documento personal"""
     import os
-    from django.http import FileResponse
-    from django.conf import settings
+    from solicitudes.almacenamiento import extension_de, tipo_contenido
+    from solicitudes.entrega_archivos import servir_archivo
 
-    documento = get_object_or_404(DocumentoPersonal, id=documento_id)
+    documento = get_object_or_404(DocumentoPersonal.objects.select_related('persona'), id=documento_id)
+
+    # Solo la empresa propietaria y el personal de evaluación pueden verlo
+    if documento.persona.empresa != request.user and request.user.role not in ROLES_LECTURA_DOCUMENTOS:
+        messages.error(request, 'No tienes permisos para ver este documento.')
+        return redirect('gestion_personal:dashboard')
 
     if not documento.archivo:
         messages.error(request, 'No hay archivo asociado a este documento.')
@@ -323,26 +331,15 @@ def descargar_documento_personal(request, documento_id):
         return redirect('gestion_personal:detalle_persona', persona_id=documento.persona.id)
 
     try:
-        # Determinar el tipo de contenido
-        file_extension = os.path.splitext(file_path)[1].lower()
-        content_types = {
-            '.pdf': 'application/pdf',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-        }
-        content_type = content_types.get(file_extension, 'application/octet-stream')
+        # Tipo y extensión del contenido (la ruta deduplicada no lleva extensión)
+        content_type = tipo_contenido(documento.archivo.name)
+        file_extension = extension_de(documento.archivo.name)
 
         # Crear nombre de archivo descriptivo
         safe_filename = f"{documento.persona.nombre}_{documento.persona.apellido}_{documento.get_tipo_documento_display()}{file_extension}"
 
-        response = FileResponse(
-            open(file_path, 'rb'),
-            content_type=content_type,
-            as_attachment=False  # Para vista previa en navegador
-        )
-        response['Content-Disposition'] = f'inline; filename="{safe_filename}"'
-        return response
+        # Vista previa en navegador; la transferencia la hace el servidor web si está configurado
+        return servir_archivo(request, file_path, safe_filename, content_type=content_type)
 
     except Exception as e:
         messages.error(request, f'Error al abrir el archivo: {str(e)}')
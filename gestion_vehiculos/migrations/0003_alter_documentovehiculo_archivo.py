@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:14
+
+from django.db import migrations, models
+import solicitudes.almacenamiento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vehiculos', '0002_vehiculo_mejoras_notas_inhabilitacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentovehiculo',
+            name='archivo',
+            field=models.FileField(help_text='Archivo del documento (PDF, JPG, PNG máx. 5MB)', storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='documentos/vehiculos/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vehiculos', '0003_alter_documentovehiculo_archivo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentovehiculo',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, db_index=True, help_text='Fecha de vencimiento del documento', null=True),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 import re
 
+from solicitudes.almacenamiento import almacenamiento_documentos
+
 
 def validate_placa_dominicana(value):
     """Validar formato de placa dominicana (A123456 o AB123456)"""
@@ -182,11 +184,13 @@ class DocumentoVehiculo(models.Model):
     )
     archivo = models.FileField(
         upload_to='documentos/vehiculos/%Y/%m/',
+        storage=almacenamiento_documentos,
         help_text="Archivo del documento (PDF, JPG, PNG máx. 5MB)"
     )
     fecha_vencimiento = models.DateField(
         blank=True,
         null=True,
+        db_index=True,
         help_text="Fecha de vencimiento del documento"
     )
     estado_validacion = models.CharField(
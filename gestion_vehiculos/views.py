@@ -1,7 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, FileResponse
+from django.http import JsonResponse, HttpResponse
 from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -12,6 +12,9 @@ from accounts.decorators import role_required
 from .models import Vehiculo, DocumentoVehiculo
 from .forms import VehiculoForm, DocumentoVehiculoForm
 
+# Roles que pueden ver documentos de cualquier empresa (evaluación)
+ROLES_LECTURA_DOCUMENTOS = ('evaluador', 'supervisor', 'admin_tic', 'direccion')
+
 
 @login_required
 def dashboard(request):
@@ -348,14 +351,13 @@ def editar_documento_vehiculo(request, documento_id):
                     messages.error(request, 'Formato de archivo no permitido. Use PDF, JPG o PNG.')
                     return render(request, 'gestion_vehiculos/editar_documento.html', {'documento': documento})
 
-                # Eliminar archivo anterior si existe
+                # Liberar archivo anterior si existe (puede estar compartido con
+                # otros documentos: el almacenamiento decide si se borra)
                 if documento.archivo:
-                    old_file_path = documento.archivo.path
-                    if os.path.exists(old_file_path):
-                        try:
-                            os.remove(old_file_path)
-                        except OSError:
-                            pass  # No detener el proceso si no se puede eliminar el archivo anterior
+                    try:
+                        documento.archivo.delete(save=False)
+                    except OSError:
+                        pass  # No detener el proceso si no se puede eliminar el archivo anterior
 
                 # Asignar nuevo archivo
                 documento.archivo = nuevo_archivo
@@ -411,7 +413,15 @@ def validar_documento_vehiculo(request, documento_id):
 @login_required
 def descargar_documento_vehiculo(request, documento_id):
     """Descargar archivo de documento de vehículo"""
-    documento = get_object_or_404(DocumentoVehiculo, id=documento_id)
+    from solicitudes.almacenamiento import extension_de, tipo_contenido
+    from solicitudes.entrega_archivos import servir_archivo
+
+    documento = get_object_or_404(DocumentoVehiculo.objects.select_related('vehiculo'), id=documento_id)
+
+    # Solo la empresa propietaria y el personal de evaluación pueden verlo
+    if documento.vehiculo.empresa_propietaria != request.user and request.user.role not in ROLES_LECTURA_DOCUMENTOS:
+        messages.error(request, 'No tienes permisos para ver este documento.')
+        return redirect('gestion_vehiculos:dashboard')
 
     if not documento.archivo:
         messages.error(request, 'No hay archivo asociado a este documento.')
@@ -425,26 +435,15 @@ def descargar_documento_vehiculo(request, documento_id):
         return redirect('gestion_vehiculos:detalle_vehiculo', vehiculo_id=documento.vehiculo.id)
 
     try:
-        # Determinar el tipo de contenido
-        file_extension = os.path.splitext(file_path)[1].lower()
-        content_types = {
-            '.pdf': 'application/pdf',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-        }
-        content_type = content_types.get(file_extension, 'application/octet-stream')
+        # Tipo y extensión del contenido (la ruta deduplicada no lleva extensión)
+        content_type = tipo_contenido(documento.archivo.name)
+        file_extension = extension_de(documento.archivo.name)
 
         # Crear nombre de archivo descriptivo
         safe_filename = f"{documento.vehiculo.placa}_{documento.get_tipo_documento_display()}{file_extension}"
 
-        response = FileResponse(
-            open(file_path, 'rb'),
-            content_type=content_type,
-            as_attachment=False  # Para vista previa en navegador
-        )
-        response['Content-Disposition'] = f'inline; filename="{safe_filename}"'
-        return response
+        # Vista previa en navegador; la transferencia la hace el servidor web si está configurado
+        return servir_archivo(request, file_path, safe_filename, content_type=content_type)
 
     except Exception as e:
         messages.error(request, f'Error al abrir el archivo: {str(e)}')
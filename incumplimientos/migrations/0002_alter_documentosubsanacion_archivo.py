@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:14
+
+import django.core.validators
+from django.db import migrations, models
+import solicitudes.almacenamiento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incumplimientos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentosubsanacion',
+            name='archivo',
+            field=models.FileField(help_text='Documento de soporte (PDF, imagen o documento Word)', storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='incumplimientos/subsanaciones/%Y/%m/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'])], verbose_name='Archivo'),
+        ),
+    ]
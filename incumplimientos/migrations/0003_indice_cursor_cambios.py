@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incumplimientos', '0002_alter_documentosubsanacion_archivo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incumplimiento',
+            index=models.Index(fields=['fecha_modificacion', 'id'], name='incumplimie_fecha_m_44e542_idx'),
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.utils import timezone
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
 
+from solicitudes.almacenamiento import almacenamiento_documentos
+
+
 class Incumplimiento(models.Model):
     """
     Modelo para registrar incumplimientos de proveedores de servicio.
@@ -148,6 +151,8 @@ class Incumplimiento(models.Model):
             models.Index(fields=['solicitud', 'estado']),
             models.Index(fields=['reportado_por', 'fecha_reporte']),
             models.Index(fields=['estado']),
+            # Cursor del feed de cambios (reportes/cambios.py)
+            models.Index(fields=['fecha_modificacion', 'id']),
         ]
 
     def __str__(self):
@@ -382,6 +387,7 @@ class DocumentoSubsanacion(models.Model):
 
     archivo = models.FileField(
         upload_to='incumplimientos/subsanaciones/%Y/%m/',
+        storage=almacenamiento_documentos,
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx'])],
         verbose_name='Archivo',
         help_text='Documento de soporte (PDF, imagen o documento Word)'
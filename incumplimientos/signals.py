@@ -1,13 +1,13 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Incumplimiento, SolicitudSubsanacion, RespuestaSubsanacion
-from notificaciones.services.email_service import EmailService
+from notificaciones.services import despachar_notificacion
 
 
 @receiver(post_save, sender=Incumplimiento)
 def notificar_incumplimiento_reportado(sender, instance, created, **kwargs):
     """Notifica cuando se reporta un incumplimiento nuevo"""
-    if created:
+    if created and not kwargs.get('raw'):
         # Notificar a la empresa
         if instance.solicitud.empresa:
             empresa_emails = [user.email for user in instance.solicitud.empresa.usuarios.filter(es_admin_empresa=True) if user.email]
@@ -22,7 +22,7 @@ def notificar_incumplimiento_reportado(sender, instance, created, **kwargs):
                     'solicitud_id': instance.solicitud.id,
                 }
                 
-                EmailService.enviar_notificacion(
+                despachar_notificacion(
                     codigo_evento='incumplimiento_reportado',
                     contexto=contexto,
                     destinatarios_adicionales=empresa_emails,
@@ -33,7 +33,7 @@ def notificar_incumplimiento_reportado(sender, instance, created, **kwargs):
 @receiver(post_save, sender=SolicitudSubsanacion)
 def notificar_subsanacion_solicitada(sender, instance, created, **kwargs):
     """Notifica cuando se solicita una subsanación"""
-    if created:
+    if created and not kwargs.get('raw'):
         # Notificar a la empresa
         empresa = instance.incumplimiento.solicitud.empresa
         if empresa:
@@ -48,7 +48,7 @@ def notificar_subsanacion_solicitada(sender, instance, created, **kwargs):
                     'fecha_limite': instance.fecha_limite,
                 }
                 
-                EmailService.enviar_notificacion(
+                despachar_notificacion(
                     codigo_evento='subsanacion_solicitada',
                     contexto=contexto,
                     destinatarios_adicionales=empresa_emails,
@@ -59,7 +59,7 @@ def notificar_subsanacion_solicitada(sender, instance, created, **kwargs):
 @receiver(post_save, sender=RespuestaSubsanacion)
 def notificar_subsanacion_respondida(sender, instance, created, **kwargs):
     """Notifica cuando la empresa responde una subsanación"""
-    if created:
+    if created and not kwargs.get('raw'):
         # Notificar al supervisor que solicitó la subsanación
         supervisor = instance.solicitud_subsanacion.solicitado_por
         
@@ -71,7 +71,7 @@ def notificar_subsanacion_respondida(sender, instance, created, **kwargs):
                 'respondido_por': instance.respondido_por.get_full_name(),
             }
             
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='subsanacion_respondida',
                 contexto=contexto,
                 destinatarios_adicionales=[supervisor.email],
@@ -94,7 +94,7 @@ def notificar_subsanacion_respondida(sender, instance, created, **kwargs):
                         'revisado_por': instance.revisado_por.get_full_name() if instance.revisado_por else 'N/A',
                     }
                     
-                    EmailService.enviar_notificacion(
+                    despachar_notificacion(
                         codigo_evento='subsanacion_revisada',
                         contexto=contexto,
                         destinatarios_adicionales=empresa_emails,
@@ -3,6 +3,13 @@ ASGI config for naviport project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production server for the live dashboards (notificaciones/en_vivo.py), which
+keep one streaming response open per client:
+
+    uvicorn naviport.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Under WSGI the dashboards fall back to polling every EN_VIVO_REINTENTO_WSGI_MS.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
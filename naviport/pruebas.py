@@ -0,0 +1,116 @@
+"""
+Datos mínimos para las pruebas de las apps (``from naviport.pruebas import ...``).
+
+Cada función crea solo lo que el modelo exige; los argumentos con nombre
+sobrescriben los valores por defecto.
+"""
+import itertools
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+_secuencia = itertools.count(1)
+
+
+def crear_usuario(role='solicitante', **extra):
+    from accounts.models import User
+
+    n = next(_secuencia)
+    datos = {
+        'username': f'{role}{n}',
+        'email': f'{role}{n}@naviport.test',
+        'cedula_rnc': f'001-{n:07d}-1',
+        'first_name': role.capitalize(),
+        'last_name': str(n),
+        'role': role,
+    }
+    datos.update(extra)
+    return User.objects.create_user(password='clave-de-prueba', **datos)
+
+
+def crear_empresa(representante=None, **extra):
+    from accounts.models import Empresa
+
+    n = next(_secuencia)
+    datos = {
+        'rnc': f'1{n:08d}',
+        'nombre': f'Empresa {n}',
+        'email': f'empresa{n}@naviport.test',
+        'representante_legal': representante or crear_usuario(),
+    }
+    datos.update(extra)
+    return Empresa.objects.create(**datos)
+
+
+def crear_puerto(**extra):
+    from solicitudes.models import Puerto
+
+    n = next(_secuencia)
+    datos = {'nombre': f'Puerto {n}', 'codigo': f'P{n}'}
+    datos.update(extra)
+    return Puerto.objects.create(**datos)
+
+
+def crear_lugar(puerto, **extra):
+    from solicitudes.models import LugarPuerto
+
+    n = next(_secuencia)
+    datos = {'puerto': puerto, 'nombre': f'Muelle {n}', 'codigo': f'M{n}'}
+    datos.update(extra)
+    return LugarPuerto.objects.create(**datos)
+
+
+def crear_solicitud(estado='pendiente', placas=('A000001',), inicio=None, horas=8, **extra):
+    """Solicitud con su ventana de acceso [inicio, inicio + horas) y un vehículo por placa"""
+    from solicitudes.models import MotivoAcceso, Solicitud, Vehiculo
+
+    inicio = timezone.localtime(inicio or timezone.now() - timedelta(hours=1))
+    fin = inicio + timedelta(hours=horas)
+    solicitante = extra.pop('solicitante', None) or crear_usuario()
+    datos = {
+        'solicitante': solicitante,
+        'empresa': extra.pop('empresa', None) or crear_empresa(representante=solicitante),
+        'puerto_destino': extra.pop('puerto_destino', None) or crear_puerto(),
+        'motivo_acceso': MotivoAcceso.objects.get_or_create(nombre='Carga')[0],
+        'fecha_ingreso': inicio.date(),
+        'hora_ingreso': inicio.time().replace(microsecond=0),
+        'fecha_salida': fin.date(),
+        'hora_salida': fin.time().replace(microsecond=0),
+        'descripcion': 'Solicitud de prueba',
+        'estado': estado,
+    }
+    datos.update(extra)
+    solicitud = Solicitud.objects.create(**datos)
+    for placa in placas:
+        Vehiculo.objects.create(
+            solicitud=solicitud, placa=placa, tipo_vehiculo='camion', conductor_nombre=f'Conductor {placa}',
+        )
+    return solicitud
+
+
+def crear_autorizacion(solicitud=None, **extra):
+    """Autorización activa con la ventana y los vehículos de la solicitud"""
+    from control_acceso.models import Autorizacion
+
+    solicitud = solicitud or crear_solicitud(estado='aprobada')
+    return Autorizacion.objects.create(solicitud=solicitud, **extra)
+
+
+class PruebaConMedia(TestCase):
+    """TestCase con MEDIA_ROOT en un directorio temporal que se borra al terminar"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media = tempfile.mkdtemp(prefix='naviport-pruebas-')
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media)
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls._media, ignore_errors=True)
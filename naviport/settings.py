@@ -52,6 +52,9 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # API REST para escáneres de garita y clientes móviles
+    'rest_framework',
+    'rest_framework.authtoken',
     # Apps del sistema
     'accounts',
     'solicitudes',
@@ -108,6 +111,24 @@ DATABASES = {
 }
 
 
+# Cache
+# En producción con varios procesos conviene un backend compartido
+# (Redis/Memcached) para que el limitador de peticiones, la página pública
+# de verificación y los contadores de ocupación se compartan entre workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'naviport-default',
+    }
+}
+
+# Limitador de peticiones (control_acceso/limitador.py)
+# Proxies inversos propios delante de la aplicación (Azure App Service: 1).
+# Con 0 se usa REMOTE_ADDR; si no, la IP del cliente anónimo se toma de
+# X-Forwarded-For. Los usuarios autenticados se limitan por usuario.
+LIMITADOR_PROXIES_CONFIABLES = 0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -156,6 +177,106 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# API REST (Django REST framework)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Tokens firmados en el QR para verificación offline en garita (Ed25519).
+# QR_FIRMA_CLAVES: {kid: clave privada}, en PEM (PKCS8) o como semilla de 32
+# bytes en base64url; se firma con QR_FIRMA_CLAVE_ACTIVA y se aceptan todas
+# las claves del juego (rotación). Los dispositivos solo reciben las claves
+# públicas (api/v1/control-acceso/qr/claves/). Sin claves configuradas se
+# deriva una de SECRET_KEY.
+QR_INCLUIR_TOKEN_FIRMADO = False
+QR_FIRMA_CLAVES = {}
+QR_FIRMA_CLAVE_ACTIVA = None
+
+# Entrega de archivos protegidos (descargas de documentos).
+# None: Django sirve el archivo (con Range/ETag). 'x-accel-redirect' (nginx)
+# o 'x-sendfile' (Apache/lighttpd): el servidor web transfiere el archivo.
+ENTREGA_ARCHIVOS_MODO = None
+ENTREGA_ARCHIVOS_PREFIJO_INTERNO = '/protegido/'
+
+# Despacho de efectos secundarios (emails, QR) tras el commit de la transacción
+# SQLite no admite escrituras concurrentes desde otros hilos sin bloqueos,
+# por lo que con SQLite las tareas se ejecutan en el mismo hilo tras el commit.
+DESPACHO_HILOS = 2
+DESPACHO_SINCRONO = DATABASES['default']['ENGINE'].endswith('sqlite3')
+
+# Asignación de solicitudes a evaluadores (evaluacion/asignacion.py)
+# Políticas: 'round_robin', 'menos_cargado', 'habilidades'.
+# Con ASIGNACION_AUTOMATICA cada solicitud enviada se asigna al recibirse;
+# si no, el comando asignar_solicitudes reparte la cola pendiente.
+ASIGNACION_POLITICA = 'menos_cargado'
+ASIGNACION_AUTOMATICA = False
+# Segundos que cada proceso conserva las cargas de los evaluadores, ajustadas
+# con cada cambio de solicitud, antes de releerlas (cambios de otros procesos)
+ASIGNACION_CARGAS_SEGUNDOS = 60
+
+# Alertas a supervisores (supervisor/planificador.py, comando planificar_alertas)
+# Minutos de anticipación antes de vence_el (VIP/críticas) y de tiempo_limite
+ALERTAS_AVISOS_SOLICITUD = (60, 15)
+ALERTAS_AVISOS_ESCALAMIENTO = (60, 15)
+
+# Ocupación en tiempo real (control_acceso/ocupacion.py)
+# Segundos que vive un contador por puerto/lugar en la caché antes de volver
+# a calcularse con un COUNT. Con un backend compartido (Redis) los contadores
+# son exactos y puede subirse; con LocMemCache cada worker tiene los suyos y
+# este valor es el desfase máximo entre procesos.
+OCUPACION_CONTADORES_SEGUNDOS = 30
+
+# Barrido de permanencias (control_acceso/permanencias.py, comando barrer_permanencias)
+# Minutos de gracia después de valida_hasta antes de marcar una permanencia excedida
+PERMANENCIA_TOLERANCIA_MINUTOS = 30
+
+# Archivo histórico (solicitudes/archivo.py, comando archivar_solicitudes)
+# Meses desde el cierre tras los cuales una solicitud sale de las tablas activas
+ARCHIVO_MESES = 12
+
+# Retención de logs de notificaciones (comando depurar_logs_notificaciones)
+NOTIFICACIONES_RETENCION_DIAS = 180
+NOTIFICACIONES_RETENCION_ERRORES_DIAS = 365
+
+# Actualizaciones en vivo de los dashboards (notificaciones/en_vivo.py)
+# Con ASGI (uvicorn naviport.asgi:application) el flujo queda abierto y
+# consulta eventos nuevos cada EN_VIVO_INTERVALO segundos hasta
+# EN_VIVO_DURACION; el navegador reconecta a los EN_VIVO_REINTENTO_MS.
+# Con WSGI cada petición devuelve lo pendiente y el navegador vuelve a
+# preguntar a los EN_VIVO_REINTENTO_WSGI_MS (la antigua recarga de 5 minutos).
+# El cursor solo avanza sobre eventos con más de EN_VIVO_MARGEN_SEGUNDOS para
+# no saltarse transacciones que aún no confirmaron.
+EN_VIVO_INTERVALO = 2
+EN_VIVO_DURACION = 300
+EN_VIVO_REINTENTO_MS = 15000
+EN_VIVO_REINTENTO_WSGI_MS = 300000
+EN_VIVO_MARGEN_SEGUNDOS = 10
+EN_VIVO_RETENCION_HORAS = 24
+
+# Feed de cambios para sincronización (reportes/cambios.py, api/v1/cambios/)
+# Solo se entregan cambios con más de CAMBIOS_MARGEN_SEGUNDOS de antigüedad
+# para no saltarse transacciones que aún no confirmaron. Las lápidas de
+# registros eliminados se depuran tras CAMBIOS_RETENCION_ELIMINADOS_DIAS
+# (comando depurar_registros_eliminados); un cursor anterior debe resincronizar.
+CAMBIOS_MARGEN_SEGUNDOS = 30
+CAMBIOS_LIMITE = 500
+CAMBIOS_LIMITE_MAXIMO = 5000
+CAMBIOS_RETENCION_ELIMINADOS_DIAS = 90
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Para desarrollo - imprime en consola
 DEFAULT_FROM_EMAIL = 'noreply@naviportrd.com'
@@ -97,6 +97,10 @@ urlpatterns = [
     path('debug-admin/', debug_admin, name='debug_admin'),
     # Ruta pública de verificación (debe ir antes de las rutas con login)
     path('verificar/<uuid:uuid>/', verificar_autorizacion_publica, name='verificar_autorizacion_publica'),
+    # API REST versionada para escáneres de garita y clientes móviles
+    path('api/v1/control-acceso/', include('control_acceso.api.urls')),
+    # Feed de cambios incremental para sincronización (BI, garitas, integraciones)
+    path('api/v1/cambios/', include('reportes.api.urls')),
     path('accounts/', include('accounts.urls')),
     path('solicitudes/', include('solicitudes.urls')),
     path('evaluacion/', include('evaluacion.urls')),
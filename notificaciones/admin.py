@@ -115,7 +115,7 @@ class LogNotificacionAdmin(admin.ModelAdmin):
     list_display = ['evento', 'asunto', 'estado', 'exitoso', 'fecha_creacion', 'fecha_envio']
     list_filter = ['estado', 'exitoso', 'evento', 'fecha_creacion']
     search_fields = ['asunto', 'destinatarios', 'mensaje_error']
-    readonly_fields = ['evento', 'destinatarios', 'asunto', 'mensaje_html', 'mensaje_texto',
+    readonly_fields = ['evento', 'destinatarios', 'asunto', 'plantilla', 'mensaje_html', 'mensaje_texto',
                        'estado', 'exitoso', 'mensaje_error', 'metadata', 'fecha_creacion', 'fecha_envio']
 
     fieldsets = (
@@ -123,7 +123,7 @@ class LogNotificacionAdmin(admin.ModelAdmin):
             'fields': ('evento', 'estado', 'exitoso', 'destinatarios', 'asunto')
         }),
         ('Contenido del Mensaje', {
-            'fields': ('mensaje_html', 'mensaje_texto'),
+            'fields': ('plantilla', 'mensaje_html', 'mensaje_texto'),
             'classes': ('collapse',)
         }),
         ('Resultado', {
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NotificacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notificaciones'
+
+    def ready(self):
+        """Publicar los cambios para las actualizaciones en vivo de los dashboards"""
+        from .en_vivo import conectar
+        conectar()
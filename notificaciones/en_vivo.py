@@ -0,0 +1,217 @@
+"""
+Actualizaciones en vivo de los dashboards (server-sent events).
+
+Los cambios que interesan a un dashboard abierto (solicitudes que entran a
+la cola o cambian de estado, asignaciones, registros de acceso y alertas) se
+publican como deltas JSON pequeños en EventoEnVivo, dentro de la misma
+transacción que el cambio (si se revierte, el evento también). El navegador
+se suscribe a un canal con EventSource y aplica cada delta sobre la página,
+sin recargarla.
+
+El ID del evento es el cursor: el navegador lo reenvía en Last-Event-ID al
+reconectar, así que no se pierden eventos entre conexiones.
+
+- Con transacciones concurrentes un ID menor puede confirmarse después de
+  uno mayor. Los eventos se envían en cuanto son visibles, pero el cursor
+  solo avanza sobre los que tienen más de EN_VIVO_MARGEN_SEGUNDOS; los más
+  recientes se vuelven a leer en la siguiente consulta y el navegador
+  descarta los repetidos por ``evento_id``.
+- Con ASGI (``uvicorn naviport.asgi:application``) la respuesta queda
+  abierta y consulta eventos nuevos cada EN_VIVO_INTERVALO segundos, hasta
+  EN_VIVO_DURACION; al cerrarse el navegador reconecta a los
+  EN_VIVO_REINTENTO_MS.
+- Con WSGI no se puede retener un worker por cliente: cada petición
+  devuelve lo pendiente y termina, y el navegador vuelve a preguntar a los
+  EN_VIVO_REINTENTO_WSGI_MS, el mismo intervalo que la recarga completa del
+  dashboard que reemplaza.
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import EventoEnVivo
+
+# Roles que pueden suscribirse a cada canal
+CANALES = {
+    'evaluacion': ('evaluador', 'supervisor', 'admin_tic'),
+    'control_acceso': ('oficial_acceso', 'supervisor', 'admin_tic'),
+}
+
+# Alertas del sistema que van al canal de control de acceso (el resto a evaluación)
+ALERTAS_CONTROL_ACCESO = ('permanencia_excedida', 'discrepancias_acumuladas')
+
+# Eventos por respuesta; si hay más el cliente los recibe en la siguiente
+MAXIMO_POR_RESPUESTA = 200
+
+# Segundos sin eventos tras los que se envía un comentario para mantener la conexión
+LATIDO = 15
+
+
+def publicar(canal, tipo, datos):
+    """Publica un delta en el canal dentro de la transacción actual"""
+    EventoEnVivo.objects.create(canal=canal, tipo=tipo, datos=datos)
+
+
+# ===========================
+# RECEPTORES
+# ===========================
+
+def publicar_evento_solicitud(sender, instance, created, **kwargs):
+    """Cambios de estado y asignaciones, a partir del timeline de la solicitud"""
+    if not created or kwargs.get('raw'):
+        return
+    metadata = instance.metadata or {}
+    solicitud = instance.solicitud
+    base = {
+        'solicitud_id': solicitud.pk,
+        'codigo': solicitud.codigo,
+        'prioridad': solicitud.prioridad,
+        'evaluador_id': solicitud.evaluador_asignado_id,
+    }
+    if 'estado_nuevo' in metadata or 'estado_inicial' in metadata:
+        estado = metadata.get('estado_nuevo') or metadata.get('estado_inicial')
+        if estado == 'borrador':
+            return
+        publicar('evaluacion', 'solicitud_estado', {
+            **base,
+            'empresa': solicitud.empresa.nombre,
+            'estado_anterior': metadata.get('estado_anterior'),
+            'estado': estado,
+            'estado_display': dict(solicitud.ESTADO_CHOICES).get(estado, estado),
+        })
+    elif 'evaluador_nuevo_id' in metadata:
+        publicar('evaluacion', 'solicitud_asignada', {
+            **base,
+            'estado': solicitud.estado,
+            'evaluador_anterior_id': metadata.get('evaluador_anterior_id'),
+            'evaluador': metadata.get('evaluador_nuevo_nombre'),
+        })
+
+
+def publicar_registro_acceso(sender, instance, created, **kwargs):
+    if not created or kwargs.get('raw'):
+        return
+    publicar('control_acceso', 'acceso_registrado', {
+        'registro_id': instance.pk,
+        'autorizacion': instance.autorizacion.codigo,
+        'puerto': instance.autorizacion.puerto_nombre,
+        'tipo_acceso': instance.tipo_acceso,
+        'estado': instance.estado,
+        'placa': instance.vehiculo_placa,
+        'conductor': instance.conductor_nombre,
+        'oficial_id': instance.oficial_acceso_id,
+        'hora': timezone.localtime(instance.timestamp).strftime('%H:%M'),
+    })
+
+
+def publicar_discrepancia(sender, instance, created, **kwargs):
+    if not created or kwargs.get('raw'):
+        return
+    publicar('control_acceso', 'alerta', {
+        'titulo': f'Discrepancia {instance.codigo}',
+        'mensaje': instance.get_tipo_discrepancia_display(),
+        'nivel': 'advertencia',
+        'reportada_por_id': instance.reportada_por_id,
+    })
+
+
+def publicar_alertas(alertas):
+    """Alertas del sistema (AlertaSistema.crear_para_supervisores), una vez cada una"""
+    for alerta in alertas:
+        canal = 'control_acceso' if alerta['tipo_alerta'] in ALERTAS_CONTROL_ACCESO else 'evaluacion'
+        publicar(canal, 'alerta', {
+            'titulo': alerta['titulo'],
+            'mensaje': alerta['mensaje'],
+            'nivel': alerta.get('nivel', 'info'),
+        })
+
+
+def conectar():
+    """Conecta los receptores (NotificacionesConfig.ready)"""
+    from django.db.models.signals import post_save
+    from control_acceso.models import Discrepancia, RegistroAcceso
+    from solicitudes.models import EventoSolicitud
+
+    post_save.connect(publicar_evento_solicitud, sender=EventoSolicitud, dispatch_uid='en_vivo_evento_solicitud')
+    post_save.connect(publicar_registro_acceso, sender=RegistroAcceso, dispatch_uid='en_vivo_registro_acceso')
+    post_save.connect(publicar_discrepancia, sender=Discrepancia, dispatch_uid='en_vivo_discrepancia')
+
+
+# ===========================
+# FLUJO
+# ===========================
+
+def pendientes(canal, desde):
+    """Eventos del canal posteriores al cursor ``desde``"""
+    return list(
+        EventoEnVivo.objects.filter(canal=canal, id__gt=desde).order_by('id')[:MAXIMO_POR_RESPUESTA]
+    )
+
+
+def cursor_confirmado(eventos, desde):
+    """
+    Hasta dónde puede avanzar el cursor: el último evento con más de
+    EN_VIVO_MARGEN_SEGUNDOS, cuando ya no queda una transacción anterior
+    sin confirmar.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.EN_VIVO_MARGEN_SEGUNDOS)
+    return max([desde] + [evento.pk for evento in eventos if evento.creado_el < limite])
+
+
+def formatear(evento):
+    """Mensaje text/event-stream de un evento (sin ``id``: ver formatear_cursor)"""
+    datos = json.dumps(
+        {**evento.datos, 'evento_id': evento.pk}, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'),
+    )
+    return f'event: {evento.tipo}\ndata: {datos}\n\n'
+
+
+def formatear_cursor(cursor):
+    """Mensaje sin datos: actualiza el Last-Event-ID del navegador sin emitir evento"""
+    return f'id: {cursor}\n\n'
+
+
+def inicio(reintento_ms):
+    return f'retry: {reintento_ms}\n\n'
+
+
+def respuesta_unica(canal, desde):
+    """Cuerpo para WSGI: lo pendiente y fin (el navegador reconecta)"""
+    eventos = pendientes(canal, desde)
+    cuerpo = inicio(settings.EN_VIVO_REINTENTO_WSGI_MS) + ''.join(formatear(evento) for evento in eventos)
+    cursor = cursor_confirmado(eventos, desde)
+    if cursor > desde:
+        cuerpo += formatear_cursor(cursor)
+    return cuerpo
+
+
+async def flujo(canal, desde):
+    """Generador para ASGI: mantiene la conexión hasta EN_VIVO_DURACION"""
+    consultar = sync_to_async(pendientes)
+    yield inicio(settings.EN_VIVO_REINTENTO_MS)
+    # Enviados por encima del cursor, que se vuelven a leer hasta confirmarse
+    enviados = set()
+    fin = time.monotonic() + settings.EN_VIVO_DURACION
+    ultimo_envio = time.monotonic()
+    while time.monotonic() < fin:
+        eventos = await consultar(canal, desde)
+        nuevos = [evento for evento in eventos if evento.pk not in enviados]
+        cursor = cursor_confirmado(eventos, desde)
+        mensaje = ''.join(formatear(evento) for evento in nuevos)
+        if cursor > desde:
+            mensaje += formatear_cursor(cursor)
+        enviados = {pk for pk in enviados if pk > cursor} | {evento.pk for evento in nuevos if evento.pk > cursor}
+        desde = cursor
+        if mensaje:
+            ultimo_envio = time.monotonic()
+            yield mensaje
+        elif time.monotonic() - ultimo_envio >= LATIDO:
+            ultimo_envio = time.monotonic()
+            yield ': latido\n\n'
+        await asyncio.sleep(settings.EN_VIVO_INTERVALO)
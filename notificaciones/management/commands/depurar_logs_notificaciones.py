@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from notificaciones.models import CuerpoNotificacion, EventoEnVivo, LogNotificacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina los logs de notificaciones más antiguos que el período de retención '
+        '(los de envíos con error se conservan más tiempo) y los cuerpos de mensaje '
+        'que ya no usa ningún log, además de los eventos en vivo ya entregados '
+        '(EN_VIVO_RETENCION_HORAS). Programar una vez al día (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.NOTIFICACIONES_RETENCION_DIAS,
+            help=f'Días que se conservan los logs (por defecto {settings.NOTIFICACIONES_RETENCION_DIAS})'
+        )
+        parser.add_argument(
+            '--dias-errores',
+            type=int,
+            default=settings.NOTIFICACIONES_RETENCION_ERRORES_DIAS,
+            help=f'Días que se conservan los logs con error (por defecto {settings.NOTIFICACIONES_RETENCION_ERRORES_DIAS})'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Registros eliminados por transacción (por defecto 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se eliminaría sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        dias, dias_errores = options['dias'], options['dias_errores']
+        if dias < 1 or dias_errores < 1:
+            raise CommandError('Los períodos de retención deben ser de al menos 1 día')
+        lote = max(options['lote'], 1)
+
+        ahora = timezone.now()
+        vencidos = LogNotificacion.objects.filter(
+            Q(fecha_creacion__lt=ahora - timedelta(days=dias)) & ~Q(estado='error') |
+            Q(fecha_creacion__lt=ahora - timedelta(days=dias_errores), estado='error')
+        )
+        eventos_en_vivo = EventoEnVivo.objects.filter(
+            creado_el__lt=ahora - timedelta(hours=settings.EN_VIVO_RETENCION_HORAS)
+        )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se eliminarían {vencidos.count()} logs '
+                f'(retención {dias} días, {dias_errores} con error) y {eventos_en_vivo.count()} eventos en vivo'
+            ))
+            return
+
+        logs = self._eliminar_por_lotes(vencidos, lote)
+
+        en_uso = LogNotificacion.objects.filter(
+            Q(cuerpo_html=OuterRef('pk')) | Q(cuerpo_texto=OuterRef('pk'))
+        )
+        huerfanos = CuerpoNotificacion.objects.filter(~Exists(en_uso))
+        liberados = huerfanos.aggregate(total=Sum('tamaño'))['total'] or 0
+        cuerpos = self._eliminar_por_lotes(huerfanos, lote)
+        eventos = self._eliminar_por_lotes(eventos_en_vivo, lote)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {logs} logs eliminados; {cuerpos} cuerpos sin uso eliminados '
+            f'({liberados / 1024:.1f} KB sin comprimir); {eventos} eventos en vivo eliminados'
+        ))
+
+    def _eliminar_por_lotes(self, queryset, lote):
+        total = 0
+        while True:
+            ids = list(queryset.order_by().values_list('pk', flat=True)[:lote])
+            if not ids:
+                return total
+            with transaction.atomic():
+                total += queryset.model.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from accounts.models import User
+from gestion_personal.models import DocumentoPersonal as DocumentoPersona
+from gestion_vehiculos.models import DocumentoVehiculo as DocumentoFlota
+from solicitudes.models import DocumentoPersonal, DocumentoVehiculo
+from notificaciones.services import EmailService
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía un resumen diario por empresa con los documentos próximos a vencer '
+        'y los vencidos recientemente. Programar una vez al día (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--avisos',
+            default='30,15,7,1',
+            help='Días de anticipación en los que se avisa, separados por coma (por defecto 30,15,7,1)'
+        )
+        parser.add_argument(
+            '--dias-atras',
+            type=int,
+            default=1,
+            help='Incluir documentos vencidos en los últimos N días (por defecto 1: vencidos ayer)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar el resumen sin enviar emails ni actualizar estados'
+        )
+
+    def fuentes(self):
+        """
+        Documentos con vencimiento por origen: (queryset, descripción de la
+        fila). Cada queryset anota el usuario propietario como ``propietario``.
+        """
+        def tipo(choices):
+            etiquetas = dict(choices)
+            return lambda fila: etiquetas.get(fila['tipo_documento'], fila['tipo_documento'])
+
+        tipo_persona = tipo(DocumentoPersona.TIPO_DOCUMENTO_CHOICES)
+        tipo_flota = tipo(DocumentoFlota.TIPO_DOCUMENTO_CHOICES)
+        tipo_personal = tipo(DocumentoPersonal.TIPOS_DOCUMENTO)
+        tipo_vehiculo = tipo(DocumentoVehiculo.TIPOS_DOCUMENTO)
+
+        return [
+            (
+                DocumentoPersona.objects.annotate(
+                    propietario=F('persona__empresa_id'),
+                    titular=Concat('persona__nombre', Value(' '), 'persona__apellido'),
+                ),
+                lambda f: f"{f['titular']} - {tipo_persona(f)}",
+            ),
+            (
+                DocumentoFlota.objects.annotate(
+                    propietario=F('vehiculo__empresa_propietaria_id'),
+                    titular=F('vehiculo__placa'),
+                ),
+                lambda f: f"Vehículo {f['titular']} - {tipo_flota(f)}",
+            ),
+            (
+                DocumentoVehiculo.objects.annotate(
+                    propietario=F('vehiculo__solicitud__solicitante_id'),
+                    titular=F('vehiculo__placa'),
+                ),
+                lambda f: f"Vehículo {f['titular']} - {tipo_vehiculo(f)}",
+            ),
+            (
+                # El personal puede estar en solicitudes de varias empresas:
+                # se avisa a cada una
+                DocumentoPersonal.objects.annotate(
+                    propietario=F('personal__solicitudpersonal__solicitud__solicitante_id'),
+                    titular=F('personal__nombre'),
+                ).distinct(),
+                lambda f: f"{f['titular']} - {tipo_personal(f)}",
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        try:
+            avisos = sorted({int(d) for d in options['avisos'].split(',') if d.strip()})
+        except ValueError:
+            raise CommandError('--avisos debe ser una lista de números separados por coma')
+        dias_atras = options['dias_atras']
+        dry_run = options['dry_run']
+
+        hoy = timezone.localdate()
+        fechas_aviso = [hoy + timedelta(days=d) for d in avisos]
+        filtro = Q(fecha_vencimiento__in=fechas_aviso)
+        if dias_atras > 0:
+            filtro |= Q(fecha_vencimiento__range=(hoy - timedelta(days=dias_atras), hoy - timedelta(days=1)))
+
+        # 1. Una consulta por tipo de documento (usa el índice de fecha_vencimiento)
+        por_usuario = defaultdict(lambda: {'por_vencer': [], 'vencidos': []})
+        for queryset, describir in self.fuentes():
+            filas = queryset.filter(filtro, propietario__isnull=False).values(
+                'fecha_vencimiento', 'tipo_documento', 'propietario', 'titular'
+            )
+            for fila in filas:
+                grupo = 'vencidos' if fila['fecha_vencimiento'] < hoy else 'por_vencer'
+                por_usuario[fila['propietario']][grupo].append((fila['fecha_vencimiento'], describir(fila)))
+
+        # 2. Marcar como vencidos los documentos de empresa en una sola actualización
+        marcados = 0
+        if not dry_run:
+            for modelo in (DocumentoPersona, DocumentoFlota):
+                marcados += modelo.objects.filter(
+                    fecha_vencimiento__lt=hoy
+                ).exclude(estado_validacion='vencido').update(estado_validacion='vencido')
+
+        # 3. Agrupar por empresa (los usuarios sin empresa reciben su propio resumen)
+        usuarios = User.objects.select_related('empresa').in_bulk(list(por_usuario))
+        resumenes = {}
+        for usuario_id, documentos in por_usuario.items():
+            usuario = usuarios.get(usuario_id)
+            if usuario is None:
+                continue
+            clave = ('empresa', usuario.empresa_id) if usuario.empresa_id else ('usuario', usuario.id)
+            resumen = resumenes.setdefault(clave, {
+                'empresa_nombre': usuario.empresa.nombre if usuario.empresa_id else usuario.get_display_name(),
+                'emails': set(),
+                'por_vencer': set(),
+                'vencidos': set(),
+            })
+            if usuario.email:
+                resumen['emails'].add(usuario.email)
+            resumen['por_vencer'].update(documentos['por_vencer'])
+            resumen['vencidos'].update(documentos['vencidos'])
+
+        # 4. Un email por empresa
+        enviados = 0
+        for resumen in resumenes.values():
+            lineas = [
+                f"- [Por vencer {fecha:%d/%m/%Y}] {descripcion}" for fecha, descripcion in sorted(resumen['por_vencer'])
+            ] + [
+                f"- [Vencido {fecha:%d/%m/%Y}] {descripcion}" for fecha, descripcion in sorted(resumen['vencidos'])
+            ]
+            if dry_run:
+                self.stdout.write(f"{resumen['empresa_nombre']} ({', '.join(sorted(resumen['emails'])) or 'sin email'})")
+                for linea in lineas:
+                    self.stdout.write(f'  {linea}')
+                continue
+            if not resumen['emails']:
+                continue
+            exito, _, _ = EmailService.enviar_notificacion(
+                'documentos_por_vencer',
+                {
+                    'empresa_nombre': resumen['empresa_nombre'],
+                    'total_por_vencer': len(resumen['por_vencer']),
+                    'total_vencidos': len(resumen['vencidos']),
+                    'detalle': '\n'.join(lineas),
+                },
+                destinatarios_adicionales=sorted(resumen['emails']),
+                forzar_destinatarios=True,
+            )
+            if exito:
+                enviados += 1
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se enviarían {len(resumenes)} resúmenes'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {enviados} de {len(resumenes)} resúmenes enviados; '
+            f'{marcados} documentos marcados como vencidos'
+        ))
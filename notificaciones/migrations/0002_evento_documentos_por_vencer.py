@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+def crear_evento(apps, schema_editor):
+    EventoSistema = apps.get_model('notificaciones', 'EventoSistema')
+    EventoSistema.objects.get_or_create(
+        codigo='documentos_por_vencer',
+        defaults={
+            'nombre': 'Resumen de Documentos por Vencer',
+            'descripcion': 'Resumen diario por empresa de documentos vencidos o próximos a vencer',
+            'asunto_email': 'Documentos por vencer - {empresa_nombre}',
+            'mensaje_texto_plano': (
+                'Estimado(a) {empresa_nombre}:\n\n'
+                'Tiene {total_por_vencer} documento(s) próximo(s) a vencer y '
+                '{total_vencidos} documento(s) vencido(s) recientemente:\n\n'
+                '{detalle}\n\n'
+                'Por favor actualice los documentos en el sistema NaviPort.'
+            ),
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventosistema',
+            name='codigo',
+            field=models.CharField(choices=[('solicitud_recibida', 'Solicitud Recibida'), ('solicitud_aprobada', 'Solicitud Aprobada'), ('solicitud_rechazada', 'Solicitud Rechazada'), ('solicitud_requerimientos', 'Solicitud con Requerimientos'), ('solicitud_vencida', 'Solicitud Vencida'), ('asignacion_evaluador', 'Asignación a Evaluador'), ('asignacion_supervisor', 'Asignación a Supervisor'), ('autorizacion_generada', 'Autorización Generada'), ('autorizacion_vencida', 'Autorización Vencida'), ('extension_solicitada', 'Extensión de Validez Solicitada'), ('extension_aprobada', 'Extensión de Validez Aprobada'), ('extension_rechazada', 'Extensión de Validez Rechazada'), ('incumplimiento_reportado', 'Incumplimiento Reportado'), ('subsanacion_solicitada', 'Subsanación Solicitada'), ('subsanacion_respondida', 'Subsanación Respondida'), ('solicitud_excepcional_aprobada', 'Solicitud Excepcional Aprobada'), ('licencia_por_vencer', 'Licencia por Vencer'), ('licencia_vencida', 'Licencia Vencida'), ('contrato_por_vencer', 'Contrato por Vencer'), ('contrato_vencido', 'Contrato Vencido'), ('documentos_por_vencer', 'Resumen de Documentos por Vencer'), ('personalizado', 'Evento Personalizado')], help_text='Código único que identifica este evento', max_length=50, unique=True, verbose_name='Código del Evento'),
+        ),
+        migrations.RunPython(crear_evento, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:49
+
+import hashlib
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Copias de notificaciones.models.comprimir/descomprimir: la migración no debe
+# depender del código actual de los modelos, que puede cambiar después.
+def comprimir(texto):
+    datos = texto.encode('utf-8')
+    if brotli is not None:
+        return 'br', brotli.compress(datos, mode=brotli.MODE_TEXT)
+    return 'zlib', zlib.compress(datos, 9)
+
+
+def descomprimir(algoritmo, datos):
+    datos = bytes(datos)
+    if algoritmo == 'br':
+        if brotli is None:
+            raise RuntimeError('Se necesita el paquete Brotli para leer este mensaje')
+        return brotli.decompress(datos).decode('utf-8')
+    return zlib.decompress(datos).decode('utf-8')
+
+
+def comprimir_mensajes(apps, schema_editor):
+    """Mueve los cuerpos existentes a CuerpoNotificacion (uno por contenido)"""
+    LogNotificacion = apps.get_model('notificaciones', 'LogNotificacion')
+    CuerpoNotificacion = apps.get_model('notificaciones', 'CuerpoNotificacion')
+
+    cuerpos = {}
+
+    def cuerpo_id(texto):
+        if not texto:
+            return None
+        sha256 = hashlib.sha256(texto.encode('utf-8')).hexdigest()
+        if sha256 not in cuerpos:
+            compresion, datos = comprimir(texto)
+            cuerpos[sha256] = CuerpoNotificacion.objects.create(
+                sha256=sha256, compresion=compresion, datos=datos, tamaño=len(texto.encode('utf-8'))
+            ).pk
+        return cuerpos[sha256]
+
+    pendientes = []
+    for log in LogNotificacion.objects.only('mensaje_html', 'mensaje_texto').iterator(chunk_size=500):
+        log.cuerpo_html_id = cuerpo_id(log.mensaje_html)
+        log.cuerpo_texto_id = cuerpo_id(log.mensaje_texto)
+        pendientes.append(log)
+        if len(pendientes) >= 500:
+            LogNotificacion.objects.bulk_update(pendientes, ['cuerpo_html', 'cuerpo_texto'])
+            pendientes = []
+    LogNotificacion.objects.bulk_update(pendientes, ['cuerpo_html', 'cuerpo_texto'])
+
+
+def descomprimir_mensajes(apps, schema_editor):
+    LogNotificacion = apps.get_model('notificaciones', 'LogNotificacion')
+    for log in LogNotificacion.objects.select_related('cuerpo_html', 'cuerpo_texto').iterator(chunk_size=500):
+        LogNotificacion.objects.filter(pk=log.pk).update(
+            mensaje_html=descomprimir(log.cuerpo_html.compresion, log.cuerpo_html.datos) if log.cuerpo_html_id else '',
+            mensaje_texto=descomprimir(log.cuerpo_texto.compresion, log.cuerpo_texto.datos) if log.cuerpo_texto_id else '',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_evento_documentos_por_vencer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuerpoNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('compresion', models.CharField(choices=[('br', 'Brotli'), ('zlib', 'zlib')], max_length=4, verbose_name='Compresión')),
+                ('datos', models.BinaryField(verbose_name='Contenido comprimido')),
+                ('tamaño', models.PositiveIntegerField(default=0, verbose_name='Tamaño sin comprimir (bytes)')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+            ],
+            options={
+                'verbose_name': 'Cuerpo de Notificación',
+                'verbose_name_plural': 'Cuerpos de Notificaciones',
+            },
+        ),
+        migrations.AddField(
+            model_name='lognotificacion',
+            name='plantilla',
+            field=models.CharField(blank=True, help_text='Plantilla HTML del evento al momento del envío', max_length=200, verbose_name='Plantilla'),
+        ),
+        migrations.AddIndex(
+            model_name='lognotificacion',
+            index=models.Index(fields=['fecha_creacion'], name='notificacio_fecha_c_2833ef_idx'),
+        ),
+        migrations.AddField(
+            model_name='lognotificacion',
+            name='cuerpo_html',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='notificaciones.cuerponotificacion', verbose_name='Mensaje HTML'),
+        ),
+        migrations.AddField(
+            model_name='lognotificacion',
+            name='cuerpo_texto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='notificaciones.cuerponotificacion', verbose_name='Mensaje en Texto'),
+        ),
+        migrations.RunPython(comprimir_mensajes, descomprimir_mensajes),
+        migrations.RemoveField(
+            model_name='lognotificacion',
+            name='mensaje_html',
+        ),
+        migrations.RemoveField(
+            model_name='lognotificacion',
+            name='mensaje_texto',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0003_logs_comprimidos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoEnVivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(choices=[('evaluacion', 'Evaluación'), ('control_acceso', 'Control de Acceso')], max_length=20, verbose_name='Canal')),
+                ('tipo', models.CharField(max_length=30, verbose_name='Tipo')),
+                ('datos', models.JSONField(default=dict, verbose_name='Datos')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Creado el')),
+            ],
+            options={
+                'verbose_name': 'Evento en Vivo',
+                'verbose_name_plural': 'Eventos en Vivo',
+                'indexes': [models.Index(fields=['canal', 'id'], name='notificacio_canal_88a1be_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,18 @@
+import hashlib
+import zlib
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.conf import settings
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # ===========================
 # CONFIGURACIÓN DE CORREO
 # ===========================
@@ -294,6 +303,7 @@ class EventoSistema(models.Model):
         ('licencia_vencida', 'Licencia Vencida'),
         ('contrato_por_vencer', 'Contrato por Vencer'),
         ('contrato_vencido', 'Contrato Vencido'),
+        ('documentos_por_vencer', 'Resumen de Documentos por Vencer'),
 
         # Personalizado
         ('personalizado', 'Evento Personalizado'),
@@ -451,6 +461,72 @@ class DestinatarioEvento(models.Model):
 # LOG DE NOTIFICACIONES
 # ===========================
 
+def comprimir(texto):
+    """
+    Comprime un texto con Brotli (o zlib si no está instalado).
+
+    Returns:
+        tuple: (algoritmo, bytes comprimidos)
+    """
+    datos = texto.encode('utf-8')
+    if brotli is not None:
+        return 'br', brotli.compress(datos, mode=brotli.MODE_TEXT)
+    return 'zlib', zlib.compress(datos, 9)
+
+
+def descomprimir(algoritmo, datos):
+    datos = bytes(datos)
+    if algoritmo == 'br':
+        if brotli is None:
+            raise RuntimeError('Se necesita el paquete Brotli para leer este mensaje')
+        return brotli.decompress(datos).decode('utf-8')
+    return zlib.decompress(datos).decode('utf-8')
+
+
+class CuerpoNotificacion(models.Model):
+    """
+    Cuerpo renderizado de una notificación (HTML o texto), comprimido y
+    guardado una sola vez por contenido. Los logs con el mismo cuerpo
+    apuntan a la misma fila.
+    """
+
+    COMPRESION_CHOICES = [
+        ('br', 'Brotli'),
+        ('zlib', 'zlib'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    compresion = models.CharField(max_length=4, choices=COMPRESION_CHOICES, verbose_name='Compresión')
+    datos = models.BinaryField(verbose_name='Contenido comprimido')
+    tamaño = models.PositiveIntegerField(default=0, verbose_name='Tamaño sin comprimir (bytes)')
+    creado_el = models.DateTimeField(auto_now_add=True, verbose_name='Creado el')
+
+    class Meta:
+        verbose_name = 'Cuerpo de Notificación'
+        verbose_name_plural = 'Cuerpos de Notificaciones'
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.tamaño} bytes)"
+
+    def texto(self):
+        return descomprimir(self.compresion, self.datos)
+
+    @classmethod
+    def obtener(cls, texto):
+        """Cuerpo con este contenido, creándolo si no existe (None si está vacío)"""
+        if not texto:
+            return None
+        sha256 = hashlib.sha256(texto.encode('utf-8')).hexdigest()
+        cuerpo = cls.objects.filter(sha256=sha256).only('pk').first()
+        if cuerpo is None:
+            compresion, datos = comprimir(texto)
+            cuerpo, _ = cls.objects.get_or_create(
+                sha256=sha256,
+                defaults={'compresion': compresion, 'datos': datos, 'tamaño': len(texto.encode('utf-8'))}
+            )
+        return cuerpo
+
+
 class LogNotificacion(models.Model):
     """Log auditable de todas las notificaciones enviadas"""
 
@@ -477,16 +553,32 @@ class LogNotificacion(models.Model):
         verbose_name='Asunto'
     )
 
-    mensaje_html = models.TextField(
+    # Cuerpos comprimidos y deduplicados; se leen con mensaje_html/mensaje_texto
+    cuerpo_html = models.ForeignKey(
+        CuerpoNotificacion,
+        on_delete=models.PROTECT,
+        null=True,
         blank=True,
+        related_name='+',
         verbose_name='Mensaje HTML'
     )
 
-    mensaje_texto = models.TextField(
+    cuerpo_texto = models.ForeignKey(
+        CuerpoNotificacion,
+        on_delete=models.PROTECT,
+        null=True,
         blank=True,
+        related_name='+',
         verbose_name='Mensaje en Texto'
     )
 
+    plantilla = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Plantilla',
+        help_text='Plantilla HTML del evento al momento del envío'
+    )
+
     estado = models.CharField(
         max_length=20,
         choices=ESTADO_CHOICES,
@@ -528,10 +620,21 @@ class LogNotificacion(models.Model):
         verbose_name = 'Log de Notificación'
         verbose_name_plural = 'Logs de Notificaciones'
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['fecha_creacion']),
+        ]
 
     def __str__(self):
         return f"{self.evento.nombre} - {self.get_estado_display()} ({self.fecha_creacion})"
 
+    @cached_property
+    def mensaje_html(self):
+        return self.cuerpo_html.texto() if self.cuerpo_html_id else ''
+
+    @cached_property
+    def mensaje_texto(self):
+        return self.cuerpo_texto.texto() if self.cuerpo_texto_id else ''
+
     def marcar_como_enviado(self):
         """Marca el log como enviado exitosamente"""
         self.estado = 'enviado'
@@ -546,3 +649,40 @@ class LogNotificacion(models.Model):
         self.mensaje_error = mensaje_error
         self.fecha_envio = timezone.now()
         self.save(update_fields=['estado', 'exitoso', 'mensaje_error', 'fecha_envio'])
+
+
+# ===========================
+# EVENTOS EN VIVO
+# ===========================
+
+class EventoEnVivo(models.Model):
+    """
+    Cambio pequeño (delta JSON) que se envía a los dashboards abiertos por
+    el flujo de eventos (notificaciones/en_vivo.py). El ID es el cursor de
+    los clientes (Last-Event-ID); las filas se depuran a las pocas horas.
+    """
+
+    CANAL_CHOICES = [
+        ('evaluacion', 'Evaluación'),
+        ('control_acceso', 'Control de Acceso'),
+    ]
+
+    canal = models.CharField(max_length=20, choices=CANAL_CHOICES, verbose_name='Canal')
+    tipo = models.CharField(max_length=30, verbose_name='Tipo')
+    datos = models.JSONField(default=dict, verbose_name='Datos')
+    creado_el = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Creado el')
+
+    class Meta:
+        verbose_name = 'Evento en Vivo'
+        verbose_name_plural = 'Eventos en Vivo'
+        indexes = [
+            models.Index(fields=['canal', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.canal}/{self.tipo}"
+
+    @classmethod
+    def ultimo_id(cls, canal):
+        """Cursor actual del canal (0 si está vacío)"""
+        return cls.objects.filter(canal=canal).order_by('-id').values_list('id', flat=True).first() or 0
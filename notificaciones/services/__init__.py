@@ -8,6 +8,7 @@ from .email_service import (
     notificar_solicitud_rechazada,
     notificar_asignacion_evaluador,
 )
+from .despacho import despachar, despachar_notificacion
 
 __all__ = [
     'EmailService',
@@ -15,4 +16,6 @@ __all__ = [
     'notificar_solicitud_aprobada',
     'notificar_solicitud_rechazada',
     'notificar_asignacion_evaluador',
+    'despachar',
+    'despachar_notificacion',
 ]
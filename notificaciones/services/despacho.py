@@ -0,0 +1,71 @@
+"""
+Despacho de efectos secundarios fuera de la transacción.
+
+Los envíos de email, la generación de QR y demás efectos externos se
+registran con ``transaction.on_commit``: solo se ejecutan si la transacción
+se confirma y nunca retienen el bloqueo de escritura de la base de datos.
+Una vez confirmada, la tarea se entrega a un pool de hilos en segundo plano.
+
+Configuración (settings):
+    DESPACHO_HILOS: Número de hilos del pool (por defecto 2)
+    DESPACHO_SINCRONO: Si True, ejecuta la tarea en el mismo hilo tras el
+        commit (útil en desarrollo y pruebas)
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor():
+    """Crea el pool de hilos la primera vez que se necesita"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'DESPACHO_HILOS', 2),
+                    thread_name_prefix='despacho'
+                )
+    return _executor
+
+
+def _ejecutar(func, args, kwargs, en_segundo_plano):
+    """Ejecuta la tarea registrando cualquier error sin propagarlo"""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Error en tarea despachada %s', getattr(func, '__qualname__', func))
+    finally:
+        if en_segundo_plano:
+            # Cada hilo tiene su propia conexión: liberarla al terminar
+            connections.close_all()
+
+
+def despachar(func, *args, **kwargs):
+    """
+    Ejecuta ``func(*args, **kwargs)`` después del commit de la transacción
+    actual (o de inmediato si no hay transacción abierta), en segundo plano.
+
+    Si la transacción se revierte la tarea se descarta.
+    """
+    def encolar():
+        if getattr(settings, 'DESPACHO_SINCRONO', False):
+            _ejecutar(func, args, kwargs, en_segundo_plano=False)
+        else:
+            _obtener_executor().submit(_ejecutar, func, args, kwargs, True)
+
+    transaction.on_commit(encolar)
+
+
+def despachar_notificacion(codigo_evento, **kwargs):
+    """Atajo para despachar EmailService.enviar_notificacion"""
+    from .email_service import EmailService
+    despachar(EmailService.enviar_notificacion, codigo_evento=codigo_evento, **kwargs)
@@ -6,7 +6,7 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from django.conf import settings
 from accounts.models import User
-from ..models import ConfiguracionEmail, EventoSistema, LogNotificacion, DestinatarioEvento
+from ..models import ConfiguracionEmail, CuerpoNotificacion, EventoSistema, LogNotificacion, DestinatarioEvento
 
 
 class EmailService:
@@ -47,7 +47,8 @@ class EmailService:
         codigo_evento,
         contexto=None,
         destinatarios_adicionales=None,
-        forzar_destinatarios=False
+        forzar_destinatarios=False,
+        destinatarios_roles=None
     ):
         """
         Envía una notificación basada en un evento del sistema
@@ -57,6 +58,7 @@ class EmailService:
             contexto: Diccionario con variables para el template
             destinatarios_adicionales: Lista de emails adicionales
             forzar_destinatarios: Si True, solo usa destinatarios_adicionales
+            destinatarios_roles: Lista de roles cuyos usuarios se agregan como destinatarios adicionales
 
         Returns:
             Tuple (success: bool, mensaje: str, log_id: int)
@@ -67,6 +69,12 @@ class EmailService:
         except EventoSistema.DoesNotExist:
             return False, f"Evento '{codigo_evento}' no encontrado o inactivo", None
 
+        # Los roles se resuelven como destinatarios adicionales
+        if destinatarios_roles:
+            destinatarios_adicionales = list(destinatarios_adicionales or [])
+            for rol in destinatarios_roles:
+                destinatarios_adicionales.extend(EmailService.obtener_emails_por_rol(rol))
+
         # Resolver destinatarios
         if forzar_destinatarios and destinatarios_adicionales:
             emails_destinatarios = destinatarios_adicionales
@@ -100,8 +108,9 @@ class EmailService:
             evento=evento,
             destinatarios=', '.join(emails_destinatarios),
             asunto=asunto,
-            mensaje_html=mensaje_html,
-            mensaje_texto=mensaje_texto,
+            cuerpo_html=CuerpoNotificacion.obtener(mensaje_html),
+            cuerpo_texto=CuerpoNotificacion.obtener(mensaje_texto),
+            plantilla=evento.template_html or '',
             metadata=contexto,
             estado='pendiente'
         )
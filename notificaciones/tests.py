@@ -1,3 +1,127 @@
-from django.test import TestCase
+import json
+import sys
+from datetime import timedelta
 
-# Create your tests here.
+from unittest import mock
+
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from naviport.pruebas import crear_usuario
+
+from . import en_vivo
+from .models import EventoEnVivo
+
+
+def _mensajes(cuerpo):
+    """[(campos, datos)] de un cuerpo text/event-stream"""
+    mensajes = []
+    for bloque in cuerpo.strip().split('\n\n'):
+        campos = dict(linea.split(': ', 1) for linea in bloque.split('\n'))
+        mensajes.append((campos, json.loads(campos['data']) if 'data' in campos else None))
+    return mensajes
+
+
+@override_settings(EN_VIVO_MARGEN_SEGUNDOS=10, EN_VIVO_REINTENTO_WSGI_MS=300000)
+class FlujoEnVivoTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(crear_usuario('evaluador'))
+
+    def _consultar(self, desde):
+        respuesta = self.client.get(reverse('notificaciones:flujo_en_vivo', args=['evaluacion']), {'desde': desde})
+        self.assertEqual(respuesta.status_code, 200)
+        return _mensajes(respuesta.content.decode())
+
+    def _envejecer(self, *eventos):
+        EventoEnVivo.objects.filter(pk__in=[e.pk for e in eventos]).update(
+            creado_el=timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_evento_se_descarta_con_la_transaccion(self):
+        try:
+            with transaction.atomic():
+                en_vivo.publicar('evaluacion', 'alerta', {'titulo': 'x', 'mensaje': 'y'})
+                self.assertEqual(EventoEnVivo.objects.count(), 1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(EventoEnVivo.objects.exists())
+
+    def test_wsgi_conserva_el_intervalo_de_recarga(self):
+        retry, = self._consultar(0)
+        self.assertEqual(retry[0], {'retry': '300000'})
+
+    def test_evento_confirmado_tarde_con_id_menor_no_se_pierde(self):
+        posterior = EventoEnVivo.objects.create(pk=10, canal='evaluacion', tipo='alerta', datos={'n': 2})
+
+        # El evento reciente se entrega, pero el cursor no pasa sobre él
+        mensajes = self._consultar(0)[1:]
+        self.assertEqual([datos['evento_id'] for _, datos in mensajes], [posterior.pk])
+        self.assertNotIn('id', mensajes[0][0])
+
+        # Una transacción más lenta confirma un ID menor
+        anterior = EventoEnVivo.objects.create(pk=9, canal='evaluacion', tipo='alerta', datos={'n': 1})
+        mensajes = self._consultar(0)[1:]
+        self.assertEqual([datos['evento_id'] for _, datos in mensajes], [anterior.pk, posterior.pk])
+
+        # Pasado el margen el cursor avanza y ya no se reenvían
+        self._envejecer(anterior, posterior)
+        *eventos, cursor = self._consultar(0)[1:]
+        self.assertEqual(len(eventos), 2)
+        self.assertEqual(cursor, ({'id': str(posterior.pk)}, None))
+        self.assertEqual(self._consultar(posterior.pk)[1:], [])
+
+    def test_canal_restringido_por_rol(self):
+        self.client.force_login(crear_usuario('solicitante'))
+        respuesta = self.client.get(reverse('notificaciones:flujo_en_vivo', args=['evaluacion']))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class MigracionLogsComprimidosTests(TransactionTestCase):
+    """0003 mueve los cuerpos sin depender del código actual de los modelos"""
+
+    antes = [('notificaciones', '0002_evento_documentos_por_vencer')]
+    despues = [('notificaciones', '0003_logs_comprimidos')]
+
+    def _migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        self._migrar(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_ida_y_vuelta_sin_los_helpers_de_los_modelos(self):
+        apps = self._migrar(self.antes)
+        evento = apps.get_model('notificaciones', 'EventoSistema').objects.create(
+            codigo='personalizado', nombre='Prueba', asunto_email='Prueba',
+        )
+        LogNotificacion = apps.get_model('notificaciones', 'LogNotificacion')
+        for _ in range(2):
+            LogNotificacion.objects.create(
+                evento=evento, destinatarios='a@b.c', asunto='Prueba',
+                mensaje_html='<p>Hola ñandú</p>', mensaje_texto='',
+            )
+
+        # Si la migración usara los helpers de los modelos, fallaría al recargarla
+        with mock.patch('notificaciones.models.comprimir', side_effect=AssertionError), \
+                mock.patch('notificaciones.models.descomprimir', side_effect=AssertionError), \
+                mock.patch.dict(sys.modules):
+            sys.modules.pop('notificaciones.migrations.0003_logs_comprimidos', None)
+            apps = self._migrar(self.despues)
+            CuerpoNotificacion = apps.get_model('notificaciones', 'CuerpoNotificacion')
+            self.assertEqual(CuerpoNotificacion.objects.count(), 1)
+            self.assertFalse(apps.get_model('notificaciones', 'LogNotificacion').objects.exclude(
+                cuerpo_texto__isnull=True,
+            ).exists())
+
+            apps = self._migrar(self.antes)
+            self.assertEqual(
+                list(apps.get_model('notificaciones', 'LogNotificacion').objects.values_list('mensaje_html', flat=True)),
+                ['<p>Hola ñandú</p>'] * 2,
+            )
@@ -17,4 +17,7 @@ urlpatterns = [
     # Logs de Notificaciones
     path('logs/', views.ver_logs_notificaciones, name='ver_logs'),
     path('logs/<int:log_id>/', views.detalle_log, name='detalle_log'),
+
+    # Actualizaciones en vivo de los dashboards (server-sent events)
+    path('en-vivo/<str:canal>/', views.flujo_en_vivo, name='flujo_en_vivo'),
 ]
@@ -1,10 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods, require_safe
 from django.db import transaction
 from accounts.decorators import can_evaluate_required
-from .models import ConfiguracionEmail, EventoSistema, DestinatarioEvento, LogNotificacion
+from . import en_vivo
+from .models import ConfiguracionEmail, EventoSistema, DestinatarioEvento, EventoEnVivo, LogNotificacion
 
 
 # ===========================
@@ -209,7 +212,7 @@ def gestionar_destinatarios(request, evento_id):
 @can_evaluate_required
 def ver_logs_notificaciones(request):
     """Ver logs de notificaciones enviadas"""
-    logs = LogNotificacion.objects.all().order_by('-fecha_creacion')[:100]
+    logs = LogNotificacion.objects.select_related('evento').order_by('-fecha_creacion')
 
     # Filtros
     evento_id = request.GET.get('evento')
@@ -221,6 +224,8 @@ def ver_logs_notificaciones(request):
     if estado:
         logs = logs.filter(estado=estado)
 
+    logs = logs[:100]
+
     # Estadísticas
     total_logs = LogNotificacion.objects.count()
     total_enviados = LogNotificacion.objects.filter(exitoso=True).count()
@@ -239,9 +244,42 @@ def ver_logs_notificaciones(request):
 @can_evaluate_required
 def detalle_log(request, log_id):
     """Ver detalle de un log de notificación"""
-    log = get_object_or_404(LogNotificacion, pk=log_id)
+    # Los cuerpos se descomprimen al leer log.mensaje_html / log.mensaje_texto
+    log = get_object_or_404(
+        LogNotificacion.objects.select_related('evento', 'cuerpo_html', 'cuerpo_texto'), pk=log_id
+    )
 
     context = {
         'log': log,
     }
     return render(request, 'notificaciones/detalle_log.html', context)
+
+
+# ===========================
+# ACTUALIZACIONES EN VIVO
+# ===========================
+
+@login_required
+@require_safe
+def flujo_en_vivo(request, canal):
+    """
+    Flujo text/event-stream de un canal (ver notificaciones/en_vivo.py).
+    El cursor llega en Last-Event-ID al reconectar o en ?desde= la primera
+    vez (el ID que tenía el canal al renderizar el dashboard).
+    """
+    if canal not in en_vivo.CANALES:
+        raise Http404
+    if request.user.role not in en_vivo.CANALES[canal]:
+        return HttpResponseForbidden()
+
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('desde', '')
+    desde = int(cursor) if cursor.isdigit() else EventoEnVivo.ultimo_id(canal)
+
+    if isinstance(request, ASGIRequest):
+        respuesta = StreamingHttpResponse(en_vivo.flujo(canal, desde), content_type='text/event-stream')
+    else:
+        respuesta = HttpResponse(en_vivo.respuesta_unica(canal, desde), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    # Sin buffer en nginx para que cada evento llegue al enviarse
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
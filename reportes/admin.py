@@ -1,3 +1,35 @@
 from django.contrib import admin
+from .models import MarcaResumen, RegistroEliminado, TiempoEnEstado
 
-# Register your models here.
+
+@admin.register(MarcaResumen)
+class MarcaResumenAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'procesado_hasta', 'ultimo_id']
+    readonly_fields = ['nombre', 'procesado_hasta', 'ultimo_id']
+
+
+@admin.register(TiempoEnEstado)
+class TiempoEnEstadoAdmin(admin.ModelAdmin):
+    list_display = ['dimension', 'valor', 'estado', 'muestras', 'p50', 'p90', 'p99', 'actualizado_el']
+    list_filter = ['dimension', 'estado']
+    search_fields = ['valor']
+    exclude = ['boceto']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RegistroEliminado)
+class RegistroEliminadoAdmin(admin.ModelAdmin):
+    list_display = ['entidad', 'objeto_id', 'eliminado_el']
+    list_filter = ['entidad']
+    search_fields = ['objeto_id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,22 @@
+from rest_framework.permissions import BasePermission
+
+from ..cambios import ENTIDADES
+
+
+class PuedeLeerCambios(BasePermission):
+    """Permite el feed de una entidad a los usuarios activos con un rol autorizado para ella"""
+
+    message = 'Su rol no tiene acceso al feed de cambios de esta entidad.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        entidad = ENTIDADES.get(view.kwargs.get('entidad'))
+        if entidad is None:
+            # La vista responde 404
+            return bool(user and user.is_authenticated)
+        return bool(
+            user and
+            user.is_authenticated and
+            getattr(user, 'role', None) in entidad.roles and
+            getattr(user, 'activo', True)
+        )
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import cambios
+
+app_name = 'cambios_api'
+
+urlpatterns = [
+    path('<str:entidad>/', cambios, name='cambios'),
+]
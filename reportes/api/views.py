@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.views.decorators.gzip import gzip_page
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from ..cambios import ENTIDADES, CursorCaducado, CursorInvalido, cursor_inicial, lote
+from .permissions import PuedeLeerCambios
+
+
+@gzip_page
+@api_view(['GET'])
+@permission_classes([PuedeLeerCambios])
+def cambios(request, entidad):
+    """
+    Cambios de la entidad desde el cursor ``since`` (token de ``siguiente``
+    o fecha ISO 8601; vacío para la sincronización inicial), hasta
+    ``limite`` filas. Repetir con ``siguiente`` mientras ``completo`` sea falso.
+    """
+    if entidad not in ENTIDADES:
+        return Response(
+            {'detail': f'Entidad desconocida. Disponibles: {", ".join(sorted(ENTIDADES))}.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    try:
+        limite = int(request.query_params.get('limite', settings.CAMBIOS_LIMITE))
+    except ValueError:
+        return Response({'detail': 'limite debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+    limite = max(1, min(limite, settings.CAMBIOS_LIMITE_MAXIMO))
+
+    try:
+        cursor = cursor_inicial(request.query_params.get('since', ''))
+    except CursorInvalido as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except CursorCaducado:
+        return Response(
+            {'detail': 'El cursor es anterior a la depuración de eliminados; sincronice de nuevo desde cero.'},
+            status=status.HTTP_410_GONE,
+        )
+
+    response = Response(lote(entidad, cursor, limite))
+    response['Cache-Control'] = 'private, no-cache'
+    return response
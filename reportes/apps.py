@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ReportesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reportes'
+
+    def ready(self):
+        """Lápidas y restauraciones para el feed de cambios"""
+        from .cambios import conectar
+        conectar()
@@ -0,0 +1,258 @@
+"""
+Feed de cambios incremental para sincronización (api/v1/cambios/<entidad>/).
+
+Los consumidores (BI, dispositivos de garita, integraciones de puertos)
+preguntan "qué cambió desde el cursor X" en lugar de descargar listados
+completos. Cada entidad se recorre por (marca de modificación, id), con un
+índice compuesto en cada tabla, y la respuesta es columnar: la lista de
+campos una vez y luego una fila por registro.
+
+- El cursor es opaco para el cliente: codifica la última posición entregada
+  (marca, id) y el último RegistroEliminado visto. Se devuelve en
+  ``siguiente`` y se repite hasta que ``completo`` sea verdadero.
+- Solo se entregan cambios con más de CAMBIOS_MARGEN_SEGUNDOS: una
+  transacción que todavía no confirmó puede tener una marca anterior a otra
+  ya visible, y el cursor pasaría por encima sin verla.
+- Las eliminaciones (incluido el archivo de solicitudes cerradas) dejan una
+  lápida en RegistroEliminado; se entregan en ``eliminados``. Al restaurar
+  desde el archivo se quita la lápida y se renueva la marca del registro
+  para que vuelva a entregarse.
+- Las lápidas se depuran tras CAMBIOS_RETENCION_ELIMINADOS_DIAS; un cursor
+  anterior a la depuración ya no puede saber qué se borró y debe
+  resincronizar desde cero (la vista responde 410).
+- La primera sincronización se hace sin cursor; ``since`` también acepta una
+  fecha ISO 8601 para empezar desde un momento dado.
+"""
+import base64
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Empresa
+from control_acceso.models import Autorizacion, RegistroAcceso
+from incumplimientos.models import Incumplimiento
+from solicitudes.models import Solicitud
+
+from .models import MarcaResumen, RegistroEliminado
+
+# Marca de la última depuración de lápidas (depurar_registros_eliminados)
+MARCA_DEPURACION = 'registros_eliminados'
+
+ROLES_ANALISIS = ('admin_tic', 'direccion')
+
+Entidad = namedtuple('Entidad', ['modelo', 'campo_cambio', 'campos', 'roles'])
+
+ENTIDADES = {
+    'solicitudes': Entidad(
+        Solicitud, 'actualizada_el',
+        ('id', 'codigo', 'estado', 'prioridad', 'empresa_id', 'solicitante_id',
+         'puerto_destino_id', 'lugar_destino_id', 'motivo_acceso_id', 'evaluador_asignado_id',
+         'numero_imo', 'naviera', 'inicio_acceso', 'fin_acceso', 'fecha_evaluacion',
+         'vence_el', 'creada_el', 'enviada_el', 'actualizada_el'),
+        ROLES_ANALISIS,
+    ),
+    'autorizaciones': Entidad(
+        Autorizacion, 'actualizada_el',
+        ('id', 'codigo', 'uuid', 'solicitud_id', 'estado', 'empresa_nombre', 'empresa_rnc',
+         'puerto_nombre', 'valida_desde', 'valida_hasta', 'vehiculos_autorizados',
+         'revocada_el', 'creada_el', 'actualizada_el'),
+        ROLES_ANALISIS + ('oficial_acceso',),
+    ),
+    'registros_acceso': Entidad(
+        RegistroAcceso, 'actualizado_el',
+        ('id', 'autorizacion_id', 'tipo_acceso', 'estado', 'vehiculo_placa', 'conductor_nombre',
+         'oficial_acceso_id', 'documento_verificado', 'vehiculo_verificado',
+         'conductor_verificado', 'motivo_denegacion', 'timestamp', 'actualizado_el'),
+        ROLES_ANALISIS + ('oficial_acceso',),
+    ),
+    'incumplimientos': Entidad(
+        Incumplimiento, 'fecha_modificacion',
+        ('id', 'solicitud_id', 'autorizacion_id', 'tipo', 'estado', 'puerto_id',
+         'lugar_puerto_id', 'reportado_por_id', 'revisado_por_id', 'fecha_incumplimiento',
+         'fecha_reporte', 'fecha_revision', 'fecha_modificacion'),
+        ROLES_ANALISIS,
+    ),
+    'empresas': Entidad(
+        Empresa, 'updated_at',
+        ('id', 'rnc', 'nombre', 'email', 'telefono', 'activa', 'verificada',
+         'numero_licencia', 'tipo_licencia_id', 'fecha_expiracion_licencia',
+         'fecha_expiracion_contrato', 'created_at', 'updated_at'),
+        ROLES_ANALISIS,
+    ),
+}
+
+Cursor = namedtuple('Cursor', ['marca', 'id', 'eliminado_id'])
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class CursorCaducado(Exception):
+    """El cursor es anterior a la última depuración de lápidas"""
+
+
+# ===========================
+# CURSOR
+# ===========================
+
+def _microsegundos(momento):
+    return round(momento.timestamp() * 1_000_000)
+
+
+def _desde_microsegundos(valor):
+    return datetime.fromtimestamp(0, tz=dt_timezone.utc) + timedelta(microseconds=valor)
+
+
+def codificar(cursor):
+    marca = _microsegundos(cursor.marca) if cursor.marca else 0
+    texto = f'{marca}.{cursor.id}.{cursor.eliminado_id}'
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar(token):
+    try:
+        relleno = '=' * (-len(token) % 4)
+        marca, ultimo_id, eliminado_id = (
+            int(parte) for parte in base64.urlsafe_b64decode(token + relleno).decode().split('.')
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise CursorInvalido('Cursor no válido.')
+    if marca < 0 or ultimo_id < 0 or eliminado_id < 0:
+        raise CursorInvalido('Cursor no válido.')
+    return Cursor(_desde_microsegundos(marca) if marca else None, ultimo_id, eliminado_id)
+
+
+def _depuracion():
+    return MarcaResumen.objects.filter(nombre=MARCA_DEPURACION).first()
+
+
+def cursor_inicial(since):
+    """
+    Cursor a partir del parámetro ``since``: vacío (desde el principio), un
+    token devuelto antes o una fecha ISO 8601.
+    """
+    depuracion = _depuracion()
+    if not since:
+        # Sin datos previos no hay nada que borrar: las lápidas depuradas no importan
+        return Cursor(None, 0, depuracion.ultimo_id if depuracion else 0)
+
+    try:
+        momento = parse_datetime(since) if '-' in since or ':' in since else None
+    except ValueError:
+        # Con forma ISO pero inexistente (2026-02-30T10:00)
+        raise CursorInvalido('Fecha no válida.')
+    if momento is not None:
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        if depuracion and momento < depuracion.procesado_hasta:
+            raise CursorCaducado()
+        anterior = (
+            RegistroEliminado.objects.filter(eliminado_el__lt=momento).order_by('-id').values_list('id', flat=True).first()
+        )
+        # Justo antes de ``momento``: incluye los registros modificados en ese instante
+        return Cursor(momento - timedelta(microseconds=1), 2 ** 63 - 1, anterior or 0)
+
+    cursor = decodificar(since)
+    if depuracion and cursor.eliminado_id < depuracion.ultimo_id:
+        raise CursorCaducado()
+    return cursor
+
+
+# ===========================
+# LOTES
+# ===========================
+
+def _ultima_lapida(hasta):
+    """ID de la última lápida (de cualquier entidad) anterior a ``hasta``"""
+    return RegistroEliminado.objects.filter(eliminado_el__lt=hasta).aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+
+def lote(nombre, cursor, limite):
+    """
+    Siguiente lote de cambios de la entidad a partir del cursor: filas
+    modificadas, IDs eliminados y el cursor para continuar.
+    """
+    entidad = ENTIDADES[nombre]
+    campo = entidad.campo_cambio
+    hasta = timezone.now() - timedelta(seconds=settings.CAMBIOS_MARGEN_SEGUNDOS)
+
+    registros = entidad.modelo.objects.filter(**{f'{campo}__lt': hasta})
+    if cursor.marca is not None:
+        registros = registros.filter(
+            Q(**{f'{campo}__gt': cursor.marca}) | Q(**{campo: cursor.marca, 'id__gt': cursor.id})
+        )
+    indice = entidad.campos.index(campo)
+    filas = [
+        list(fila)
+        for fila in registros.order_by(campo, 'id').values_list(*entidad.campos)[:limite]
+    ]
+
+    eliminados = list(
+        RegistroEliminado.objects.filter(
+            entidad=nombre, id__gt=cursor.eliminado_id, eliminado_el__lt=hasta,
+        ).order_by('id').values_list('id', 'objeto_id')[:limite]
+    )
+
+    marca, ultimo_id = cursor.marca, cursor.id
+    if filas:
+        marca, ultimo_id = filas[-1][indice], filas[-1][0]
+    if len(eliminados) < limite:
+        # Las lápidas de todas las entidades comparten la secuencia de IDs: con
+        # las de esta entidad entregadas, el cursor avanza hasta la última
+        # confirmada de cualquier entidad. Si no, un cliente al día quedaría
+        # detrás de la depuración de lápidas ajenas y recibiría 410.
+        eliminado_id = max(cursor.eliminado_id, _ultima_lapida(hasta))
+    else:
+        eliminado_id = eliminados[-1][0]
+
+    return {
+        'entidad': nombre,
+        'campos': list(entidad.campos),
+        'filas': filas,
+        'eliminados': [objeto_id for _, objeto_id in eliminados],
+        'siguiente': codificar(Cursor(marca, ultimo_id, eliminado_id)),
+        'completo': len(filas) < limite and len(eliminados) < limite,
+    }
+
+
+# ===========================
+# LÁPIDAS
+# ===========================
+
+def _nombre_entidad(modelo):
+    for nombre, entidad in ENTIDADES.items():
+        if entidad.modelo is modelo:
+            return nombre
+    return None
+
+
+def registrar_eliminado(sender, instance, **kwargs):
+    """post_delete: deja la lápida en la misma transacción que el borrado"""
+    RegistroEliminado.objects.create(entidad=_nombre_entidad(sender), objeto_id=instance.pk)
+
+
+def registrar_restaurado(sender, instance, **kwargs):
+    """
+    post_save con ``raw`` (restauración del archivo o loaddata): la marca de
+    modificación conserva su valor antiguo, así que se renueva para que el
+    registro vuelva a entregarse, y se quita la lápida.
+    """
+    if not kwargs.get('raw'):
+        return
+    nombre = _nombre_entidad(sender)
+    RegistroEliminado.objects.filter(entidad=nombre, objeto_id=instance.pk).delete()
+    sender.objects.filter(pk=instance.pk).update(**{ENTIDADES[nombre].campo_cambio: timezone.now()})
+
+
+def conectar():
+    """Conecta los receptores (ReportesConfig.ready)"""
+    from django.db.models.signals import post_delete, post_save
+
+    for nombre, entidad in ENTIDADES.items():
+        post_delete.connect(registrar_eliminado, sender=entidad.modelo, dispatch_uid=f'cambios_eliminado_{nombre}')
+        post_save.connect(registrar_restaurado, sender=entidad.modelo, dispatch_uid=f'cambios_restaurado_{nombre}')
@@ -0,0 +1,90 @@
+"""
+Sketch de cuantiles fusionable (estilo DDSketch).
+
+Cada valor positivo cae en el cubo ``ceil(log_gamma(valor))`` con
+``gamma = (1 + precision) / (1 - precision)``; el cuantil estimado tiene un
+error relativo de como mucho ``precision`` (1% por defecto). Dos sketches
+con la misma precisión se fusionan sumando los conteos de sus cubos, así
+que los resultados parciales de cada ejecución se acumulan sin volver a
+leer los datos originales. Se guarda como JSON.
+"""
+import math
+from collections import Counter
+
+PRECISION = 0.01
+
+# Valores por debajo de este mínimo (segundos) se cuentan como cero
+MINIMO = 1.0
+
+# Con más cubos se juntan los más bajos (pierden precisión los valores pequeños)
+MAX_CUBOS = 2048
+
+
+class BocetoCuantiles:
+    """Conteos por cubo logarítmico; ver el docstring del módulo"""
+
+    def __init__(self, precision=PRECISION, cubos=None, ceros=0):
+        self.precision = precision
+        self.gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self.gamma)
+        self.cubos = Counter(cubos or {})
+        self.ceros = ceros
+
+    def __len__(self):
+        return self.ceros + sum(self.cubos.values())
+
+    def agregar(self, valor, veces=1):
+        if valor < MINIMO:
+            self.ceros += veces
+        else:
+            self.cubos[math.ceil(math.log(valor) / self._log_gamma)] += veces
+            self._compactar()
+
+    def fusionar(self, otro):
+        if otro.precision != self.precision:
+            raise ValueError('Solo se pueden fusionar sketches con la misma precisión')
+        self.cubos.update(otro.cubos)
+        self.ceros += otro.ceros
+        self._compactar()
+        return self
+
+    def _compactar(self):
+        if len(self.cubos) <= MAX_CUBOS:
+            return
+        claves = sorted(self.cubos)
+        sobrantes = claves[:len(claves) - MAX_CUBOS + 1]
+        destino = claves[len(sobrantes)]
+        self.cubos[destino] += sum(self.cubos.pop(clave) for clave in sobrantes)
+
+    def cuantil(self, q):
+        """Valor estimado del cuantil ``q`` (0..1), o None si está vacío"""
+        total = len(self)
+        if not total:
+            return None
+        rango = q * (total - 1)
+        acumulado = self.ceros
+        if rango < acumulado:
+            return 0.0
+        for clave in sorted(self.cubos):
+            acumulado += self.cubos[clave]
+            if rango < acumulado:
+                # Punto del cubo con el menor error relativo
+                return 2 * self.gamma ** clave / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.cubos) / (self.gamma + 1)
+
+    def a_dict(self):
+        return {
+            'precision': self.precision,
+            'ceros': self.ceros,
+            'cubos': {str(clave): conteo for clave, conteo in self.cubos.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, datos):
+        if not datos:
+            return cls()
+        return cls(
+            precision=datos.get('precision', PRECISION),
+            cubos={int(clave): conteo for clave, conteo in datos.get('cubos', {}).items()},
+            ceros=datos.get('ceros', 0),
+        )
@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reportes.resumenes import RESUMENES, actualizar, dias_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza los resúmenes diarios del dashboard de reportes recalculando los '
+        'días con registros modificados desde la última ejecución. Es idempotente; '
+        'programarlo cada pocos minutos o una vez por noche (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resumen',
+            choices=sorted(RESUMENES),
+            action='append',
+            help='Actualizar solo este resumen (se puede repetir; por defecto todos)'
+        )
+        parser.add_argument(
+            '--desde',
+            help='Recalcular todos los días a partir de esta fecha (AAAA-MM-DD)'
+        )
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Reconstruir los resúmenes desde cero (recoge eliminaciones)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar cuántos días se recalcularían sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError('--desde debe tener el formato AAAA-MM-DD')
+
+        for nombre in options['resumen'] or sorted(RESUMENES):
+            if options['dry_run']:
+                dias = dias_pendientes(nombre, desde, options['completo'])
+                self.stdout.write(self.style.WARNING(
+                    f'[INFO] (dry-run) {nombre}: {len(dias)} días por recalcular'
+                ))
+                continue
+
+            dias, filas = actualizar(nombre, desde, options['completo'])
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] {nombre}: {dias} días recalculados, {filas} filas'
+            ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from reportes.tiempos import actualizar, eventos_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza los tiempos en cada estado (p50/p90/p99 por prioridad, puerto, '
+        'servicio y evaluador) procesando los eventos de solicitud nuevos desde la '
+        'última ejecución. Programarlo junto con actualizar_resumenes (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Reconstruir desde cero a partir de todo el historial de eventos'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar cuántos eventos se procesarían sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            pendientes = eventos_pendientes(options['completo']).count()
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) {pendientes} eventos de cambio de estado por procesar'
+            ))
+            return
+
+        eventos, muestras = actualizar(options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {eventos} eventos procesados, {muestras} tiempos agregados'
+        ))
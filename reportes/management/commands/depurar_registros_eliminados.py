@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reportes.cambios import MARCA_DEPURACION
+from reportes.models import MarcaResumen, RegistroEliminado
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina las lápidas del feed de cambios más antiguas que el período de '
+        'retención. Los clientes con un cursor anterior reciben 410 y deben '
+        'sincronizar de nuevo desde cero. Programar una vez al día (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.CAMBIOS_RETENCION_ELIMINADOS_DIAS,
+            help=f'Días que se conservan las lápidas (por defecto {settings.CAMBIOS_RETENCION_ELIMINADOS_DIAS})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se eliminaría sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        dias = options['dias']
+        if dias < 1:
+            raise CommandError('El período de retención debe ser de al menos 1 día')
+
+        limite = timezone.now() - timedelta(days=dias)
+        ultimo_id = (
+            RegistroEliminado.objects.filter(eliminado_el__lt=limite)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        if ultimo_id is None:
+            self.stdout.write(self.style.SUCCESS(f'[OK] No hay lápidas con más de {dias} días'))
+            return
+
+        vencidas = RegistroEliminado.objects.filter(id__lte=ultimo_id)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se eliminarían {vencidas.count()} lápidas (retención {dias} días)'
+            ))
+            return
+
+        with transaction.atomic():
+            # Los cursores con un ID de lápida menor ya no son válidos
+            MarcaResumen.objects.update_or_create(
+                nombre=MARCA_DEPURACION,
+                defaults={'procesado_hasta': limite, 'ultimo_id': ultimo_id},
+            )
+            eliminadas = vencidas.delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {eliminadas} lápidas eliminadas (retención {dias} días)'
+        ))
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0009_aprobacionexcepcional'),
+        ('solicitudes', '0019_solicitudarchivada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaResumen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=30, unique=True, verbose_name='Resumen')),
+                ('procesado_hasta', models.DateTimeField(verbose_name='Procesado hasta')),
+            ],
+            options={
+                'verbose_name': 'Marca de Resumen',
+                'verbose_name_plural': 'Marcas de Resúmenes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenSolicitudesDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('estado', models.CharField(choices=[('borrador', 'Borrador'), ('recibido', 'Recibida'), ('sin_asignar', 'Sin Asignar'), ('pendiente', 'Pendiente de Revisión'), ('en_revision', 'En Revisión'), ('documentos_faltantes', 'Documentos Faltantes'), ('aprobada', 'Aprobada'), ('rechazada', 'Rechazada'), ('vencida', 'Vencida'), ('escalada', 'Escalada a Supervisor')], max_length=25, verbose_name='Estado')),
+                ('prioridad', models.CharField(choices=[('normal', 'Normal'), ('alta', 'Alta'), ('critica', 'Crítica'), ('vip', 'VIP Gubernamental')], max_length=15, verbose_name='Prioridad')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.empresa', verbose_name='Empresa')),
+                ('puerto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='solicitudes.puerto', verbose_name='Puerto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Solicitudes',
+                'verbose_name_plural': 'Resúmenes Diarios de Solicitudes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenIncumplimientosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('tipo', models.CharField(choices=[('documentacion_invalida', 'Documentación Inválida o Vencida'), ('personal_no_autorizado', 'Personal No Autorizado'), ('vehiculo_no_autorizado', 'Vehículo No Autorizado'), ('horario_incumplido', 'Incumplimiento de Horario Autorizado'), ('zona_no_autorizada', 'Acceso a Zona No Autorizada'), ('seguridad', 'Incumplimiento de Normas de Seguridad'), ('otro', 'Otro Incumplimiento')], max_length=30, verbose_name='Tipo')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('puerto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='solicitudes.puerto', verbose_name='Puerto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Incumplimientos',
+                'verbose_name_plural': 'Resúmenes Diarios de Incumplimientos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenEvaluacionDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('resultado', models.CharField(choices=[('borrador', 'Borrador'), ('recibido', 'Recibida'), ('sin_asignar', 'Sin Asignar'), ('pendiente', 'Pendiente de Revisión'), ('en_revision', 'En Revisión'), ('documentos_faltantes', 'Documentos Faltantes'), ('aprobada', 'Aprobada'), ('rechazada', 'Rechazada'), ('vencida', 'Vencida'), ('escalada', 'Escalada a Supervisor')], max_length=25, verbose_name='Resultado')),
+                ('evaluadas', models.PositiveIntegerField(default=0, verbose_name='Evaluadas')),
+                ('horas_total', models.FloatField(default=0, verbose_name='Horas totales')),
+                ('horas_max', models.FloatField(default=0, verbose_name='Horas máximas')),
+                ('puerto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='solicitudes.puerto', verbose_name='Puerto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Evaluación',
+                'verbose_name_plural': 'Resúmenes Diarios de Evaluación',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenAccesosDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('hora', models.PositiveSmallIntegerField(verbose_name='Hora')),
+                ('tipo_acceso', models.CharField(max_length=10, verbose_name='Tipo de Acceso')),
+                ('estado', models.CharField(max_length=15, verbose_name='Estado')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('puerto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='solicitudes.puerto', verbose_name='Puerto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Accesos',
+                'verbose_name_plural': 'Resúmenes Diarios de Accesos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumensolicitudesdia',
+            constraint=models.UniqueConstraint(fields=('fecha', 'puerto', 'empresa', 'estado', 'prioridad'), name='resumen_solicitudes_dia_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenincumplimientosdia',
+            constraint=models.UniqueConstraint(fields=('fecha', 'puerto', 'tipo'), name='resumen_incumplimientos_dia_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenevaluaciondia',
+            constraint=models.UniqueConstraint(fields=('fecha', 'puerto', 'resultado'), name='resumen_evaluacion_dia_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenaccesosdia',
+            constraint=models.UniqueConstraint(fields=('fecha', 'puerto', 'hora', 'tipo_acceso', 'estado'), name='resumen_accesos_dia_unico'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TiempoEnEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('global', 'Global'), ('prioridad', 'Prioridad'), ('puerto', 'Puerto'), ('servicio', 'Servicio'), ('evaluador', 'Evaluador')], max_length=15, verbose_name='Dimensión')),
+                ('valor', models.CharField(blank=True, help_text='ID o código; vacío en global', max_length=50, verbose_name='Valor')),
+                ('estado', models.CharField(max_length=25, verbose_name='Estado')),
+                ('muestras', models.PositiveIntegerField(default=0, verbose_name='Muestras')),
+                ('segundos_total', models.FloatField(default=0, verbose_name='Segundos totales')),
+                ('p50', models.FloatField(blank=True, null=True, verbose_name='p50 (s)')),
+                ('p90', models.FloatField(blank=True, null=True, verbose_name='p90 (s)')),
+                ('p99', models.FloatField(blank=True, null=True, verbose_name='p99 (s)')),
+                ('boceto', models.JSONField(default=dict, verbose_name='Sketch de cuantiles')),
+                ('actualizado_el', models.DateTimeField(auto_now=True, verbose_name='Actualizado el')),
+            ],
+            options={
+                'verbose_name': 'Tiempo en Estado',
+                'verbose_name_plural': 'Tiempos en Estado',
+            },
+        ),
+        migrations.AddField(
+            model_name='marcaresumen',
+            name='ultimo_id',
+            field=models.BigIntegerField(default=0, verbose_name='Último ID procesado'),
+        ),
+        migrations.AddConstraint(
+            model_name='tiempoenestado',
+            constraint=models.UniqueConstraint(fields=('dimension', 'valor', 'estado'), name='tiempo_en_estado_unico'),
+        ),
+    ]
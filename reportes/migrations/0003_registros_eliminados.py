@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0002_tiempos_en_estado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(max_length=30, verbose_name='Entidad')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID del registro')),
+                ('eliminado_el', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Eliminado el')),
+            ],
+            options={
+                'verbose_name': 'Registro Eliminado',
+                'verbose_name_plural': 'Registros Eliminados',
+                'indexes': [models.Index(fields=['entidad', 'id'], name='reportes_re_entidad_77577a_idx'), models.Index(fields=['entidad', 'objeto_id'], name='reportes_re_entidad_3a5c68_idx')],
+            },
+        ),
+    ]
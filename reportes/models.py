@@ -1,3 +1,203 @@
 from django.db import models
 
-# Create your models here.
+from incumplimientos.models import Incumplimiento
+from solicitudes.models import Solicitud
+
+
+# ===========================
+# RESÚMENES DIARIOS
+# ===========================
+# Tablas precalculadas por día (hora local) que alimentan el dashboard de
+# reportes. Las mantiene el comando actualizar_resumenes (reportes/resumenes.py):
+# cada día afectado se recalcula completo, así que volver a ejecutarlo no
+# cambia nada.
+
+class ResumenSolicitudesDia(models.Model):
+    """Solicitudes creadas por día, puerto, empresa, estado actual y prioridad"""
+
+    fecha = models.DateField(verbose_name='Fecha')
+    puerto = models.ForeignKey('solicitudes.Puerto', on_delete=models.CASCADE, related_name='+', verbose_name='Puerto')
+    empresa = models.ForeignKey('accounts.Empresa', on_delete=models.CASCADE, related_name='+', verbose_name='Empresa')
+    estado = models.CharField(max_length=25, choices=Solicitud.ESTADO_CHOICES, verbose_name='Estado')
+    prioridad = models.CharField(max_length=15, choices=Solicitud.PRIORIDAD_CHOICES, verbose_name='Prioridad')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Solicitudes'
+        verbose_name_plural = 'Resúmenes Diarios de Solicitudes'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'puerto', 'empresa', 'estado', 'prioridad'],
+                name='resumen_solicitudes_dia_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.puerto_id}/{self.empresa_id} {self.estado}: {self.total}"
+
+
+class ResumenEvaluacionDia(models.Model):
+    """Solicitudes evaluadas por día, puerto y resultado con su tiempo de respuesta"""
+
+    fecha = models.DateField(verbose_name='Fecha')
+    puerto = models.ForeignKey('solicitudes.Puerto', on_delete=models.CASCADE, related_name='+', verbose_name='Puerto')
+    resultado = models.CharField(max_length=25, choices=Solicitud.ESTADO_CHOICES, verbose_name='Resultado')
+    evaluadas = models.PositiveIntegerField(default=0, verbose_name='Evaluadas')
+    # Suma y máximo de horas entre creación y evaluación (la media se
+    # calcula sumando días: horas_total / evaluadas)
+    horas_total = models.FloatField(default=0, verbose_name='Horas totales')
+    horas_max = models.FloatField(default=0, verbose_name='Horas máximas')
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Evaluación'
+        verbose_name_plural = 'Resúmenes Diarios de Evaluación'
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'puerto', 'resultado'], name='resumen_evaluacion_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.puerto_id} {self.resultado}: {self.evaluadas}"
+
+
+class ResumenAccesosDia(models.Model):
+    """Registros de acceso por día, puerto, hora, tipo y estado"""
+
+    fecha = models.DateField(verbose_name='Fecha')
+    puerto = models.ForeignKey('solicitudes.Puerto', on_delete=models.CASCADE, related_name='+', verbose_name='Puerto')
+    hora = models.PositiveSmallIntegerField(verbose_name='Hora')
+    tipo_acceso = models.CharField(max_length=10, verbose_name='Tipo de Acceso')
+    estado = models.CharField(max_length=15, verbose_name='Estado')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Accesos'
+        verbose_name_plural = 'Resúmenes Diarios de Accesos'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'puerto', 'hora', 'tipo_acceso', 'estado'],
+                name='resumen_accesos_dia_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.hora:02d}h {self.puerto_id} {self.tipo_acceso}: {self.total}"
+
+
+class ResumenIncumplimientosDia(models.Model):
+    """Incumplimientos por día en que ocurrieron, puerto y tipo"""
+
+    fecha = models.DateField(verbose_name='Fecha')
+    puerto = models.ForeignKey('solicitudes.Puerto', on_delete=models.CASCADE, related_name='+', verbose_name='Puerto')
+    tipo = models.CharField(max_length=30, choices=Incumplimiento.TIPO_CHOICES, verbose_name='Tipo')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Incumplimientos'
+        verbose_name_plural = 'Resúmenes Diarios de Incumplimientos'
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'puerto', 'tipo'], name='resumen_incumplimientos_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.puerto_id} {self.tipo}: {self.total}"
+
+
+class MarcaResumen(models.Model):
+    """Hasta cuándo se procesaron los cambios de cada resumen"""
+
+    nombre = models.CharField(max_length=30, unique=True, verbose_name='Resumen')
+    procesado_hasta = models.DateTimeField(verbose_name='Procesado hasta')
+    # Para los procesos que avanzan por ID de registro (tiempos en estado)
+    ultimo_id = models.BigIntegerField(default=0, verbose_name='Último ID procesado')
+
+    class Meta:
+        verbose_name = 'Marca de Resumen'
+        verbose_name_plural = 'Marcas de Resúmenes'
+
+    def __str__(self):
+        return f"{self.nombre}: {self.procesado_hasta}"
+
+
+# ===========================
+# TIEMPOS EN ESTADO
+# ===========================
+
+class TiempoEnEstado(models.Model):
+    """
+    Distribución del tiempo que pasan las solicitudes en cada estado, por
+    dimensión (prioridad, puerto, servicio, evaluador o global). Se
+    alimenta del historial de EventoSolicitud (reportes/tiempos.py) y guarda
+    un sketch de cuantiles fusionable para sumar cada ejecución a la
+    anterior; p50/p90/p99 quedan materializados en segundos.
+    """
+
+    DIMENSION_CHOICES = [
+        ('global', 'Global'),
+        ('prioridad', 'Prioridad'),
+        ('puerto', 'Puerto'),
+        ('servicio', 'Servicio'),
+        ('evaluador', 'Evaluador'),
+    ]
+
+    # Pseudo-estado: desde que la solicitud se envía hasta que se aprueba o rechaza
+    RESOLUCION = 'resolucion'
+
+    dimension = models.CharField(max_length=15, choices=DIMENSION_CHOICES, verbose_name='Dimensión')
+    valor = models.CharField(max_length=50, blank=True, verbose_name='Valor', help_text='ID o código; vacío en global')
+    estado = models.CharField(max_length=25, verbose_name='Estado')
+    muestras = models.PositiveIntegerField(default=0, verbose_name='Muestras')
+    segundos_total = models.FloatField(default=0, verbose_name='Segundos totales')
+    p50 = models.FloatField(null=True, blank=True, verbose_name='p50 (s)')
+    p90 = models.FloatField(null=True, blank=True, verbose_name='p90 (s)')
+    p99 = models.FloatField(null=True, blank=True, verbose_name='p99 (s)')
+    boceto = models.JSONField(default=dict, verbose_name='Sketch de cuantiles')
+    actualizado_el = models.DateTimeField(auto_now=True, verbose_name='Actualizado el')
+
+    class Meta:
+        verbose_name = 'Tiempo en Estado'
+        verbose_name_plural = 'Tiempos en Estado'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'valor', 'estado'], name='tiempo_en_estado_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.valor or '*'} {self.estado}: p50 {self.p50}s ({self.muestras})"
+
+    @property
+    def promedio(self):
+        return self.segundos_total / self.muestras if self.muestras else None
+
+    @classmethod
+    def dias_resolucion(cls, dimension='global', valor=''):
+        """Mediana en días desde el envío hasta la decisión, o None sin datos"""
+        p50 = cls.objects.filter(
+            dimension=dimension, valor=str(valor), estado=cls.RESOLUCION
+        ).values_list('p50', flat=True).first()
+        return round(p50 / 86400, 1) if p50 is not None else None
+
+
+# ===========================
+# FEED DE CAMBIOS
+# ===========================
+
+class RegistroEliminado(models.Model):
+    """
+    Lápida de un registro eliminado (o archivado) de una entidad del feed de
+    cambios (reportes/cambios.py), para que los clientes que sincronizan lo
+    borren también. Se depuran tras CAMBIOS_RETENCION_ELIMINADOS_DIAS.
+    """
+
+    entidad = models.CharField(max_length=30, verbose_name='Entidad')
+    objeto_id = models.BigIntegerField(verbose_name='ID del registro')
+    eliminado_el = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Eliminado el')
+
+    class Meta:
+        verbose_name = 'Registro Eliminado'
+        verbose_name_plural = 'Registros Eliminados'
+        indexes = [
+            models.Index(fields=['entidad', 'id']),
+            models.Index(fields=['entidad', 'objeto_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} #{self.objeto_id} ({self.eliminado_el})"
@@ -0,0 +1,331 @@
+"""
+Mantenimiento de los resúmenes diarios de reportes.
+
+Cada resumen agrupa una tabla de origen por día (hora local) y otras
+dimensiones. La actualización es incremental: se buscan los días con
+registros modificados desde la última ejecución (MarcaResumen) y cada uno
+de esos días se recalcula completo dentro de una transacción, borrando sus
+filas y volviendo a insertarlas. Recalcular un día dos veces da el mismo
+resultado, así que el proceso es idempotente y se puede repetir sin riesgo.
+
+Los registros eliminados (o movidos a otro día) no dejan rastro en las
+tablas de origen; ``actualizar(completo=True)`` reconstruye todo.
+
+Las solicitudes archivadas (solicitudes/archivo.py) ya no están en las
+tablas de origen, pero siguen contando: al recalcular un día se suman los
+registros de cada SolicitudArchivada que pudo tener datos ese día (creada
+antes de que termine y archivada después de que empiece).
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from control_acceso.models import RegistroAcceso
+from incumplimientos.models import Incumplimiento
+from solicitudes.models import Solicitud, SolicitudArchivada
+
+from .models import (
+    MarcaResumen,
+    ResumenAccesosDia,
+    ResumenEvaluacionDia,
+    ResumenIncumplimientosDia,
+    ResumenSolicitudesDia,
+)
+
+# Margen al buscar cambios: cubre transacciones que guardaron antes de la
+# marca pero confirmaron después
+MARGEN = timedelta(minutes=10)
+
+# Días consecutivos recalculados por transacción
+DIAS_POR_LOTE = 31
+
+RESULTADOS_EVALUACION = ('aprobada', 'rechazada')
+
+Resumen = namedtuple('Resumen', 'modelo origen campo_fecha campo_cambio filas archivo')
+
+
+def _rango(dias):
+    """[medianoche del primer día, medianoche del día siguiente al último)"""
+    desde = timezone.make_aware(datetime.combine(min(dias), time.min))
+    hasta = timezone.make_aware(datetime.combine(max(dias) + timedelta(days=1), time.min))
+    return desde, hasta
+
+
+def _agrupar(queryset, campo_fecha, dias, *dimensiones, **agregados):
+    desde, hasta = _rango(dias)
+    return [
+        fila for fila in queryset.filter(**{
+            f'{campo_fecha}__gte': desde, f'{campo_fecha}__lt': hasta,
+        }).annotate(fecha=TruncDate(campo_fecha)).order_by().values(
+            'fecha', *dimensiones
+        ).annotate(**agregados)
+        if fila['fecha'] in dias
+    ]
+
+
+# ===========================
+# SOLICITUDES ARCHIVADAS
+# ===========================
+
+def _momento(valor):
+    return parse_datetime(valor) if valor else None
+
+
+def _archivadas(desde=None, hasta=None):
+    """
+    Registros de cada solicitud archivada que puede tener datos en
+    [desde, hasta), como diccionario {modelo: [campos]}.
+    """
+    queryset = SolicitudArchivada.objects.order_by('pk')
+    if desde is not None:
+        queryset = queryset.filter(archivada_el__gte=desde)
+    if hasta is not None:
+        queryset = queryset.filter(creada_el__lt=hasta)
+    for archivada in queryset.iterator(chunk_size=50):
+        objetos = defaultdict(list)
+        for objeto in archivada.datos():
+            objetos[objeto['model']].append({'id': objeto['pk'], **objeto['fields']})
+        yield objetos
+
+
+def _combinar(filas, archivo, dias, *dimensiones, maximos=()):
+    """
+    Suma a las filas agrupadas de las tablas de origen las de los registros
+    archivados en ``dias`` (un diccionario por registro, con los mismos
+    campos que las filas).
+    """
+    claves = ('fecha',) + dimensiones
+    grupos = {tuple(fila[clave] for clave in claves): fila for fila in filas}
+    for objetos in _archivadas(*_rango(dias)):
+        for fila in archivo(objetos):
+            if fila['fecha'] not in dias:
+                continue
+            grupo = grupos.setdefault(tuple(fila[clave] for clave in claves), fila)
+            if grupo is fila:
+                continue
+            for campo, valor in fila.items():
+                if campo not in claves:
+                    grupo[campo] = max(grupo[campo], valor) if campo in maximos else grupo[campo] + valor
+    return list(grupos.values())
+
+
+# ===========================
+# RESÚMENES
+# ===========================
+
+def _solicitudes():
+    return Solicitud.objects.exclude(estado='borrador')
+
+
+def _archivo_solicitudes(objetos):
+    for solicitud in objetos['solicitudes.solicitud']:
+        if solicitud['estado'] != 'borrador':
+            yield {
+                'fecha': timezone.localdate(_momento(solicitud['creada_el'])),
+                'puerto_destino_id': solicitud['puerto_destino'], 'empresa_id': solicitud['empresa'],
+                'estado': solicitud['estado'], 'prioridad': solicitud['prioridad'], 'total': 1,
+            }
+
+
+def _filas_solicitudes(dias):
+    dimensiones = ('puerto_destino_id', 'empresa_id', 'estado', 'prioridad')
+    return [
+        ResumenSolicitudesDia(
+            fecha=fila['fecha'], puerto_id=fila['puerto_destino_id'], empresa_id=fila['empresa_id'],
+            estado=fila['estado'], prioridad=fila['prioridad'], total=fila['total'],
+        )
+        for fila in _combinar(
+            _agrupar(_solicitudes(), 'creada_el', dias, *dimensiones, total=Count('id')),
+            _archivo_solicitudes, dias, *dimensiones,
+        )
+    ]
+
+
+def _evaluadas():
+    return Solicitud.objects.filter(estado__in=RESULTADOS_EVALUACION, fecha_evaluacion__isnull=False)
+
+
+def _archivo_evaluacion(objetos):
+    for solicitud in objetos['solicitudes.solicitud']:
+        if solicitud['estado'] in RESULTADOS_EVALUACION and solicitud['fecha_evaluacion']:
+            evaluada = _momento(solicitud['fecha_evaluacion'])
+            demora = evaluada - _momento(solicitud['creada_el'])
+            yield {
+                'fecha': timezone.localdate(evaluada), 'puerto_destino_id': solicitud['puerto_destino'],
+                'estado': solicitud['estado'], 'evaluadas': 1, 'demora_total': demora, 'demora_max': demora,
+            }
+
+
+def _filas_evaluacion(dias):
+    demora = ExpressionWrapper(F('fecha_evaluacion') - F('creada_el'), output_field=DurationField())
+    filas = []
+    for fila in _combinar(
+        _agrupar(
+            _evaluadas(), 'fecha_evaluacion', dias,
+            'puerto_destino_id', 'estado', evaluadas=Count('id'), demora_total=Sum(demora), demora_max=Max(demora),
+        ),
+        _archivo_evaluacion, dias, 'puerto_destino_id', 'estado', maximos=('demora_max',),
+    ):
+        filas.append(ResumenEvaluacionDia(
+            fecha=fila['fecha'], puerto_id=fila['puerto_destino_id'], resultado=fila['estado'],
+            evaluadas=fila['evaluadas'],
+            horas_total=max(fila['demora_total'].total_seconds(), 0) / 3600,
+            horas_max=max(fila['demora_max'].total_seconds(), 0) / 3600,
+        ))
+    return filas
+
+
+def _accesos():
+    return RegistroAcceso.objects.all()
+
+
+def _archivo_accesos(objetos):
+    puertos = {solicitud['id']: solicitud['puerto_destino'] for solicitud in objetos['solicitudes.solicitud']}
+    autorizaciones = {
+        autorizacion['id']: puertos.get(autorizacion['solicitud'])
+        for autorizacion in objetos['control_acceso.autorizacion']
+    }
+    for registro in objetos['control_acceso.registroacceso']:
+        momento = timezone.localtime(_momento(registro['timestamp']))
+        yield {
+            'fecha': momento.date(), 'hora': momento.hour,
+            'autorizacion__solicitud__puerto_destino_id': autorizaciones.get(registro['autorizacion']),
+            'tipo_acceso': registro['tipo_acceso'], 'estado': registro['estado'], 'total': 1,
+        }
+
+
+def _filas_accesos(dias):
+    dimensiones = ('autorizacion__solicitud__puerto_destino_id', 'hora', 'tipo_acceso', 'estado')
+    return [
+        ResumenAccesosDia(
+            fecha=fila['fecha'], puerto_id=fila['autorizacion__solicitud__puerto_destino_id'], hora=fila['hora'],
+            tipo_acceso=fila['tipo_acceso'], estado=fila['estado'], total=fila['total'],
+        )
+        for fila in _combinar(
+            _agrupar(
+                _accesos().annotate(hora=ExtractHour('timestamp')), 'timestamp', dias, *dimensiones, total=Count('id'),
+            ),
+            _archivo_accesos, dias, *dimensiones,
+        )
+    ]
+
+
+def _incumplimientos():
+    return Incumplimiento.objects.all()
+
+
+def _archivo_incumplimientos(objetos):
+    for incumplimiento in objetos['incumplimientos.incumplimiento']:
+        yield {
+            'fecha': timezone.localdate(_momento(incumplimiento['fecha_incumplimiento'])),
+            'puerto_id': incumplimiento['puerto'], 'tipo': incumplimiento['tipo'], 'total': 1,
+        }
+
+
+def _filas_incumplimientos(dias):
+    return [
+        ResumenIncumplimientosDia(
+            fecha=fila['fecha'], puerto_id=fila['puerto_id'], tipo=fila['tipo'], total=fila['total'],
+        )
+        for fila in _combinar(
+            _agrupar(_incumplimientos(), 'fecha_incumplimiento', dias, 'puerto_id', 'tipo', total=Count('id')),
+            _archivo_incumplimientos, dias, 'puerto_id', 'tipo',
+        )
+    ]
+
+
+RESUMENES = {
+    'solicitudes': Resumen(
+        ResumenSolicitudesDia, _solicitudes, 'creada_el', 'actualizada_el', _filas_solicitudes, _archivo_solicitudes,
+    ),
+    'evaluacion': Resumen(
+        ResumenEvaluacionDia, _evaluadas, 'fecha_evaluacion', 'actualizada_el', _filas_evaluacion, _archivo_evaluacion,
+    ),
+    'accesos': Resumen(ResumenAccesosDia, _accesos, 'timestamp', 'actualizado_el', _filas_accesos, _archivo_accesos),
+    'incumplimientos': Resumen(
+        ResumenIncumplimientosDia, _incumplimientos, 'fecha_incumplimiento', 'fecha_modificacion',
+        _filas_incumplimientos, _archivo_incumplimientos,
+    ),
+}
+
+
+def _dias(queryset, campo_fecha):
+    return set(
+        queryset.annotate(dia=TruncDate(campo_fecha)).order_by().values_list('dia', flat=True).distinct()
+    ) - {None}
+
+
+def _lotes(dias):
+    """Tramos de días consecutivos de hasta DIAS_POR_LOTE días"""
+    lote = []
+    for dia in sorted(dias):
+        if lote and (dia - lote[-1] > timedelta(days=1) or len(lote) >= DIAS_POR_LOTE):
+            yield lote
+            lote = []
+        lote.append(dia)
+    if lote:
+        yield lote
+
+
+def dias_pendientes(nombre, desde=None, completo=False):
+    """
+    Días que hay que recalcular: todos (completo), los posteriores a
+    ``desde`` o los que tienen registros modificados desde la última marca.
+    """
+    resumen = RESUMENES[nombre]
+    origen = resumen.origen()
+    if not completo and desde is None:
+        marca = MarcaResumen.objects.filter(nombre=nombre).first()
+        if marca is not None:
+            cambios = origen.filter(**{f'{resumen.campo_cambio}__gte': marca.procesado_hasta - MARGEN})
+            return _dias(cambios, resumen.campo_fecha)
+        completo = True
+
+    existentes = resumen.modelo.objects.all()
+    inicio = None
+    if not completo:
+        inicio = _rango([desde])[0]
+        origen = origen.filter(**{f'{resumen.campo_fecha}__gte': inicio})
+        existentes = existentes.filter(fecha__gte=desde)
+    archivados = {
+        fila['fecha'] for objetos in _archivadas(desde=inicio) for fila in resumen.archivo(objetos)
+        if fila['fecha'] is not None and (inicio is None or fila['fecha'] >= desde)
+    }
+    # Los días que ya no tienen registros también se recalculan (quedan vacíos)
+    return _dias(origen, resumen.campo_fecha) | set(existentes.values_list('fecha', flat=True).distinct()) | archivados
+
+
+def actualizar(nombre, desde=None, completo=False):
+    """
+    Recalcula los días pendientes de un resumen y avanza su marca.
+
+    Returns:
+        tuple: (días recalculados, filas escritas)
+    """
+    resumen = RESUMENES[nombre]
+    inicio = timezone.now()
+    dias = dias_pendientes(nombre, desde, completo)
+
+    filas = 0
+    for lote in _lotes(dias):
+        with transaction.atomic():
+            nuevas = resumen.filas(set(lote))
+            resumen.modelo.objects.filter(fecha__in=lote).delete()
+            resumen.modelo.objects.bulk_create(nuevas, batch_size=500)
+        filas += len(nuevas)
+
+    MarcaResumen.objects.update_or_create(nombre=nombre, defaults={'procesado_hasta': inicio})
+    return len(dias), filas
+
+
+def ultima_actualizacion():
+    """Marca más antigua entre los resúmenes (None si alguno no se ha calculado)"""
+    marcas = dict(MarcaResumen.objects.values_list('nombre', 'procesado_hasta'))
+    if set(marcas) != set(RESUMENES):
+        return None
+    return min(marcas.values())
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from naviport.pruebas import PruebaConMedia, crear_autorizacion, crear_empresa, crear_solicitud, crear_usuario
+
+from . import cambios, resumenes
+from .models import MarcaResumen, RegistroEliminado, ResumenAccesosDia, ResumenEvaluacionDia, ResumenSolicitudesDia
+
+
+@override_settings(CAMBIOS_MARGEN_SEGUNDOS=0)
+class FeedCambiosTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(crear_usuario('admin_tic'))
+
+    def _get(self, entidad, **parametros):
+        return self.client.get(reverse('cambios_api:cambios', args=[entidad]), parametros)
+
+    def _sincronizar(self, entidad, since='', limite=2):
+        """Recorre el feed hasta ``completo``; retorna (ids, eliminados, cursor)"""
+        ids, eliminados = [], []
+        while True:
+            datos = self._get(entidad, since=since, limite=limite).json()
+            ids += [fila[0] for fila in datos['filas']]
+            eliminados += datos['eliminados']
+            since = datos['siguiente']
+            if datos['completo']:
+                return ids, eliminados, since
+
+    def test_paginacion_entrega_cada_registro_una_vez(self):
+        empresas = [crear_empresa() for _ in range(5)]
+        ids, _, cursor = self._sincronizar('empresas')
+        self.assertEqual(sorted(ids), sorted(e.pk for e in empresas))
+
+        nueva = crear_empresa()
+        ids, _, _ = self._sincronizar('empresas', cursor)
+        self.assertEqual(ids, [nueva.pk])
+
+    def test_eliminacion_deja_lapida(self):
+        empresa = crear_empresa()
+        _, _, cursor = self._sincronizar('empresas')
+        empresa_id = empresa.pk
+        empresa.delete()
+
+        _, eliminados, _ = self._sincronizar('empresas', cursor)
+        self.assertEqual(eliminados, [empresa_id])
+
+    def test_cursor_al_dia_sobrevive_depuracion_de_otra_entidad(self):
+        crear_empresa()
+        _, _, cursor = self._sincronizar('registros_acceso')
+
+        # Una lápida antigua de otra entidad, ya vista por el cliente en su tiempo
+        empresa = crear_empresa()
+        empresa.delete()
+        RegistroEliminado.objects.update(eliminado_el=timezone.now() - timedelta(days=365))
+        _, _, cursor = self._sincronizar('registros_acceso', cursor)
+
+        call_command('depurar_registros_eliminados', stdout=StringIO())
+        self.assertFalse(RegistroEliminado.objects.exists())
+        self.assertEqual(self._get('registros_acceso', since=cursor).status_code, 200)
+
+    def test_cursor_anterior_a_la_depuracion_recibe_410(self):
+        _, _, cursor = self._sincronizar('empresas')
+        empresa = crear_empresa()
+        empresa.delete()
+        RegistroEliminado.objects.update(eliminado_el=timezone.now() - timedelta(days=365))
+
+        call_command('depurar_registros_eliminados', stdout=StringIO())
+        self.assertEqual(self._get('empresas', since=cursor).status_code, 410)
+        self.assertEqual(self._get('empresas').status_code, 200)
+
+    def test_since_fecha_iso(self):
+        crear_empresa()
+        self.assertEqual(self._get('empresas', since='2020-01-01T00:00:00').status_code, 200)
+
+    def test_since_fecha_inexistente_es_400(self):
+        self.assertEqual(self._get('solicitudes', since='2026-02-30T10:00').status_code, 400)
+        self.assertEqual(self._get('solicitudes', since='no-es-un-cursor').status_code, 400)
+        with self.assertRaises(cambios.CursorInvalido):
+            cambios.cursor_inicial('2026-13-01T00:00')
+
+    def test_roles(self):
+        self.client.force_login(crear_usuario('oficial_acceso'))
+        self.assertEqual(self._get('autorizaciones').status_code, 200)
+        self.assertEqual(self._get('empresas').status_code, 403)
+        self.assertEqual(self._get('desconocida').status_code, 404)
+
+
+class ResumenesArchivoTests(PruebaConMedia):
+    """Los resúmenes conservan la historia de las solicitudes archivadas"""
+
+    def setUp(self):
+        from control_acceso.models import RegistroAcceso
+
+        self.autorizacion = crear_autorizacion(
+            crear_solicitud(estado='aprobada', fecha_evaluacion=timezone.now()),
+        )
+        self.solicitud = self.autorizacion.solicitud
+        self.registro = RegistroAcceso.objects.create(
+            autorizacion=self.autorizacion, tipo_acceso='salida', vehiculo_placa='A000001',
+            conductor_nombre='Conductor', oficial_acceso=crear_usuario('oficial_acceso'), estado='autorizado',
+        )
+
+    def _actualizar(self, **opciones):
+        for nombre in resumenes.RESUMENES:
+            resumenes.actualizar(nombre, **opciones)
+
+    def _totales(self):
+        return (
+            sum(ResumenSolicitudesDia.objects.values_list('total', flat=True)),
+            sum(ResumenEvaluacionDia.objects.values_list('evaluadas', flat=True)),
+            sum(ResumenAccesosDia.objects.values_list('total', flat=True)),
+        )
+
+    def test_reconstruccion_completa_conserva_lo_archivado(self):
+        from solicitudes.archivo import archivar_solicitud
+
+        self._actualizar()
+        self.assertEqual(self._totales(), (1, 1, 1))
+
+        archivar_solicitud(self.solicitud)
+        self._actualizar(completo=True)
+        self.assertEqual(self._totales(), (1, 1, 1))
+
+        # Sin resúmenes previos (p. ej. archivo anterior a los resúmenes)
+        ResumenSolicitudesDia.objects.all().delete()
+        MarcaResumen.objects.all().delete()
+        self._actualizar()
+        self.assertEqual(self._totales(), (1, 1, 1))
+
+    def test_dia_con_archivadas_y_nuevas_suma_ambas(self):
+        from solicitudes.archivo import archivar_solicitud
+
+        self._actualizar()
+        archivar_solicitud(self.solicitud)
+        crear_solicitud(estado='pendiente')
+        self._actualizar()
+        self.assertEqual(self._totales(), (2, 1, 1))
+
+    def test_accesos_detecta_cambios_por_actualizado_el(self):
+        from control_acceso.models import RegistroAcceso
+
+        RegistroAcceso.objects.filter(pk=self.registro.pk).update(timestamp=timezone.now() - timedelta(days=3))
+        self._actualizar()
+        self.assertEqual(ResumenAccesosDia.objects.get().estado, 'autorizado')
+
+        self.registro.refresh_from_db()
+        self.registro.estado = 'denegado'
+        self.registro.save()
+        resumenes.actualizar('accesos')
+        self.assertEqual(ResumenAccesosDia.objects.get().estado, 'denegado')
@@ -0,0 +1,195 @@
+"""
+Tiempo en cada estado a partir del historial de EventoSolicitud.
+
+Los eventos de creación guardan ``estado_inicial`` en su metadata y los de
+cambio de estado ``estado_anterior``/``estado_nuevo``. Recorriendo los de
+una solicitud en orden, cada transición cierra el estado anterior: la
+diferencia entre las dos fechas es una muestra de tiempo en ese estado.
+Cuando la solicitud pasa a aprobada o rechazada se toma además una muestra
+de ``resolucion`` (desde que se envió por primera vez).
+
+La actualización es incremental: solo se cuentan las muestras que cierra
+un evento posterior al último procesado (MarcaResumen.ultimo_id). Para
+ello se recorre el historial completo de las solicitudes afectadas, en una
+consulta ordenada por (solicitud, fecha) cada lote. Las muestras nuevas se
+acumulan en sketches de cuantiles que se fusionan con los guardados, todo
+en la misma transacción que avanza la marca.
+
+Las dimensiones (prioridad, puerto, servicios, evaluador) son las que
+tiene la solicitud al procesar el evento.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from solicitudes.models import EventoSolicitud, Solicitud
+
+from .cuantiles import BocetoCuantiles
+from .models import MarcaResumen, TiempoEnEstado
+
+MARCA = 'tiempos_estado'
+
+# Eventos más recientes que esto aún pueden tener transacciones sin confirmar
+# con IDs menores; se dejan para la siguiente ejecución
+MARGEN = timedelta(minutes=10)
+
+SOLICITUDES_POR_LOTE = 1000
+
+ESTADOS_DECISION = ('aprobada', 'rechazada')
+
+TRANSICIONES = Q(metadata__has_key='estado_nuevo') | Q(metadata__has_key='estado_inicial')
+
+CUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+
+def _estado(metadata):
+    return metadata.get('estado_nuevo') or metadata.get('estado_inicial')
+
+
+def muestras_solicitud(eventos, ultimo_id):
+    """
+    Muestras (estado, segundos) que cierran los eventos con ID mayor que
+    ``ultimo_id``. ``eventos`` son tuplas (id, fecha, estado) en orden.
+    """
+    anterior = None
+    creada_el = enviada_el = None
+    for evento_id, fecha, estado in eventos:
+        if anterior is None:
+            creada_el = fecha
+        elif estado == anterior[1]:
+            continue
+        elif evento_id > ultimo_id:
+            yield anterior[1], (fecha - anterior[0]).total_seconds()
+            if estado in ESTADOS_DECISION and anterior[1] not in ESTADOS_DECISION:
+                # Sin paso por 'recibido' (creada por API o admin) cuenta desde la creación
+                yield TiempoEnEstado.RESOLUCION, (fecha - (enviada_el or creada_el)).total_seconds()
+        if estado == 'recibido' and enviada_el is None:
+            enviada_el = fecha
+        anterior = (fecha, estado)
+
+
+def _dimensiones(solicitud_ids):
+    """solicitud_id -> [(dimension, valor), ...]"""
+    servicios = defaultdict(list)
+    for solicitud_id, servicio_id in Solicitud.servicios_solicitados.through.objects.filter(
+        solicitud_id__in=solicitud_ids
+    ).values_list('solicitud_id', 'servicio_id'):
+        servicios[solicitud_id].append(('servicio', str(servicio_id)))
+
+    dimensiones = {}
+    for solicitud_id, prioridad, puerto_id, evaluador_id in Solicitud.objects.filter(
+        pk__in=solicitud_ids
+    ).values_list('id', 'prioridad', 'puerto_destino_id', 'evaluador_asignado_id'):
+        claves = [('global', ''), ('prioridad', prioridad), ('puerto', str(puerto_id))]
+        if evaluador_id:
+            claves.append(('evaluador', str(evaluador_id)))
+        dimensiones[solicitud_id] = claves + servicios[solicitud_id]
+    return dimensiones
+
+
+def _acumular(solicitud_ids, ultimo_id, hasta_id, acumulado):
+    eventos = EventoSolicitud.objects.filter(
+        TRANSICIONES, solicitud_id__in=solicitud_ids, id__lte=hasta_id
+    ).order_by('solicitud_id', 'creado_el', 'id').values_list(
+        'solicitud_id', 'id', 'creado_el', 'metadata'
+    ).iterator(chunk_size=2000)
+
+    dimensiones = _dimensiones(solicitud_ids)
+    muestras = 0
+    for solicitud_id, grupo in groupby(eventos, key=itemgetter(0)):
+        claves = dimensiones.get(solicitud_id, [('global', '')])
+        historial = ((evento_id, fecha, _estado(metadata)) for _, evento_id, fecha, metadata in grupo)
+        for estado, segundos in muestras_solicitud(historial, ultimo_id):
+            segundos = max(segundos, 0)
+            muestras += 1
+            for dimension, valor in claves:
+                entrada = acumulado[(dimension, valor, estado)]
+                entrada[0].agregar(segundos)
+                entrada[1] += segundos
+    return muestras
+
+
+def _guardar(acumulado):
+    existentes = {
+        (t.dimension, t.valor, t.estado): t
+        for t in TiempoEnEstado.objects.all()
+    }
+    nuevos, modificados = [], []
+    for clave, (boceto, segundos) in acumulado.items():
+        fila = existentes.get(clave)
+        if fila is None:
+            fila = TiempoEnEstado(dimension=clave[0], valor=clave[1], estado=clave[2])
+            nuevos.append(fila)
+        else:
+            boceto = BocetoCuantiles.de_dict(fila.boceto).fusionar(boceto)
+            modificados.append(fila)
+        fila.muestras = len(boceto)
+        fila.segundos_total += segundos
+        fila.boceto = boceto.a_dict()
+        for campo, q in CUANTILES:
+            setattr(fila, campo, boceto.cuantil(q))
+        fila.actualizado_el = timezone.now()
+
+    TiempoEnEstado.objects.bulk_create(nuevos, batch_size=500)
+    TiempoEnEstado.objects.bulk_update(
+        modificados, ['muestras', 'segundos_total', 'boceto', 'p50', 'p90', 'p99', 'actualizado_el'], batch_size=500
+    )
+
+
+def _ultimo_id(completo):
+    marca = MarcaResumen.objects.filter(nombre=MARCA).first()
+    return 0 if completo or marca is None else marca.ultimo_id
+
+
+def eventos_pendientes(completo=False):
+    """Eventos de transición que procesaría la próxima actualización"""
+    return EventoSolicitud.objects.filter(
+        TRANSICIONES, id__gt=_ultimo_id(completo), creado_el__lt=timezone.now() - MARGEN
+    )
+
+
+def actualizar(completo=False):
+    """
+    Procesa los eventos nuevos (o todos con ``completo``).
+
+    Returns:
+        tuple: (eventos nuevos, muestras agregadas)
+    """
+    inicio = timezone.now()
+    ultimo_id = _ultimo_id(completo)
+
+    nuevos = EventoSolicitud.objects.filter(TRANSICIONES, id__gt=ultimo_id, creado_el__lt=inicio - MARGEN)
+    hasta_id = nuevos.aggregate(maximo=Max('id'))['maximo']
+    if hasta_id is None:
+        with transaction.atomic():
+            if completo:
+                TiempoEnEstado.objects.all().delete()
+            MarcaResumen.objects.update_or_create(
+                nombre=MARCA, defaults={'procesado_hasta': inicio, 'ultimo_id': ultimo_id}
+            )
+        return 0, 0
+
+    nuevos = nuevos.filter(id__lte=hasta_id)
+    total_eventos = nuevos.count()
+    solicitud_ids = sorted(set(nuevos.values_list('solicitud_id', flat=True)))
+
+    acumulado = defaultdict(lambda: [BocetoCuantiles(), 0.0])
+    muestras = 0
+    for inicio_lote in range(0, len(solicitud_ids), SOLICITUDES_POR_LOTE):
+        muestras += _acumular(
+            solicitud_ids[inicio_lote:inicio_lote + SOLICITUDES_POR_LOTE], ultimo_id, hasta_id, acumulado
+        )
+
+    with transaction.atomic():
+        if completo:
+            TiempoEnEstado.objects.all().delete()
+        _guardar(acumulado)
+        MarcaResumen.objects.update_or_create(
+            nombre=MARCA, defaults={'procesado_hasta': inicio, 'ultimo_id': hasta_id}
+        )
+    return total_eventos, muestras
@@ -1,12 +1,170 @@
+from datetime import date, timedelta
+
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.db.models import Max, Sum
+from django.utils import timezone
+from accounts.decorators import role_required
+from accounts.models import Empresa
+from incumplimientos.models import Incumplimiento
+from solicitudes.models import Puerto, Solicitud
+
+from .models import (
+    ResumenAccesosDia,
+    ResumenEvaluacionDia,
+    ResumenIncumplimientosDia,
+    ResumenSolicitudesDia,
+    TiempoEnEstado,
+)
+from .resumenes import ultima_actualizacion
+
+ESTADOS_EN_PROCESO = ('recibido', 'sin_asignar', 'pendiente', 'en_revision', 'documentos_faltantes', 'escalada')
+
+
+def _horas(segundos):
+    return segundos / 3600 if segundos is not None else None
+
+
+def _tiempos(dimension, etiquetas, **filtro):
+    """Filas de TiempoEnEstado con los cuantiles en horas"""
+    filas = []
+    for tiempo in TiempoEnEstado.objects.filter(dimension=dimension, **filtro).order_by('-muestras'):
+        clave = tiempo.estado if dimension == 'global' else tiempo.valor
+        filas.append({
+            'nombre': etiquetas.get(clave, clave),
+            'muestras': tiempo.muestras,
+            'p50': _horas(tiempo.p50),
+            'p90': _horas(tiempo.p90),
+            'p99': _horas(tiempo.p99),
+        })
+    return filas
+
+
+def _fecha(valor, defecto):
+    try:
+        return date.fromisoformat(valor) if valor else defecto
+    except ValueError:
+        return defecto
 
-# Create your views here.
 
 @login_required
+@role_required('direccion', 'supervisor', 'admin_tic')
 def dashboard(request):
-    # Vista placeholder para reportes
-    return render(request, 'dashboard_placeholder.html', {
-        'title': 'Reportes',
-        'user': request.user
-    })
+    """
+    Dashboard gerencial. Lee solo los resúmenes diarios (comando
+    actualizar_resumenes), así que su costo depende del rango consultado y
+    no del tamaño del historial.
+    """
+    hoy = timezone.localdate()
+    hasta = _fecha(request.GET.get('hasta'), hoy)
+    desde = _fecha(request.GET.get('desde'), hasta - timedelta(days=29))
+    if desde > hasta:
+        desde, hasta = hasta, desde
+    puerto_id = request.GET.get('puerto', '')
+
+    filtro = {'fecha__gte': desde, 'fecha__lte': hasta}
+    if puerto_id.isdigit():
+        filtro['puerto_id'] = int(puerto_id)
+
+    solicitudes = ResumenSolicitudesDia.objects.filter(**filtro).order_by()
+    etiquetas_estado = dict(Solicitud.ESTADO_CHOICES)
+    por_estado = {
+        fila['estado']: fila['total']
+        for fila in solicitudes.values('estado').annotate(total=Sum('total'))
+    }
+    total_solicitudes = sum(por_estado.values())
+
+    nombres_puerto = dict(Puerto.objects.values_list('id', 'nombre'))
+    por_puerto = [
+        {'puerto': nombres_puerto.get(fila['puerto_id'], '—'), 'total': fila['total']}
+        for fila in solicitudes.values('puerto_id').annotate(total=Sum('total')).order_by('-total')
+    ]
+
+    top_empresas = list(solicitudes.values('empresa_id').annotate(total=Sum('total')).order_by('-total')[:10])
+    nombres_empresa = dict(Empresa.objects.filter(
+        pk__in=[fila['empresa_id'] for fila in top_empresas]
+    ).values_list('id', 'nombre'))
+    for fila in top_empresas:
+        fila['empresa'] = nombres_empresa.get(fila['empresa_id'], '—')
+
+    etiquetas_prioridad = dict(Solicitud.PRIORIDAD_CHOICES)
+    por_prioridad = [
+        {'prioridad': etiquetas_prioridad.get(fila['prioridad'], fila['prioridad']), 'total': fila['total']}
+        for fila in solicitudes.values('prioridad').annotate(total=Sum('total')).order_by('-total')
+    ]
+
+    por_dia = dict(solicitudes.values_list('fecha').annotate(total=Sum('total')))
+    serie_dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+    # Tiempo de respuesta: la media se combina con sumas, no promediando medias
+    evaluacion = ResumenEvaluacionDia.objects.filter(**filtro).order_by()
+    respuesta_por_puerto = []
+    for fila in evaluacion.values('puerto_id').annotate(
+        evaluadas=Sum('evaluadas'), horas=Sum('horas_total'), maximo=Max('horas_max')
+    ).order_by('-evaluadas'):
+        respuesta_por_puerto.append({
+            'puerto': nombres_puerto.get(fila['puerto_id'], '—'),
+            'evaluadas': fila['evaluadas'],
+            'promedio': fila['horas'] / fila['evaluadas'] if fila['evaluadas'] else 0,
+            'maximo': fila['maximo'] or 0,
+        })
+    totales_evaluacion = evaluacion.aggregate(evaluadas=Sum('evaluadas'), horas=Sum('horas_total'))
+    evaluadas = totales_evaluacion['evaluadas'] or 0
+    resultados = dict(evaluacion.values_list('resultado').annotate(total=Sum('evaluadas')))
+
+    accesos = ResumenAccesosDia.objects.filter(**filtro).order_by()
+    por_hora = dict(accesos.filter(estado='autorizado').values_list('hora').annotate(total=Sum('total')))
+    accesos_estado = dict(accesos.values_list('estado').annotate(total=Sum('total')))
+
+    incumplimientos = ResumenIncumplimientosDia.objects.filter(**filtro).order_by()
+    etiquetas_tipo = dict(Incumplimiento.TIPO_CHOICES)
+    por_tipo = [
+        {'tipo': etiquetas_tipo.get(fila['tipo'], fila['tipo']), 'total': fila['total']}
+        for fila in incumplimientos.values('tipo').annotate(total=Sum('total')).order_by('-total')
+    ]
+
+    # Tiempos en estado: acumulados de todo el historial (actualizar_tiempos_estado)
+    tiempos_estado = _tiempos('global', {**etiquetas_estado, TiempoEnEstado.RESOLUCION: 'Resolución (envío a decisión)'})
+    resolucion_prioridad = _tiempos('prioridad', etiquetas_prioridad, estado=TiempoEnEstado.RESOLUCION)
+
+    context = {
+        'desde': desde,
+        'hasta': hasta,
+        'puerto_id': puerto_id,
+        'puertos': Puerto.objects.filter(activo=True).order_by('nombre'),
+        'actualizado': ultima_actualizacion(),
+        'kpis': {
+            'solicitudes': total_solicitudes,
+            'aprobadas': por_estado.get('aprobada', 0),
+            'rechazadas': por_estado.get('rechazada', 0),
+            'en_proceso': sum(por_estado.get(e, 0) for e in ESTADOS_EN_PROCESO),
+            'evaluadas': evaluadas,
+            'tasa_aprobacion': round(resultados.get('aprobada', 0) * 100 / evaluadas, 1) if evaluadas else 0,
+            'horas_respuesta': (totales_evaluacion['horas'] or 0) / evaluadas if evaluadas else 0,
+            'accesos': accesos_estado.get('autorizado', 0),
+            'accesos_denegados': accesos_estado.get('denegado', 0),
+            'incumplimientos': sum(fila['total'] for fila in por_tipo),
+        },
+        'por_puerto': por_puerto,
+        'top_empresas': top_empresas,
+        'por_prioridad': por_prioridad,
+        'respuesta_por_puerto': respuesta_por_puerto,
+        'por_tipo': por_tipo,
+        'tiempos_estado': tiempos_estado,
+        'resolucion_prioridad': resolucion_prioridad,
+        'graficos': {
+            'estados': {
+                'labels': [etiquetas_estado.get(e, e) for e in por_estado],
+                'data': list(por_estado.values()),
+            },
+            'dias': {
+                'labels': [d.strftime('%d/%m') for d in serie_dias],
+                'data': [por_dia.get(d, 0) for d in serie_dias],
+            },
+            'horas': {
+                'labels': [f'{h:02d}h' for h in range(24)],
+                'data': [por_hora.get(h, 0) for h in range(24)],
+            },
+        },
+    }
+    return render(request, 'reportes/dashboard.html', context)
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import Solicitud, Vehiculo, DocumentoAdjunto, Puerto, MotivoAcceso, SolicitudPersonal, DocumentoServicioSolicitud, EventoSolicitud
+from .models import Solicitud, Vehiculo, DocumentoAdjunto, Puerto, MotivoAcceso, SolicitudPersonal, DocumentoServicioSolicitud, EventoSolicitud, ContenidoArchivo, SolicitudArchivada
 
 @admin.register(Puerto)
 class PuertoAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'activo']
+    list_display = ['nombre', 'capacidad_maxima', 'activo']
     list_filter = ['activo']
     search_fields = ['nombre']
     ordering = ['nombre']
@@ -160,3 +160,25 @@ class EventoSolicitudAdmin(admin.ModelAdmin):
         else:
             return "👁️‍🗨️ Staff"
     visibilidad_display.short_description = "Visibilidad"
+
+
+@admin.register(ContenidoArchivo)
+class ContenidoArchivoAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'ruta', 'tamaño', 'referencias', 'creado_el']
+    search_fields = ['sha256', 'ruta']
+    readonly_fields = ['sha256', 'ruta', 'tamaño', 'referencias', 'creado_el']
+
+
+@admin.register(SolicitudArchivada)
+class SolicitudArchivadaAdmin(admin.ModelAdmin):
+    list_display = ['codigo', 'empresa_nombre', 'puerto_nombre', 'estado', 'cerrada_el', 'particion', 'registros', 'archivada_el']
+    list_filter = ['estado', 'particion']
+    search_fields = ['codigo', 'numero_imo', 'empresa_nombre', 'empresa_rnc']
+    ordering = ['-cerrada_el']
+    exclude = ['contenido']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,254 @@
+"""
+Almacenamiento de documentos direccionado por contenido.
+
+Cada archivo subido se procesa en bloques a través de SHA-256 y se guarda
+una sola vez bajo una ruta derivada solo de su hash:
+
+    documentos/contenido/ab/cd/abcd...ef
+
+La ruta no lleva la extensión del nombre subido: los mismos bytes subidos
+como a.jpg y b.JPEG son un único archivo. El tipo de contenido se guarda en
+``ContenidoArchivo.tipo_contenido`` (``tipo_contenido()`` y
+``extension_de()`` lo recuperan para las descargas).
+
+Si el contenido ya existe no se vuelve a escribir: solo se incrementa su
+contador de referencias (``ContenidoArchivo.referencias``). Al eliminar un
+documento el contador se decrementa y el archivo se borra del disco, junto
+con sus vistas previas, cuando ya ningún registro lo usa.
+
+Los archivos guardados antes de este esquema (rutas por carpeta y fecha, o
+rutas de contenido con extensión) siguen funcionando; el comando
+``deduplicar_documentos`` los migra.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+PREFIJO_CONTENIDO = 'documentos/contenido'
+
+# Activo mientras se archivan registros: sus archivos siguen en uso
+_conservar_archivos = ContextVar('conservar_archivos', default=False)
+
+
+def calcular_sha256(archivo, tamano_bloque=64 * 1024):
+    """Hash SHA-256 de un archivo de Django leyéndolo por bloques"""
+    hasher = hashlib.sha256()
+    if hasattr(archivo, 'seek'):
+        archivo.seek(0)
+    for bloque in archivo.chunks(tamano_bloque):
+        hasher.update(bloque)
+    return hasher.hexdigest()
+
+
+def ruta_contenido(sha256):
+    """Ruta relativa (a MEDIA_ROOT) de un contenido según su hash"""
+    return f'{PREFIJO_CONTENIDO}/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def sha256_de_ruta(nombre):
+    """Hash de una ruta de contenido (con o sin extensión), o None si es una ruta antigua"""
+    if not nombre or not nombre.startswith(PREFIJO_CONTENIDO + '/'):
+        return None
+    return os.path.splitext(os.path.basename(nombre))[0]
+
+
+def _tipo_por_nombre(nombre):
+    return mimetypes.guess_type(nombre or '')[0] or ''
+
+
+def tipo_contenido(nombre):
+    """Tipo MIME de un archivo del almacenamiento (por defecto application/octet-stream)"""
+    from .models import ContenidoArchivo
+
+    sha256 = sha256_de_ruta(nombre)
+    tipo = ''
+    if sha256:
+        tipo = ContenidoArchivo.objects.filter(sha256=sha256).values_list('tipo_contenido', flat=True).first()
+    return tipo or _tipo_por_nombre(nombre) or 'application/octet-stream'
+
+
+def extension_de(nombre):
+    """Extensión para el nombre de descarga (.pdf, .jpg...), o ''"""
+    extension = os.path.splitext(os.path.basename(nombre or ''))[1].lower()
+    if extension and not sha256_de_ruta(nombre):
+        return extension
+    return mimetypes.guess_extension(tipo_contenido(nombre)) or extension
+
+
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    """FileSystemStorage que guarda cada contenido distinto una sola vez"""
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el hash en _save; nunca hay colisiones
+        return name
+
+    def path(self, name):
+        ruta = super().path(name)
+        sha256 = sha256_de_ruta(name)
+        if sha256 and not os.path.exists(ruta):
+            # Ruta de contenido antigua, con extensión (p. ej. en el archivo
+            # histórico): el contenido vive en la ruta del hash
+            return super().path(ruta_contenido(sha256))
+        return ruta
+
+    def _save(self, name, content):
+        from .models import ContenidoArchivo
+
+        directorio = self.path(PREFIJO_CONTENIDO)
+        os.makedirs(directorio, exist_ok=True)
+
+        # Escribir a un temporal mientras se calcula el hash (una sola lectura)
+        hasher = hashlib.sha256()
+        tamano = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.parcial')
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                for bloque in content.chunks():
+                    hasher.update(bloque)
+                    tamano += len(bloque)
+                    destino.write(bloque)
+            sha256 = hasher.hexdigest()
+            nombre_final = ruta_contenido(sha256)
+            ContenidoArchivo.registrar_referencia(sha256, nombre_final, tamano, _tipo_por_nombre(name))
+
+            ruta_final = self.path(nombre_final)
+            if os.path.exists(ruta_final):
+                # Contenido repetido: no se escribe de nuevo
+                os.remove(temporal)
+            else:
+                os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporal, self.file_permissions_mode)
+                os.replace(temporal, ruta_final)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+        return nombre_final
+
+    def guardar_desde_ruta(self, ruta, nombre_original):
+        """
+        Incorpora un archivo que ya está en disco (p. ej. un temporal del
+        wizard) renombrándolo, sin volver a copiar su contenido.
+
+        Returns:
+            tuple: (nombre_final, movido). Si el contenido ya existía el
+            archivo de origen se deja intacto y ``movido`` es False.
+        """
+        from .models import ContenidoArchivo
+
+        with open(ruta, 'rb') as origen:
+            hasher = hashlib.sha256()
+            for bloque in iter(lambda: origen.read(64 * 1024), b''):
+                hasher.update(bloque)
+        sha256 = hasher.hexdigest()
+        nombre_final = ruta_contenido(sha256)
+        ContenidoArchivo.registrar_referencia(
+            sha256, nombre_final, os.path.getsize(ruta), _tipo_por_nombre(nombre_original)
+        )
+
+        ruta_final = self.path(nombre_final)
+        if os.path.exists(ruta_final):
+            return nombre_final, False
+
+        os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+        os.replace(ruta, ruta_final)
+        return nombre_final, True
+
+    def delete(self, name):
+        """
+        Libera una referencia. El archivo solo se elimina del disco cuando
+        no quedan referencias y después del commit de la transacción.
+        """
+        from .models import ContenidoArchivo
+        from .vistas_previas import eliminar_vistas_previas
+
+        sha256 = sha256_de_ruta(name)
+        if sha256 is None:
+            # Ruta antigua, no compartida
+            super().delete(name)
+            eliminar_vistas_previas(name)
+            return
+
+        if not ContenidoArchivo.liberar_referencia(sha256):
+            return
+
+        def eliminar_si_huerfano():
+            # Una subida concurrente pudo volver a registrar el contenido
+            if not ContenidoArchivo.objects.filter(sha256=sha256).exists():
+                # ``name`` puede ser una ruta de contenido antigua, con extensión
+                for nombre in {ruta_contenido(sha256), name}:
+                    super(AlmacenamientoDeduplicado, self).delete(nombre)
+                eliminar_vistas_previas(name)
+
+        transaction.on_commit(eliminar_si_huerfano)
+
+
+almacenamiento_documentos = AlmacenamientoDeduplicado()
+
+
+def campos_deduplicados(modelo):
+    """FileField del modelo que usan el almacenamiento deduplicado"""
+    return [
+        field for field in modelo._meta.concrete_fields
+        if isinstance(getattr(field, 'storage', None), AlmacenamientoDeduplicado)
+    ]
+
+
+@contextmanager
+def conservando_archivos():
+    """Elimina registros sin liberar sus archivos (los conserva el archivo histórico)"""
+    token = _conservar_archivos.set(True)
+    try:
+        yield
+    finally:
+        _conservar_archivos.reset(token)
+
+
+def liberar_archivos_al_eliminar(sender, instance, **kwargs):
+    """post_delete: libera las referencias de los FileField deduplicados"""
+    if _conservar_archivos.get():
+        return
+    for field in campos_deduplicados(sender):
+        nombre = getattr(instance, field.attname)
+        if nombre:
+            field.storage.delete(str(nombre))
+
+
+def referencias_en_uso():
+    """
+    Cuenta las referencias reales a cada contenido recorriendo todos los
+    FileField que usan el almacenamiento deduplicado.
+
+    Returns:
+        dict: {sha256: número de registros que lo usan}
+    """
+    from collections import Counter
+    from django.apps import apps
+
+    conteo = Counter()
+    for modelo in apps.get_models():
+        for field in campos_deduplicados(modelo):
+            nombres = modelo._default_manager.filter(
+                **{f'{field.attname}__startswith': PREFIJO_CONTENIDO + '/'}
+            ).values_list(field.attname, flat=True)
+            for nombre in nombres.iterator():
+                conteo[sha256_de_ruta(nombre)] += 1
+
+    # Documentos de solicitudes archivadas
+    SolicitudArchivada = apps.get_model('solicitudes', 'SolicitudArchivada')
+    for archivos in SolicitudArchivada.objects.values_list('archivos', flat=True).iterator():
+        for nombre in archivos:
+            sha256 = sha256_de_ruta(nombre)
+            if sha256:
+                conteo[sha256] += 1
+    return conteo
@@ -8,3 +8,25 @@ class SolicitudesConfig(AppConfig):
     def ready(self):
         """Importar signals cuando la app esté lista"""
         import solicitudes.signals  # noqa
+
+        # Documentos en el almacenamiento deduplicado: liberar referencias al
+        # borrarlos y, si sus páginas las muestran, generar sus vistas
+        # previas al guardarlos
+        from django.apps import apps
+        from django.db.models.signals import post_delete, post_save
+        from .almacenamiento import campos_deduplicados, liberar_archivos_al_eliminar
+        from .vistas_previas import programar_vistas_previas_al_guardar, tiene_vista_previa
+
+        for modelo in apps.get_models():
+            if campos_deduplicados(modelo):
+                post_delete.connect(
+                    liberar_archivos_al_eliminar,
+                    sender=modelo,
+                    dispatch_uid=f'liberar_archivos_{modelo._meta.label_lower}'
+                )
+            if campos_deduplicados(modelo) and tiene_vista_previa(modelo):
+                post_save.connect(
+                    programar_vistas_previas_al_guardar,
+                    sender=modelo,
+                    dispatch_uid=f'vistas_previas_{modelo._meta.label_lower}'
+                )
@@ -0,0 +1,196 @@
+"""
+Archivo histórico de solicitudes cerradas.
+
+Las solicitudes aprobadas, rechazadas o vencidas que llevan más de
+ARCHIVO_MESES meses cerradas salen de las tablas activas: se recolecta con
+el Collector de Django todo lo que se eliminaría en cascada junto con la
+solicitud (eventos, vehículos, documentos, personal, autorización, sus
+registros de acceso y discrepancias, incumplimientos...), se serializa a
+JSON, se comprime con zlib y se guarda en una fila de SolicitudArchivada
+particionada por mes de cierre. Después se elimina el grafo activo.
+
+Los archivos de los documentos no se borran: la fila archivada conserva la
+referencia (ver ``conservando_archivos`` y ``referencias_en_uso``).
+
+``restaurar()`` vuelve a insertar los registros con sus IDs originales y
+elimina la fila archivada. La restauración usa guardado "raw" (como
+loaddata), por lo que las señales no generan eventos ni notificaciones.
+"""
+import calendar
+import json
+import zlib
+
+from django.conf import settings
+from django.core import serializers
+from django.db import IntegrityError, router, transaction
+from django.db.models import FileField, Q
+from django.db.models.deletion import Collector, ProtectedError, RestrictedError
+from django.utils import timezone
+
+from .almacenamiento import conservando_archivos
+from .models import Solicitud, SolicitudArchivada
+
+ESTADOS_ARCHIVABLES = ('aprobada', 'rechazada', 'vencida')
+
+# Registros que no se archivan: se recrean solos o son temporales
+MODELOS_EXCLUIDOS = ('solicitudes.borradorwizard',)
+
+
+class _Recolector(Collector):
+    """Collector que materializa todos los registros (sin borrados rápidos)"""
+
+    def can_fast_delete(self, *args, **kwargs):
+        return False
+
+
+def restar_meses(momento, meses):
+    """Mismo día ``meses`` meses antes (ajustado al último día del mes)"""
+    total = momento.year * 12 + momento.month - 1 - meses
+    año, mes = divmod(total, 12)
+    dia = min(momento.day, calendar.monthrange(año, mes + 1)[1])
+    return momento.replace(year=año, month=mes + 1, day=dia)
+
+
+def candidatas(meses=None, ahora=None):
+    """
+    Solicitudes cerradas antes del corte cuya ventana de acceso también
+    terminó antes del corte y sin vehículos dentro del puerto.
+    """
+    meses = settings.ARCHIVO_MESES if meses is None else meses
+    corte = restar_meses(ahora or timezone.now(), meses)
+    return Solicitud.objects.filter(
+        estado__in=ESTADOS_ARCHIVABLES,
+        actualizada_el__lt=corte,
+    ).exclude(
+        fin_acceso__gte=corte
+    ).exclude(
+        autorizacion__vehiculos_dentro__isnull=False
+    ).order_by('actualizada_el')
+
+
+def _recolectar(solicitud):
+    """Registros que dependen de la solicitud, en orden de inserción"""
+    recolector = _Recolector(using=router.db_for_write(Solicitud))
+    recolector.collect([solicitud])
+    recolector.sort()
+    objetos = []
+    # sort() ordena para borrar (dependientes primero); al insertar es al revés
+    for modelo, instancias in reversed(list(recolector.data.items())):
+        if modelo._meta.auto_created or modelo._meta.label_lower in MODELOS_EXCLUIDOS:
+            # Las tablas intermedias M2M se restauran con el campo del modelo
+            continue
+        objetos.extend(sorted(instancias, key=lambda obj: obj.pk))
+    return recolector, objetos
+
+
+def _archivos(objetos):
+    rutas = []
+    for obj in objetos:
+        for field in obj._meta.concrete_fields:
+            if isinstance(field, FileField):
+                nombre = getattr(obj, field.attname)
+                if nombre:
+                    rutas.append(str(nombre))
+    return rutas
+
+
+def archivar_solicitud(solicitud):
+    """
+    Archiva una solicitud y elimina su grafo de las tablas activas.
+
+    Returns:
+        SolicitudArchivada
+    """
+    recolector, objetos = _recolectar(solicitud)
+    serializado = serializers.serialize(
+        'json', objetos, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    with transaction.atomic():
+        archivada = SolicitudArchivada.objects.create(
+            solicitud_pk=solicitud.pk,
+            codigo=solicitud.codigo,
+            numero_imo=solicitud.numero_imo,
+            empresa_nombre=solicitud.empresa.nombre,
+            empresa_rnc=solicitud.empresa.rnc or '',
+            puerto_nombre=solicitud.puerto_destino.nombre,
+            estado=solicitud.estado,
+            creada_el=solicitud.creada_el,
+            cerrada_el=solicitud.actualizada_el,
+            particion=f'{timezone.localtime(solicitud.actualizada_el):%Y-%m}',
+            contenido=zlib.compress(serializado, 6),
+            registros=len(objetos),
+            tamaño_original=len(serializado),
+            archivos=_archivos(objetos),
+        )
+        with conservando_archivos():
+            recolector.delete()
+    return archivada
+
+
+def archivar(meses=None, limite=None, lote=100):
+    """
+    Archiva las solicitudes candidatas en transacciones de ``lote``. Las que
+    tienen registros protegidos (on_delete PROTECT/RESTRICT) se omiten.
+
+    Returns:
+        dict: archivadas, omitidas, registros y bytes original/comprimido
+    """
+    pendientes = candidatas(meses)
+    if limite:
+        pendientes = pendientes[:limite]
+    ids = list(pendientes.values_list('pk', flat=True))
+
+    resumen = {'archivadas': 0, 'omitidas': 0, 'registros': 0, 'original': 0, 'comprimido': 0}
+    for inicio in range(0, len(ids), lote):
+        with transaction.atomic():
+            for solicitud in Solicitud.objects.select_related('empresa', 'puerto_destino').filter(
+                pk__in=ids[inicio:inicio + lote]
+            ):
+                try:
+                    archivada = archivar_solicitud(solicitud)
+                except (ProtectedError, RestrictedError):
+                    resumen['omitidas'] += 1
+                    continue
+                resumen['archivadas'] += 1
+                resumen['registros'] += archivada.registros
+                resumen['original'] += archivada.tamaño_original
+                resumen['comprimido'] += len(archivada.contenido)
+    return resumen
+
+
+def restaurar(archivada):
+    """
+    Devuelve la solicitud archivada y sus registros a las tablas activas.
+
+    Raises:
+        ValueError: Si la solicitud ya existe o algún registro choca con uno actual
+
+    Returns:
+        Solicitud
+    """
+    if Solicitud.objects.filter(pk=archivada.solicitud_pk).exists():
+        raise ValueError(f'La solicitud {archivada.codigo} ya está en las tablas activas')
+
+    contenido = json.dumps(archivada.datos())
+    try:
+        with transaction.atomic():
+            for objeto in serializers.deserialize('json', contenido):
+                objeto.save()
+            archivada.delete()
+    except IntegrityError as e:
+        raise ValueError(f'No se puede restaurar {archivada.codigo}: {e}') from e
+    return Solicitud.objects.get(pk=archivada.solicitud_pk)
+
+
+def buscar(texto='', particion=''):
+    """Solicitudes archivadas por código, IMO, empresa o RNC y partición"""
+    queryset = SolicitudArchivada.objects.defer('contenido')
+    if particion:
+        queryset = queryset.filter(particion=particion)
+    if texto:
+        queryset = queryset.filter(
+            Q(codigo__iexact=texto) | Q(numero_imo=texto) | Q(empresa_rnc=texto) |
+            Q(empresa_nombre__icontains=texto)
+        )
+    return queryset
@@ -0,0 +1,151 @@
+"""
+Capacidad de puertos y lugares.
+
+Cada solicitud aprobada ocupa su puerto y lugar de destino durante su
+ventana de acceso [inicio_acceso, fin_acceso) con tantos vehículos como
+tenga registrados (mínimo uno). La carga concurrente se calcula con un
+barrido de eventos: cada ventana aporta +carga al inicio y -carga al fin;
+ordenados por instante, la suma acumulada es la ocupación en cada momento.
+
+Las ventanas que tocan un rango se obtienen con una sola consulta sobre
+los índices parciales (lugar/puerto, fin_acceso, inicio_acceso) de las
+solicitudes aprobadas, así que el costo depende de las ventanas que se
+solapan con el rango y no del historial completo.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Solicitud
+
+# Igualdad simple (no __in) para que el planificador use los índices parciales
+ESTADO_QUE_OCUPA = 'aprobada'
+
+
+def ventanas(desde, hasta, puerto_id=None, lugar_id=None, excluir=None):
+    """
+    Ventanas aprobadas que se solapan con [desde, hasta).
+
+    Returns:
+        list: Tuplas (inicio, fin, carga)
+    """
+    queryset = Solicitud.objects.filter(
+        estado=ESTADO_QUE_OCUPA,
+        fin_acceso__gt=desde,
+        inicio_acceso__lt=hasta,
+    ).exclude(autorizacion__estado='revocada')
+    if lugar_id:
+        queryset = queryset.filter(lugar_destino_id=lugar_id)
+    else:
+        queryset = queryset.filter(puerto_destino_id=puerto_id)
+    if excluir:
+        queryset = queryset.exclude(pk=excluir)
+
+    return [
+        (inicio, fin, max(carga, 1))
+        for inicio, fin, carga in queryset.annotate(
+            carga=Count('vehiculos')
+        ).order_by().values_list('inicio_acceso', 'fin_acceso', 'carga')
+    ]
+
+
+def _eventos(intervalos, desde, hasta):
+    """Eventos (instante, delta) recortados al rango; a igual instante primero las salidas"""
+    eventos = []
+    for inicio, fin, carga in intervalos:
+        inicio, fin = max(inicio, desde), min(fin, hasta)
+        if inicio < fin:
+            eventos.append((inicio, carga))
+            eventos.append((fin, -carga))
+    eventos.sort()
+    return eventos
+
+
+def carga_maxima(intervalos, desde, hasta):
+    """
+    Carga concurrente máxima en [desde, hasta).
+
+    Returns:
+        tuple: (pico, instante en que se alcanza o None)
+    """
+    actual = pico = 0
+    momento = None
+    for instante, delta in _eventos(intervalos, desde, hasta):
+        actual += delta
+        if actual > pico:
+            pico, momento = actual, instante
+    return pico, momento
+
+
+def mapa_calor(desde, hasta, paso=timedelta(hours=1), puerto_id=None, lugar_id=None):
+    """
+    Carga máxima por tramo de ``paso`` entre ``desde`` y ``hasta``, con un
+    solo barrido sobre los eventos del rango.
+
+    Returns:
+        list: Tuplas (inicio del tramo, pico)
+    """
+    eventos = _eventos(ventanas(desde, hasta, puerto_id, lugar_id), desde, hasta)
+    tramos = []
+    actual = i = 0
+    inicio = desde
+    while inicio < hasta:
+        fin = min(inicio + paso, hasta)
+        while i < len(eventos) and eventos[i][0] <= inicio:
+            actual += eventos[i][1]
+            i += 1
+        pico = actual
+        while i < len(eventos) and eventos[i][0] < fin:
+            actual += eventos[i][1]
+            pico = max(pico, actual)
+            i += 1
+        tramos.append((inicio, pico))
+        inicio = fin
+    return tramos
+
+
+def rango_dias(fecha, dias):
+    """[inicio, fin) en hora local desde la medianoche de ``fecha``"""
+    desde = timezone.make_aware(datetime.combine(fecha, time.min))
+    return desde, desde + timedelta(days=dias)
+
+
+def evaluar_capacidad(solicitud):
+    """
+    Ocupación que tendría el destino de la solicitud si se aprueba: pico de
+    las demás solicitudes aprobadas durante su ventana más su propia carga.
+    Se evalúa el lugar (si tiene) y el puerto.
+
+    Returns:
+        list: Un diccionario por ámbito con capacidad, pico y si se excede
+    """
+    if not solicitud.inicio_acceso or not solicitud.fin_acceso:
+        return []
+
+    carga = max(solicitud.vehiculos.count(), 1)
+    ambitos = []
+    if solicitud.lugar_destino_id:
+        ambitos.append((solicitud.lugar_destino.nombre, solicitud.lugar_destino.capacidad_maxima,
+                        {'lugar_id': solicitud.lugar_destino_id}))
+    ambitos.append((solicitud.puerto_destino.nombre, solicitud.puerto_destino.capacidad_maxima,
+                    {'puerto_id': solicitud.puerto_destino_id}))
+
+    resultado = []
+    for nombre, capacidad, filtro in ambitos:
+        pico, momento = carga_maxima(
+            ventanas(solicitud.inicio_acceso, solicitud.fin_acceso, excluir=solicitud.pk, **filtro),
+            solicitud.inicio_acceso, solicitud.fin_acceso,
+        )
+        total = pico + carga
+        resultado.append({
+            'ambito': nombre,
+            'capacidad': capacidad,
+            'pico': pico,
+            'momento': momento,
+            'carga_solicitud': carga,
+            'total': total,
+            'porcentaje': round(total * 100 / capacidad) if capacidad else None,
+            'excede': bool(capacidad) and total > capacidad,
+        })
+    return resultado
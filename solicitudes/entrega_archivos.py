@@ -0,0 +1,157 @@
+"""
+Entrega de archivos protegidos.
+
+La vista comprueba los permisos y este módulo construye la respuesta:
+
+* Con ``ENTREGA_ARCHIVOS_MODO = 'x-accel-redirect'`` (nginx) o
+  ``'x-sendfile'`` (Apache mod_xsendfile, lighttpd) la respuesta va vacía
+  con la cabecera correspondiente y es el servidor web quien transfiere el
+  archivo, sin ocupar un worker de la aplicación.
+* Sin modo configurado se sirve desde Django con soporte de ``Range``
+  (una sola porción), ``If-Range``, ``If-Modified-Since`` y ``ETag``.
+
+Ejemplo de nginx para ``ENTREGA_ARCHIVOS_PREFIJO_INTERNO = '/protegido/'``::
+
+    location /protegido/ {
+        internal;
+        alias /ruta/a/media/;
+    }
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .almacenamiento import sha256_de_ruta, tipo_contenido
+
+TAMAÑO_BLOQUE = 64 * 1024
+
+RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(ruta, info):
+    """ETag fuerte: hash del contenido si está en el almacenamiento deduplicado"""
+    relativa = os.path.relpath(ruta, settings.MEDIA_ROOT).replace(os.sep, '/')
+    return quote_etag(sha256_de_ruta(relativa) or f'{info.st_size:x}-{int(info.st_mtime):x}')
+
+
+def _content_disposition(nombre_descarga, adjunto):
+    """Content-Disposition con nombre ASCII y variante UTF-8 (RFC 6266)"""
+    tipo = 'attachment' if adjunto else 'inline'
+    ascii_nombre = nombre_descarga.encode('ascii', 'ignore').decode('ascii').replace('"', '')
+    return f'{tipo}; filename="{ascii_nombre}"; filename*=UTF-8\'\'{quote(nombre_descarga)}'
+
+
+def _parsear_rango(cabecera, tamaño):
+    """
+    Interpreta una cabecera Range de una sola porción.
+
+    Returns:
+        tuple | None | False: (inicio, fin) inclusivo; None si la cabecera no
+        aplica (se responde el archivo completo); False si no es satisfacible.
+    """
+    coincidencia = RANGO_RE.match(cabecera.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if inicio == '' and fin == '':
+        return None
+    if inicio == '':
+        # Sufijo: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return False
+        return max(tamaño - largo, 0), tamaño - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamaño - 1) if fin else tamaño - 1
+    if inicio >= tamaño or inicio > fin:
+        return False
+    return inicio, fin
+
+
+def _leer(ruta, inicio, largo):
+    """Generador que lee ``largo`` bytes desde ``inicio``"""
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(inicio)
+        restante = largo
+        while restante > 0:
+            bloque = archivo.read(min(TAMAÑO_BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def servir_archivo(request, ruta, nombre_descarga, content_type=None, adjunto=False):
+    """
+    Respuesta para entregar un archivo ya autorizado.
+
+    Args:
+        request: Petición actual
+        ruta: Ruta absoluta del archivo (debe estar dentro de MEDIA_ROOT)
+        nombre_descarga: Nombre sugerido al navegador
+        content_type: Tipo MIME (por defecto el del contenido, ver almacenamiento.tipo_contenido)
+        adjunto: True para forzar la descarga, False para verlo en el navegador
+    """
+    info = os.stat(ruta)
+    if not content_type:
+        relativa = os.path.relpath(ruta, settings.MEDIA_ROOT).replace(os.sep, '/')
+        content_type = tipo_contenido(relativa)
+    etag = _etag(ruta, info)
+    modo = (getattr(settings, 'ENTREGA_ARCHIVOS_MODO', None) or '').lower()
+
+    if modo in ('x-accel-redirect', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if modo == 'x-accel-redirect':
+            relativa = os.path.relpath(ruta, settings.MEDIA_ROOT).replace(os.sep, '/')
+            prefijo = getattr(settings, 'ENTREGA_ARCHIVOS_PREFIJO_INTERNO', '/protegido/')
+            response['X-Accel-Redirect'] = quote(prefijo.rstrip('/') + '/' + relativa)
+        else:
+            response['X-Sendfile'] = ruta
+        response['Content-Disposition'] = _content_disposition(nombre_descarga, adjunto)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(info.st_mtime)
+        return response
+
+    # Respaldo en Django: peticiones condicionales
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=int(info.st_mtime))
+    if no_modificado is not None:
+        return no_modificado
+
+    tamaño = info.st_size
+    rango = None
+    cabecera_rango = request.META.get('HTTP_RANGE')
+    if cabecera_rango and request.method in ('GET', 'HEAD'):
+        if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+        vigente = (
+            not if_range
+            or if_range == etag
+            or parse_http_date_safe(if_range) == int(info.st_mtime)
+        )
+        if vigente:
+            rango = _parsear_rango(cabecera_rango, tamaño)
+            if rango is False:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{tamaño}'
+                return response
+
+    if rango:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        response = StreamingHttpResponse(_leer(ruta, inicio, largo), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamaño}'
+    else:
+        largo = tamaño
+        response = StreamingHttpResponse(_leer(ruta, 0, tamaño), content_type=content_type)
+
+    response['Content-Length'] = str(largo)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = _content_disposition(nombre_descarga, adjunto)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(info.st_mtime)
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
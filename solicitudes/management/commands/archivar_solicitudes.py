@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from solicitudes.archivo import archivar, candidatas, restaurar
+from solicitudes.models import SolicitudArchivada
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve al archivo histórico las solicitudes aprobadas, rechazadas o vencidas '
+        'cerradas hace más de --meses meses, junto con su historial, documentos, '
+        'autorización y accesos. Con --restaurar devuelve una solicitud archivada '
+        'a las tablas activas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            help='Meses desde el cierre (por defecto ARCHIVO_MESES)'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            help='Máximo de solicitudes a archivar en esta ejecución'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=100,
+            help='Solicitudes por transacción (por defecto 100)'
+        )
+        parser.add_argument(
+            '--restaurar',
+            metavar='CODIGO',
+            help='Restaurar la solicitud archivada con este código'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar cuántas solicitudes se archivarían sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        if options['restaurar']:
+            self._restaurar(options['restaurar'], options['dry_run'])
+            return
+
+        meses = options['meses'] if options['meses'] is not None else settings.ARCHIVO_MESES
+        if meses < 1:
+            raise CommandError('--meses debe ser al menos 1')
+
+        if options['dry_run']:
+            pendientes = candidatas(meses).count()
+            if options['limite']:
+                pendientes = min(pendientes, options['limite'])
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se archivarían {pendientes} solicitudes cerradas hace más de {meses} meses'
+            ))
+            return
+
+        resumen = archivar(meses, options['limite'], max(options['lote'], 1))
+        if resumen['omitidas']:
+            self.stdout.write(self.style.WARNING(
+                f"[INFO] {resumen['omitidas']} solicitudes omitidas por registros protegidos"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {resumen['archivadas']} solicitudes archivadas ({resumen['registros']} registros, "
+            f"{resumen['original'] / 1024:.1f} KB -> {resumen['comprimido'] / 1024:.1f} KB)"
+        ))
+
+    def _restaurar(self, codigo, dry_run):
+        archivada = SolicitudArchivada.objects.filter(codigo=codigo).first()
+        if archivada is None:
+            raise CommandError(f'No hay ninguna solicitud archivada con código {codigo}')
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se restaurarían {archivada.registros} registros de {codigo}'
+            ))
+            return
+        try:
+            restaurar(archivada)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Solicitud {codigo} restaurada ({archivada.registros} registros)'
+        ))
@@ -0,0 +1,171 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from solicitudes.almacenamiento import (
+    PREFIJO_CONTENIDO,
+    almacenamiento_documentos,
+    campos_deduplicados,
+    referencias_en_uso,
+    ruta_contenido,
+    sha256_de_ruta,
+)
+from solicitudes.models import ContenidoArchivo
+from solicitudes.vistas_previas import PREFIJO_PREVIAS, _clave, eliminar_vistas_previas
+
+
+class Command(BaseCommand):
+    help = (
+        'Migra los documentos guardados con rutas antiguas al almacenamiento '
+        'deduplicado (incluidas las rutas de contenido con extensión), recalcula '
+        'el contador de referencias de cada contenido y elimina del disco los '
+        'contenidos y vistas previas que ya no usa ningún registro'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se migraría sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.bytes_liberados = 0
+        campos = [(modelo, field) for modelo in apps.get_models() for field in campos_deduplicados(modelo)]
+
+        # 1. Migrar rutas antiguas
+        migrados, faltantes = self._migrar_rutas_antiguas(campos, dry_run)
+
+        # 2. Rutas de contenido con extensión a la ruta del hash
+        normalizados = self._normalizar_rutas_contenido(campos, dry_run)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se migrarían {migrados} documentos '
+                f'({faltantes} sin archivo en disco) y {normalizados} rutas de contenido con extensión'
+            ))
+            return
+
+        # 3. Recalcular referencias a partir de los registros reales
+        corregidos = 0
+        huerfanos = 0
+        conteo = referencias_en_uso()
+        for contenido in ContenidoArchivo.objects.iterator():
+            reales = conteo.get(contenido.sha256, 0)
+            if reales == 0:
+                huerfanos += 1
+                ContenidoArchivo.objects.filter(pk=contenido.pk).delete()
+                self._eliminar(almacenamiento_documentos.path(contenido.ruta))
+                eliminar_vistas_previas(contenido.ruta)
+            elif reales != contenido.referencias:
+                corregidos += 1
+                ContenidoArchivo.objects.filter(pk=contenido.pk).update(referencias=reales)
+
+        # 4. Archivos y vistas previas en disco sin registro
+        sueltos = self._eliminar_sueltos(campos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Migrados {migrados} documentos ({faltantes} sin archivo en disco), '
+            f'{normalizados} rutas de contenido normalizadas; {corregidos} contadores corregidos, '
+            f'{huerfanos} contenidos huérfanos y {sueltos} archivos sueltos eliminados; '
+            f'{self.bytes_liberados / (1024 * 1024):.2f} MB liberados'
+        ))
+
+    def _eliminar(self, ruta):
+        if os.path.exists(ruta):
+            self.bytes_liberados += os.path.getsize(ruta)
+            os.remove(ruta)
+
+    def _migrar_rutas_antiguas(self, campos, dry_run):
+        migrados = 0
+        faltantes = 0
+        for modelo, field in campos:
+            storage = field.storage
+            pendientes = modelo._default_manager.exclude(
+                **{f'{field.attname}__startswith': PREFIJO_CONTENIDO + '/'}
+            ).exclude(**{field.attname: ''}).values_list('pk', field.attname)
+
+            for pk, nombre in pendientes.iterator():
+                ruta = storage.path(nombre)
+                if not os.path.exists(ruta):
+                    faltantes += 1
+                    continue
+                migrados += 1
+                if dry_run:
+                    continue
+
+                with transaction.atomic():
+                    nombre_final, movido = storage.guardar_desde_ruta(ruta, nombre)
+                    modelo._default_manager.filter(pk=pk).update(**{field.attname: nombre_final})
+                if not movido:
+                    # El contenido ya existía: la copia antigua sobra
+                    self._eliminar(ruta)
+        return migrados, faltantes
+
+    def _normalizar_rutas_contenido(self, campos, dry_run):
+        """
+        Las rutas de contenido llevaban la extensión de la primera subida. Mueve
+        cada archivo a la ruta del hash (o borra la copia si ya existe) y
+        actualiza ContenidoArchivo y los registros.
+        """
+        normalizados = 0
+        for contenido in ContenidoArchivo.objects.exclude(ruta__regex=r'/[0-9a-f]{64}$').iterator():
+            normalizados += 1
+            if dry_run:
+                continue
+            destino = ruta_contenido(contenido.sha256)
+            origen = os.path.join(almacenamiento_documentos.location, contenido.ruta)
+            ruta_destino = os.path.join(almacenamiento_documentos.location, destino)
+            if os.path.exists(origen):
+                if os.path.exists(ruta_destino):
+                    self._eliminar(origen)
+                else:
+                    os.replace(origen, ruta_destino)
+            ContenidoArchivo.objects.filter(pk=contenido.pk).update(ruta=destino)
+
+        if not dry_run:
+            prefijo = PREFIJO_CONTENIDO + '/'
+            for modelo, field in campos:
+                nombres = modelo._default_manager.filter(
+                    **{f'{field.attname}__startswith': prefijo}
+                ).exclude(**{f'{field.attname}__regex': r'/[0-9a-f]{64}$'}).values_list('pk', field.attname)
+                for pk, nombre in nombres.iterator():
+                    modelo._default_manager.filter(pk=pk).update(
+                        **{field.attname: ruta_contenido(sha256_de_ruta(nombre))}
+                    )
+        return normalizados
+
+    def _eliminar_sueltos(self, campos):
+        """Archivos de contenido y vistas previas que ningún registro usa"""
+        sueltos = 0
+        rutas = set(ContenidoArchivo.objects.values_list('ruta', flat=True))
+        directorio = os.path.join(almacenamiento_documentos.location, PREFIJO_CONTENIDO)
+        for raiz, _, archivos in os.walk(directorio):
+            for archivo in archivos:
+                if archivo.endswith('.parcial'):
+                    continue  # Subida en curso
+                ruta = os.path.join(raiz, archivo)
+                relativa = os.path.relpath(ruta, almacenamiento_documentos.location).replace(os.sep, '/')
+                # Se vuelve a consultar: una subida pudo registrarlo después de leer ``rutas``
+                if relativa not in rutas and not ContenidoArchivo.objects.filter(ruta=relativa).exists():
+                    sueltos += 1
+                    self._eliminar(ruta)
+
+        # Claves de vista previa en uso: hash del contenido o de la ruta antigua
+        claves = {sha256 for sha256 in ContenidoArchivo.objects.values_list('sha256', flat=True)}
+        for modelo, field in campos:
+            nombres = modelo._default_manager.exclude(
+                **{f'{field.attname}__startswith': PREFIJO_CONTENIDO + '/'}
+            ).exclude(**{field.attname: ''}).values_list(field.attname, flat=True)
+            claves.update(_clave(nombre) for nombre in nombres.iterator())
+
+        directorio = os.path.join(almacenamiento_documentos.location, PREFIJO_PREVIAS)
+        for raiz, _, archivos in os.walk(directorio):
+            for archivo in archivos:
+                if archivo.rsplit('_', 1)[0] not in claves:
+                    sueltos += 1
+                    self._eliminar(os.path.join(raiz, archivo))
+        return sueltos
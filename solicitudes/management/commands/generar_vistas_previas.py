@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from solicitudes.almacenamiento import campos_deduplicados
+from solicitudes.vistas_previas import existe_vista_previa, generar_vista_previa, tiene_vista_previa
+
+
+class Command(BaseCommand):
+    help = 'Genera las miniaturas y vistas previas de los documentos ya subidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Regenerar también las vistas previas que ya existen'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar cuántos archivos se procesarían sin generar nada'
+        )
+
+    def handle(self, *args, **options):
+        forzar = options['forzar']
+        dry_run = options['dry_run']
+
+        # Solo los documentos cuyas páginas muestran vistas previas; los que
+        # tienen el mismo contenido la comparten: cada archivo una sola vez
+        nombres = set()
+        for modelo in apps.get_models():
+            if not tiene_vista_previa(modelo):
+                continue
+            for field in campos_deduplicados(modelo):
+                nombres.update(
+                    modelo._default_manager.exclude(**{field.attname: ''})
+                    .values_list(field.attname, flat=True)
+                    .iterator()
+                )
+
+        pendientes = sorted(n for n in nombres if forzar or not existe_vista_previa(n, 'm'))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) Se procesarían {len(pendientes)} de {len(nombres)} archivos'
+            ))
+            return
+
+        generadas = 0
+        for nombre in pendientes:
+            if generar_vista_previa(nombre, forzar=forzar):
+                generadas += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Vistas previas generadas para {generadas} de {len(pendientes)} archivos '
+            f'({len(pendientes) - generadas} sin vista previa posible o sin archivo en disco)'
+        ))
@@ -0,0 +1,73 @@
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from solicitudes.models import BorradorWizard
+
+
+class Command(BaseCommand):
+    help = 'Elimina borradores abandonados del wizard de solicitudes y sus archivos temporales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=72,
+            help='Antigüedad mínima (horas sin actividad) para considerar abandonado un borrador (por defecto 72)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se eliminaría sin eliminar nada'
+        )
+
+    def handle(self, *args, **options):
+        horas = options['horas']
+        dry_run = options['dry_run']
+        limite = timezone.now() - timedelta(hours=horas)
+
+        # 1. Borradores sin actividad
+        abandonados = BorradorWizard.objects.filter(actualizado_el__lt=limite)
+        total_borradores = 0
+        for borrador in abandonados.iterator():
+            total_borradores += 1
+            if not dry_run:
+                borrador.descartar()
+
+        # 2. Archivos temporales huérfanos (sin borrador que los referencie)
+        temp_dir = BorradorWizard.directorio_temporal()
+        referenciados = set()
+        for paso4 in BorradorWizard.objects.exclude(
+            pk__in=abandonados.values('pk') if dry_run else []
+        ).values_list('paso4', flat=True):
+            for doc in (paso4 or {}).get('documentos_subidos', []):
+                if doc.get('temp_filename'):
+                    referenciados.add(os.path.basename(doc['temp_filename']))
+
+        total_archivos = 0
+        bytes_liberados = 0
+        limite_epoch = time.time() - horas * 3600
+        if os.path.isdir(temp_dir):
+            for entrada in os.scandir(temp_dir):
+                if not entrada.is_file() or entrada.name in referenciados:
+                    continue
+                info = entrada.stat()
+                if info.st_mtime >= limite_epoch:
+                    continue
+                total_archivos += 1
+                bytes_liberados += info.st_size
+                if not dry_run:
+                    try:
+                        os.remove(entrada.path)
+                    except OSError:
+                        pass
+
+        prefijo = '[INFO] (dry-run) Se eliminarían' if dry_run else '[OK] Eliminados'
+        estilo = self.style.WARNING if dry_run else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f'{prefijo} {total_borradores} borradores y {total_archivos} archivos temporales '
+            f'({bytes_liberados / (1024 * 1024):.2f} MB) con más de {horas} horas de antigüedad'
+        ))
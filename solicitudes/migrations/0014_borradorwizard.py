@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('solicitudes', '0013_eventosolicitud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorradorWizard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identificador', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Prefijo de los archivos temporales del borrador', unique=True, verbose_name='Identificador')),
+                ('paso1', models.JSONField(blank=True, default=dict, verbose_name='Paso 1: Información Básica')),
+                ('paso2', models.JSONField(blank=True, default=dict, verbose_name='Paso 2: Personal')),
+                ('paso3', models.JSONField(blank=True, default=dict, verbose_name='Paso 3: Vehículos')),
+                ('paso4', models.JSONField(blank=True, default=dict, verbose_name='Paso 4: Servicios y Documentos')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('actualizado_el', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Actualizado el')),
+                ('solicitud', models.ForeignKey(blank=True, help_text='Solo en modo edición', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='borradores_wizard', to='solicitudes.solicitud', verbose_name='Solicitud en edición')),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='borrador_wizard', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Borrador de Wizard',
+                'verbose_name_plural': 'Borradores de Wizard',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:14
+
+from django.db import migrations, models
+import solicitudes.almacenamiento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0014_borradorwizard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContenidoArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('ruta', models.CharField(max_length=255, verbose_name='Ruta')),
+                ('tamaño', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('creado_el', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+            ],
+            options={
+                'verbose_name': 'Contenido de Archivo',
+                'verbose_name_plural': 'Contenidos de Archivos',
+            },
+        ),
+        migrations.AlterField(
+            model_name='documentoadjunto',
+            name='archivo',
+            field=models.FileField(storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='solicitudes/documentos/%Y/%m/', verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='documentopersonal',
+            name='archivo',
+            field=models.FileField(storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='documentos/personal/', verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='documentoserviciosolicitud',
+            name='archivo',
+            field=models.FileField(storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='solicitudes/documentos_servicios/%Y/%m/', verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='documentovehiculo',
+            name='archivo',
+            field=models.FileField(storage=solicitudes.almacenamiento.AlmacenamientoDeduplicado(), upload_to='documentos/vehiculos/', verbose_name='Archivo'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0015_contenidoarchivo_alter_documentoadjunto_archivo_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentopersonal',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Fecha de Vencimiento'),
+        ),
+        migrations.AlterField(
+            model_name='documentovehiculo',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Fecha de Vencimiento'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:38
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def calcular_ventanas(apps, schema_editor):
+    Solicitud = apps.get_model('solicitudes', 'Solicitud')
+
+    def combinar(fecha, hora):
+        momento = datetime.combine(fecha, hora)
+        return timezone.make_aware(momento) if settings.USE_TZ else momento
+
+    pendientes = []
+    for solicitud in Solicitud.objects.only('fecha_ingreso', 'hora_ingreso', 'fecha_salida', 'hora_salida').iterator():
+        solicitud.inicio_acceso = combinar(solicitud.fecha_ingreso, solicitud.hora_ingreso)
+        solicitud.fin_acceso = combinar(solicitud.fecha_salida, solicitud.hora_salida)
+        pendientes.append(solicitud)
+    Solicitud.objects.bulk_update(pendientes, ['inicio_acceso', 'fin_acceso'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0016_alter_documentopersonal_fecha_vencimiento_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puerto',
+            name='capacidad_maxima',
+            field=models.PositiveIntegerField(blank=True, help_text='Vehículos que el puerto admite a la vez (opcional)', null=True, verbose_name='Capacidad Máxima'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='fin_acceso',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Fin del Acceso'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='inicio_acceso',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Inicio del Acceso'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'aprobada')), fields=['lugar_destino', 'fin_acceso', 'inicio_acceso'], name='solicitud_ventana_lugar_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('estado', 'aprobada')), fields=['puerto_destino', 'fin_acceso', 'inicio_acceso'], name='solicitud_ventana_puerto_idx'),
+        ),
+        migrations.RunPython(calcular_ventanas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+ESTADOS_IMO_ACTIVO = ('recibido', 'sin_asignar', 'pendiente', 'en_revision', 'documentos_faltantes', 'aprobada')
+
+
+def verificar_imo_duplicados(apps, schema_editor):
+    """Vacíos a NULL y error explícito si hay buques con más de una solicitud activa"""
+    Solicitud = apps.get_model('solicitudes', 'Solicitud')
+    Solicitud.objects.filter(numero_imo='').update(numero_imo=None)
+    duplicados = list(
+        Solicitud.objects.filter(numero_imo__isnull=False, estado__in=ESTADOS_IMO_ACTIVO)
+        .values('numero_imo').annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('numero_imo', flat=True)
+    )
+    if duplicados:
+        raise RuntimeError(
+            'Hay buques con más de una solicitud activa; resuelva antes de migrar: '
+            + ', '.join(duplicados)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0017_ventana_acceso_capacidad'),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_imo_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='solicitud',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ('recibido', 'sin_asignar', 'pendiente', 'en_revision', 'documentos_faltantes', 'aprobada'))), fields=('numero_imo',), name='solicitud_imo_activo_unico'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0018_imo_activo_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudArchivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solicitud_pk', models.BigIntegerField(unique=True, verbose_name='ID original')),
+                ('codigo', models.CharField(max_length=20, unique=True, verbose_name='Código de Solicitud')),
+                ('numero_imo', models.CharField(blank=True, max_length=20, null=True, verbose_name='Número IMO')),
+                ('empresa_nombre', models.CharField(max_length=200, verbose_name='Empresa')),
+                ('empresa_rnc', models.CharField(blank=True, max_length=15, verbose_name='RNC')),
+                ('puerto_nombre', models.CharField(max_length=100, verbose_name='Puerto')),
+                ('estado', models.CharField(choices=[('borrador', 'Borrador'), ('recibido', 'Recibida'), ('sin_asignar', 'Sin Asignar'), ('pendiente', 'Pendiente de Revisión'), ('en_revision', 'En Revisión'), ('documentos_faltantes', 'Documentos Faltantes'), ('aprobada', 'Aprobada'), ('rechazada', 'Rechazada'), ('vencida', 'Vencida'), ('escalada', 'Escalada a Supervisor')], max_length=25, verbose_name='Estado')),
+                ('creada_el', models.DateTimeField(verbose_name='Creada el')),
+                ('cerrada_el', models.DateTimeField(verbose_name='Cerrada el')),
+                ('particion', models.CharField(max_length=7, verbose_name='Partición')),
+                ('contenido', models.BinaryField(verbose_name='Contenido (JSON comprimido)')),
+                ('registros', models.PositiveIntegerField(default=0, verbose_name='Registros archivados')),
+                ('tamaño_original', models.PositiveIntegerField(default=0, verbose_name='Tamaño sin comprimir (bytes)')),
+                ('archivos', models.JSONField(blank=True, default=list, verbose_name='Archivos')),
+                ('archivada_el', models.DateTimeField(auto_now_add=True, verbose_name='Archivada el')),
+            ],
+            options={
+                'verbose_name': 'Solicitud Archivada',
+                'verbose_name_plural': 'Solicitudes Archivadas',
+                'ordering': ['-cerrada_el'],
+                'indexes': [models.Index(fields=['particion', '-cerrada_el'], name='solicitudes_partici_b64515_idx'), models.Index(fields=['empresa_rnc'], name='solicitudes_empresa_69408f_idx'), models.Index(fields=['numero_imo'], name='solicitudes_numero__4d075b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0019_solicitudarchivada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['actualizada_el', 'id'], name='solicitudes_actuali_0bc178_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:25
+
+import mimetypes
+
+from django.db import migrations, models
+
+
+def tipo_desde_ruta(apps, schema_editor):
+    """Las rutas existentes conservan la extensión de la primera subida"""
+    ContenidoArchivo = apps.get_model('solicitudes', 'ContenidoArchivo')
+    for pk, ruta in ContenidoArchivo.objects.values_list('pk', 'ruta').iterator():
+        tipo = mimetypes.guess_type(ruta)[0]
+        if tipo:
+            ContenidoArchivo.objects.filter(pk=pk).update(tipo_contenido=tipo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0020_indice_cursor_cambios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contenidoarchivo',
+            name='tipo_contenido',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Tipo de contenido'),
+        ),
+        migrations.RunPython(tipo_desde_ruta, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,8 @@ from django.conf import settings
 from datetime import datetime, timedelta
 import uuid
 
+from .almacenamiento import almacenamiento_documentos
+
 class Puerto(models.Model):
     """Modelo para los puertos disponibles"""
     nombre = models.CharField(max_length=100, unique=True, verbose_name='Nombre')
@@ -12,6 +14,12 @@ class Puerto(models.Model):
     activo = models.BooleanField(default=True, verbose_name='Activo')
     ubicacion = models.CharField(max_length=200, blank=True, verbose_name='Ubicación')
     descripcion = models.TextField(blank=True, verbose_name='Descripción')
+    capacidad_maxima = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Capacidad Máxima',
+        help_text='Vehículos que el puerto admite a la vez (opcional)'
+    )
     fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name='Fecha de Creación')
     fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name='Última Modificación')
 
@@ -94,6 +102,152 @@ class MotivoAcceso(models.Model):
     def __str__(self):
         return self.nombre
 
+# ===== INSIGNIAS DE ESTADO =====
+# Tablas precalculadas: las listas consultan el diccionario de cada fila en
+# lugar de reconstruirlo. Se comparten entre filas, no deben modificarse.
+
+INSIGNIAS_ESTADO = {
+    'borrador': {'color': 'gray', 'bg_color': '#95a5a6', 'texto': 'Borrador', 'icono': '📝'},
+    'recibido': {'color': 'yellow', 'bg_color': '#f1c40f', 'texto': 'Recibida', 'icono': '📨', 'text_color': '#000000'},
+    'sin_asignar': {'color': 'secondary', 'bg_color': '#6c757d', 'texto': 'Sin Asignar', 'icono': '📋'},
+    'pendiente': {'color': 'orange', 'bg_color': '#f39c12', 'texto': 'Pendiente', 'icono': '⏳'},
+    'en_revision': {'color': 'blue', 'bg_color': '#3498db', 'texto': 'En Revisión', 'icono': '👀'},
+    'documentos_faltantes': {'color': 'info', 'bg_color': '#17a2b8', 'texto': 'Docs. Faltantes', 'icono': '📄', 'text_color': '#ffffff'},
+    'aprobada': {'color': 'green', 'bg_color': '#27ae60', 'texto': 'Aprobada', 'icono': '✅'},
+    'rechazada': {'color': 'red', 'bg_color': '#e74c3c', 'texto': 'Rechazada', 'icono': '❌'},
+    'vencida': {'color': 'dark-red', 'bg_color': '#c0392b', 'texto': 'Vencida', 'icono': '⏰'},
+    'escalada': {'color': 'purple', 'bg_color': '#9b59b6', 'texto': 'Escalada', 'icono': '🚨'},
+}
+
+# Estados que conservan su insignia aunque la solicitud haya vencido
+# (documentos_faltantes mantiene su color para diferenciarlo de rechazada)
+ESTADOS_SIN_MARCA_VENCIDA = ('aprobada', 'rechazada', 'documentos_faltantes')
+
+INSIGNIAS_ESTADO_VENCIDA = {
+    estado: {
+        **info,
+        'color': 'danger',
+        'bg_color': '#dc3545',
+        'texto': f"{info['texto']} (Vencida)",
+        'icono': '⚠️',
+    }
+    for estado, info in INSIGNIAS_ESTADO.items()
+    if estado not in ESTADOS_SIN_MARCA_VENCIDA
+}
+
+# Estados simplificados que ve el solicitante
+ESTADOS_SOLICITANTE = {
+    'borrador': 'borrador',
+    'recibido': 'recibida',
+    'sin_asignar': 'recibida',
+    'pendiente': 'recibida',
+    'en_revision': 'recibida',
+    'documentos_faltantes': 'documentos_faltantes',
+    'escalada': 'recibida',
+    'aprobada': 'aprobada',
+    'rechazada': 'rechazada',
+    'vencida': 'rechazada',
+}
+
+# Insignias de los estados simplificados del solicitante
+INSIGNIAS_SOLICITANTE = {
+    'borrador': {'color': 'gray', 'bg_color': '#95a5a6', 'texto': 'Borrador', 'icono': '📝', 'text_color': 'white'},
+    'recibida': {'color': 'yellow', 'bg_color': '#f1c40f', 'texto': 'Recibida', 'icono': '📨', 'text_color': '#000000'},
+    'documentos_faltantes': {'color': 'orange', 'bg_color': '#e67e22', 'texto': 'Docs. Pendientes', 'icono': '📄', 'text_color': 'white'},
+    'aprobada': {'color': 'green', 'bg_color': '#27ae60', 'texto': 'Aprobada', 'icono': '✅', 'text_color': 'white'},
+    'rechazada': {'color': 'red', 'bg_color': '#e74c3c', 'texto': 'Rechazada', 'icono': '❌', 'text_color': 'white'},
+}
+
+
+# Estados sin insignia propia
+INSIGNIA_GENERICA = {'color': 'secondary', 'bg_color': '#6c757d', 'icono': 'ℹ️'}
+
+
+def insignia_estado(estado_visible, rol=None, vencida=False):
+    """
+    Insignia de las tablas precalculadas para un estado ya mapeado según el
+    rol (la anotación estado_visible de SolicitudQuerySet.con_urgencia).
+
+    Returns:
+        dict o None si el estado no tiene insignia
+    """
+    if rol == 'solicitante' and estado_visible in INSIGNIAS_SOLICITANTE:
+        return INSIGNIAS_SOLICITANTE[estado_visible]
+    if vencida and estado_visible in INSIGNIAS_ESTADO_VENCIDA:
+        return INSIGNIAS_ESTADO_VENCIDA[estado_visible]
+    return INSIGNIAS_ESTADO.get(estado_visible)
+
+
+PRIORIDADES_URGENTES = ('critica', 'vip')
+
+# Estados que ya no esperan evaluación: van al final al ordenar por urgencia
+ESTADOS_CERRADOS = ('borrador', 'aprobada', 'rechazada', 'vencida')
+
+# Un buque (número IMO) solo puede tener una solicitud en estos estados;
+# lo garantiza la restricción única parcial IMO_ACTIVO_UNICO
+ESTADOS_IMO_ACTIVO = ('recibido', 'sin_asignar', 'pendiente', 'en_revision', 'documentos_faltantes', 'aprobada')
+IMO_ACTIVO_UNICO = 'solicitud_imo_activo_unico'
+
+
+class SolicitudQuerySet(models.QuerySet):
+    """Consultas de solicitudes con los datos de urgencia calculados en SQL"""
+
+    def con_urgencia(self, rol=None, ahora=None):
+        """
+        Anota los datos que las listas calculaban fila por fila:
+
+            restante: tiempo hasta vence_el (timedelta; negativo si venció)
+            vencida: True si vence_el ya pasó
+            rango_urgencia: 0 vencida, 1 vence en menos de una hora,
+                2 VIP, 3 crítica, 4 alta, 5 normal, 6 cerrada o borrador
+            urgente: lo mismo que requiere_atencion_urgente()
+            estado_visible: estado según el rol (el solicitante ve los
+                estados simplificados de ESTADOS_SOLICITANTE); clave de
+                insignia_estado()
+        """
+        ahora = ahora or timezone.now()
+        vencida = models.Q(vence_el__lt=ahora)
+        por_vencer = models.Q(vence_el__lt=ahora + timedelta(hours=1))
+
+        if rol == 'solicitante':
+            estado_visible = models.Case(
+                *[models.When(estado=interno, then=models.Value(visible)) for interno, visible in ESTADOS_SOLICITANTE.items()],
+                default=models.F('estado'),
+                output_field=models.CharField(),
+            )
+        else:
+            estado_visible = models.F('estado')
+
+        return self.annotate(
+            restante=models.ExpressionWrapper(
+                models.F('vence_el') - models.Value(ahora, output_field=models.DateTimeField()),
+                output_field=models.DurationField(),
+            ),
+            vencida=models.Case(models.When(vencida, then=models.Value(True)), default=models.Value(False), output_field=models.BooleanField()),
+            rango_urgencia=models.Case(
+                models.When(estado__in=ESTADOS_CERRADOS, then=models.Value(6)),
+                models.When(vencida, then=models.Value(0)),
+                models.When(por_vencer, then=models.Value(1)),
+                models.When(prioridad='vip', then=models.Value(2)),
+                models.When(prioridad='critica', then=models.Value(3)),
+                models.When(prioridad='alta', then=models.Value(4)),
+                default=models.Value(5),
+                output_field=models.IntegerField(),
+            ),
+            urgente=models.Case(
+                models.When(vencida | por_vencer | models.Q(prioridad__in=PRIORIDADES_URGENTES), then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            estado_visible=estado_visible,
+        )
+
+    def por_urgencia(self, rol=None, ahora=None):
+        """Ordena de la más a la menos urgente (anota si hace falta)"""
+        qs = self if 'rango_urgencia' in self.query.annotations else self.con_urgencia(rol, ahora)
+        return qs.order_by('rango_urgencia', models.F('vence_el').asc(nulls_last=True), '-creada_el')
+
+
 class Solicitud(models.Model):
     """Modelo principal para las solicitudes de acceso portuario"""
     ESTADO_CHOICES = [
@@ -175,6 +329,10 @@ class Solicitud(models.Model):
     hora_salida = models.TimeField(verbose_name='Hora de Salida')
     descripcion = models.TextField(verbose_name='Descripción Detallada')
     
+    # Ventana de acceso combinada (fecha + hora) para consultas de solapamiento
+    inicio_acceso = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Inicio del Acceso')
+    fin_acceso = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Fin del Acceso')
+    
     # Servicios solicitados
     servicios_solicitados = models.ManyToManyField(
         'evaluacion.Servicio',
@@ -220,6 +378,8 @@ class Solicitud(models.Model):
     actualizada_el = models.DateTimeField(auto_now=True, verbose_name='Actualizada el')
     enviada_el = models.DateTimeField(null=True, blank=True, verbose_name='Enviada el')
     
+    objects = SolicitudQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Solicitud'
         verbose_name_plural = 'Solicitudes'
@@ -228,41 +388,106 @@ class Solicitud(models.Model):
             models.Index(fields=['estado', '-creada_el']),
             models.Index(fields=['evaluador_asignado', 'estado']),
             models.Index(fields=['vence_el']),
+            # Cursor del feed de cambios (reportes/cambios.py)
+            models.Index(fields=['actualizada_el', 'id']),
+            # Solapamiento de ventanas aprobadas (solicitudes/capacidad.py):
+            # fin_acceso primero para descartar por rango lo que ya terminó
+            models.Index(
+                fields=['lugar_destino', 'fin_acceso', 'inicio_acceso'],
+                condition=models.Q(estado='aprobada'),
+                name='solicitud_ventana_lugar_idx',
+            ),
+            models.Index(
+                fields=['puerto_destino', 'fin_acceso', 'inicio_acceso'],
+                condition=models.Q(estado='aprobada'),
+                name='solicitud_ventana_puerto_idx',
+            ),
+        ]
+        constraints = [
+            # Índice único parcial (PostgreSQL y SQLite). En motores sin
+            # soporte Django lo omite y queda la validación de clean().
+            models.UniqueConstraint(
+                fields=['numero_imo'],
+                condition=models.Q(estado__in=ESTADOS_IMO_ACTIVO),
+                name=IMO_ACTIVO_UNICO,
+            ),
         ]
 
-    def clean(self):
-        """Validaciones de reglas de negocio"""
-        from django.core.exceptions import ValidationError
+    @classmethod
+    def activa_con_imo(cls, numero_imo, excluir=None):
+        """Solicitud activa del buque, o None. Una consulta sobre el índice parcial."""
+        query = cls.objects.filter(numero_imo=numero_imo, estado__in=ESTADOS_IMO_ACTIVO)
+        if excluir:
+            query = query.exclude(pk=excluir)
+        return query.only('codigo', 'estado', 'empresa_id').first()
 
-        # Validar que no haya múltiples solicitudes activas para el mismo buque (número IMO)
-        if self.numero_imo:
-            estados_activos = ['recibido', 'sin_asignar', 'pendiente', 'en_revision', 'documentos_faltantes', 'aprobada']
+    def error_imo_duplicado(self, existente=None):
+        """ValidationError de IMO duplicado con el código y estado de la solicitud existente"""
+        from django.core.exceptions import ValidationError
 
-            # Buscar solicitudes activas con el mismo número IMO
-            query = Solicitud.objects.filter(
-                numero_imo=self.numero_imo,
-                estado__in=estados_activos
-            )
+        existente = existente or Solicitud.activa_con_imo(self.numero_imo, excluir=self.pk)
+        if existente is None:
+            return ValidationError({
+                'numero_imo': f'Ya existe una solicitud activa para el buque con IMO {self.numero_imo}.'
+            })
+        return ValidationError({
+            'numero_imo': f'Ya existe una solicitud activa ({existente.codigo}) '
+                          f'para el buque con IMO {self.numero_imo}. '
+                          f'Estado: {existente.get_estado_display()}'
+        })
 
-            # Excluir la solicitud actual si ya existe (edición)
-            if self.pk:
-                query = query.exclude(pk=self.pk)
+    @staticmethod
+    def es_conflicto_imo(error):
+        """Si un IntegrityError viene de la restricción de IMO activo"""
+        mensaje = str(error)
+        # PostgreSQL nombra la restricción; SQLite solo la columna
+        return IMO_ACTIVO_UNICO in mensaje or 'solicitudes_solicitud.numero_imo' in mensaje
 
-            if query.exists():
-                solicitud_existente = query.first()
-                raise ValidationError({
-                    'numero_imo': f'Ya existe una solicitud activa ({solicitud_existente.codigo}) '
-                                  f'para el buque con IMO {self.numero_imo}. '
-                                  f'Estado: {solicitud_existente.get_estado_display()}'
-                })
+    def clean(self):
+        """Validaciones de reglas de negocio"""
+        # Validar que no haya múltiples solicitudes activas para el mismo buque (número IMO)
+        self.numero_imo = (self.numero_imo or '').strip() or None
+        if self.numero_imo:
+            existente = Solicitud.activa_con_imo(self.numero_imo, excluir=self.pk)
+            if existente is not None:
+                raise self.error_imo_duplicado(existente)
 
     def save(self, *args, **kwargs):
+        from django.db import IntegrityError, transaction
+
         if not self.codigo:
             self.codigo = self.generar_codigo()
         if self.estado == 'pendiente' and not self.enviada_el:
             self.enviada_el = timezone.now()
             self.calcular_vencimiento()
-        super().save(*args, **kwargs)
+        self.numero_imo = (self.numero_imo or '').strip() or None
+        self.calcular_ventana_acceso()
+        if not self.numero_imo or self.estado not in ESTADOS_IMO_ACTIVO:
+            super().save(*args, **kwargs)
+            return
+        # Dos envíos simultáneos del mismo buque: la base de datos rechaza el
+        # segundo y se informa con el mismo mensaje de clean()
+        try:
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if self.es_conflicto_imo(e):
+                raise self.error_imo_duplicado() from e
+            raise
+
+    def calcular_ventana_acceso(self):
+        """Combina fecha y hora de ingreso/salida en inicio_acceso y fin_acceso"""
+        def combinar(campo_fecha, campo_hora):
+            # El asistente asigna las fechas como texto desde la sesión
+            fecha = self._meta.get_field(campo_fecha).to_python(getattr(self, campo_fecha))
+            hora = self._meta.get_field(campo_hora).to_python(getattr(self, campo_hora))
+            if not fecha or not hora:
+                return None
+            momento = datetime.combine(fecha, hora)
+            return timezone.make_aware(momento) if settings.USE_TZ else momento
+
+        self.inicio_acceso = combinar('fecha_ingreso', 'hora_ingreso')
+        self.fin_acceso = combinar('fecha_salida', 'hora_salida')
 
     def generar_codigo(self):
         """Genera un código único para la solicitud"""
@@ -313,10 +538,13 @@ class Solicitud(models.Model):
         """Retorna el tiempo restante para el vencimiento"""
         if not self.vence_el:
             return None
-        ahora = timezone.now()
-        if ahora > self.vence_el:
+        # Anotado por SolicitudQuerySet.con_urgencia()
+        restante = getattr(self, 'restante', None)
+        if restante is None:
+            restante = self.vence_el - timezone.now()
+        if restante <= timedelta(0):
             return timedelta(0)  # Ya venció
-        return self.vence_el - ahora
+        return restante
     
     def tiempo_restante_formateado(self):
         """Retorna el tiempo restante formateado para mostrar"""
@@ -342,6 +570,9 @@ class Solicitud(models.Model):
         """Verifica si la solicitud está vencida"""
         if not self.vence_el:
             return False
+        vencida = getattr(self, 'vencida', None)
+        if vencida is not None:
+            return vencida
         return timezone.now() > self.vence_el
     
     def dias_transcurridos(self):
@@ -354,72 +585,33 @@ class Solicitud(models.Model):
     
     def requiere_atencion_urgente(self):
         """Verifica si requiere atención urgente"""
+        urgente = getattr(self, 'urgente', None)
+        if urgente is not None:
+            return urgente
         if self.esta_vencida():
             return True
         tiempo_restante = self.tiempo_restante()
         if tiempo_restante and tiempo_restante.total_seconds() < 3600:  # Menos de 1 hora
             return True
-        return self.prioridad in ['critica', 'vip']
+        return self.prioridad in PRIORIDADES_URGENTES
     
     @property
     def estado_con_color(self):
         """Retorna el estado de la solicitud con información de color"""
-        estado_map = {
-            'borrador': {'color': 'gray', 'bg_color': '#95a5a6', 'texto': 'Borrador', 'icono': '📝'},
-            'recibido': {'color': 'yellow', 'bg_color': '#f1c40f', 'texto': 'Recibida', 'icono': '📨', 'text_color': '#000000'},
-            'sin_asignar': {'color': 'secondary', 'bg_color': '#6c757d', 'texto': 'Sin Asignar', 'icono': '📋'},
-            'pendiente': {'color': 'orange', 'bg_color': '#f39c12', 'texto': 'Pendiente', 'icono': '⏳'},
-            'en_revision': {'color': 'blue', 'bg_color': '#3498db', 'texto': 'En Revisión', 'icono': '👀'},
-            'documentos_faltantes': {'color': 'info', 'bg_color': '#17a2b8', 'texto': 'Docs. Faltantes', 'icono': '📄', 'text_color': '#ffffff'},
-            'aprobada': {'color': 'green', 'bg_color': '#27ae60', 'texto': 'Aprobada', 'icono': '✅'},
-            'rechazada': {'color': 'red', 'bg_color': '#e74c3c', 'texto': 'Rechazada', 'icono': '❌'},
-            'vencida': {'color': 'dark-red', 'bg_color': '#c0392b', 'texto': 'Vencida', 'icono': '⏰'},
-            'escalada': {'color': 'purple', 'bg_color': '#9b59b6', 'texto': 'Escalada', 'icono': '🚨'},
-        }
-        
-        estado_info = estado_map.get(self.estado, {
-            'color': 'secondary', 
-            'bg_color': '#6c757d', 
-            'texto': self.get_estado_display(), 
-            'icono': 'ℹ️'
-        })
-        
-        # Modificar color si está vencida independientemente del estado
-        # (excepto para documentos_faltantes que mantiene su color azul para diferenciarlo de rechazada)
-        if self.esta_vencida() and self.estado not in ['aprobada', 'rechazada', 'documentos_faltantes']:
-            estado_info.update({
-                'color': 'danger',
-                'bg_color': '#dc3545',
-                'texto': f"{estado_info['texto']} (Vencida)",
-                'icono': '⚠️'
-            })
-        
+        if self.esta_vencida() and self.estado in INSIGNIAS_ESTADO_VENCIDA:
+            return INSIGNIAS_ESTADO_VENCIDA[self.estado]
+        estado_info = INSIGNIAS_ESTADO.get(self.estado)
+        if estado_info is None:
+            estado_info = {**INSIGNIA_GENERICA, 'texto': self.get_estado_display()}
         return estado_info
 
     # ===== MAPEO DE ESTADOS POR ROL =====
 
     # Estados simplificados para el solicitante
-    ESTADOS_SOLICITANTE = {
-        'borrador': 'borrador',
-        'recibido': 'recibida',
-        'sin_asignar': 'recibida',
-        'pendiente': 'recibida',
-        'en_revision': 'recibida',
-        'documentos_faltantes': 'documentos_faltantes',
-        'escalada': 'recibida',
-        'aprobada': 'aprobada',
-        'rechazada': 'rechazada',
-        'vencida': 'rechazada',
-    }
+    ESTADOS_SOLICITANTE = ESTADOS_SOLICITANTE
 
     # Configuración visual de estados para solicitante
-    ESTADOS_SOLICITANTE_CONFIG = {
-        'borrador': {'color': 'gray', 'bg_color': '#95a5a6', 'texto': 'Borrador', 'icono': '📝', 'text_color': 'white'},
-        'recibida': {'color': 'yellow', 'bg_color': '#f1c40f', 'texto': 'Recibida', 'icono': '📨', 'text_color': '#000000'},
-        'documentos_faltantes': {'color': 'orange', 'bg_color': '#e67e22', 'texto': 'Docs. Pendientes', 'icono': '📄', 'text_color': 'white'},
-        'aprobada': {'color': 'green', 'bg_color': '#27ae60', 'texto': 'Aprobada', 'icono': '✅', 'text_color': 'white'},
-        'rechazada': {'color': 'red', 'bg_color': '#e74c3c', 'texto': 'Rechazada', 'icono': '❌', 'text_color': 'white'},
-    }
+    ESTADOS_SOLICITANTE_CONFIG = INSIGNIAS_SOLICITANTE
 
     def get_estado_para_rol(self, rol):
         """Retorna el estado visible según el rol del usuario"""
@@ -441,10 +633,9 @@ class Solicitud(models.Model):
     def get_estado_con_color_para_rol(self, rol):
         """Retorna el estado con información de color según el rol"""
         if rol == 'solicitante':
-            estado_mapeado = self.ESTADOS_SOLICITANTE.get(self.estado, self.estado)
-            config = self.ESTADOS_SOLICITANTE_CONFIG.get(estado_mapeado)
+            config = insignia_estado(ESTADOS_SOLICITANTE.get(self.estado, self.estado), rol)
             if config:
-                return config.copy()
+                return config
         # Para otros roles, usar el método normal
         return self.estado_con_color
 
@@ -514,6 +705,7 @@ class DocumentoAdjunto(models.Model):
     )
     archivo = models.FileField(
         upload_to='solicitudes/documentos/%Y/%m/',
+        storage=almacenamiento_documentos,
         verbose_name='Archivo'
     )
     nombre_original = models.CharField(max_length=255, verbose_name='Nombre Original')
@@ -580,10 +772,10 @@ class DocumentoPersonal(models.Model):
 
     personal = models.ForeignKey('empresas.Personal', on_delete=models.CASCADE, related_name='documentos')
     tipo_documento = models.CharField(max_length=25, choices=TIPOS_DOCUMENTO, verbose_name='Tipo de Documento')
-    archivo = models.FileField(upload_to='documentos/personal/', verbose_name='Archivo')
+    archivo = models.FileField(upload_to='documentos/personal/', storage=almacenamiento_documentos, verbose_name='Archivo')
     numero_documento = models.CharField(max_length=50, blank=True, verbose_name='Número de Documento')
     fecha_emision = models.DateField(null=True, blank=True, verbose_name='Fecha de Emisión')
-    fecha_vencimiento = models.DateField(null=True, blank=True, verbose_name='Fecha de Vencimiento')
+    fecha_vencimiento = models.DateField(null=True, blank=True, db_index=True, verbose_name='Fecha de Vencimiento')
     verificado = models.BooleanField(default=False, verbose_name='Verificado')
     verificado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -626,10 +818,10 @@ class DocumentoVehiculo(models.Model):
 
     vehiculo = models.ForeignKey(Vehiculo, on_delete=models.CASCADE, related_name='documentos')
     tipo_documento = models.CharField(max_length=25, choices=TIPOS_DOCUMENTO, verbose_name='Tipo de Documento')
-    archivo = models.FileField(upload_to='documentos/vehiculos/', verbose_name='Archivo')
+    archivo = models.FileField(upload_to='documentos/vehiculos/', storage=almacenamiento_documentos, verbose_name='Archivo')
     numero_documento = models.CharField(max_length=50, blank=True, verbose_name='Número de Documento')
     fecha_emision = models.DateField(null=True, blank=True, verbose_name='Fecha de Emisión')
-    fecha_vencimiento = models.DateField(null=True, blank=True, verbose_name='Fecha de Vencimiento')
+    fecha_vencimiento = models.DateField(null=True, blank=True, db_index=True, verbose_name='Fecha de Vencimiento')
     verificado = models.BooleanField(default=False, verbose_name='Verificado')
     verificado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -680,6 +872,7 @@ class DocumentoServicioSolicitud(models.Model):
     )
     archivo = models.FileField(
         upload_to='solicitudes/documentos_servicios/%Y/%m/',
+        storage=almacenamiento_documentos,
         verbose_name='Archivo'
     )
     nombre_original = models.CharField(
@@ -913,3 +1106,248 @@ class EventoSolicitud(models.Model):
         if self.usuario:
             return self.usuario.get_full_name()
         return 'Sistema Automático'
+
+
+class BorradorWizard(models.Model):
+    """
+    Datos en progreso del wizard de solicitud.
+
+    Sustituye el almacenamiento en sesión: cada paso actualiza solo su propio
+    campo, y los archivos subidos en el paso 4 quedan en MEDIA_ROOT/temp_wizard
+    hasta que se finaliza o se descarta el borrador.
+    """
+
+    DIRECTORIO_TEMPORAL = 'temp_wizard'
+
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='borrador_wizard',
+        verbose_name='Usuario'
+    )
+    identificador = models.UUIDField(
+        default=uuid.uuid4,
+        editable=False,
+        unique=True,
+        verbose_name='Identificador',
+        help_text='Prefijo de los archivos temporales del borrador'
+    )
+    solicitud = models.ForeignKey(
+        Solicitud,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='borradores_wizard',
+        verbose_name='Solicitud en edición',
+        help_text='Solo en modo edición'
+    )
+
+    # Datos de cada paso
+    paso1 = models.JSONField(default=dict, blank=True, verbose_name='Paso 1: Información Básica')
+    paso2 = models.JSONField(default=dict, blank=True, verbose_name='Paso 2: Personal')
+    paso3 = models.JSONField(default=dict, blank=True, verbose_name='Paso 3: Vehículos')
+    paso4 = models.JSONField(default=dict, blank=True, verbose_name='Paso 4: Servicios y Documentos')
+
+    creado_el = models.DateTimeField(auto_now_add=True, verbose_name='Creado el')
+    actualizado_el = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Actualizado el')
+
+    class Meta:
+        verbose_name = 'Borrador de Wizard'
+        verbose_name_plural = 'Borradores de Wizard'
+
+    def __str__(self):
+        return f"Borrador de {self.usuario} ({self.actualizado_el:%d/%m/%Y %H:%M})"
+
+    @property
+    def modo_edicion(self):
+        return self.solicitud_id is not None
+
+    @classmethod
+    def directorio_temporal(cls):
+        """Ruta absoluta del directorio de archivos temporales"""
+        import os
+        return os.path.join(settings.MEDIA_ROOT, cls.DIRECTORIO_TEMPORAL)
+
+    @classmethod
+    def ruta_temporal(cls, temp_filename):
+        """Ruta absoluta de un archivo temporal (solo el nombre, nunca rutas recibidas)"""
+        import os
+        return os.path.join(cls.directorio_temporal(), os.path.basename(temp_filename))
+
+    @classmethod
+    def obtener(cls, usuario):
+        """Borrador actual del usuario, o uno vacío sin guardar"""
+        return cls.objects.filter(usuario=usuario).first() or cls(usuario=usuario)
+
+    def guardar_paso(self, numero, datos):
+        """Guarda los datos de un paso actualizando solo su columna"""
+        campo = f'paso{numero}'
+        setattr(self, campo, datos)
+        if self.pk:
+            self.save(update_fields=[campo, 'actualizado_el'])
+        else:
+            self.save()
+
+    @classmethod
+    def mover_archivo(cls, temp_filename, instancia, campo, nombre):
+        """
+        Mueve un archivo temporal al destino final del FileField indicado.
+
+        Con almacenamiento en disco el archivo se renombra (sin volver a
+        copiar su contenido); con otros backends se sube y se elimina el
+        temporal. Retorna (origen, destino) para poder revertir el
+        movimiento, o None si no hubo renombrado.
+
+        Con el almacenamiento deduplicado, si el contenido ya existe no se
+        mueve nada y el temporal se elimina al descartar el borrador.
+        """
+        import os
+        from django.core.files import File
+        from .almacenamiento import AlmacenamientoDeduplicado
+
+        origen = cls.ruta_temporal(temp_filename)
+        field = instancia._meta.get_field(campo)
+        storage = field.storage
+
+        if isinstance(storage, AlmacenamientoDeduplicado):
+            nombre_final, movido = storage.guardar_desde_ruta(origen, nombre)
+            setattr(instancia, campo, nombre_final)
+            return (origen, storage.path(nombre_final)) if movido else None
+
+        nombre_final = storage.get_available_name(field.generate_filename(instancia, nombre))
+
+        try:
+            destino = storage.path(nombre_final)
+        except NotImplementedError:
+            with open(origen, 'rb') as f:
+                getattr(instancia, campo).save(nombre, File(f), save=False)
+            os.remove(origen)
+            return None
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(origen, destino)
+        setattr(instancia, campo, nombre_final)
+        return origen, destino
+
+    def archivos_temporales(self):
+        """Rutas absolutas de los archivos temporales referenciados por el borrador"""
+        return [
+            self.ruta_temporal(doc['temp_filename'])
+            for doc in (self.paso4 or {}).get('documentos_subidos', [])
+            if doc.get('temp_filename')
+        ]
+
+    def eliminar_archivos_temporales(self, conservar=()):
+        """Elimina los archivos temporales del borrador salvo los indicados"""
+        import os
+        conservar = set(conservar)
+        for ruta in self.archivos_temporales():
+            if ruta not in conservar and os.path.exists(ruta):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def descartar(self):
+        """Elimina el borrador y sus archivos temporales"""
+        self.eliminar_archivos_temporales()
+        if self.pk:
+            self.delete()
+
+
+class ContenidoArchivo(models.Model):
+    """
+    Contenido único de un documento en el almacenamiento deduplicado.
+    Varios documentos pueden apuntar al mismo contenido; el archivo se
+    elimina del disco cuando ``referencias`` llega a cero.
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    ruta = models.CharField(max_length=255, verbose_name='Ruta')
+    tamaño = models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')
+    referencias = models.PositiveIntegerField(default=0, verbose_name='Referencias')
+    # La ruta solo depende del hash; el tipo se conserva aquí para las descargas
+    tipo_contenido = models.CharField(max_length=100, blank=True, verbose_name='Tipo de contenido')
+    creado_el = models.DateTimeField(auto_now_add=True, verbose_name='Creado el')
+
+    class Meta:
+        verbose_name = 'Contenido de Archivo'
+        verbose_name_plural = 'Contenidos de Archivos'
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.referencias} ref.)"
+
+    @classmethod
+    def registrar_referencia(cls, sha256, ruta, tamaño, tipo_contenido=''):
+        """Suma una referencia al contenido, creándolo si no existe"""
+        contenido, creado = cls.objects.get_or_create(
+            sha256=sha256,
+            defaults={'ruta': ruta, 'tamaño': tamaño, 'referencias': 1, 'tipo_contenido': tipo_contenido}
+        )
+        if not creado:
+            cambios = {'referencias': models.F('referencias') + 1}
+            if tipo_contenido and not contenido.tipo_contenido:
+                cambios['tipo_contenido'] = tipo_contenido
+            cls.objects.filter(pk=contenido.pk).update(**cambios)
+        return contenido
+
+    @classmethod
+    def liberar_referencia(cls, sha256):
+        """
+        Resta una referencia al contenido.
+
+        Returns:
+            bool: True si el contenido quedó sin referencias y se eliminó
+        """
+        cls.objects.filter(sha256=sha256, referencias__gt=0).update(
+            referencias=models.F('referencias') - 1
+        )
+        eliminados, _ = cls.objects.filter(sha256=sha256, referencias=0).delete()
+        return eliminados > 0
+
+
+class SolicitudArchivada(models.Model):
+    """
+    Solicitud cerrada movida fuera de las tablas activas junto con todo lo
+    que dependía de ella (eventos, vehículos, documentos, autorización,
+    registros de acceso...). El grafo se guarda serializado y comprimido;
+    las columnas de búsqueda quedan indexadas. Ver solicitudes/archivo.py.
+    """
+    solicitud_pk = models.BigIntegerField(unique=True, verbose_name='ID original')
+    codigo = models.CharField(max_length=20, unique=True, verbose_name='Código de Solicitud')
+    numero_imo = models.CharField(max_length=20, blank=True, null=True, verbose_name='Número IMO')
+    empresa_nombre = models.CharField(max_length=200, verbose_name='Empresa')
+    empresa_rnc = models.CharField(max_length=15, blank=True, verbose_name='RNC')
+    puerto_nombre = models.CharField(max_length=100, verbose_name='Puerto')
+    estado = models.CharField(max_length=25, choices=Solicitud.ESTADO_CHOICES, verbose_name='Estado')
+    creada_el = models.DateTimeField(verbose_name='Creada el')
+    cerrada_el = models.DateTimeField(verbose_name='Cerrada el')
+
+    # Partición mensual (AAAA-MM de cierre)
+    particion = models.CharField(max_length=7, verbose_name='Partición')
+
+    contenido = models.BinaryField(verbose_name='Contenido (JSON comprimido)')
+    registros = models.PositiveIntegerField(default=0, verbose_name='Registros archivados')
+    tamaño_original = models.PositiveIntegerField(default=0, verbose_name='Tamaño sin comprimir (bytes)')
+    # Rutas de documentos que el archivo conserva en el almacenamiento
+    archivos = models.JSONField(default=list, blank=True, verbose_name='Archivos')
+
+    archivada_el = models.DateTimeField(auto_now_add=True, verbose_name='Archivada el')
+
+    class Meta:
+        verbose_name = 'Solicitud Archivada'
+        verbose_name_plural = 'Solicitudes Archivadas'
+        ordering = ['-cerrada_el']
+        indexes = [
+            models.Index(fields=['particion', '-cerrada_el']),
+            models.Index(fields=['empresa_rnc']),
+            models.Index(fields=['numero_imo']),
+        ]
+
+    def __str__(self):
+        return f"{self.codigo} ({self.particion})"
+
+    def datos(self):
+        """Registros archivados como lista de diccionarios {model, pk, fields}"""
+        import json
+        import zlib
+        return json.loads(zlib.decompress(bytes(self.contenido)).decode('utf-8'))
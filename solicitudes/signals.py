@@ -12,7 +12,7 @@ def registrar_evento_creacion(sender, instance, created, **kwargs):
     """
     Registra un evento cuando se crea una nueva solicitud
     """
-    if created:
+    if created and not kwargs.get('raw'):
         EventoSolicitud.objects.create(
             solicitud=instance,
             usuario=instance.solicitante,
@@ -35,8 +35,9 @@ def detectar_cambios_solicitud(sender, instance, **kwargs):
     Detecta cambios en la solicitud y registra eventos correspondientes.
     Este signal se ejecuta ANTES de guardar, por eso usamos pre_save.
     """
-    # Solo procesamos si la solicitud ya existe (no es creación)
-    if instance.pk:
+    # Solo procesamos si la solicitud ya existe (no es creación).
+    # Los guardados raw (loaddata, restauración del archivo) no generan eventos
+    if instance.pk and not kwargs.get('raw'):
         try:
             # Obtener el estado anterior de la solicitud
             solicitud_anterior = Solicitud.objects.get(pk=instance.pk)
@@ -112,7 +113,7 @@ def registrar_cambio_estado(solicitud, estado_anterior, estado_nuevo):
     info = evento_info.get(estado_nuevo, {
         'tipo': 'cambio_estado',
         'titulo': f'Estado actualizado',
-        'descripcion': f'El estado cambió de "{Solicitud.ESTADO_CHOICES[estado_anterior][1]}" a "{Solicitud.ESTADO_CHOICES[estado_nuevo][1]}"',
+        'descripcion': f'El estado cambió de "{dict(Solicitud.ESTADO_CHOICES).get(estado_anterior, estado_anterior)}" a "{dict(Solicitud.ESTADO_CHOICES).get(estado_nuevo, estado_nuevo)}"',
         'visible': True,
         'interno': False
     })
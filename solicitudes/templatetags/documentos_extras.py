@@ -0,0 +1,17 @@
+from django import template
+
+from solicitudes.vistas_previas import url_vista_previa
+
+register = template.Library()
+
+
+@register.filter
+def miniatura(archivo):
+    """URL de la miniatura de un documento, o '' si no existe"""
+    return url_vista_previa(archivo, 'm')
+
+
+@register.filter
+def vista_previa(archivo):
+    """URL de la vista previa reducida de un documento, o '' si no existe"""
+    return url_vista_previa(archivo, 'v')
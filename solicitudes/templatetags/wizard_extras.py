@@ -1,5 +1,7 @@
 from django import template
 
+from solicitudes.models import INSIGNIA_GENERICA, insignia_estado as _insignia_estado
+
 register = template.Library()
 
 @register.filter
@@ -40,3 +42,9 @@ def estado_con_color_para_rol(solicitud, user):
     if hasattr(solicitud, 'get_estado_con_color_para_rol') and hasattr(user, 'role'):
         return solicitud.get_estado_con_color_para_rol(user.role)
     return solicitud.estado_con_color if hasattr(solicitud, 'estado_con_color') else {}
+
+
+@register.simple_tag
+def insignia_estado(estado_visible, rol, vencida=False):
+    """Insignia de la tabla precalculada para la anotación estado_visible"""
+    return _insignia_estado(estado_visible, rol, vencida) or {**INSIGNIA_GENERICA, 'texto': estado_visible}
@@ -1,3 +1,321 @@
+import io
+import os
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from naviport.pruebas import PruebaConMedia, crear_empresa, crear_solicitud, crear_usuario
+
+from .almacenamiento import PREFIJO_CONTENIDO, almacenamiento_documentos, extension_de, ruta_contenido, tipo_contenido
+from .models import INSIGNIAS_ESTADO, INSIGNIAS_SOLICITANTE, ContenidoArchivo, DocumentoAdjunto, Solicitud
+from .vistas_previas import PREFIJO_PREVIAS, existe_vista_previa, generar_vista_previa, url_vista_previa
+
+
+def _png(color='navy'):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _archivos(prefijo):
+    directorio = os.path.join(almacenamiento_documentos.location, prefijo)
+    return sorted(
+        os.path.relpath(os.path.join(raiz, nombre), directorio)
+        for raiz, _, nombres in os.walk(directorio) for nombre in nombres
+    )
+
+
+class AlmacenamientoDeduplicadoTests(PruebaConMedia):
+
+    def setUp(self):
+        self.solicitud = crear_solicitud()
+        self.contenido = _png()
+
+    def _adjuntar(self, nombre):
+        documento = DocumentoAdjunto(
+            solicitud=self.solicitud, tipo_documento='otros', nombre_original=nombre, tamaño=len(self.contenido),
+        )
+        documento.archivo.save(nombre, ContentFile(self.contenido))
+        return documento
+
+    def test_mismo_contenido_con_distintas_extensiones_es_un_solo_archivo(self):
+        documentos = [self._adjuntar(nombre) for nombre in ('a.jpg', 'b.JPEG', 'c.jpg')]
+
+        self.assertEqual({d.archivo.name for d in documentos}, {ruta_contenido(ContenidoArchivo.objects.get().sha256)})
+        self.assertEqual(ContenidoArchivo.objects.get().referencias, 3)
+        self.assertEqual(len(_archivos(PREFIJO_CONTENIDO)), 1)
+
+        generar_vista_previa(documentos[0].archivo.name)
+        self.assertEqual(len(_archivos(PREFIJO_PREVIAS)), 2)
+
+        for documento in documentos:
+            with self.captureOnCommitCallbacks(execute=True):
+                documento.delete()
+        self.assertFalse(ContenidoArchivo.objects.exists())
+        self.assertEqual(_archivos(PREFIJO_CONTENIDO), [])
+        self.assertEqual(_archivos(PREFIJO_PREVIAS), [])
+
+    def test_tipo_y_extension_se_conservan_en_el_registro(self):
+        documento = self._adjuntar('foto.PNG')
+        self.assertEqual(tipo_contenido(documento.archivo.name), 'image/png')
+        self.assertEqual(extension_de(documento.archivo.name), '.png')
+
+    def test_rutas_con_extension_se_normalizan(self):
+        documento = self._adjuntar('a.jpg')
+        contenido = ContenidoArchivo.objects.get()
+        antigua = contenido.ruta + '.jpg'
+        os.replace(almacenamiento_documentos.path(contenido.ruta), os.path.join(almacenamiento_documentos.location, antigua))
+        ContenidoArchivo.objects.update(ruta=antigua)
+        DocumentoAdjunto.objects.filter(pk=documento.pk).update(archivo=antigua)
+        # Copia sobrante de una subida con otra extensión
+        with open(os.path.join(almacenamiento_documentos.location, contenido.ruta + '.jpeg'), 'wb') as sobrante:
+            sobrante.write(self.contenido)
+
+        call_command('deduplicar_documentos', stdout=io.StringIO())
+
+        documento.refresh_from_db()
+        self.assertEqual(documento.archivo.name, contenido.ruta)
+        self.assertEqual(_archivos(PREFIJO_CONTENIDO), [os.path.relpath(contenido.ruta, PREFIJO_CONTENIDO)])
+        # Una referencia antigua (p. ej. del archivo histórico) sigue encontrando el contenido
+        self.assertTrue(os.path.exists(almacenamiento_documentos.path(antigua)))
+
+
+class VistaPreviaProtegidaTests(PruebaConMedia):
+
+    def setUp(self):
+        self.solicitud = crear_solicitud()
+        contenido = _png()
+        self.documento = DocumentoAdjunto(
+            solicitud=self.solicitud, tipo_documento='otros', nombre_original='foto.png', tamaño=len(contenido),
+        )
+        self.documento.archivo.save('foto.png', ContentFile(contenido))
+        generar_vista_previa(self.documento.archivo.name)
+        self.url = url_vista_previa(self.documento.archivo, 'm')
+
+    def test_url_no_esta_bajo_media(self):
+        from django.conf import settings
+
+        self.assertTrue(self.url)
+        self.assertFalse(self.url.startswith(settings.MEDIA_URL))
+
+    def test_solicitante_y_evaluador_ven_la_vista_previa(self):
+        for usuario in (self.solicitud.solicitante, crear_usuario('evaluador')):
+            self.client.force_login(usuario)
+            respuesta = self.client.get(self.url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta['Content-Type'].startswith('image/'))
+
+    def test_otro_usuario_no_la_ve(self):
+        self.client.force_login(crear_usuario('solicitante'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class VistaPreviaDocumentoVehiculoTests(PruebaConMedia):
+    """Los documentos de la flota tienen miniatura con los permisos de su descarga"""
+
+    def setUp(self):
+        from gestion_vehiculos.models import DocumentoVehiculo, Vehiculo
+
+        self.empresa = crear_usuario('solicitante')
+        self.vehiculo = Vehiculo.objects.create(
+            placa='A123456', marca='Marca', modelo='Modelo', ano=2020, color='Blanco',
+            tipo_vehiculo='camion', empresa_propietaria=self.empresa,
+        )
+        self.documento = DocumentoVehiculo(vehiculo=self.vehiculo, tipo_documento='matricula')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documento.archivo.save('matricula.png', ContentFile(_png()))
+
+    def test_se_genera_al_guardar_y_se_muestra_al_propietario(self):
+        url = url_vista_previa(self.documento.archivo, 'm')
+        self.assertTrue(url)
+
+        self.client.force_login(self.empresa)
+        detalle = self.client.get(reverse('gestion_vehiculos:detalle_vehiculo', args=[self.vehiculo.pk]))
+        self.assertContains(detalle, url)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.force_login(crear_usuario('evaluador'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(crear_usuario('solicitante'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_modelos_sin_pagina_de_vista_previa_no_la_generan(self):
+        from solicitudes.models import DocumentoVehiculo
+
+        solicitud = crear_solicitud()
+        documento = DocumentoVehiculo(
+            vehiculo=solicitud.vehiculos.get(), tipo_documento='matricula',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.archivo.save('otro.png', ContentFile(_png('teal')))
+        self.assertFalse(existe_vista_previa(documento.archivo.name, 'm'))
+
+
+class InsigniaEstadoTests(TestCase):
+    """Las listas toman la insignia de la anotación estado_visible y las tablas"""
+
+    def setUp(self):
+        self.solicitud = crear_solicitud(estado='en_revision')
+        self.client.force_login(self.solicitud.solicitante)
+
+    def test_estado_visible_segun_el_rol(self):
+        self.assertEqual(Solicitud.objects.con_urgencia('solicitante').get().estado_visible, 'recibida')
+        self.assertEqual(Solicitud.objects.con_urgencia('evaluador').get().estado_visible, 'en_revision')
+
+    def test_listas_y_detalle_no_calculan_la_insignia_por_fila(self):
+        insignia = INSIGNIAS_SOLICITANTE['recibida']
+        with mock.patch.object(Solicitud, 'get_estado_con_color_para_rol', side_effect=AssertionError), \
+                mock.patch.object(Solicitud, 'estado_con_color', new_callable=mock.PropertyMock, side_effect=AssertionError):
+            for url in (reverse('solicitudes:mis_solicitudes'),
+                        reverse('solicitudes:detalle_solicitud', args=[self.solicitud.pk])):
+                respuesta = self.client.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertContains(respuesta, insignia['bg_color'])
+                self.assertNotContains(respuesta, INSIGNIAS_ESTADO['en_revision']['texto'])
+
+
+class ImoActivoUnicoTests(TestCase):
+    """Un buque solo puede tener una solicitud activa, aun sin pasar por clean()"""
+
+    IMO = '9876543'
+
+    def setUp(self):
+        self.activa = crear_solicitud(estado='pendiente', numero_imo=self.IMO)
+
+    def test_duplicado_simultaneo_se_informa_como_validacion(self):
+        from django.core.exceptions import ValidationError
+
+        # save() directo, como un segundo envío que pasó clean() a la vez
+        with self.assertRaises(ValidationError) as error:
+            crear_solicitud(estado='pendiente', numero_imo=f' {self.IMO} ')
+        self.assertIn(self.activa.codigo, error.exception.message_dict['numero_imo'][0])
+        self.assertEqual(Solicitud.objects.filter(numero_imo=self.IMO).count(), 1)
+
+    def test_reactivar_una_cerrada_con_imo_ocupado(self):
+        from django.core.exceptions import ValidationError
+
+        cerrada = crear_solicitud(estado='rechazada', numero_imo=self.IMO)
+        cerrada.estado = 'pendiente'
+        with self.assertRaises(ValidationError):
+            cerrada.save()
+        cerrada.refresh_from_db()
+        self.assertEqual(cerrada.estado, 'rechazada')
+
+    def test_imo_en_blanco_se_guarda_como_null(self):
+        sin_imo = [crear_solicitud(estado='pendiente', numero_imo=imo) for imo in ('', '   ')]
+        self.assertEqual(Solicitud.objects.filter(pk__in=[s.pk for s in sin_imo], numero_imo__isnull=True).count(), 2)
+
+    def test_conflicto_reconocido_en_sqlite_y_postgresql(self):
+        from django.db import IntegrityError
+
+        self.assertTrue(Solicitud.es_conflicto_imo(IntegrityError(
+            'UNIQUE constraint failed: solicitudes_solicitud.numero_imo'
+        )))
+        self.assertTrue(Solicitud.es_conflicto_imo(IntegrityError(
+            'duplicate key value violates unique constraint "solicitud_imo_activo_unico"'
+        )))
+        self.assertFalse(Solicitud.es_conflicto_imo(IntegrityError(
+            'UNIQUE constraint failed: solicitudes_solicitud.codigo'
+        )))
+
+    def _verificar(self, usuario, imo):
+        self.client.force_login(usuario)
+        return self.client.get(reverse('solicitudes:wizard_verificar_imo'), {'imo': imo}).json()
+
+    def test_verificar_imo_misma_empresa_ve_la_solicitud(self):
+        usuario = crear_usuario('solicitante', empresa=self.activa.empresa)
+        self.assertEqual(self._verificar(usuario, self.IMO), {
+            'valido': True, 'disponible': False,
+            'codigo': self.activa.codigo, 'estado': self.activa.get_estado_display(),
+        })
+
+    def test_verificar_imo_otra_empresa_no_ve_la_solicitud(self):
+        usuario = crear_usuario('solicitante', empresa=crear_empresa())
+        self.assertEqual(self._verificar(usuario, self.IMO), {'valido': True, 'disponible': False})
+        self.assertEqual(self._verificar(usuario, '1234567'), {'valido': True, 'disponible': True})
+        self.assertEqual(self._verificar(usuario, '12345'), {'valido': False, 'disponible': None})
+
+
+class ArchivoHistoricoTests(PruebaConMedia):
+    """archivar() y restaurar() mueven el grafo completo de la solicitud"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from control_acceso.models import RegistroAcceso
+        from naviport.pruebas import crear_autorizacion
+
+        self.solicitud = crear_solicitud(estado='aprobada', inicio=timezone.now() - timedelta(days=3))
+        self.autorizacion = crear_autorizacion(self.solicitud)
+        oficial = crear_usuario('oficial_acceso')
+        for tipo in ('ingreso', 'salida'):
+            RegistroAcceso.objects.create(
+                autorizacion=self.autorizacion, tipo_acceso=tipo, vehiculo_placa='A000001',
+                conductor_nombre='Conductor', oficial_acceso=oficial, estado='autorizado',
+            )
+        self.documento = DocumentoAdjunto(
+            solicitud=self.solicitud, tipo_documento='otros', nombre_original='a.png', tamaño=1,
+        )
+        self.documento.archivo.save('a.png', ContentFile(_png()))
+
+    def _conteos(self):
+        from control_acceso.models import Autorizacion, AutorizacionVehiculo, RegistroAcceso
+        from .models import EventoSolicitud, Vehiculo
+
+        return {
+            modelo.__name__: modelo.objects.count()
+            for modelo in (Solicitud, EventoSolicitud, Vehiculo, DocumentoAdjunto,
+                           Autorizacion, AutorizacionVehiculo, RegistroAcceso)
+        }
+
+    def test_ida_y_vuelta_conserva_registros_y_archivos(self):
+        from .archivo import archivar, restaurar
+        from .models import SolicitudArchivada
+
+        antes = self._conteos()
+        self.assertTrue(all(antes.values()), antes)
+        ruta = almacenamiento_documentos.path(self.documento.archivo.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archivar(meses=0)['archivadas'], 1)
+        self.assertEqual(set(self._conteos().values()), {0})
+        # El contenido deduplicado sigue en disco y contado como en uso
+        self.assertTrue(os.path.exists(ruta))
+        self.assertEqual(ContenidoArchivo.objects.get().referencias, 1)
+        call_command('deduplicar_documentos', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(ruta))
+
+        archivada = SolicitudArchivada.objects.get()
+        self.assertEqual(archivada.archivos, [self.documento.archivo.name])
+        restaurada = restaurar(archivada)
+
+        self.assertEqual(self._conteos(), antes)
+        self.assertEqual(restaurada.codigo, self.solicitud.codigo)
+        self.assertEqual(restaurada.documentos.get().archivo.name, self.documento.archivo.name)
+        self.assertFalse(SolicitudArchivada.objects.exists())
+
+    def test_registros_protegidos_se_omiten(self):
+        from django.db.models.deletion import ProtectedError
+        from . import archivo
+
+        with mock.patch.object(archivo, 'archivar_solicitud', side_effect=ProtectedError('protegida', set())):
+            resumen = archivo.archivar(meses=0)
+        self.assertEqual((resumen['archivadas'], resumen['omitidas']), (0, 1))
+        self.assertEqual(Solicitud.objects.count(), 1)
+
+    def test_restaurar_no_pisa_una_solicitud_existente(self):
+        from .archivo import archivar_solicitud, restaurar
 
-# Create your tests here.
+        archivada = archivar_solicitud(self.solicitud)
+        # Otra solicitud ocupa el ID original
+        crear_solicitud(id=archivada.solicitud_pk)
+        with self.assertRaises(ValueError):
+            restaurar(archivada)
+        self.assertTrue(type(archivada).objects.filter(pk=archivada.pk).exists())
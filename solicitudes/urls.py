@@ -2,13 +2,14 @@ from django.urls import path
 from .views import (
     dashboard, nueva_solicitud, detalle_solicitud, editar_solicitud, borrar_solicitud,
     mis_borradores, mis_solicitudes, mis_autorizaciones, estadisticas,
-    imprimir_autorizacion,
+    imprimir_autorizacion, vista_previa_documento,
     # Wizard views
     solicitud_wizard_inicio, solicitud_wizard_paso1, solicitud_wizard_paso2,
     solicitud_wizard_paso3, solicitud_wizard_paso4, solicitud_wizard_paso5,
     solicitud_wizard_finalizar, wizard_cargar_lugares_puerto,
     wizard_cargar_lugar_detalle, wizard_cargar_documentos_servicio,
-    solicitud_wizard_volver_paso, solicitud_wizard_editar, listar_vehiculos_ajax
+    solicitud_wizard_volver_paso, solicitud_wizard_editar, listar_vehiculos_ajax,
+    wizard_verificar_imo
 )
 
 app_name = 'solicitudes'
@@ -24,6 +25,7 @@ urlpatterns = [
     path('mis-autorizaciones/', mis_autorizaciones, name='mis_autorizaciones'),
     path('estadisticas/', estadisticas, name='estadisticas'),
     path('imprimir/<int:solicitud_id>/', imprimir_autorizacion, name='imprimir_autorizacion'),
+    path('documentos/<str:tipo>/<int:documento_id>/vista-previa/<str:tamaño>/', vista_previa_documento, name='vista_previa_documento'),
     
     # Wizard URLs
     path('wizard/', solicitud_wizard_inicio, name='solicitud_wizard_inicio'),
@@ -34,6 +36,7 @@ urlpatterns = [
     path('wizard/paso5/', solicitud_wizard_paso5, name='wizard_paso5'),
     path('wizard/finalizar/', solicitud_wizard_finalizar, name='wizard_finalizar'),
     path('wizard/api/lugares-puerto/', wizard_cargar_lugares_puerto, name='wizard_cargar_lugares_puerto'),
+    path('wizard/api/verificar-imo/', wizard_verificar_imo, name='wizard_verificar_imo'),
     path('wizard/api/lugar-detalle/<int:lugar_id>/', wizard_cargar_lugar_detalle, name='wizard_cargar_lugar_detalle'),
     path('wizard/api/documentos-servicio/<int:servicio_id>/', wizard_cargar_documentos_servicio, name='wizard_cargar_documentos_servicio'),
     path('wizard/volver-paso/<int:paso>/', solicitud_wizard_volver_paso, name='wizard_volver_paso'),
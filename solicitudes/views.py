@@ -1,4 +1,5 @@
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.shortcuts import render, redirect, get_object_or_404
 from .forms import SolicitudForm, VehiculoFormSet, DocumentoFormSet
 from accounts.models import Empresa
@@ -6,12 +7,15 @@ from accounts.decorators import role_required
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Count, Q
-from .models import Solicitud, SolicitudPersonal, Puerto, LugarPuerto, MotivoAcceso
+from .models import Solicitud, SolicitudPersonal, Puerto, LugarPuerto, MotivoAcceso, BorradorWizard
 from empresas.models import Personal
+from reportes.models import TiempoEnEstado
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 import json
+import re
 from django.http import JsonResponse
 
 def verificar_solicitud_completa(solicitud, request):
@@ -152,6 +156,8 @@ def dashboard(request):
         stats['porcentaje_aprobacion'] = round((stats['aprobadas'] / total_evaluadas) * 100)
     else:
         stats['porcentaje_aprobacion'] = 0
+
+    stats['tiempo_promedio_aprobacion'] = TiempoEnEstado.dias_resolucion()
     
     # Verificar autorizaciones (simulado por ahora)
     from control_acceso.models import Autorizacion
@@ -333,7 +339,7 @@ def nueva_solicitud(request):
 @login_required
 @role_required('solicitante')
 def detalle_solicitud(request, solicitud_id):
-    solicitud = request.user.solicitudes.select_related('empresa').filter(id=solicitud_id).first()
+    solicitud = request.user.solicitudes.con_urgencia(request.user.role).select_related('empresa').filter(id=solicitud_id).first()
     if not solicitud:
         return redirect('solicitudes:dashboard')
     return render(request, 'solicitudes/detalle_solicitud.html', {'solicitud': solicitud})
@@ -413,7 +419,7 @@ def mis_solicitudes(request):
     }
 
     # Filtrar solicitudes
-    solicitudes_list = request.user.solicitudes.select_related('empresa', 'puerto_destino', 'motivo_acceso').order_by('-creada_el')
+    solicitudes_list = request.user.solicitudes.con_urgencia(request.user.role).select_related('empresa', 'puerto_destino', 'motivo_acceso').order_by('-creada_el')
 
     if estado_filtro:
         # Obtener los estados internos correspondientes al filtro del solicitante
@@ -508,8 +514,8 @@ def estadisticas(request):
         count=Count('id')
     ).order_by('-count')[:5]
     
-    # Tiempo promedio de aprobación (simulado - en días)
-    tiempo_promedio = 5  # Por ahora estático, se puede calcular con fechas reales
+    # Mediana de días desde el envío hasta la decisión (actualizar_tiempos_estado)
+    tiempo_promedio = TiempoEnEstado.dias_resolucion()
     
     # Próximas autorizaciones por vencer (simulado)
     autorizaciones_por_vencer = user_solicitudes.filter(estado='aprobada').count()
@@ -558,35 +564,20 @@ def estadisticas(request):
 # VIEWS FOR WIZARD FORM (Experimental)
 # ================================================
 
-def limpiar_sesion_wizard(request):
-    """Limpia los datos de sesión del wizard y archivos temporales"""
-    import os
-    from django.conf import settings
-
-    # Obtener datos del paso 4 para limpiar archivos temporales
-    paso4 = request.session.get('wizard_paso4', {})
-    documentos_subidos = paso4.get('documentos_subidos', [])
-
-    # Eliminar archivos temporales
-    for doc_info in documentos_subidos:
-        temp_path = doc_info.get('temp_path')
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+def limpiar_borrador_wizard(request):
+    """Descarta el borrador del wizard del usuario y sus archivos temporales"""
+    BorradorWizard.obtener(request.user).descartar()
 
-    # Limpiar sesión
-    for key in list(request.session.keys()):
-        if key.startswith('wizard_'):
-            del request.session[key]
+    # Datos de versiones anteriores del wizard guardados en sesión
+    for key in [k for k in request.session.keys() if k.startswith('wizard_')]:
+        del request.session[key]
 
 @login_required
 @role_required('solicitante')
 def solicitud_wizard_inicio(request):
     """Página de inicio del wizard - solo para pruebas"""
     if request.method == 'POST' and request.POST.get('iniciar_wizard'):
-        limpiar_sesion_wizard(request)
+        limpiar_borrador_wizard(request)
         return redirect('solicitudes:wizard_paso1')
     
     context = {
@@ -602,9 +593,11 @@ def solicitud_wizard_inicio(request):
 @role_required('solicitante')
 def solicitud_wizard_paso1(request):
     """Paso 1: Información Básica"""
+    borrador = BorradorWizard.obtener(request.user)
+
     if request.method == 'POST':
-        # Guardar datos del paso 1 en sesión
-        request.session['wizard_paso1'] = {
+        # Guardar datos del paso 1 en el borrador
+        borrador.guardar_paso(1, {
             'numero_imo': request.POST.get('numero_imo'),
             'naviera': request.POST.get('naviera'),
             'puerto_destino': request.POST.get('puerto_destino'),
@@ -616,11 +609,11 @@ def solicitud_wizard_paso1(request):
             'hora_salida': request.POST.get('hora_salida'),
             'descripcion': request.POST.get('descripcion'),
             'prioridad': request.POST.get('prioridad', 'normal'),
-        }
+        })
         return redirect('solicitudes:wizard_paso2')
 
-    # Cargar datos si existen en sesión
-    datos_previos = request.session.get('wizard_paso1', {})
+    # Cargar datos si existen en el borrador
+    datos_previos = borrador.paso1 or {}
 
     # Cargar opciones para el formulario
     puertos = Puerto.objects.filter(activo=True)
@@ -644,6 +637,8 @@ def solicitud_wizard_paso1(request):
 @role_required('solicitante')
 def solicitud_wizard_paso2(request):
     """Paso 2: Personal"""
+    borrador = BorradorWizard.obtener(request.user)
+
     if request.method == 'POST':
         # Procesar personal
         personal_data = []
@@ -674,13 +669,13 @@ def solicitud_wizard_paso2(request):
                 })
             i += 1
 
-        request.session['wizard_paso2'] = {
+        borrador.guardar_paso(2, {
             'personal': personal_data
-        }
+        })
         return redirect('solicitudes:wizard_paso3')
 
     # Cargar datos previos
-    datos_previos = request.session.get('wizard_paso2', {'personal': []})
+    datos_previos = borrador.paso2 or {'personal': []}
 
     # Calcular porcentaje de progreso
     porcentaje_progreso = int((2 / 5) * 100) if 5 > 0 else 40
@@ -697,6 +692,8 @@ def solicitud_wizard_paso2(request):
 @role_required('solicitante')
 def solicitud_wizard_paso3(request):
     """Paso 3: Vehículos"""
+    borrador = BorradorWizard.obtener(request.user)
+
     if request.method == 'POST':
         # Procesar vehículos
         vehiculos_data = []
@@ -716,13 +713,13 @@ def solicitud_wizard_paso3(request):
                 })
             i += 1
 
-        request.session['wizard_paso3'] = {
+        borrador.guardar_paso(3, {
             'vehiculos': vehiculos_data
-        }
+        })
         return redirect('solicitudes:wizard_paso4')
 
     # Cargar datos previos
-    datos_previos = request.session.get('wizard_paso3', {'vehiculos': []})
+    datos_previos = borrador.paso3 or {'vehiculos': []}
 
     # Calcular porcentaje de progreso
     porcentaje_progreso = int((3 / 5) * 100) if 5 > 0 else 60
@@ -747,10 +744,10 @@ def solicitud_wizard_paso3(request):
 def solicitud_wizard_paso4(request):
     """Paso 4: Servicios y Documentos"""
     import os
-    import uuid
-    from django.conf import settings
     from evaluacion.models import DocumentoRequeridoServicio
 
+    borrador = BorradorWizard.obtener(request.user)
+
     if request.method == 'POST':
         # Procesar servicio seleccionado (solo uno)
         servicio_seleccionado = request.POST.get('servicio_seleccionado')
@@ -766,15 +763,18 @@ def solicitud_wizard_paso4(request):
             )
 
             # Crear directorio temporal si no existe
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_wizard')
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir)
+            temp_dir = BorradorWizard.directorio_temporal()
+            os.makedirs(temp_dir, exist_ok=True)
 
-            # Generar un ID único para esta sesión de wizard
-            wizard_session_id = request.session.get('wizard_session_id')
-            if not wizard_session_id:
-                wizard_session_id = str(uuid.uuid4())
-                request.session['wizard_session_id'] = wizard_session_id
+            # Los archivos temporales se identifican con el borrador
+            wizard_session_id = str(borrador.identificador)
+
+            # Documentos ya subidos en una visita anterior a este paso
+            previos = {
+                d['documento_requerido_id']: d
+                for d in (borrador.paso4 or {}).get('documentos_subidos', [])
+                if d.get('temp_filename')
+            }
 
             # Procesar cada archivo subido
             for doc in docs_requeridos:
@@ -796,18 +796,23 @@ def solicitud_wizard_paso4(request):
                         'documento_requerido_id': doc.id,
                         'nombre_original': archivo.name,
                         'tamaño': archivo.size,
-                        'temp_path': temp_path,
                         'temp_filename': temp_filename,
                     })
-
-        request.session['wizard_paso4'] = {
+                elif doc.id in previos:
+                    documentos_subidos.append(previos[doc.id])
+
+        # Eliminar temporales anteriores que ya no forman parte del borrador
+        borrador.eliminar_archivos_temporales(conservar=[
+            BorradorWizard.ruta_temporal(doc['temp_filename']) for doc in documentos_subidos
+        ])
+        borrador.guardar_paso(4, {
             'servicios_seleccionados': [servicio_seleccionado] if servicio_seleccionado else [],
             'documentos_subidos': documentos_subidos,
-        }
+        })
         return redirect('solicitudes:wizard_paso5')
 
     # Cargar datos previos
-    datos_previos = request.session.get('wizard_paso4', {'servicios_seleccionados': [], 'documentos_subidos': []})
+    datos_previos = borrador.paso4 or {'servicios_seleccionados': [], 'documentos_subidos': []}
 
     # Cargar servicios de la licencia asociada a la empresa del usuario
     servicios = []
@@ -841,10 +846,11 @@ def solicitud_wizard_paso5(request):
     from evaluacion.models import Servicio, DocumentoRequeridoServicio
 
     # Obtener todos los datos acumulados
-    paso1 = request.session.get('wizard_paso1', {})
-    paso2 = request.session.get('wizard_paso2', {})
-    paso3 = request.session.get('wizard_paso3', {})
-    paso4 = request.session.get('wizard_paso4', {})
+    borrador = BorradorWizard.obtener(request.user)
+    paso1 = borrador.paso1 or {}
+    paso2 = borrador.paso2 or {}
+    paso3 = borrador.paso3 or {}
+    paso4 = borrador.paso4 or {}
 
     # Cargar información adicional para mostrar en el resumen
     puertos = Puerto.objects.filter(activo=True)
@@ -922,35 +928,37 @@ def convertir_hora_12_a_24(hora_12h):
     """Convierte hora en formato 12H (08:00 AM) a formato 24H (08:00)"""
     if not hora_12h:
         return None
-    try:
-        # Parsear la hora en formato 12H
-        hora_obj = datetime.strptime(hora_12h, '%I:%M %p')
-        # Retornar en formato 24H
-        return hora_obj.strftime('%H:%M')
-    except:
-        return None
+    # 12H desde el formulario; 24H cuando el borrador viene de una solicitud existente
+    for formato in ('%I:%M %p', '%H:%M'):
+        try:
+            hora_obj = datetime.strptime(hora_12h, formato)
+            # Retornar en formato 24H
+            return hora_obj.strftime('%H:%M')
+        except ValueError:
+            continue
+    return None
 
 @login_required
 @role_required('solicitante')
 def solicitud_wizard_finalizar(request):
     """Finalizar y crear/actualizar la solicitud"""
     import os
-    import shutil
-    from django.conf import settings
-    from django.core.files import File
 
     if request.method == 'POST':
+        # Archivos movidos desde temp_wizard, para revertir si la transacción falla
+        movidos = []
         try:
             with transaction.atomic():
                 # Obtener todos los datos del wizard
-                paso1 = request.session.get('wizard_paso1', {})
-                paso2 = request.session.get('wizard_paso2', {})
-                paso3 = request.session.get('wizard_paso3', {})
-                paso4 = request.session.get('wizard_paso4', {})
+                borrador = BorradorWizard.obtener(request.user)
+                paso1 = borrador.paso1 or {}
+                paso2 = borrador.paso2 or {}
+                paso3 = borrador.paso3 or {}
+                paso4 = borrador.paso4 or {}
 
                 # Verificar si estamos en modo edición
-                modo_edicion = request.session.get('wizard_modo_edicion', False)
-                solicitud_id = request.session.get('wizard_solicitud_id')
+                modo_edicion = borrador.modo_edicion
+                solicitud_id = borrador.solicitud_id
 
                 # Convertir horas de formato 12H a 24H
                 hora_ingreso = convertir_hora_12_a_24(paso1.get('hora_ingreso'))
@@ -1006,87 +1014,143 @@ def solicitud_wizard_finalizar(request):
                 from evaluacion.models import DocumentoRequeridoServicio
                 from .models import DocumentoServicioSolicitud
 
-                documentos_subidos = paso4.get('documentos_subidos', [])
+                documentos_subidos = [
+                    doc_info for doc_info in paso4.get('documentos_subidos', [])
+                    if doc_info.get('temp_filename') and
+                    os.path.exists(BorradorWizard.ruta_temporal(doc_info['temp_filename']))
+                ]
+                # Una sola consulta para todas las definiciones de documentos
+                docs_requeridos = DocumentoRequeridoServicio.objects.in_bulk(
+                    [doc_info['documento_requerido_id'] for doc_info in documentos_subidos]
+                )
+
+                documentos_nuevos = []
                 for doc_info in documentos_subidos:
-                    temp_path = doc_info.get('temp_path')
-                    if temp_path and os.path.exists(temp_path):
-                        try:
-                            # Obtener el documento requerido
-                            doc_requerido = DocumentoRequeridoServicio.objects.get(
-                                id=doc_info['documento_requerido_id']
-                            )
-
-                            # Crear el registro de documento de servicio
-                            with open(temp_path, 'rb') as f:
-                                doc_servicio = DocumentoServicioSolicitud(
-                                    solicitud=solicitud,
-                                    documento_requerido=doc_requerido,
-                                    nombre_original=doc_info['nombre_original'],
-                                    tamaño=doc_info['tamaño'],
-                                )
-                                # Guardar el archivo
-                                doc_servicio.archivo.save(
-                                    doc_info['nombre_original'],
-                                    File(f),
-                                    save=True
-                                )
-
-                            # Eliminar archivo temporal
-                            os.remove(temp_path)
-                        except Exception as e:
-                            # Log error pero continuar
-                            print(f"Error procesando documento: {e}")
+                    doc_requerido = docs_requeridos.get(doc_info['documento_requerido_id'])
+                    if not doc_requerido:
+                        continue
+                    doc_servicio = DocumentoServicioSolicitud(
+                        solicitud=solicitud,
+                        documento_requerido=doc_requerido,
+                        nombre_original=doc_info['nombre_original'],
+                        tamaño=doc_info['tamaño'],
+                    )
+                    # Mover (renombrar) el archivo temporal a su destino final
+                    movimiento = BorradorWizard.mover_archivo(
+                        doc_info['temp_filename'], doc_servicio, 'archivo', doc_info['nombre_original']
+                    )
+                    if movimiento:
+                        movidos.append(movimiento)
+                    documentos_nuevos.append(doc_servicio)
+
+                if documentos_nuevos:
+                    if modo_edicion:
+                        # Los documentos subidos de nuevo reemplazan a los anteriores
+                        DocumentoServicioSolicitud.objects.filter(
+                            solicitud=solicitud,
+                            documento_requerido__in=[d.documento_requerido for d in documentos_nuevos]
+                        ).delete()
+                    DocumentoServicioSolicitud.objects.bulk_create(documentos_nuevos)
+
+                    # bulk_create no emite post_save: programar las vistas previas aquí
+                    from .vistas_previas import programar_vista_previa
+                    for doc_servicio in documentos_nuevos:
+                        programar_vista_previa(doc_servicio.archivo.name)
 
                 # Crear personal y asociarlo
                 from empresas.models import Personal
+
+                personal_ids = []      # Personal existente referenciado por ID (modo edición)
+                personal_datos = []    # Personal capturado en el paso 2
                 for pers_data in paso2.get('personal', []):
-                    # Construir nombre completo
-                    nombre_completo = f"{pers_data.get('nombre', '')} {pers_data.get('apellido', '')}".strip()
-
-                    # Buscar o crear personal con los campos requeridos
-                    personal_data = {
-                        'nombre': nombre_completo,
-                        'cedula': pers_data.get('cedula', '') or None,
-                        'pasaporte': pers_data.get('pasaporte', '') or None,
-                        'telefono': pers_data.get('telefono', '') or None,
-                        'cargo': pers_data.get('cargo', '') or None,
-                        'licencia_conducir': pers_data.get('licencia_conducir', '') or None,
-                    }
+                    if isinstance(pers_data, dict):
+                        personal_datos.append(pers_data)
+                    elif str(pers_data).isdigit():
+                        personal_ids.append(int(pers_data))
+
+                cedulas = {p.get('cedula') for p in personal_datos if p.get('cedula')}
+                pasaportes = {p.get('pasaporte') for p in personal_datos if p.get('pasaporte')}
+
+                # Una sola consulta para todo el personal ya registrado
+                por_id, por_cedula, por_pasaporte = {}, {}, {}
+                if personal_ids or cedulas or pasaportes:
+                    existentes = Personal.objects.filter(
+                        Q(pk__in=personal_ids) | Q(cedula__in=cedulas) | Q(pasaporte__in=pasaportes)
+                    ).order_by('pk')
+                    for personal in existentes:
+                        por_id[personal.pk] = personal
+                        if personal.cedula:
+                            por_cedula.setdefault(personal.cedula, personal)
+                        if personal.pasaporte:
+                            por_pasaporte.setdefault(personal.pasaporte, personal)
+
+                asignaciones = [(por_id[pk], '') for pk in personal_ids if pk in por_id]
+                pendientes = {}        # Personal nuevo, deduplicado por documento
+                for pers_data in personal_datos:
+                    cedula = pers_data.get('cedula') or None
+                    pasaporte = pers_data.get('pasaporte') or None
 
                     # Buscar por cédula o pasaporte
-                    personal = None
-                    if personal_data['cedula']:
-                        personal = Personal.objects.filter(cedula=personal_data['cedula']).first()
-                    elif personal_data['pasaporte']:
-                        personal = Personal.objects.filter(pasaporte=personal_data['pasaporte']).first()
-
-                    # Si no existe, crear nuevo personal
+                    personal = por_cedula.get(cedula) if cedula else por_pasaporte.get(pasaporte)
                     if not personal:
-                        personal = Personal.objects.create(**personal_data)
+                        clave = ('cedula', cedula) if cedula else ('pasaporte', pasaporte)
+                        personal = pendientes.get(clave)
+                        if not personal:
+                            personal = Personal(
+                                nombre=f"{pers_data.get('nombre', '')} {pers_data.get('apellido', '')}".strip(),
+                                cedula=cedula,
+                                pasaporte=pasaporte,
+                                telefono=pers_data.get('telefono') or '',
+                                cargo=pers_data.get('cargo') or '',
+                                licencia_conducir=pers_data.get('licencia_conducir') or '',
+                            )
+                            pendientes[clave] = personal
+                    asignaciones.append((personal, pers_data.get('rol_operacion', '')))
+
+                if pendientes:
+                    Personal.objects.bulk_create(pendientes.values())
 
-                    # Crear relación solicitud-personal
-                    solicitud.personal_asignado.create(
+                if modo_edicion:
+                    # El personal y los vehículos del wizard reemplazan a los anteriores
+                    solicitud.personal_asignado.all().delete()
+                    solicitud.vehiculos.all().delete()
+
+                asignados = {}
+                for personal, rol_operacion in asignaciones:
+                    asignados.setdefault(personal.pk, SolicitudPersonal(
+                        solicitud=solicitud,
                         personal=personal,
-                        rol_operacion=pers_data.get('rol_operacion', '')
-                    )
+                        rol_operacion=rol_operacion
+                    ))
+                SolicitudPersonal.objects.bulk_create(asignados.values())
 
                 # Crear vehículos
                 from .models import Vehiculo
+                vehiculos = {}
                 for veh_data in paso3.get('vehiculos', []):
-                    Vehiculo.objects.create(
+                    placa = veh_data.get('placa', '')
+                    vehiculos.setdefault(placa, Vehiculo(
                         solicitud=solicitud,
-                        placa=veh_data.get('placa', ''),
-                        tipo_vehiculo=veh_data.get('tipo_vehiculo', 'camion'),
-                        conductor_nombre=veh_data.get('conductor_nombre', ''),
-                        conductor_licencia=veh_data.get('conductor_licencia', '')
-                    )
-
-                # Enviar notificación por correo (solo si es nueva)
+                        placa=placa,
+                        tipo_vehiculo=veh_data.get('tipo_vehiculo') or 'camion',
+                        conductor_nombre=veh_data.get('conductor_nombre') or '',
+                        conductor_licencia=veh_data.get('conductor_licencia') or ''
+                    ))
+                Vehiculo.objects.bulk_create(vehiculos.values())
+
+                # Enviar notificación por correo (solo si es nueva), tras el commit
                 if not modo_edicion:
-                    enviar_notificacion_nueva_solicitud(solicitud)
+                    from notificaciones.services import despachar
+                    despachar(enviar_notificacion_nueva_solicitud, solicitud)
 
-                # Limpiar sesión del wizard
-                limpiar_sesion_wizard(request)
+                # Asignación automática de evaluador, tras el commit
+                if getattr(settings, 'ASIGNACION_AUTOMATICA', False):
+                    from notificaciones.services import despachar
+                    from evaluacion.asignacion import asignar_solicitud
+                    despachar(asignar_solicitud, solicitud.pk)
+
+                # Limpiar borrador del wizard (los archivos ya se movieron)
+                limpiar_borrador_wizard(request)
 
                 if modo_edicion:
                     messages.success(request, f"¡Solicitud {solicitud.codigo} actualizada y reenviada exitosamente!")
@@ -1095,6 +1159,16 @@ def solicitud_wizard_finalizar(request):
                 return redirect('solicitudes:detalle_solicitud', solicitud_id=solicitud.id)
 
         except Exception as e:
+            # Devolver los archivos a temp_wizard para no perderlos
+            for origen, destino in reversed(movidos):
+                try:
+                    os.replace(destino, origen)
+                except OSError:
+                    pass
+            if isinstance(e, ValidationError):
+                # p. ej. otra solicitud activa para el mismo buque (IMO)
+                messages.error(request, ' '.join(e.messages))
+                return redirect('solicitudes:wizard_paso1')
             messages.error(request, f"Error al procesar la solicitud: {str(e)}")
 
     return redirect('solicitudes:solicitud_wizard_inicio')
@@ -1109,6 +1183,26 @@ def wizard_cargar_lugares_puerto(request):
         return JsonResponse({'lugares': list(lugares)})
     return JsonResponse({'lugares': []})
 
+@login_required
+@role_required('solicitante')
+def wizard_verificar_imo(request):
+    """API para verificar mientras se escribe si el buque ya tiene una solicitud activa"""
+    numero_imo = request.GET.get('imo', '').strip()
+    if not re.fullmatch(r'\d{7}', numero_imo):
+        return JsonResponse({'valido': False, 'disponible': None})
+
+    # Al editar, la propia solicitud no cuenta
+    borrador = BorradorWizard.objects.filter(usuario=request.user).only('solicitud_id').first()
+    existente = Solicitud.activa_con_imo(numero_imo, excluir=borrador.solicitud_id if borrador else None)
+    if existente is None:
+        return JsonResponse({'valido': True, 'disponible': True})
+
+    respuesta = {'valido': True, 'disponible': False}
+    # El código y estado solo se muestran si la solicitud es de la misma empresa
+    if existente.empresa_id == request.user.empresa_id:
+        respuesta.update(codigo=existente.codigo, estado=existente.get_estado_display())
+    return JsonResponse(respuesta)
+
 @login_required
 @role_required('solicitante')
 def wizard_cargar_lugar_detalle(request, lugar_id):
@@ -1141,7 +1235,7 @@ def wizard_cargar_documentos_servicio(request, servicio_id):
 def solicitud_wizard_volver_paso(request, paso):
     """Volver a un paso específico del wizard"""
     if request.method == 'POST':
-        limpiar_sesion_wizard(request)
+        limpiar_borrador_wizard(request)
         return redirect(f'solicitudes:solicitud_wizard_paso{paso}')
     return redirect('solicitudes:solicitud_wizard_inicio')
 
@@ -1164,11 +1258,13 @@ def solicitud_wizard_editar(request, solicitud_id):
         return redirect('solicitudes:mis_solicitudes')
 
     # Limpiar sesión anterior del wizard
-    limpiar_sesion_wizard(request)
+    limpiar_borrador_wizard(request)
+
+    # Cargar datos de la solicitud en un borrador nuevo del wizard
+    borrador = BorradorWizard(usuario=request.user, solicitud=solicitud)
 
-    # Cargar datos de la solicitud en la sesión del wizard
     # Paso 1: Información básica
-    request.session['wizard_paso1'] = {
+    borrador.paso1 = {
         'numero_imo': solicitud.numero_imo or '',
         'naviera': solicitud.naviera or '',
         'puerto_destino': str(solicitud.puerto_destino.id) if solicitud.puerto_destino else '',
@@ -1184,13 +1280,13 @@ def solicitud_wizard_editar(request, solicitud_id):
 
     # Paso 2: Personal
     personal_ids = list(solicitud.personal_asignado.values_list('personal_id', flat=True))
-    request.session['wizard_paso2'] = {
+    borrador.paso2 = {
         'personal': [str(p) for p in personal_ids]
     }
 
     # Paso 3: Vehículos
     vehiculos = list(solicitud.vehiculos.values('placa', 'tipo_vehiculo', 'conductor_nombre', 'conductor_licencia'))
-    request.session['wizard_paso3'] = {
+    borrador.paso3 = {
         'vehiculos': vehiculos
     }
 
@@ -1198,21 +1294,18 @@ def solicitud_wizard_editar(request, solicitud_id):
     servicios_ids = list(solicitud.servicios_solicitados.values_list('id', flat=True))
     # Obtener documentos ya subidos
     documentos_subidos = []
-    for doc in solicitud.documentos_servicio.all():
+    for doc in solicitud.documentos_servicios.all():
         documentos_subidos.append({
             'documento_requerido_id': doc.documento_requerido_id,
             'nombre': doc.nombre_original,
             'archivo_id': doc.id
         })
 
-    request.session['wizard_paso4'] = {
+    borrador.paso4 = {
         'servicios_seleccionados': [str(s) for s in servicios_ids],
         'documentos_subidos': documentos_subidos
     }
-
-    # Guardar ID de solicitud que se está editando
-    request.session['wizard_solicitud_id'] = solicitud.id
-    request.session['wizard_modo_edicion'] = True
+    borrador.save()
 
     # Mensaje informativo
     if solicitud.estado == 'documentos_faltantes':
@@ -1324,6 +1417,10 @@ def imprimir_autorizacion(request, solicitud_id):
     # Actualizar el estado de la autorización por si está vencida
     autorizacion.actualizar_estado()
 
+    # El QR se genera en segundo plano; si aún no está listo, generarlo ahora
+    if not autorizacion.qr_code:
+        autorizacion.generar_qr()
+
     context = {
         'solicitud': solicitud,
         'autorizacion': autorizacion,
@@ -1331,3 +1428,33 @@ def imprimir_autorizacion(request, solicitud_id):
     }
 
     return render(request, 'solicitudes/imprimir_autorizacion.html', context)
+
+
+# Roles que pueden ver los documentos de cualquier solicitud
+ROLES_LECTURA_DOCUMENTOS = ('evaluador', 'supervisor', 'admin_tic', 'direccion')
+
+
+@login_required
+def vista_previa_documento(request, tipo, documento_id, tamaño):
+    """Miniatura ('m') o vista previa ('v') de un documento, con los permisos de su descarga"""
+    import os
+    from django.apps import apps
+    from django.http import Http404
+    from .entrega_archivos import servir_archivo
+    from .vistas_previas import MODELOS_VISTA_PREVIA, TAMAÑOS, nombre_vista_previa
+
+    if tipo not in MODELOS_VISTA_PREVIA or tamaño not in TAMAÑOS:
+        raise Http404
+    etiqueta, propietario = MODELOS_VISTA_PREVIA[tipo]
+    documentos = apps.get_model(etiqueta).objects.all()
+
+    # Solo el propietario y el personal de evaluación, como la descarga del documento
+    if request.user.role not in ROLES_LECTURA_DOCUMENTOS:
+        documentos = documentos.filter(**{propietario: request.user})
+    documento = get_object_or_404(documentos, pk=documento_id)
+
+    nombre = nombre_vista_previa(documento.archivo.name, tamaño) if documento.archivo else ''
+    ruta = os.path.join(settings.MEDIA_ROOT, nombre)
+    if not nombre or not os.path.exists(ruta):
+        raise Http404
+    return servir_archivo(request, ruta, f'vista_previa_{documento.pk}{os.path.splitext(nombre)[1]}')
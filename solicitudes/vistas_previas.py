@@ -0,0 +1,217 @@
+"""
+Vistas previas reducidas de los documentos subidos.
+
+Para cada documento de MODELOS_VISTA_PREVIA se generan dos imágenes WebP (JPEG si Pillow no tiene
+soporte WebP) junto al original:
+
+    documentos/previas/ab/cd/<clave>_m.webp   miniatura (tarjetas)
+    documentos/previas/ab/cd/<clave>_v.webp   vista previa (modal)
+
+La clave es el hash del contenido, por lo que documentos idénticos
+comparten sus vistas previas. Las imágenes se reducen con Pillow; de los
+PDF se renderiza la primera página con ``pdftoppm`` (paquete del sistema
+poppler-utils). Sin él los PDF no tienen vista previa y la página de
+evaluación muestra el original.
+
+Las vistas previas no se publican bajo MEDIA_URL: se entregan con la vista
+``solicitudes:vista_previa_documento``, que comprueba los permisos del
+documento igual que su descarga.
+
+La generación se despacha en segundo plano tras el commit.
+"""
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.urls import reverse
+
+from .almacenamiento import almacenamiento_documentos, sha256_de_ruta
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_PREVIAS = 'documentos/previas'
+
+TAMAÑOS = {
+    'm': (320, 320),
+    'v': (1400, 1400),
+}
+
+# Extensiones con las que pueden haberse guardado las vistas previas
+EXTENSIONES_PREVIAS = ('.webp', '.jpg')
+
+# Documentos con vista previa: tipo en la URL -> (modelo, campo del usuario
+# propietario). Solo estos modelos generan vistas previas: son los únicos
+# cuyas páginas las muestran.
+MODELOS_VISTA_PREVIA = {
+    'adjunto': ('solicitudes.documentoadjunto', 'solicitud__solicitante'),
+    'servicio': ('solicitudes.documentoserviciosolicitud', 'solicitud__solicitante'),
+    'personal': ('gestion_personal.documentopersonal', 'persona__empresa'),
+    'vehiculo': ('gestion_vehiculos.documentovehiculo', 'vehiculo__empresa_propietaria'),
+}
+
+
+def tiene_vista_previa(modelo):
+    """Indica si las páginas del modelo muestran vistas previas"""
+    return any(etiqueta == modelo._meta.label_lower for etiqueta, _ in MODELOS_VISTA_PREVIA.values())
+
+
+def _formato():
+    """('WEBP', '.webp') si Pillow soporta WebP, si no ('JPEG', '.jpg')"""
+    from PIL import features
+    if features.check('webp'):
+        return 'WEBP', '.webp'
+    return 'JPEG', '.jpg'
+
+
+def _clave(nombre):
+    """Hash del contenido, o hash de la ruta para archivos antiguos"""
+    return sha256_de_ruta(nombre) or hashlib.sha256(nombre.encode('utf-8')).hexdigest()
+
+
+def nombre_vista_previa(nombre, tamaño='v'):
+    """Ruta relativa (a MEDIA_ROOT) de la vista previa de un archivo"""
+    clave = _clave(nombre)
+    _, extension = _formato()
+    return f'{PREFIJO_PREVIAS}/{clave[:2]}/{clave[2:4]}/{clave}_{tamaño}{extension}'
+
+
+def existe_vista_previa(nombre, tamaño='v'):
+    """Indica si ya se generó la vista previa de un archivo"""
+    return os.path.exists(os.path.join(settings.MEDIA_ROOT, nombre_vista_previa(nombre, tamaño)))
+
+
+def eliminar_vistas_previas(nombre):
+    """Borra las vistas previas de un archivo (al liberar su contenido)"""
+    clave = _clave(nombre)
+    directorio = os.path.join(settings.MEDIA_ROOT, PREFIJO_PREVIAS, clave[:2], clave[2:4])
+    for tamaño in TAMAÑOS:
+        for extension in EXTENSIONES_PREVIAS:
+            try:
+                os.remove(os.path.join(directorio, f'{clave}_{tamaño}{extension}'))
+            except FileNotFoundError:
+                pass
+
+
+def url_vista_previa(archivo, tamaño='v'):
+    """
+    URL protegida de la vista previa de un FieldFile, o '' si aún no existe
+    o su modelo no tiene vista de vista previa.
+    """
+    if not archivo or not existe_vista_previa(archivo.name, tamaño):
+        return ''
+    etiqueta = archivo.instance._meta.label_lower
+    tipo = next((t for t, (modelo, _) in MODELOS_VISTA_PREVIA.items() if modelo == etiqueta), None)
+    if tipo is None:
+        return ''
+    return reverse('solicitudes:vista_previa_documento', args=[tipo, archivo.instance.pk, tamaño])
+
+
+def _renderizar_pdf(ruta, ancho):
+    """Primera página de un PDF como imagen de Pillow, o None"""
+    from PIL import Image
+
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm is None:
+        return None
+    resultado = subprocess.run(
+        [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(ancho), '-png', ruta, '-'],
+        capture_output=True,
+        timeout=60,
+    )
+    if resultado.returncode != 0 or not resultado.stdout:
+        return None
+    return Image.open(io.BytesIO(resultado.stdout))
+
+
+def _abrir_imagen(ruta):
+    """
+    Abre el archivo como imagen (o primera página si es PDF), o None. El
+    tipo se reconoce por el contenido: las rutas deduplicadas no tienen
+    extensión.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    with open(ruta, 'rb') as archivo:
+        es_pdf = archivo.read(5) == b'%PDF-'
+    if es_pdf:
+        imagen = _renderizar_pdf(ruta, max(ancho for ancho, _ in TAMAÑOS.values()))
+    else:
+        try:
+            imagen = Image.open(ruta)
+        except UnidentifiedImageError:
+            return None  # Ni imagen ni PDF (p. ej. un .docx)
+        imagen.draft('RGB', max(TAMAÑOS.values()))  # decodificación reducida de JPEG
+        imagen = ImageOps.exif_transpose(imagen)
+    if imagen is None:
+        return None
+    if imagen.mode not in ('RGB', 'L'):
+        fondo = Image.new('RGB', imagen.size, 'white')
+        imagen = imagen.convert('RGBA')
+        fondo.paste(imagen, mask=imagen.split()[-1])
+        imagen = fondo
+    return imagen
+
+
+def generar_vista_previa(nombre, forzar=False):
+    """
+    Genera la miniatura y la vista previa de un archivo del almacenamiento
+    de documentos.
+
+    Returns:
+        bool: True si existen las vistas previas al terminar
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+
+    destinos = {t: os.path.join(settings.MEDIA_ROOT, nombre_vista_previa(nombre, t)) for t in TAMAÑOS}
+    if not forzar and all(os.path.exists(d) for d in destinos.values()):
+        return True
+
+    ruta = almacenamiento_documentos.path(nombre)
+    if not os.path.exists(ruta):
+        return False
+
+    try:
+        imagen = _abrir_imagen(ruta)
+    except (OSError, ValueError, Image.DecompressionBombError, subprocess.SubprocessError):
+        logger.warning('No se pudo abrir %s para generar su vista previa', nombre, exc_info=True)
+        return False
+    if imagen is None:
+        return False
+
+    formato, _ = _formato()
+    for tamaño, (ancho, alto) in TAMAÑOS.items():
+        copia = imagen.copy()
+        copia.thumbnail((ancho, alto), Image.LANCZOS)
+        destino = destinos[tamaño]
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = destino + '.parcial'
+        copia.save(temporal, formato, quality=70 if tamaño == 'v' else 60, optimize=True)
+        os.replace(temporal, destino)
+    return True
+
+
+def programar_vista_previa(nombre):
+    """Genera la vista previa en segundo plano después del commit"""
+    if not nombre:
+        return
+    from notificaciones.services import despachar
+    despachar(generar_vista_previa, str(nombre))
+
+
+def programar_vistas_previas_al_guardar(sender, instance, **kwargs):
+    """post_save: programa las vistas previas de los FileField deduplicados"""
+    from .almacenamiento import campos_deduplicados
+
+    if kwargs.get('raw'):
+        return
+    for field in campos_deduplicados(sender):
+        archivo = getattr(instance, field.attname)
+        if archivo and not existe_vista_previa(archivo.name, 'm'):
+            programar_vista_previa(archivo.name)
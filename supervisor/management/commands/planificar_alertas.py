@@ -0,0 +1,114 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from supervisor.models import AlertaSistema
+from supervisor.planificador import PlanificadorVencimientos, evaluadores_sobrecargados
+
+
+def _minutos(valor):
+    try:
+        return [int(m) for m in valor.split(',') if m.strip()]
+    except ValueError:
+        raise CommandError('Los avisos deben ser minutos separados por coma')
+
+
+class Command(BaseCommand):
+    help = (
+        'Proceso continuo que alerta a los supervisores antes del vencimiento de '
+        'solicitudes VIP/críticas y de escalamientos, y cuando hay evaluadores '
+        'sobrecargados. Duerme hasta el próximo aviso; recarga la cola cada '
+        '--recarga segundos para incluir plazos nuevos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--avisos-solicitud',
+            help='Minutos de anticipación para solicitudes, separados por coma '
+                 '(por defecto ALERTAS_AVISOS_SOLICITUD)'
+        )
+        parser.add_argument(
+            '--avisos-escalamiento',
+            help='Minutos de anticipación para escalamientos, separados por coma '
+                 '(por defecto ALERTAS_AVISOS_ESCALAMIENTO)'
+        )
+        parser.add_argument(
+            '--recarga',
+            type=int,
+            default=300,
+            help='Segundos entre recargas de la cola y revisiones de sobrecarga (por defecto 300)'
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Disparar lo pendiente y terminar (para ejecutar desde cron)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar las alertas que se crearían sin guardarlas (implica --una-vez)'
+        )
+
+    def handle(self, *args, **options):
+        avisos_solicitud = _minutos(options['avisos_solicitud']) if options['avisos_solicitud'] else None
+        avisos_escalamiento = _minutos(options['avisos_escalamiento']) if options['avisos_escalamiento'] else None
+        recarga = max(options['recarga'], 10)
+        dry_run = options['dry_run']
+        una_vez = options['una_vez'] or dry_run
+
+        planificador = PlanificadorVencimientos(avisos_solicitud, avisos_escalamiento, recarga)
+
+        if dry_run:
+            programados = planificador.recargar()
+            for momento, tipo, pk, plazo, aviso in sorted(planificador.cola):
+                self.stdout.write(
+                    f'  {timezone.localtime(momento):%d/%m %H:%M} {tipo} #{pk} '
+                    f'(vence {timezone.localtime(plazo):%H:%M}, aviso {aviso} min)'
+                )
+            alertas = planificador.alertas_pendientes()
+            for alerta in alertas:
+                self.stdout.write(f"  -> [{alerta['nivel']}] {alerta['titulo']}")
+            sobrecargados = evaluadores_sobrecargados()
+            self.stdout.write(self.style.WARNING(
+                f'[INFO] (dry-run) {programados} avisos programados, {len(alertas)} para disparar ahora; '
+                f'{len(sobrecargados)} evaluadores sobrecargados'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] Planificador iniciado (avisos solicitud {planificador.avisos['solicitud']} min, "
+            f"escalamiento {planificador.avisos['escalamiento']} min, recarga {recarga}s)"
+        ))
+
+        proxima_recarga = 0
+        try:
+            while True:
+                if time.monotonic() >= proxima_recarga:
+                    if proxima_recarga:
+                        # Proceso de larga duración: no reutilizar conexiones caducadas
+                        close_old_connections()
+                    programados = planificador.recargar()
+                    sobrecargados = evaluadores_sobrecargados()
+                    if sobrecargados:
+                        AlertaSistema.crear_alerta_evaluadores_sobrecarga(len(sobrecargados), sobrecargados)
+                    proxima_recarga = time.monotonic() + recarga
+                    self.stdout.write(
+                        f'[INFO] {programados} avisos en cola; {len(sobrecargados)} evaluadores sobrecargados'
+                    )
+
+                creadas = planificador.disparar()
+                if creadas:
+                    self.stdout.write(self.style.SUCCESS(f'[OK] {creadas} alertas creadas'))
+
+                if una_vez:
+                    break
+
+                espera = proxima_recarga - time.monotonic()
+                proximo = planificador.segundos_hasta_proximo()
+                if proximo is not None:
+                    espera = min(espera, proximo)
+                time.sleep(max(espera, 1))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('[INFO] Planificador detenido'))
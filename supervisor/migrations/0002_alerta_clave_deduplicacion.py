@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supervisor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertasistema',
+            name='clave',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Clave de Deduplicación'),
+        ),
+        migrations.AlterField(
+            model_name='alertasistema',
+            name='tipo_alerta',
+            field=models.CharField(choices=[('solicitud_vip_venciendo', 'Solicitud VIP por Vencer'), ('solicitud_critica_venciendo', 'Solicitud Crítica por Vencer'), ('escalamiento_venciendo', 'Escalamiento por Vencer'), ('evaluadores_sobrecargados', 'Evaluadores Sobrecargados'), ('discrepancias_acumuladas', 'Discrepancias Acumuladas'), ('sistema_actualizado', 'Sistema Actualizado'), ('error_sistema', 'Error del Sistema'), ('rendimiento_bajo', 'Rendimiento Bajo'), ('otros', 'Otros')], max_length=30, verbose_name='Tipo de Alerta'),
+        ),
+        migrations.AddConstraint(
+            model_name='alertasistema',
+            constraint=models.UniqueConstraint(condition=models.Q(('clave', ''), _negated=True), fields=('clave', 'dirigida_a'), name='alerta_clave_unica_por_usuario'),
+        ),
+    ]
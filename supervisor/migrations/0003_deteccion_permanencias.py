@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supervisor', '0002_alerta_clave_deduplicacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alertasistema',
+            name='tipo_alerta',
+            field=models.CharField(choices=[('solicitud_vip_venciendo', 'Solicitud VIP por Vencer'), ('solicitud_critica_venciendo', 'Solicitud Crítica por Vencer'), ('escalamiento_venciendo', 'Escalamiento por Vencer'), ('evaluadores_sobrecargados', 'Evaluadores Sobrecargados'), ('discrepancias_acumuladas', 'Discrepancias Acumuladas'), ('permanencia_excedida', 'Permanencia Excedida'), ('sistema_actualizado', 'Sistema Actualizado'), ('error_sistema', 'Error del Sistema'), ('rendimiento_bajo', 'Rendimiento Bajo'), ('otros', 'Otros')], max_length=30, verbose_name='Tipo de Alerta'),
+        ),
+    ]
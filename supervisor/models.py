@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
+import hashlib
 
 class Escalamiento(models.Model):
     """Modelo para casos escalados al supervisor"""
@@ -212,8 +213,11 @@ class AlertaSistema(models.Model):
     """Modelo para alertas del sistema dirigidas al supervisor"""
     TIPO_ALERTA_CHOICES = [
         ('solicitud_vip_venciendo', 'Solicitud VIP por Vencer'),
+        ('solicitud_critica_venciendo', 'Solicitud Crítica por Vencer'),
+        ('escalamiento_venciendo', 'Escalamiento por Vencer'),
         ('evaluadores_sobrecargados', 'Evaluadores Sobrecargados'),
         ('discrepancias_acumuladas', 'Discrepancias Acumuladas'),
+        ('permanencia_excedida', 'Permanencia Excedida'),
         ('sistema_actualizado', 'Sistema Actualizado'),
         ('error_sistema', 'Error del Sistema'),
         ('rendimiento_bajo', 'Rendimiento Bajo'),
@@ -260,6 +264,9 @@ class AlertaSistema(models.Model):
         verbose_name='Datos Adicionales'
     )
     
+    # Evita repetir la misma alerta al mismo usuario (vacía = sin deduplicar)
+    clave = models.CharField(max_length=100, blank=True, default='', verbose_name='Clave de Deduplicación')
+    
     # Metadatos
     creada_el = models.DateTimeField(auto_now_add=True, verbose_name='Creada el')
     leida_el = models.DateTimeField(null=True, blank=True, verbose_name='Leída el')
@@ -272,6 +279,13 @@ class AlertaSistema(models.Model):
             models.Index(fields=['dirigida_a', 'activa', '-creada_el']),
             models.Index(fields=['nivel', 'activa']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clave', 'dirigida_a'],
+                condition=~models.Q(clave=''),
+                name='alerta_clave_unica_por_usuario',
+            ),
+        ]
     
     def marcar_como_leida(self, usuario=None):
         """Marca la alerta como leída"""
@@ -280,42 +294,114 @@ class AlertaSistema(models.Model):
         self.save()
     
     @classmethod
-    def crear_alerta_vip_venciendo(cls, solicitud):
-        """Crea una alerta para solicitudes VIP que están por vencer"""
+    def crear_para_supervisores(cls, alertas):
+        """
+        Crea cada alerta para todos los supervisores activos con una sola
+        inserción. Las alertas con ``clave`` ya enviadas a un supervisor se
+        omiten.
+
+        Args:
+            alertas: Lista de diccionarios con los campos de AlertaSistema
+
+        Returns:
+            int: Número de alertas nuevas
+        """
         from django.contrib.auth import get_user_model
         User = get_user_model()
-        supervisores = User.objects.filter(role='supervisor', activo=True)
-        for supervisor in supervisores:
-            cls.objects.create(
-                titulo="Solicitud VIP vence en 15 min",
-                mensaje=f"La solicitud {solicitud.codigo} de {solicitud.empresa.nombre} vence en 15 minutos.",
-                tipo_alerta='solicitud_vip_venciendo',
-                nivel='critico',
-                dirigida_a=supervisor,
-                datos_adicionales={
-                    'solicitud_id': solicitud.id,
-                    'codigo': solicitud.codigo,
-                    'empresa': solicitud.empresa.nombre
-                }
-            )
-    
+        supervisores = list(User.objects.filter(role='supervisor', activo=True).values_list('id', flat=True))
+        if not supervisores or not alertas:
+            return 0
+
+        claves = {a['clave'] for a in alertas if a.get('clave')}
+        existentes = set(cls.objects.filter(
+            clave__in=claves, dirigida_a_id__in=supervisores
+        ).values_list('clave', 'dirigida_a_id')) if claves else set()
+
+        nuevas = [
+            cls(dirigida_a_id=supervisor_id, **alerta)
+            for alerta in alertas
+            for supervisor_id in supervisores
+            if (alerta.get('clave'), supervisor_id) not in existentes
+        ]
+        # ignore_conflicts cubre a otro proceso que inserte la misma clave a la vez
+        cls.objects.bulk_create(nuevas, ignore_conflicts=True)
+
+        # bulk_create no emite señales: avisar a los dashboards abiertos
+        from notificaciones.en_vivo import publicar_alertas
+        publicar_alertas([
+            alerta for alerta in alertas
+            if any((alerta.get('clave'), supervisor_id) not in existentes for supervisor_id in supervisores)
+        ])
+        return len(nuevas)
+
     @classmethod
-    def crear_alerta_evaluadores_sobrecarga(cls, count_sobrecargados):
-        """Crea una alerta por evaluadores sobrecargados"""
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        supervisores = User.objects.filter(role='supervisor', activo=True)
-        for supervisor in supervisores:
-            cls.objects.create(
-                titulo=f"{count_sobrecargados} evaluadores sobrecargados",
-                mensaje=f"Hay {count_sobrecargados} evaluadores con carga de trabajo excesiva.",
-                tipo_alerta='evaluadores_sobrecargados',
-                nivel='advertencia',
-                dirigida_a=supervisor,
-                datos_adicionales={
-                    'count': count_sobrecargados
-                }
-            )
+    def datos_alerta_vip_venciendo(cls, solicitud, minutos=15, aviso=None):
+        """
+        Campos de la alerta para una solicitud VIP o crítica por vencer.
+        ``aviso`` es la anticipación configurada (por defecto ``minutos``);
+        identifica la alerta junto con la solicitud y su vencimiento.
+        """
+        es_vip = solicitud.prioridad == 'vip'
+        return {
+            'titulo': f"Solicitud {'VIP' if es_vip else 'crítica'} vence en {minutos} min",
+            'mensaje': f"La solicitud {solicitud.codigo} de {solicitud.empresa.nombre} vence en {minutos} minutos.",
+            'tipo_alerta': 'solicitud_vip_venciendo' if es_vip else 'solicitud_critica_venciendo',
+            'nivel': 'critico',
+            'clave': f"solicitud:{solicitud.id}:{solicitud.vence_el:%Y%m%d%H%M}:{aviso or minutos}",
+            'datos_adicionales': {
+                'solicitud_id': solicitud.id,
+                'codigo': solicitud.codigo,
+                'empresa': solicitud.empresa.nombre,
+                'vence_el': solicitud.vence_el.isoformat(),
+            },
+        }
+
+    @classmethod
+    def crear_alerta_vip_venciendo(cls, solicitud, minutos=15):
+        """Crea una alerta para solicitudes VIP que están por vencer"""
+        return cls.crear_para_supervisores([cls.datos_alerta_vip_venciendo(solicitud, minutos)])
+
+    @classmethod
+    def datos_alerta_escalamiento_venciendo(cls, escalamiento, minutos=15, aviso=None):
+        """Campos de la alerta para un escalamiento cuyo tiempo límite se acerca"""
+        return {
+            'titulo': f"Escalamiento {escalamiento.codigo} vence en {minutos} min",
+            'mensaje': (
+                f"El escalamiento {escalamiento.codigo} de la solicitud {escalamiento.solicitud.codigo} "
+                f"vence en {minutos} minutos."
+            ),
+            'tipo_alerta': 'escalamiento_venciendo',
+            'nivel': 'critico' if escalamiento.prioridad in ('critica', 'alta') else 'advertencia',
+            'clave': f"escalamiento:{escalamiento.id}:{escalamiento.tiempo_limite:%Y%m%d%H%M}:{aviso or minutos}",
+            'datos_adicionales': {
+                'escalamiento_id': escalamiento.id,
+                'codigo': escalamiento.codigo,
+                'solicitud_id': escalamiento.solicitud_id,
+                'tiempo_limite': escalamiento.tiempo_limite.isoformat(),
+            },
+        }
+
+    @classmethod
+    def crear_alerta_evaluadores_sobrecarga(cls, count_sobrecargados, evaluadores=None):
+        """
+        Crea una alerta por evaluadores sobrecargados. Con la lista de
+        evaluadores se avisa una sola vez por día y grupo de evaluadores.
+        """
+        alerta = {
+            'titulo': f"{count_sobrecargados} evaluadores sobrecargados",
+            'mensaje': f"Hay {count_sobrecargados} evaluadores con carga de trabajo excesiva.",
+            'tipo_alerta': 'evaluadores_sobrecargados',
+            'nivel': 'advertencia',
+            'datos_adicionales': {
+                'count': count_sobrecargados
+            },
+        }
+        if evaluadores:
+            ids = ','.join(str(e) for e in sorted(evaluadores))
+            grupo = hashlib.sha1(ids.encode()).hexdigest()[:16]
+            alerta['clave'] = f"sobrecarga:{timezone.localdate():%Y%m%d}:{grupo}"
+            alerta['datos_adicionales']['evaluadores'] = sorted(evaluadores)
+        return cls.crear_para_supervisores([alerta])
 
     def __str__(self):
         return f"{self.titulo} - {self.get_nivel_display()}"
@@ -0,0 +1,188 @@
+"""
+Planificador de alertas por vencimiento.
+
+Mantiene una cola ordenada por tiempo (heap) con los próximos momentos de
+aviso: para cada solicitud VIP o crítica abierta y cada escalamiento sin
+resolver se programa un aviso por cada anticipación configurada antes de
+``vence_el`` / ``tiempo_limite``. El proceso duerme hasta el siguiente
+aviso o la siguiente recarga, por lo que en reposo no consulta la base de
+datos más que al recargar.
+
+Al disparar se revalida que el plazo siga vigente y las alertas se crean
+para todos los supervisores con un solo bulk_create; la clave de cada
+alerta evita duplicados entre ejecuciones y procesos.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from evaluacion.asignacion import ESTADOS_ABIERTOS, excede_capacidad
+from solicitudes.models import Solicitud
+
+from .models import AlertaSistema, Escalamiento
+
+PRIORIDADES_ALERTADAS = ('vip', 'critica')
+ESTADOS_SOLICITUD_ABIERTOS = ('recibido', 'sin_asignar', 'pendiente', 'en_revision', 'escalada')
+ESTADOS_ESCALAMIENTO_ABIERTOS = ('pendiente', 'en_revision')
+
+
+class PlanificadorVencimientos:
+    """Cola de avisos de vencimiento de solicitudes y escalamientos"""
+
+    def __init__(self, avisos_solicitud=None, avisos_escalamiento=None, intervalo_recarga=300):
+        """
+        Args:
+            avisos_solicitud: Minutos de anticipación para solicitudes
+            avisos_escalamiento: Minutos de anticipación para escalamientos
+            intervalo_recarga: Segundos entre recargas de la cola
+        """
+        self.avisos = {
+            'solicitud': sorted(set(avisos_solicitud or settings.ALERTAS_AVISOS_SOLICITUD), reverse=True),
+            'escalamiento': sorted(set(avisos_escalamiento or settings.ALERTAS_AVISOS_ESCALAMIENTO), reverse=True),
+        }
+        self.intervalo_recarga = intervalo_recarga
+        self.cola = []
+
+    # ------------------------------------------------------------------
+    # Cola
+    # ------------------------------------------------------------------
+
+    def _programar(self, tipo, pk, plazo, ahora):
+        """
+        Agrega los avisos de un plazo. Los avisos cuyo momento ya pasó se
+        reducen al más cercano al plazo, que se dispara de inmediato.
+        """
+        atrasado = None
+        for aviso in self.avisos[tipo]:
+            momento = plazo - timedelta(minutes=aviso)
+            if momento > ahora:
+                heapq.heappush(self.cola, (momento, tipo, pk, plazo, aviso))
+            else:
+                atrasado = aviso
+        if atrasado is not None:
+            heapq.heappush(self.cola, (ahora, tipo, pk, plazo, atrasado))
+
+    def recargar(self, ahora=None):
+        """
+        Reconstruye la cola con los plazos que caen dentro del horizonte
+        (mayor anticipación + intervalo de recarga).
+
+        Returns:
+            int: Avisos programados
+        """
+        ahora = ahora or timezone.now()
+        self.cola = []
+
+        horizonte = ahora + timedelta(
+            minutes=max(self.avisos['solicitud'] + self.avisos['escalamiento']),
+            seconds=self.intervalo_recarga,
+        )
+
+        solicitudes = Solicitud.objects.filter(
+            prioridad__in=PRIORIDADES_ALERTADAS,
+            estado__in=ESTADOS_SOLICITUD_ABIERTOS,
+            vence_el__gt=ahora,
+            vence_el__lte=horizonte,
+        ).values_list('pk', 'vence_el')
+        for pk, vence_el in solicitudes:
+            self._programar('solicitud', pk, vence_el, ahora)
+
+        escalamientos = Escalamiento.objects.filter(
+            estado__in=ESTADOS_ESCALAMIENTO_ABIERTOS,
+            tiempo_limite__gt=ahora,
+            tiempo_limite__lte=horizonte,
+        ).values_list('pk', 'tiempo_limite')
+        for pk, tiempo_limite in escalamientos:
+            self._programar('escalamiento', pk, tiempo_limite, ahora)
+
+        return len(self.cola)
+
+    def segundos_hasta_proximo(self, ahora=None):
+        """Segundos hasta el próximo aviso, o None si la cola está vacía"""
+        if not self.cola:
+            return None
+        ahora = ahora or timezone.now()
+        return max(0.0, (self.cola[0][0] - ahora).total_seconds())
+
+    def _vencidos(self, ahora):
+        """Saca de la cola los avisos cuyo momento llegó"""
+        listos = []
+        while self.cola and self.cola[0][0] <= ahora:
+            listos.append(heapq.heappop(self.cola))
+        return listos
+
+    # ------------------------------------------------------------------
+    # Disparo
+    # ------------------------------------------------------------------
+
+    def alertas_pendientes(self, ahora=None):
+        """
+        Campos de las alertas cuyo momento llegó, revalidando que el plazo
+        siga vigente (la solicitud pudo resolverse o reprogramarse).
+        """
+        ahora = ahora or timezone.now()
+        listos = self._vencidos(ahora)
+        if not listos:
+            return []
+
+        ids = {'solicitud': set(), 'escalamiento': set()}
+        for _, tipo, pk, _, _ in listos:
+            ids[tipo].add(pk)
+
+        solicitudes = Solicitud.objects.filter(
+            estado__in=ESTADOS_SOLICITUD_ABIERTOS
+        ).select_related('empresa').in_bulk(ids['solicitud']) if ids['solicitud'] else {}
+        escalamientos = Escalamiento.objects.filter(
+            estado__in=ESTADOS_ESCALAMIENTO_ABIERTOS
+        ).select_related('solicitud').in_bulk(ids['escalamiento']) if ids['escalamiento'] else {}
+
+        alertas = []
+        for _, tipo, pk, plazo, aviso in listos:
+            minutos = max(1, round((plazo - ahora).total_seconds() / 60))
+            if tipo == 'solicitud':
+                solicitud = solicitudes.get(pk)
+                if solicitud is None or solicitud.vence_el != plazo:
+                    continue
+                alertas.append(AlertaSistema.datos_alerta_vip_venciendo(solicitud, minutos, aviso))
+            else:
+                escalamiento = escalamientos.get(pk)
+                if escalamiento is None or escalamiento.tiempo_limite != plazo:
+                    continue
+                alertas.append(AlertaSistema.datos_alerta_escalamiento_venciendo(escalamiento, minutos, aviso))
+        return alertas
+
+    def disparar(self, ahora=None):
+        """
+        Crea las alertas cuyo momento llegó.
+
+        Returns:
+            int: Alertas creadas (una por supervisor)
+        """
+        alertas = self.alertas_pendientes(ahora)
+        return AlertaSistema.crear_para_supervisores(alertas) if alertas else 0
+
+
+def evaluadores_sobrecargados():
+    """
+    Evaluadores activos con más solicitudes abiertas que su capacidad
+    (PerfilEvaluador.capacidad_maxima), con los mismos estados y la misma
+    regla que el motor de asignación: sin capacidad definida no hay límite.
+    Una sola consulta.
+
+    Returns:
+        list: IDs de los evaluadores sobrecargados
+    """
+    from accounts.models import User
+
+    cargas = User.objects.filter(role='evaluador', activo=True, is_active=True).annotate(
+        abiertas=Count('solicitudes_asignadas', filter=Q(solicitudes_asignadas__estado__in=ESTADOS_ABIERTOS)),
+        capacidad=Coalesce('perfil_evaluador__capacidad_maxima', 0),
+    ).values_list('id', 'abiertas', 'capacidad')
+    return [
+        evaluador_id for evaluador_id, abiertas, capacidad in cargas
+        if excede_capacidad(abiertas, capacidad)
+    ]
@@ -1,3 +1,84 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from naviport.pruebas import crear_solicitud, crear_usuario
+from solicitudes.models import Solicitud
+
+from .models import AlertaSistema
+from .planificador import PlanificadorVencimientos, evaluadores_sobrecargados
+
+
+class PlanificadorVencimientosTests(TestCase):
+    """Cola de avisos: orden, avisos atrasados y deduplicación entre ejecuciones"""
+
+    def setUp(self):
+        self.ahora = timezone.now().replace(second=0, microsecond=0)
+        self.planificador = PlanificadorVencimientos(avisos_solicitud=(60, 15), avisos_escalamiento=(30,))
+
+    def _solicitud(self, prioridad, minutos):
+        solicitud = crear_solicitud(estado='pendiente', prioridad=prioridad)
+        Solicitud.objects.filter(pk=solicitud.pk).update(vence_el=self.ahora + timedelta(minutes=minutos))
+        return solicitud
+
+    def test_cola_en_orden_de_momento(self):
+        vip = self._solicitud('vip', 62)
+        critica = self._solicitud('critica', 40)
+        self._solicitud('normal', 30)
+        self._solicitud('vip', 90)   # fuera del horizonte hasta la próxima recarga
+
+        self.assertEqual(self.planificador.recargar(self.ahora), 4)
+        orden = [(tipo, pk, aviso) for _, tipo, pk, _, aviso in self.planificador._vencidos(self.ahora + timedelta(hours=2))]
+        self.assertEqual(orden, [
+            ('solicitud', critica.pk, 60),   # atrasado: se dispara ya
+            ('solicitud', vip.pk, 60),
+            ('solicitud', critica.pk, 15),
+            ('solicitud', vip.pk, 15),
+        ])
+
+    def test_avisos_atrasados_se_reducen_al_mas_cercano(self):
+        plazo = self.ahora + timedelta(minutes=10)
+        self.planificador._programar('solicitud', 1, plazo, self.ahora)
+        self.assertEqual(self.planificador.cola, [(self.ahora, 'solicitud', 1, plazo, 15)])
+        self.assertEqual(self.planificador.segundos_hasta_proximo(self.ahora), 0)
+
+    def test_clave_evita_duplicados_entre_ejecuciones(self):
+        crear_usuario('supervisor')
+        self._solicitud('vip', 10)
+
+        self.planificador.recargar(self.ahora)
+        self.assertEqual(self.planificador.disparar(self.ahora), 1)
+
+        otro = PlanificadorVencimientos(avisos_solicitud=(60, 15), avisos_escalamiento=(30,))
+        otro.recargar(self.ahora)
+        self.assertEqual(otro.disparar(self.ahora), 0)
+        self.assertEqual(AlertaSistema.objects.count(), 1)
+
+    def test_plazo_reprogramado_no_dispara(self):
+        crear_usuario('supervisor')
+        solicitud = self._solicitud('vip', 10)
+        self.planificador.recargar(self.ahora)
+        Solicitud.objects.filter(pk=solicitud.pk).update(vence_el=self.ahora + timedelta(days=1))
+        self.assertEqual(self.planificador.disparar(self.ahora), 0)
+
+
+class EvaluadoresSobrecargadosTests(TestCase):
+    """Misma capacidad y estados que el motor de asignación"""
+
+    def _evaluador(self, capacidad, abiertas):
+        from evaluacion.models import PerfilEvaluador
+
+        evaluador = crear_usuario('evaluador')
+        PerfilEvaluador.objects.create(usuario=evaluador, capacidad_maxima=capacidad)
+        for estado in ('en_revision', 'documentos_faltantes', 'pendiente')[:abiertas]:
+            crear_solicitud(estado=estado, evaluador_asignado=evaluador)
+        # Las cerradas no cuentan
+        crear_solicitud(estado='aprobada', evaluador_asignado=evaluador)
+        return evaluador
 
-# Create your tests here.
+    def test_solo_los_que_superan_su_capacidad(self):
+        excedido = self._evaluador(capacidad=1, abiertas=2)
+        self._evaluador(capacidad=2, abiertas=2)   # lleno, pero no excedido
+        self._evaluador(capacidad=0, abiertas=3)   # sin límite
+        self.assertEqual(evaluadores_sobrecargados(), [excedido.pk])
@@ -7,6 +7,7 @@ from .views_excepcionales import (
     historial_excepcionales,
     dashboard_excepcionales
 )
+from .views_archivo import lista_archivo, detalle_archivo, restaurar_archivo
 
 app_name = 'supervisor'
 
@@ -23,4 +24,9 @@ urlpatterns = [
     path('excepcionales/<int:empresa_id>/aprobar/', aprobar_excepcional, name='aprobar_excepcional'),
     path('excepcionales/<int:empresa_id>/revocar/', revocar_excepcional, name='revocar_excepcional'),
     path('excepcionales/<int:empresa_id>/historial/', historial_excepcionales, name='historial_excepcionales'),
+
+    # Archivo histórico de solicitudes
+    path('archivo/', lista_archivo, name='lista_archivo'),
+    path('archivo/<str:codigo>/', detalle_archivo, name='detalle_archivo'),
+    path('archivo/<str:codigo>/restaurar/', restaurar_archivo, name='restaurar_archivo'),
 ] 
\ No newline at end of file
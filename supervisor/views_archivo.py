@@ -0,0 +1,84 @@
+"""
+Consulta del archivo histórico de solicitudes (solo lectura) y restauración
+"""
+
+from collections import defaultdict
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.views.decorators.http import require_POST
+from accounts.decorators import role_required
+from solicitudes.archivo import buscar, restaurar
+from solicitudes.models import SolicitudArchivada
+
+
+@login_required
+@role_required('supervisor', 'admin_tic', 'direccion')
+def lista_archivo(request):
+    """Solicitudes archivadas, filtradas por texto y partición mensual"""
+    busqueda = request.GET.get('q', '').strip()
+    particion = request.GET.get('particion', '')
+
+    archivadas = buscar(busqueda, particion)
+    paginator = Paginator(archivadas, 25)
+    archivadas_page = paginator.get_page(request.GET.get('page'))
+
+    context = {
+        'archivadas': archivadas_page,
+        'busqueda': busqueda,
+        'particion': particion,
+        'particiones': SolicitudArchivada.objects.order_by('-particion').values_list(
+            'particion', flat=True
+        ).distinct(),
+    }
+    return render(request, 'supervisor/archivo/lista.html', context)
+
+
+@login_required
+@role_required('supervisor', 'admin_tic', 'direccion')
+def detalle_archivo(request, codigo):
+    """Contenido de una solicitud archivada agrupado por tipo de registro"""
+    archivada = get_object_or_404(SolicitudArchivada, codigo=codigo)
+
+    registros = defaultdict(list)
+    for registro in archivada.datos():
+        registros[registro['model']].append(registro)
+
+    solicitud = registros.pop('solicitudes.solicitud', [{}])[0].get('fields', {})
+    eventos = sorted(
+        (r['fields'] for r in registros.pop('solicitudes.eventosolicitud', [])),
+        key=lambda f: f['creado_el']
+    )
+    accesos = sorted(
+        (r['fields'] for r in registros.pop('control_acceso.registroacceso', [])),
+        key=lambda f: f['timestamp']
+    )
+
+    context = {
+        'archivada': archivada,
+        'solicitud': solicitud,
+        'vehiculos': [r['fields'] for r in registros.pop('solicitudes.vehiculo', [])],
+        'eventos': eventos,
+        'accesos': accesos,
+        'otros': sorted((modelo, len(lista)) for modelo, lista in registros.items()),
+        'puede_restaurar': request.user.role in ('supervisor', 'admin_tic'),
+    }
+    return render(request, 'supervisor/archivo/detalle.html', context)
+
+
+@login_required
+@role_required('supervisor', 'admin_tic')
+@require_POST
+def restaurar_archivo(request, codigo):
+    """Devuelve una solicitud archivada a las tablas activas"""
+    archivada = get_object_or_404(SolicitudArchivada, codigo=codigo)
+    try:
+        solicitud = restaurar(archivada)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('supervisor:detalle_archivo', codigo=codigo)
+
+    messages.success(request, f'Solicitud {solicitud.codigo} restaurada desde el archivo.')
+    return redirect('supervisor:lista_archivo')
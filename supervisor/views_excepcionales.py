@@ -96,7 +96,7 @@ def aprobar_excepcional(request, empresa_id):
         )
 
         # Enviar notificación por email
-        from notificaciones.services.email_service import EmailService
+        from notificaciones.services import despachar_notificacion
 
         # Obtener emails de admins de la empresa
         empresa_emails = [
@@ -113,7 +113,7 @@ def aprobar_excepcional(request, empresa_id):
                 'fecha_vencimiento': fecha_vencimiento if fecha_vencimiento else 'Indefinido',
             }
 
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='permiso_excepcional_aprobado',
                 contexto=contexto,
                 destinatarios_adicionales=empresa_emails,
@@ -167,7 +167,7 @@ def revocar_excepcional(request, empresa_id):
         )
 
         # Enviar notificación por email
-        from notificaciones.services.email_service import EmailService
+        from notificaciones.services import despachar_notificacion
 
         empresa_emails = [
             user.email for user in empresa.usuarios.filter(es_admin_empresa=True)
@@ -182,7 +182,7 @@ def revocar_excepcional(request, empresa_id):
                 'fecha_revocacion': timezone.now().strftime('%d/%m/%Y %H:%M'),
             }
 
-            EmailService.enviar_notificacion(
+            despachar_notificacion(
                 codigo_evento='permiso_excepcional_revocado',
                 contexto=contexto,
                 destinatarios_adicionales=empresa_emails,